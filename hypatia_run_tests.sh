@@ -28,7 +28,10 @@ bash run_integration_tests.sh || exit 1
 cd .. || exit 1
 
 # paper
-echo "Nothing to test for paper."
+echo "Running tests for paper..."
+cd paper/satellite_networks_state || exit 1
+python -m unittest discover -v -p "test_*.py" || exit 1
+cd ../.. || exit 1
 
 # Confirmation all tests were run
 echo ""
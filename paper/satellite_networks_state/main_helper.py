@@ -24,6 +24,22 @@ import sys
 sys.path.append("../../satgenpy")
 import satgen
 import os
+import state_cache
+
+# Basic ground station input per ground station selection
+GROUND_STATIONS_BASIC_FILENAMES = {
+    "ground_stations_top_100": "input_data/ground_stations_cities_sorted_by_estimated_2025_pop_top_100.basic.txt",
+    "ground_stations_paris_moscow_grid": "input_data/ground_stations_paris_moscow_grid.basic.txt",
+}
+
+# Static state files generated for each setting
+STATIC_STATE_FILENAMES = [
+    "ground_stations.txt",
+    "tles.txt",
+    "isls.txt",
+    "description.txt",
+    "gsl_interfaces_info.txt",
+]
 
 
 class MainHelper:
@@ -64,11 +80,14 @@ class MainHelper:
             isl_selection,            # isls_{none, plus_grid}
             gs_selection,             # ground_stations_{top_100, paris_moscow_grid}
             dynamic_state_algorithm,  # algorithm_{free_one_only_{gs_relays,_over_isls}, paired_many_only_over_isls}
-            num_threads
+            num_threads,
+            cache_dir=state_cache.DEFAULT_CACHE_DIR,  # Cache of generated state (None to disable)
+            cache_max_size_bytes=state_cache.DEFAULT_CACHE_MAX_SIZE_BYTES
     ):
 
         # Add base name to setting
         name = self.BASE_NAME + "_" + isl_selection + "_" + gs_selection + "_" + dynamic_state_algorithm
+        dynamic_state_dir_name = "dynamic_state_" + str(time_step_ms) + "ms_for_" + str(duration_s) + "s"
 
         # Create output directories
         if not os.path.isdir(output_generated_data_dir):
@@ -76,20 +95,38 @@ class MainHelper:
         if not os.path.isdir(output_generated_data_dir + "/" + name):
             os.makedirs(output_generated_data_dir + "/" + name, exist_ok=True)
 
+        if gs_selection not in GROUND_STATIONS_BASIC_FILENAMES:
+            raise ValueError("Unknown ground station selection: " + gs_selection)
+
+        # The static state files are generated again (and not overwritten in place, as they might be linked
+        # to the files of a cache entry)
+        for filename in STATIC_STATE_FILENAMES:
+            if os.path.lexists(output_generated_data_dir + "/" + name + "/" + filename):
+                os.remove(output_generated_data_dir + "/" + name + "/" + filename)
+
+        # All inputs which determine the output
+        key = None
+        if cache_dir is not None:
+            key = state_cache.cache_key({
+                "constellation": vars(self),
+                "isl_selection": isl_selection,
+                "gs_selection": gs_selection,
+                "ground_stations_basic": state_cache.file_hash(GROUND_STATIONS_BASIC_FILENAMES[gs_selection]),
+                "dynamic_state_algorithm": dynamic_state_algorithm,
+                "time_step_ms": time_step_ms,
+                "duration_s": duration_s,
+                "satgen_version": state_cache.satgen_version(satgen),
+            })
+            if state_cache.restore_from_cache(cache_dir, key, output_generated_data_dir + "/" + name):
+                print("Restored from cache: " + cache_dir + "/" + key)
+                return
+
         # Ground stations
         print("Generating ground stations...")
-        if gs_selection == "ground_stations_top_100":
-            satgen.extend_ground_stations(
-                "input_data/ground_stations_cities_sorted_by_estimated_2025_pop_top_100.basic.txt",
-                output_generated_data_dir + "/" + name + "/ground_stations.txt"
-            )
-        elif gs_selection == "ground_stations_paris_moscow_grid":
-            satgen.extend_ground_stations(
-                "input_data/ground_stations_paris_moscow_grid.basic.txt",
-                output_generated_data_dir + "/" + name + "/ground_stations.txt"
-            )
-        else:
-            raise ValueError("Unknown ground station selection: " + gs_selection)
+        satgen.extend_ground_stations(
+            GROUND_STATIONS_BASIC_FILENAMES[gs_selection],
+            output_generated_data_dir + "/" + name + "/ground_stations.txt"
+        )
 
         # TLEs
         print("Generating TLEs...")
@@ -166,3 +203,14 @@ class MainHelper:
             dynamic_state_algorithm,
             True
         )
+
+        # Cache
+        if cache_dir is not None:
+            print("Storing in cache: " + cache_dir + "/" + key)
+            state_cache.store_in_cache(
+                cache_dir,
+                key,
+                output_generated_data_dir + "/" + name,
+                STATIC_STATE_FILENAMES + [dynamic_state_dir_name],
+                cache_max_size_bytes
+            )
@@ -0,0 +1,193 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os
+import json
+import shutil
+import hashlib
+
+# Default location and disk quota of the cache
+DEFAULT_CACHE_DIR = "gen_data_cache"
+DEFAULT_CACHE_MAX_SIZE_BYTES = 100 * 1000 * 1000 * 1000
+
+
+def satgen_version(satgen_module):
+    """
+    Version of satgen as the hash of its source files, such that any change to it invalidates the cache.
+
+    :param satgen_module:  The satgen module
+
+    :return: Hexadecimal digest
+    """
+    satgen_dir = os.path.dirname(os.path.abspath(satgen_module.__file__))
+    digest = hashlib.sha256()
+    for root, dirs, files in os.walk(satgen_dir):
+        dirs.sort()
+        for filename in sorted(files):
+            if filename.endswith(".py"):
+                with open(os.path.join(root, filename), "rb") as f_in:
+                    digest.update(os.path.relpath(os.path.join(root, filename), satgen_dir).encode("utf-8"))
+                    digest.update(f_in.read())
+    return digest.hexdigest()
+
+
+def file_hash(filename):
+    """
+    :param filename:  Filename
+
+    :return: Hexadecimal digest of the file content
+    """
+    with open(filename, "rb") as f_in:
+        return hashlib.sha256(f_in.read()).hexdigest()
+
+
+def cache_key(settings):
+    """
+    :param settings:  Dictionary of all inputs which determine the output (JSON-serializable)
+
+    :return: Cache key (hexadecimal digest)
+    """
+    return hashlib.sha256(json.dumps(settings, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def link_or_copy(source_filename, target_filename):
+    """
+    Hard-link a file (replacing the target if it exists), or copy it if that is not possible.
+
+    :param source_filename:  Source filename
+    :param target_filename:  Target filename
+    """
+    if os.path.lexists(target_filename):
+        os.remove(target_filename)
+    try:
+        os.link(source_filename, target_filename)
+    except OSError:
+        shutil.copy2(source_filename, target_filename)
+
+
+def link_paths(source_dir, target_dir, relative_paths):
+    """
+    Link (or copy) files and directories (recursively) from a source to a target directory.
+    Target directories are replaced as a whole.
+
+    :param source_dir:      Source directory
+    :param target_dir:      Target directory
+    :param relative_paths:  Paths of the files and directories relative to the source directory
+    """
+    for relative_path in relative_paths:
+        source_path = os.path.join(source_dir, relative_path)
+        target_path = os.path.join(target_dir, relative_path)
+        if os.path.isdir(source_path):
+            if os.path.isdir(target_path):
+                shutil.rmtree(target_path)
+            os.makedirs(target_path)
+            link_paths(source_path, target_path, sorted(os.listdir(source_path)))
+        elif os.path.isfile(source_path):
+            os.makedirs(os.path.dirname(target_path), exist_ok=True)
+            link_or_copy(source_path, target_path)
+        else:
+            raise ValueError("Path to link does not exist: " + source_path)
+
+
+def entry_size_bytes(entry_dir):
+    """
+    :param entry_dir:  Directory of a cache entry
+
+    :return: Total size of its files (in bytes)
+    """
+    size_bytes = 0
+    for root, dirs, files in os.walk(entry_dir):
+        for filename in files:
+            size_bytes += os.path.getsize(os.path.join(root, filename))
+    return size_bytes
+
+
+def restore_from_cache(cache_dir, key, target_dir):
+    """
+    Link the files of a cache entry into the target directory, and mark it as most recently used.
+
+    :param cache_dir:   Cache directory
+    :param key:         Cache key
+    :param target_dir:  Target directory
+
+    :return: True iff the entry was in the cache
+    """
+    entry_dir = os.path.join(cache_dir, key)
+    if not os.path.isdir(entry_dir):
+        return False
+    link_paths(entry_dir, target_dir, sorted(os.listdir(entry_dir)))
+    os.utime(entry_dir)
+    return True
+
+
+def store_in_cache(cache_dir, key, source_dir, relative_paths, max_size_bytes):
+    """
+    Store files and directories of the source directory as cache entry (by linking them), after which
+    the least recently used entries are evicted until the cache is within its disk quota.
+
+    :param cache_dir:       Cache directory
+    :param key:             Cache key
+    :param source_dir:      Source directory
+    :param relative_paths:  Paths of the files and directories relative to the source directory
+    :param max_size_bytes:  Disk quota of the cache (in bytes)
+    """
+    entry_dir = os.path.join(cache_dir, key)
+    temp_entry_dir = entry_dir + ".tmp." + str(os.getpid())
+    if os.path.isdir(temp_entry_dir):
+        shutil.rmtree(temp_entry_dir)
+    os.makedirs(temp_entry_dir)
+    link_paths(source_dir, temp_entry_dir, relative_paths)
+
+    # Only complete entries are in the cache
+    if os.path.isdir(entry_dir):
+        shutil.rmtree(entry_dir)
+    os.rename(temp_entry_dir, entry_dir)
+
+    evict_least_recently_used(cache_dir, max_size_bytes, keep_key=key)
+
+
+def evict_least_recently_used(cache_dir, max_size_bytes, keep_key=None):
+    """
+    Remove the least recently used cache entries until their total size is within the disk quota.
+
+    :param cache_dir:       Cache directory
+    :param max_size_bytes:  Disk quota of the cache (in bytes)
+    :param keep_key:        Key of an entry which is never removed (e.g., the one just stored)
+
+    :return: Keys of the removed entries
+    """
+    entries = []
+    for key in os.listdir(cache_dir):
+        entry_dir = os.path.join(cache_dir, key)
+        if os.path.isdir(entry_dir) and ".tmp." not in key:
+            entries.append((os.path.getmtime(entry_dir), key, entry_size_bytes(entry_dir)))
+    entries.sort()
+    total_size_bytes = sum(size_bytes for _, _, size_bytes in entries)
+    removed_keys = []
+    for _, key, size_bytes in entries:
+        if total_size_bytes <= max_size_bytes:
+            break
+        if key != keep_key:
+            shutil.rmtree(os.path.join(cache_dir, key))
+            total_size_bytes -= size_bytes
+            removed_keys.append(key)
+    return removed_keys
@@ -0,0 +1,109 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os
+import unittest
+import exputil
+import state_cache
+
+
+class TestStateCache(unittest.TestCase):
+
+    def test_store_and_restore(self):
+        local_shell = exputil.LocalShell()
+        temp_dir = "temp_state_cache"
+        local_shell.make_full_dir(temp_dir + "/source/dynamic_state")
+        local_shell.write_file(temp_dir + "/source/tles.txt", "tles\n")
+        local_shell.write_file(temp_dir + "/source/dynamic_state/fstate_0.txt", "fstate\n")
+        local_shell.write_file(temp_dir + "/source/not_stored.txt", "other")
+
+        # Stored by linking, without leaving its temporary directory behind
+        state_cache.store_in_cache(temp_dir + "/cache", "a", temp_dir + "/source", ["tles.txt", "dynamic_state"], 1000)
+        self.assertEqual(os.listdir(temp_dir + "/cache"), ["a"])
+        self.assertEqual(sorted(os.listdir(temp_dir + "/cache/a")), ["dynamic_state", "tles.txt"])
+        self.assertTrue(os.path.samefile(temp_dir + "/source/tles.txt", temp_dir + "/cache/a/tles.txt"))
+
+        # Restored by linking, with the same content
+        self.assertTrue(state_cache.restore_from_cache(temp_dir + "/cache", "a", temp_dir + "/target"))
+        self.assertEqual(sorted(os.listdir(temp_dir + "/target")), ["dynamic_state", "tles.txt"])
+        for filename in ["/tles.txt", "/dynamic_state/fstate_0.txt"]:
+            self.assertEqual(
+                local_shell.read_file(temp_dir + "/target" + filename),
+                local_shell.read_file(temp_dir + "/source" + filename)
+            )
+        self.assertTrue(os.path.samefile(temp_dir + "/cache/a/tles.txt", temp_dir + "/target/tles.txt"))
+        self.assertTrue(os.path.samefile(
+            temp_dir + "/cache/a/dynamic_state/fstate_0.txt", temp_dir + "/target/dynamic_state/fstate_0.txt"
+        ))
+
+        # Storing the same key again replaces the entry
+        local_shell.write_file(temp_dir + "/source/tles.txt", "other tles\n")
+        state_cache.store_in_cache(temp_dir + "/cache", "a", temp_dir + "/source", ["tles.txt"], 1000)
+        self.assertEqual(os.listdir(temp_dir + "/cache"), ["a"])
+        self.assertEqual(os.listdir(temp_dir + "/cache/a"), ["tles.txt"])
+        self.assertEqual(
+            local_shell.read_file(temp_dir + "/cache/a/tles.txt"), local_shell.read_file(temp_dir + "/source/tles.txt")
+        )
+
+        # Not in the cache
+        self.assertFalse(state_cache.restore_from_cache(temp_dir + "/cache", "b", temp_dir + "/target_b"))
+        self.assertFalse(os.path.exists(temp_dir + "/target_b"))
+
+        # Paths to store must exist
+        try:
+            state_cache.store_in_cache(temp_dir + "/cache", "c", temp_dir + "/source", ["does_not_exist.txt"], 1000)
+            self.fail()
+        except ValueError:
+            self.assertTrue(True)
+
+        local_shell.remove_force_recursive(temp_dir)
+
+    def test_evict_least_recently_used(self):
+        local_shell = exputil.LocalShell()
+        temp_dir = "temp_state_cache_eviction"
+        local_shell.make_full_dir(temp_dir + "/source")
+        local_shell.write_file(temp_dir + "/source/state.txt", "x" * 99)  # With its newline 100 bytes
+
+        # Three entries of 100 bytes, stored (i.e., last used) in the order a, b, c
+        for i, key in enumerate(["a", "b", "c"]):
+            state_cache.store_in_cache(temp_dir + "/cache", key, temp_dir + "/source", ["state.txt"], 1000)
+            os.utime(temp_dir + "/cache/" + key, (1000 + i, 1000 + i))
+
+        # Within the quota nothing is removed
+        self.assertEqual(state_cache.evict_least_recently_used(temp_dir + "/cache", 300), [])
+
+        # Restoring an entry makes it the most recently used
+        self.assertTrue(state_cache.restore_from_cache(temp_dir + "/cache", "a", temp_dir + "/target"))
+        self.assertEqual(state_cache.evict_least_recently_used(temp_dir + "/cache", 250), ["b"])
+        self.assertEqual(sorted(os.listdir(temp_dir + "/cache")), ["a", "c"])
+
+        # The entry to keep is never removed, even if it alone exceeds the quota
+        self.assertEqual(state_cache.evict_least_recently_used(temp_dir + "/cache", 0, keep_key="c"), ["a"])
+        self.assertEqual(os.listdir(temp_dir + "/cache"), ["c"])
+
+        # Storing evicts the least recently used other entries, but not the one just stored
+        state_cache.store_in_cache(temp_dir + "/cache", "d", temp_dir + "/source", ["state.txt"], 150)
+        self.assertEqual(os.listdir(temp_dir + "/cache"), ["d"])
+        state_cache.store_in_cache(temp_dir + "/cache", "e", temp_dir + "/source", ["state.txt"], 50)
+        self.assertEqual(os.listdir(temp_dir + "/cache"), ["e"])
+
+        local_shell.remove_force_recursive(temp_dir)
@@ -6,3 +6,5 @@ from .dynamic_state import *
 from .description import *
 from .post_analysis import *
 from .distance_tools import *
+from .positions import *
+from .benchmark import *
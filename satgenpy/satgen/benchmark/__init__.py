@@ -0,0 +1,13 @@
+from .benchmark_constellations import (
+    BENCHMARK_CONSTELLATIONS,
+    generate_benchmark_ground_stations_basic,
+    generate_benchmark_network
+)
+from .benchmark_dynamic_state import (
+    BENCHMARK_ALGORITHMS,
+    run_benchmark,
+    run_benchmark_case,
+    write_benchmark,
+    read_benchmark,
+    print_benchmark_comparison
+)
@@ -0,0 +1,202 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import math
+from satgen.tles import generate_tles_from_scratch_manual
+from satgen.isls import generate_plus_grid_isls, generate_empty_isls
+from satgen.ground_stations import extend_ground_stations
+from satgen.description import generate_description
+from satgen.interfaces import generate_simple_gsl_interfaces_info
+
+# WGS72 value; taken from https://geographiclib.sourceforge.io/html/NET/NETGeographicLib_8h_source.html
+EARTH_RADIUS = 6378135.0
+
+
+def max_isl_length_m(altitude_m):
+    """
+    :param altitude_m:  Altitude of the satellites (m)
+
+    :return: Maximum ISL length (m), such that ISLs do not dip below 80 km altitude
+    """
+    return 2 * math.sqrt(math.pow(EARTH_RADIUS + altitude_m, 2) - math.pow(EARTH_RADIUS + 80000, 2))
+
+
+def max_gsl_length_m(altitude_m, satellite_cone_radius_m):
+    """
+    :param altitude_m:               Altitude of the satellites (m)
+    :param satellite_cone_radius_m:  Radius of the coverage cone of a satellite on the ground (m)
+
+    :return: Maximum GSL length (m)
+    """
+    return math.sqrt(math.pow(satellite_cone_radius_m, 2) + math.pow(altitude_m, 2))
+
+
+# Constellations of paper/satellite_networks_state (the 25x25 is generated instead of its legacy TLEs)
+BENCHMARK_CONSTELLATIONS = {
+    "25x25": {
+        "nice_name": "25x25",
+        "num_orbs": 25,
+        "num_sats_per_orb": 25,
+        "phase_diff": False,
+        "inclination_degree": 53.0,
+        "eccentricity": 0.0000001,
+        "arg_of_perigee_degree": 0.0,
+        "mean_motion_rev_per_day": 15.05527065,
+        "isl_shift": 1,
+        "max_gsl_length_m": 1089686,
+        "max_isl_length_m": 1000000000,
+    },
+    "kuiper_630": {
+        "nice_name": "Kuiper-630",
+        "num_orbs": 34,
+        "num_sats_per_orb": 34,
+        "phase_diff": True,
+        "inclination_degree": 51.9,
+        "eccentricity": 0.0000001,
+        "arg_of_perigee_degree": 0.0,
+        "mean_motion_rev_per_day": 14.80,
+        "isl_shift": 0,
+        "max_gsl_length_m": max_gsl_length_m(630000, 630000 / math.tan(math.radians(30.0))),
+        "max_isl_length_m": max_isl_length_m(630000),
+    },
+    "starlink_550": {
+        "nice_name": "Starlink-550",
+        "num_orbs": 72,
+        "num_sats_per_orb": 22,
+        "phase_diff": True,
+        "inclination_degree": 53,
+        "eccentricity": 0.0000001,
+        "arg_of_perigee_degree": 0.0,
+        "mean_motion_rev_per_day": 15.19,
+        "isl_shift": 0,
+        "max_gsl_length_m": max_gsl_length_m(550000, 940700),
+        "max_isl_length_m": max_isl_length_m(550000),
+    },
+    "telesat_1015": {
+        "nice_name": "Telesat-1015",
+        "num_orbs": 27,
+        "num_sats_per_orb": 13,
+        "phase_diff": True,
+        "inclination_degree": 98.98,
+        "eccentricity": 0.0000001,
+        "arg_of_perigee_degree": 0.0,
+        "mean_motion_rev_per_day": 13.66,
+        "isl_shift": 0,
+        "max_gsl_length_m": max_gsl_length_m(1015000, 1015000 / math.tan(math.radians(10.0))),
+        "max_isl_length_m": max_isl_length_m(1015000),
+    },
+}
+
+
+def generate_benchmark_ground_stations_basic(filename_ground_stations_basic_out, num_ground_stations,
+                                             max_abs_latitude_degree=50.0):
+    """
+    Generate ground stations spread evenly over the latitudes up to the maximum (a Fibonacci lattice),
+    such that a set of any size covers the same area.
+
+    :param filename_ground_stations_basic_out:  Output filename (ground_stations.basic.txt)
+    :param num_ground_stations:                 Number of ground stations
+    :param max_abs_latitude_degree:             Maximum absolute latitude (degrees)
+    """
+    golden_angle_degree = 180.0 * (3.0 - math.sqrt(5.0))
+    with open(filename_ground_stations_basic_out, "w+") as f_out:
+        for gid in range(num_ground_stations):
+            z = (2.0 * (gid + 0.5) / num_ground_stations - 1.0) * math.sin(math.radians(max_abs_latitude_degree))
+            latitude = math.degrees(math.asin(z))
+            longitude = (gid * golden_angle_degree) % 360.0 - 180.0
+            f_out.write("%d,Station-%d,%.6f,%.6f,0.0\n" % (gid, gid, latitude, longitude))
+
+
+def generate_benchmark_network(satellite_network_dir, constellation, num_ground_stations, dynamic_state_algorithm):
+    """
+    Generate the input files of a satellite network for a benchmark, like paper/satellite_networks_state does
+    (only ground station relays without ISLs, else +Grid ISLs).
+
+    :param satellite_network_dir:    Satellite network directory (is created)
+    :param constellation:            Constellation name (in BENCHMARK_CONSTELLATIONS)
+    :param num_ground_stations:      Number of ground stations
+    :param dynamic_state_algorithm:  Dynamic state algorithm (determines the ISLs and GSL interfaces)
+
+    :return: Constellation parameters (dictionary, see BENCHMARK_CONSTELLATIONS)
+    """
+    if constellation not in BENCHMARK_CONSTELLATIONS:
+        raise ValueError("Unknown benchmark constellation: " + str(constellation))
+    params = BENCHMARK_CONSTELLATIONS[constellation]
+    num_satellites = params["num_orbs"] * params["num_sats_per_orb"]
+
+    generate_benchmark_ground_stations_basic(
+        satellite_network_dir + "/ground_stations.basic.txt", num_ground_stations
+    )
+    extend_ground_stations(
+        satellite_network_dir + "/ground_stations.basic.txt",
+        satellite_network_dir + "/ground_stations.txt"
+    )
+    generate_tles_from_scratch_manual(
+        satellite_network_dir + "/tles.txt",
+        params["nice_name"],
+        params["num_orbs"],
+        params["num_sats_per_orb"],
+        params["phase_diff"],
+        params["inclination_degree"],
+        params["eccentricity"],
+        params["arg_of_perigee_degree"],
+        params["mean_motion_rev_per_day"]
+    )
+    if dynamic_state_algorithm == "algorithm_free_one_only_gs_relays":
+        generate_empty_isls(satellite_network_dir + "/isls.txt")
+    else:
+        generate_plus_grid_isls(
+            satellite_network_dir + "/isls.txt",
+            params["num_orbs"],
+            params["num_sats_per_orb"],
+            isl_shift=params["isl_shift"],
+            idx_offset=0
+        )
+    generate_description(
+        satellite_network_dir + "/description.txt",
+        params["max_gsl_length_m"],
+        params["max_isl_length_m"]
+    )
+
+    # Algorithms with multiple GSL interfaces per satellite have one for each ground station
+    # (for the free one, each with the bandwidth of a ground station interface)
+    agg_max_bandwidth_satellite = 1
+    if dynamic_state_algorithm in ("algorithm_free_one_only_gs_relays", "algorithm_free_one_only_over_isls"):
+        gsl_interfaces_per_satellite = 1
+    elif dynamic_state_algorithm == "algorithm_free_gs_one_sat_many_only_over_isls":
+        gsl_interfaces_per_satellite = num_ground_stations
+        agg_max_bandwidth_satellite = num_ground_stations
+    elif dynamic_state_algorithm == "algorithm_paired_many_only_over_isls":
+        gsl_interfaces_per_satellite = num_ground_stations
+    else:
+        raise ValueError("Unknown dynamic state algorithm: " + str(dynamic_state_algorithm))
+    generate_simple_gsl_interfaces_info(
+        satellite_network_dir + "/gsl_interfaces_info.txt",
+        num_satellites,
+        num_ground_stations,
+        gsl_interfaces_per_satellite,
+        1,
+        agg_max_bandwidth_satellite,
+        1
+    )
+
+    return params
@@ -0,0 +1,292 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os
+import sys
+import time
+import json
+import platform
+import tempfile
+import contextlib
+import multiprocessing
+import numpy as np
+import scipy
+from satgen.tles import read_tles
+from satgen.isls import read_isls
+from satgen.ground_stations import read_ground_stations_extended
+from satgen.interfaces import read_gsl_interfaces_info
+from satgen.dynamic_state import generate_dynamic_state, read_timings
+from satgen.dynamic_state.phase_timing import PHASES, COUNTS
+from .benchmark_constellations import BENCHMARK_CONSTELLATIONS, generate_benchmark_network
+
+BENCHMARK_ALGORITHMS = [
+    "algorithm_free_one_only_over_isls",
+    "algorithm_free_one_only_gs_relays",
+    "algorithm_free_gs_one_sat_many_only_over_isls",
+    "algorithm_paired_many_only_over_isls"
+]
+
+
+def peak_rss_bytes():
+    """
+    :return: Peak resident set size of this process (bytes)
+    """
+    import resource  # (only available on Unix)
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss if sys.platform == "darwin" else max_rss * 1024  # (macOS reports bytes, Linux kilobytes)
+
+
+def run_benchmark_case(case):
+    """
+    Run one benchmark case: generate its satellite network, and then its dynamic state with timings.
+    It is meant to run in its own process, such that the peak RSS is only of this case.
+
+    :param case:  Case (dictionary with the constellation, num_ground_stations, dynamic_state_algorithm,
+                  duration_s, time_step_ms, shortest_path_backend, position_engine and repetition)
+
+    :return: Result (dictionary with the case, the time steps per second, peak RSS and time per phase)
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        satellite_network_dir = temp_dir + "/network"
+        output_dynamic_state_dir = temp_dir + "/dynamic_state"
+        os.makedirs(satellite_network_dir)
+        os.makedirs(output_dynamic_state_dir)
+
+        # Input
+        start = time.perf_counter()
+        params = generate_benchmark_network(
+            satellite_network_dir, case["constellation"], case["num_ground_stations"], case["dynamic_state_algorithm"]
+        )
+        tles = read_tles(satellite_network_dir + "/tles.txt")
+        satellites = tles["satellites"]
+        ground_stations = read_ground_stations_extended(satellite_network_dir + "/ground_stations.txt")
+        list_isls = read_isls(satellite_network_dir + "/isls.txt", len(satellites))
+        list_gsl_interfaces_info = read_gsl_interfaces_info(
+            satellite_network_dir + "/gsl_interfaces_info.txt", len(satellites), len(ground_stations)
+        )
+        setup_s = time.perf_counter() - start
+
+        # Dynamic state (its progress is not printed)
+        num_time_steps = int(case["duration_s"] * 1000 / case["time_step_ms"])
+        start = time.perf_counter()
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            generate_dynamic_state(
+                output_dynamic_state_dir,
+                tles["epoch"],
+                case["duration_s"] * 1000 * 1000 * 1000,
+                case["time_step_ms"] * 1000 * 1000,
+                0,
+                satellites,
+                ground_stations,
+                list_isls,
+                list_gsl_interfaces_info,
+                params["max_gsl_length_m"],
+                params["max_isl_length_m"],
+                case["dynamic_state_algorithm"],
+                False,
+                position_engine=case["position_engine"],
+                shortest_path_backend=case["shortest_path_backend"],
+                timings_filename=temp_dir + "/timings.csv"
+            )
+        wall_s = time.perf_counter() - start
+
+        records = read_timings(temp_dir + "/timings.csv")
+        output_bytes = sum(
+            os.path.getsize(output_dynamic_state_dir + "/" + f) for f in os.listdir(output_dynamic_state_dir)
+        )
+
+    result = dict(case)
+    result.update({
+        "num_satellites": len(satellites),
+        "num_time_steps": num_time_steps,
+        "setup_s": setup_s,
+        "wall_s": wall_s,
+        "time_steps_per_s": num_time_steps / wall_s if wall_s > 0 else float("inf"),
+        "peak_rss_bytes": peak_rss_bytes(),
+        "output_bytes": output_bytes,
+        "phases_s": {phase: sum(map(lambda r: r[phase + "_s"], records)) for phase in PHASES},
+        "counts": {name: sum(map(lambda r: r[name], records)) for name in COUNTS},
+    })
+    return result
+
+
+def benchmark_environment():
+    """
+    :return: Description of the environment the benchmark ran in (dictionary)
+    """
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "scipy": scipy.__version__,
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def run_benchmark(
+        constellations,
+        ground_station_counts,
+        dynamic_state_algorithms,
+        duration_s,
+        time_step_ms,
+        shortest_path_backend="restricted_dijkstra",
+        position_engine="ephem",
+        num_repetitions=1,
+        progress=True
+):
+    """
+    Run the benchmark cases of all combinations, each in a newly started process.
+
+    :param constellations:            Constellation names (in BENCHMARK_CONSTELLATIONS)
+    :param ground_station_counts:     Numbers of ground stations
+    :param dynamic_state_algorithms:  Dynamic state algorithms (in BENCHMARK_ALGORITHMS)
+    :param duration_s:                Duration (s)
+    :param time_step_ms:              Time step (ms)
+    :param shortest_path_backend:     Shortest path backend
+    :param position_engine:           Position engine
+    :param num_repetitions:           Number of times each case is run
+    :param progress:                  Print each result
+
+    :return: Benchmark (dictionary with the environment and a list of results)
+    """
+    for constellation in constellations:
+        if constellation not in BENCHMARK_CONSTELLATIONS:
+            raise ValueError("Unknown benchmark constellation: " + str(constellation))
+    for dynamic_state_algorithm in dynamic_state_algorithms:
+        if dynamic_state_algorithm not in BENCHMARK_ALGORITHMS:
+            raise ValueError("Unknown dynamic state algorithm: " + str(dynamic_state_algorithm))
+    if (duration_s * 1000) % time_step_ms != 0:
+        raise ValueError("Duration must be a multiple of the time step")
+
+    cases = []
+    for constellation in constellations:
+        for num_ground_stations in ground_station_counts:
+            for dynamic_state_algorithm in dynamic_state_algorithms:
+                for repetition in range(num_repetitions):
+                    cases.append({
+                        "constellation": constellation,
+                        "num_ground_stations": num_ground_stations,
+                        "dynamic_state_algorithm": dynamic_state_algorithm,
+                        "duration_s": duration_s,
+                        "time_step_ms": time_step_ms,
+                        "shortest_path_backend": shortest_path_backend,
+                        "position_engine": position_engine,
+                        "repetition": repetition,
+                    })
+
+    # Each case in a new process (its peak RSS is then only of that case)
+    results = []
+    pool = multiprocessing.get_context("spawn").Pool(1, maxtasksperchild=1)
+    try:
+        for result in pool.imap(run_benchmark_case, cases, chunksize=1):
+            if progress:
+                print_benchmark_result(result)
+            results.append(result)
+    finally:
+        pool.close()
+        pool.join()
+
+    return {
+        "environment": benchmark_environment(),
+        "results": results
+    }
+
+
+def print_benchmark_result(result):
+    """
+    :param result:  Result of a benchmark case
+    """
+    print("%-13s %5d GSs  %-46s %8.2f steps/s  %7.1f MB  (%s)" % (
+        result["constellation"],
+        result["num_ground_stations"],
+        result["dynamic_state_algorithm"],
+        result["time_steps_per_s"],
+        result["peak_rss_bytes"] / 1e6,
+        ", ".join(map(lambda p: "%s %.2fs" % (p, result["phases_s"][p]), PHASES))
+    ))
+
+
+def write_benchmark(output_filename, benchmark):
+    """
+    :param output_filename:  Output filename (JSON)
+    :param benchmark:        Benchmark (from run_benchmark())
+    """
+    with open(output_filename, "w+") as f_out:
+        json.dump(benchmark, f_out, indent=4, sort_keys=True)
+        f_out.write("\n")
+
+
+def read_benchmark(filename):
+    """
+    :param filename:  Benchmark filename (JSON, written by write_benchmark())
+
+    :return: Benchmark (dictionary with the environment and a list of results)
+    """
+    with open(filename, "r") as f_in:
+        return json.load(f_in)
+
+
+def benchmark_case_key(result):
+    """
+    :param result:  Result of a benchmark case
+
+    :return: Key identifying the case (without the repetition)
+    """
+    return (
+        result["constellation"],
+        result["num_ground_stations"],
+        result["dynamic_state_algorithm"],
+        result["duration_s"],
+        result["time_step_ms"],
+        result["shortest_path_backend"],
+        result["position_engine"]
+    )
+
+
+def print_benchmark_comparison(baseline, benchmark):
+    """
+    Print for each case in both benchmarks the speed-up of the time steps per second (of the fastest repetition)
+    and the change of the peak RSS.
+
+    :param baseline:   Baseline benchmark (from run_benchmark() or read_benchmark())
+    :param benchmark:  Benchmark to compare to it
+    """
+    def fastest(results):
+        by_key = {}
+        for result in results:
+            key = benchmark_case_key(result)
+            if key not in by_key or result["time_steps_per_s"] > by_key[key]["time_steps_per_s"]:
+                by_key[key] = result
+        return by_key
+
+    baseline_by_key = fastest(baseline["results"])
+    for key, result in sorted(fastest(benchmark["results"]).items()):
+        if key in baseline_by_key:
+            print("%-13s %5d GSs  %-46s  speed-up x%.2f  peak RSS %+.1f MB" % (
+                key[0],
+                key[1],
+                key[2],
+                result["time_steps_per_s"] / baseline_by_key[key]["time_steps_per_s"],
+                (result["peak_rss_bytes"] - baseline_by_key[key]["peak_rss_bytes"]) / 1e6
+            ))
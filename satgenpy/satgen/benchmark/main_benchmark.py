@@ -0,0 +1,58 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import sys
+from .benchmark_constellations import BENCHMARK_CONSTELLATIONS
+from .benchmark_dynamic_state import BENCHMARK_ALGORITHMS, run_benchmark, write_benchmark, read_benchmark, \
+    print_benchmark_comparison
+
+
+def main():
+    args = sys.argv[1:]
+    if len(args) != 7 and len(args) != 8:
+        print("Must supply seven or eight arguments")
+        print("Usage: python -m satgen.benchmark.main_benchmark [output_filename.json] [duration_s] [time_step_ms] "
+              "[constellations: all or comma-separated {" + ", ".join(BENCHMARK_CONSTELLATIONS.keys()) + "}] "
+              "[ground station counts: comma-separated] "
+              "[algorithms: all or comma-separated] "
+              "[shortest_path_backend] "
+              "[optional: baseline_filename.json to compare to]")
+        exit(1)
+    else:
+        constellations = list(BENCHMARK_CONSTELLATIONS.keys()) if args[3] == "all" else args[3].split(",")
+        algorithms = BENCHMARK_ALGORITHMS if args[5] == "all" else args[5].split(",")
+        benchmark = run_benchmark(
+            constellations,
+            list(map(int, args[4].split(","))),
+            algorithms,
+            int(args[1]),
+            int(args[2]),
+            shortest_path_backend=args[6]
+        )
+        write_benchmark(args[0], benchmark)
+        print("Benchmark written to: " + args[0])
+        if len(args) == 8:
+            print_benchmark_comparison(read_benchmark(args[7]), benchmark)
+
+
+if __name__ == "__main__":
+    main()
@@ -31,8 +31,8 @@ def distance_m_between_satellites(sat1, sat2, epoch_str, date_str):
 
     :param sat1:       The first satellite
     :param sat2:       The other satellite
-    :param epoch_str:  Epoch time of the observer (string)
-    :param date_str:   The time instant when the distance should be measured (string)
+    :param epoch_str:  Epoch time of the observer (string, or ephem date float e.g. from TimeGrid)
+    :param date_str:   The time instant when the distance should be measured (string, or ephem date float)
 
     :return: The distance between the satellites in meters
     """
@@ -70,8 +70,8 @@ def distance_m_ground_station_to_satellite(ground_station, satellite, epoch_str,
 
     :param ground_station:  The ground station
     :param satellite:       The satellite
-    :param epoch_str:       Epoch time of the observer (ground station) (string)
-    :param date_str:        The time instant when the distance should be measured (string)
+    :param epoch_str:       Epoch time of the observer (ground station) (string, or ephem date float)
+    :param date_str:        The time instant when the distance should be measured (string, or ephem date float)
 
     :return: The distance between the ground station and the satellite in meters
     """
@@ -143,8 +143,8 @@ def create_basic_ground_station_for_satellite_shadow(satellite, epoch_str, date_
     Calculate the (latitude, longitude) of the satellite shadow on the Earth and creates a ground station there.
 
     :param satellite:   Satellite
-    :param epoch_str:   Epoch (string)
-    :param date_str:    Time moment (string)
+    :param epoch_str:   Epoch (string, or ephem date float)
+    :param date_str:    Time moment (string, or ephem date float)
 
     :return: Basic ground station
     """
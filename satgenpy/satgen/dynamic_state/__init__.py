@@ -4,3 +4,30 @@ from .helper_dynamic_state import (
 from .generate_dynamic_state import (
     generate_dynamic_state
 )
+from .forwarding_state import (
+    ForwardingState
+)
+from .sat_net_graph import (
+    SatNetGraph
+)
+from .constellation_graph import (
+    ConstellationGraph
+)
+from .constellation_snapshot import (
+    ConstellationSnapshot,
+    create_constellation_snapshot,
+    attach_constellation_snapshot
+)
+from .resume_dynamic_state import (
+    num_complete_time_steps,
+    replay_fstate
+)
+from .phase_timing import (
+    PhaseTimer,
+    read_timings,
+    write_timings
+)
+from .stream_dynamic_state import (
+    DynamicStateAtTime,
+    iterate_dynamic_state
+)
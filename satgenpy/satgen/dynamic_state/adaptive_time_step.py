@@ -0,0 +1,164 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os
+import numpy as np
+from .state_writer import atomic_output_file, write_fstate_delta, write_gsl_if_bandwidth_delta
+
+
+def same_dynamic_state(output, other_output):
+    """
+    :param output:        Output of a dynamic state algorithm at a time step
+    :param other_output:  Output of the same dynamic state algorithm at another time step
+
+    :return: True iff the forwarding state and the GSL interface bandwidth state (if any) are the same
+    """
+    if output["fstate"] != other_output["fstate"]:
+        return False
+    if "gsl_if_bandwidth_state" in output:
+        return np.array_equal(output["gsl_if_bandwidth_state"], other_output["gsl_if_bandwidth_state"])
+    return True
+
+
+def write_dynamic_state_delta(output_dynamic_state_dir, time_since_epoch_ns, output, prev_output):
+    """
+    (Re-)write the delta files of a time step against the given previous output. The GSL interface bandwidth
+    file is only re-written if the algorithm outputs its bandwidth state (otherwise it does not depend on the
+    previous output).
+
+    :param output_dynamic_state_dir:  Output directory of the dynamic state
+    :param time_since_epoch_ns:       Time since epoch (ns) of the time step
+    :param output:                    Output of the dynamic state algorithm at the time step
+    :param prev_output:               Output of the dynamic state algorithm at the previous time step
+    """
+    write_fstate_delta(
+        output_dynamic_state_dir + "/fstate_" + str(time_since_epoch_ns) + ".txt",
+        output["fstate"],
+        prev_output["fstate"]
+    )
+    if "gsl_if_bandwidth_state" in output:
+        write_gsl_if_bandwidth_delta(
+            output_dynamic_state_dir + "/gsl_if_bandwidth_" + str(time_since_epoch_ns) + ".txt",
+            output["gsl_if_node_ids"],
+            output["gsl_if_ids"],
+            output["gsl_if_bandwidth_state"],
+            prev_output["gsl_if_bandwidth_state"]
+        )
+
+
+def write_empty_delta(output_dynamic_state_dir, time_since_epoch_ns):
+    """
+    Write the (empty) delta files of a time step at which nothing changed.
+
+    :param output_dynamic_state_dir:  Output directory of the dynamic state
+    :param time_since_epoch_ns:       Time since epoch (ns) of the time step
+    """
+    for prefix in ["/fstate_", "/gsl_if_bandwidth_"]:
+        with atomic_output_file(output_dynamic_state_dir + prefix + str(time_since_epoch_ns) + ".txt"):
+            pass
+
+
+def generate_adaptive(output_dynamic_state_dir, times_ns, coarse_num_steps, calculate_at, progress=None,
+                      prev_output=None, changes_between=None):
+    """
+    Generate the dynamic state at every time step, but only calculate it on a coarse grid of every
+    <coarse_num_steps> time steps. Where two consecutive coarse states differ, the interval is bisected until
+    every change is pinned down to the time step at which it happens. All time steps which are not calculated
+    get empty delta files.
+
+    The output is the same as calculating every time step, as long as the dynamic state does not change and
+    then change back within one coarse step (in which case the change is not noticed). Intervals in which the
+    network is known to change (e.g., a satellite coming into or going out of range of a ground station, as given
+    by changes_between) are bisected as well, even if the states at their ends are the same. A change of the
+    routes which reverts within one coarse step without such a network change is still not noticed. Time steps
+    which are not calculated are also not checked (e.g., for ISLs exceeding their maximum length).
+
+    :param output_dynamic_state_dir:  Output directory of the dynamic state
+    :param times_ns:                  Time steps (ns since epoch), in increasing order
+    :param coarse_num_steps:          Number of time steps per coarse step (at least 1)
+    :param calculate_at:              Function (time index, previous output) -> output, which calculates the
+                                      dynamic state at a time step and writes its delta files
+                                      against the previous output (None if there is none)
+    :param progress:                  Function (time index) -> None called before each coarse step (optional)
+    :param prev_output:               Output of the time step before the first one (None if there is none)
+    :param changes_between:           Function (time index, later time index) -> True iff the network changes
+                                      at a time strictly in between the two time steps (optional)
+
+    :return: Number of time steps which were calculated
+    """
+    if coarse_num_steps < 1:
+        raise ValueError("Number of time steps per coarse step must be at least 1")
+    if len(times_ns) == 0:
+        return 0
+
+    # The first time step is always calculated
+    outputs = {0: calculate_at(0, prev_output)}
+    num_calculated = 1
+    start = 0
+    while start < len(times_ns) - 1:
+        end = min(start + coarse_num_steps, len(times_ns) - 1)
+        if progress is not None:
+            progress(start)
+
+        # Each calculated time step has as previous output the one of the closest calculated time step before it
+        # at the moment of calculation. If that is not the time step right before it, its forwarding state delta
+        # is only provisional: it is removed (such that the time step is not complete, in case the generation is
+        # interrupted and resumed) and written again at the end
+        prev_calculated = {}
+
+        def calculate(idx, prev_idx):
+            outputs[idx] = calculate_at(idx, outputs[prev_idx])
+            prev_calculated[idx] = prev_idx
+            if prev_idx != idx - 1:
+                os.remove(output_dynamic_state_dir + "/fstate_" + str(times_ns[idx]) + ".txt")
+
+        calculate(end, start)
+        num_calculated += 1
+
+        # Bisect all intervals whose end states differ, until they are one time step long
+        intervals = [(start, end)]
+        while len(intervals) > 0:
+            (a, b) = intervals.pop()
+            if b - a > 1 and (not same_dynamic_state(outputs[a], outputs[b])
+                              or (changes_between is not None and changes_between(a, b))):
+                mid = (a + b) // 2
+                calculate(mid, a)
+                num_calculated += 1
+                intervals.append((mid, b))
+                intervals.append((a, mid))
+
+        # The state only changes at calculated time steps, so the previous time step of each has the state of
+        # the calculated time step before it
+        last = start
+        for idx in range(start + 1, end + 1):
+            if idx in outputs:
+                if prev_calculated[idx] != idx - 1:
+                    write_dynamic_state_delta(output_dynamic_state_dir, times_ns[idx], outputs[idx], outputs[last])
+                last = idx
+            else:
+                write_empty_delta(output_dynamic_state_dir, times_ns[idx])
+
+        # Only the state at the end of the coarse step is needed further on
+        outputs = {end: outputs[end]}
+        start = end
+
+    return num_calculated
@@ -20,7 +20,10 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import numpy as np
 from .fstate_calculation import *
+from .state_writer import dynamic_state_filename, write_gsl_if_bandwidth_delta
+from .phase_timing import lap, count
 
 
 def algorithm_free_gs_one_sat_many_only_over_isls(
@@ -34,7 +37,9 @@ def algorithm_free_gs_one_sat_many_only_over_isls(
         sat_neighbor_to_if,
         list_gsl_interfaces_info,
         prev_output,
-        enable_verbose_logs
+        enable_verbose_logs,
+        shortest_path_backend="floyd_warshall",
+        phase_timer=None  # PhaseTimer, to record the time spent in each phase
 ):
     """
     FREE GROUND STATION (ONE) SATELLITE (MANY) OVER INTER-SATELLITE LINKS ALGORITHM
@@ -92,29 +97,41 @@ def algorithm_free_gs_one_sat_many_only_over_isls(
     #
 
     # There is one GSL interface per ground station, and <# of GSs> interfaces per satellite
-    output_filename = output_dynamic_state_dir + "/gsl_if_bandwidth_" + str(time_since_epoch_ns) + ".txt"
-    if enable_verbose_logs:
-        print("  > Writing interface bandwidth state to: " + output_filename)
-    with open(output_filename, "w+") as f_out:
-        if time_since_epoch_ns == 0:
-
-            # Satellite have <# of GSs> interfaces besides their ISL interfaces
-            for node_id in range(len(satellites)):
-                for i in range(list_gsl_interfaces_info[node_id]["number_of_interfaces"]):
-                    f_out.write("%d,%d,%f\n" % (
-                        node_id,
-                        num_isls_per_sat[node_id] + i,
-                        list_gsl_interfaces_info[node_id]["aggregate_max_bandwidth"]
-                        / float(list_gsl_interfaces_info[node_id]["number_of_interfaces"])
-                    ))
-
-            # Ground stations have one GSL interface: 0
-            for node_id in range(len(satellites), len(satellites) + len(ground_stations)):
-                f_out.write("%d,%d,%f\n" % (
-                    node_id,
-                    0,
-                    list_gsl_interfaces_info[node_id]["aggregate_max_bandwidth"]
-                 ))
+    output_filename = dynamic_state_filename(output_dynamic_state_dir, "gsl_if_bandwidth", time_since_epoch_ns)
+    if enable_verbose_logs and output_filename is not None:
+        print("  > Writing interface bandwidth state to: " + str(output_filename))
+    # (it never changes, so it is only written at the start)
+    if time_since_epoch_ns == 0:
+
+        # Satellite have <# of GSs> interfaces besides their ISL interfaces, which share the bandwidth
+        num_interfaces = np.array(list(map(
+            lambda node_id: list_gsl_interfaces_info[node_id]["number_of_interfaces"], range(len(satellites))
+        )), dtype=int)
+        aggregate_max_bandwidth = np.array(list(map(
+            lambda node_id: list_gsl_interfaces_info[node_id]["aggregate_max_bandwidth"], range(len(satellites))
+        )), dtype=float)
+        sat_node_ids = np.repeat(np.arange(len(satellites)), num_interfaces)
+        first_interface = np.cumsum(num_interfaces) - num_interfaces
+        sat_gsl_if_idx = np.arange(len(sat_node_ids)) - np.repeat(first_interface, num_interfaces)
+        sat_if_ids = np.array(num_isls_per_sat, dtype=int)[sat_node_ids] + sat_gsl_if_idx
+        sat_bandwidths = aggregate_max_bandwidth[sat_node_ids] / num_interfaces[sat_node_ids].astype(float)
+
+        # Ground stations have one GSL interface: 0
+        gs_node_ids = np.arange(len(satellites), len(satellites) + len(ground_stations))
+        gs_bandwidths = list(map(
+            lambda node_id: list_gsl_interfaces_info[node_id]["aggregate_max_bandwidth"], gs_node_ids.tolist()
+        ))
+
+        lap(phase_timer, "other")
+        count(phase_timer, "gsl_if_bandwidth_delta_lines", write_gsl_if_bandwidth_delta(
+            output_filename,
+            np.concatenate((sat_node_ids, gs_node_ids)),
+            np.concatenate((sat_if_ids, np.zeros(len(ground_stations), dtype=int))),
+            np.concatenate((sat_bandwidths, np.array(gs_bandwidths, dtype=float)))
+        ))
+    else:
+        write_gsl_if_bandwidth_delta(output_filename, [], [], [])
+    lap(phase_timer, "file_writing")
 
     #################################
     # FORWARDING STATE
@@ -142,7 +159,9 @@ def algorithm_free_gs_one_sat_many_only_over_isls(
         ground_station_satellites_in_range,
         sat_neighbor_to_if,
         prev_fstate,
-        enable_verbose_logs
+        enable_verbose_logs,
+        shortest_path_backend,
+        phase_timer
     )
 
     if enable_verbose_logs:
@@ -20,7 +20,10 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import numpy as np
 from .fstate_calculation import *
+from .state_writer import dynamic_state_filename, write_gsl_if_bandwidth_delta
+from .phase_timing import lap, count
 
 
 def algorithm_free_one_only_over_isls(
@@ -34,7 +37,9 @@ def algorithm_free_one_only_over_isls(
         sat_neighbor_to_if,
         list_gsl_interfaces_info,
         prev_output,
-        enable_verbose_logs
+        enable_verbose_logs,
+        shortest_path_backend="floyd_warshall",
+        phase_timer=None  # PhaseTimer, to record the time spent in each phase
 ):
     """
     FREE-ONE ONLY OVER INTER-SATELLITE LINKS ALGORITHM
@@ -71,18 +76,22 @@ def algorithm_free_one_only_over_isls(
     #
 
     # There is only one GSL interface for each node (pre-condition), which as-such will get the entire bandwidth
-    output_filename = output_dynamic_state_dir + "/gsl_if_bandwidth_" + str(time_since_epoch_ns) + ".txt"
-    if enable_verbose_logs:
-        print("  > Writing interface bandwidth state to: " + output_filename)
-    with open(output_filename, "w+") as f_out:
-        if time_since_epoch_ns == 0:
-            for node_id in range(len(satellites)):
-                f_out.write("%d,%d,%f\n"
-                            % (node_id, num_isls_per_sat[node_id],
-                               list_gsl_interfaces_info[node_id]["aggregate_max_bandwidth"]))
-            for node_id in range(len(satellites), len(satellites) + len(ground_stations)):
-                f_out.write("%d,%d,%f\n"
-                            % (node_id, 0, list_gsl_interfaces_info[node_id]["aggregate_max_bandwidth"]))
+    output_filename = dynamic_state_filename(output_dynamic_state_dir, "gsl_if_bandwidth", time_since_epoch_ns)
+    if enable_verbose_logs and output_filename is not None:
+        print("  > Writing interface bandwidth state to: " + str(output_filename))
+    # (it never changes, so it is only written at the start)
+    lap(phase_timer, "other")
+    if time_since_epoch_ns == 0:
+        num_nodes = len(satellites) + len(ground_stations)
+        count(phase_timer, "gsl_if_bandwidth_delta_lines", write_gsl_if_bandwidth_delta(
+            output_filename,
+            np.arange(num_nodes),
+            np.concatenate((np.array(num_isls_per_sat, dtype=int), np.zeros(len(ground_stations), dtype=int))),
+            list(map(lambda node_id: list_gsl_interfaces_info[node_id]["aggregate_max_bandwidth"], range(num_nodes)))
+        ))
+    else:
+        write_gsl_if_bandwidth_delta(output_filename, [], [], [])
+    lap(phase_timer, "file_writing")
 
     #################################
     # FORWARDING STATE
@@ -108,7 +117,9 @@ def algorithm_free_one_only_over_isls(
         ground_station_satellites_in_range,
         sat_neighbor_to_if,
         prev_fstate,
-        enable_verbose_logs
+        enable_verbose_logs,
+        shortest_path_backend,
+        phase_timer
     )
 
     if enable_verbose_logs:
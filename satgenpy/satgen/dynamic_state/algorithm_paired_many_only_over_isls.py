@@ -20,7 +20,10 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import numpy as np
 from .fstate_calculation import *
+from .state_writer import dynamic_state_filename, write_gsl_if_bandwidth_delta
+from .phase_timing import lap, count
 
 
 def algorithm_paired_many_only_over_isls(
@@ -34,7 +37,9 @@ def algorithm_paired_many_only_over_isls(
         sat_neighbor_to_if,
         list_gsl_interfaces_info,
         prev_output,
-        enable_verbose_logs
+        enable_verbose_logs,
+        shortest_path_backend="floyd_warshall",
+        phase_timer=None  # PhaseTimer, to record the time spent in each phase
 ):
     """
     PAIRED-MANY ONLY OVER INTER-SATELLITE LINKS ALGORITHM
@@ -91,6 +96,7 @@ def algorithm_paired_many_only_over_isls(
 
     # Go over each ground station
     ground_station_satellites_in_range_select_one_at_most = []
+    paired_satellite_id = np.full(len(ground_stations), -1, dtype=int)
     for gid in range(len(ground_stations)):
 
         # Find the closest satellite
@@ -107,48 +113,39 @@ def algorithm_paired_many_only_over_isls(
         else:
             ground_station_satellites_in_range_select_one_at_most.append([(best_distance_m, chosen_sid)])
             satellite_gsl_ifs_paired[chosen_sid].append(gid)
+            paired_satellite_id[gid] = chosen_sid
 
     ##################################################
     # Determine the new GSL interface bandwidth state
     #
 
-    # Bandwidth state
-    gsl_if_bandwidth_state = {}
-
-    # For the satellite
-    for sid in range(len(satellites)):
-
-        # The paired GSL interfaces share the total bandwidth
-        # The other ones are not in use, but still need to flush out existing packets
-        satellite_frequency_chosen = len(satellite_gsl_ifs_paired[sid])
-        for gsl_if_idx in range(len(ground_stations)):
-
-            # If it is paired, it gets its fair share
-            if gsl_if_idx in satellite_gsl_ifs_paired[sid]:
-                gsl_if_bandwidth_state[(sid, num_isls_per_sat[sid] + gsl_if_idx)] = (
-                        1.0 / float(satellite_frequency_chosen)
-                )
+    # How many ground stations are paired to each satellite
+    satellite_frequency_chosen = np.array(list(map(len, satellite_gsl_ifs_paired)), dtype=float)
+    fair_share = np.divide(
+        1.0, satellite_frequency_chosen, out=np.ones(len(satellites)), where=satellite_frequency_chosen > 0
+    )
 
-            # Else, it get the full bandwidth to get rid of the packets in it (it can also be kept, but then
-            # you cannot parallelize this generation process)
-            else:
-                gsl_if_bandwidth_state[(sid, num_isls_per_sat[sid] + gsl_if_idx)] = 1.0
+    # For the satellite (<number of ground stations> GSL interfaces, in order of satellite)
+    # The paired GSL interfaces share the total bandwidth (they get their fair share)
+    # The other ones are not in use, but still need to flush out existing packets: they get the full bandwidth
+    # (it can also be kept, but then you cannot parallelize this generation process)
+    is_paired = paired_satellite_id[np.newaxis, :] == np.arange(len(satellites))[:, np.newaxis]
+    sat_bandwidths = np.where(is_paired, fair_share[:, np.newaxis], 1.0)
 
     # For the ground stations, the same principle applies
-    for gid in range(len(ground_stations)):
-
-        # Check if it is paired
-        if len(ground_station_satellites_in_range_select_one_at_most[gid]) == 1:
-
-            # Find the satellite it is paired to, and then only get its fair share
-            paired_satellite_id = ground_station_satellites_in_range_select_one_at_most[gid][0][1]
-            satellite_frequency_chosen = len(satellite_gsl_ifs_paired[paired_satellite_id])
-            gsl_if_bandwidth_state[(len(satellites) + gid, 0)] = 1.0 / float(satellite_frequency_chosen)
-
-        # If not paired, flush out the packets (it can also be kept, but then
-        # you cannot parallelize this generation process)
-        else:
-            gsl_if_bandwidth_state[(len(satellites) + gid, 0)] = 1.0
+    # (if not paired, it gets the full bandwidth to flush out the packets)
+    gs_bandwidths = np.where(paired_satellite_id >= 0, fair_share[np.maximum(paired_satellite_id, 0)], 1.0)
+
+    # Bandwidth state of every GSL interface (satellites, then ground stations)
+    gsl_if_node_ids = np.concatenate((
+        np.repeat(np.arange(len(satellites)), len(ground_stations)),
+        np.arange(len(satellites), len(satellites) + len(ground_stations))
+    ))
+    gsl_if_ids = np.concatenate((
+        (np.array(num_isls_per_sat, dtype=int)[:, np.newaxis] + np.arange(len(ground_stations))[np.newaxis, :]).ravel(),
+        np.zeros(len(ground_stations), dtype=int)
+    ))
+    gsl_if_bandwidth_state = np.concatenate((sat_bandwidths.ravel(), gs_bandwidths))
 
     ######################################################
     # Write the new GSL interface bandwidth state (delta)
@@ -159,22 +156,18 @@ def algorithm_paired_many_only_over_isls(
     if prev_output is not None:
         prev_gsl_if_bandwidth_state = prev_output["gsl_if_bandwidth_state"]
 
-    output_filename = output_dynamic_state_dir + "/gsl_if_bandwidth_" + str(time_since_epoch_ns) + ".txt"
-    print("  > Writing interface bandwidth state to: " + output_filename)
-    with open(output_filename, "w+") as f_out:
-        for (node_id, if_id) in gsl_if_bandwidth_state:
-
-            # Only delta if have previous bandwidth state
-            if (
-                    prev_gsl_if_bandwidth_state is None
-                    or
-                    prev_gsl_if_bandwidth_state[(node_id, if_id)] != gsl_if_bandwidth_state[(node_id, if_id)]
-            ):
-                f_out.write("%d,%d,%f\n" % (
-                    node_id,
-                    if_id,
-                    gsl_if_bandwidth_state[(node_id, if_id)]
-                ))
+    output_filename = dynamic_state_filename(output_dynamic_state_dir, "gsl_if_bandwidth", time_since_epoch_ns)
+    if output_filename is not None:
+        print("  > Writing interface bandwidth state to: " + str(output_filename))
+    lap(phase_timer, "other")
+    count(phase_timer, "gsl_if_bandwidth_delta_lines", write_gsl_if_bandwidth_delta(
+        output_filename,
+        gsl_if_node_ids,
+        gsl_if_ids,
+        gsl_if_bandwidth_state,
+        prev_gsl_if_bandwidth_state
+    ))
+    lap(phase_timer, "file_writing")
 
     #################################
 
@@ -202,12 +195,16 @@ def algorithm_paired_many_only_over_isls(
         ground_station_satellites_in_range_select_one_at_most,
         sat_neighbor_to_if,
         prev_fstate,
-        enable_verbose_logs
+        enable_verbose_logs,
+        shortest_path_backend,
+        phase_timer
     )
 
     print("")
 
     return {
         "fstate": fstate,
-        "gsl_if_bandwidth_state": gsl_if_bandwidth_state
+        "gsl_if_bandwidth_state": gsl_if_bandwidth_state,
+        "gsl_if_node_ids": gsl_if_node_ids,
+        "gsl_if_ids": gsl_if_ids
     }
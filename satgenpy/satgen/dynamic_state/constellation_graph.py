@@ -0,0 +1,109 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import numpy as np
+from .sat_net_graph import SatNetGraph, edge_order, graph_from_edges
+
+
+class ConstellationGraph:
+    """
+    Topology of the constellation which does not change during a run: the ISLs (and their interfaces) are
+    indexed once in CSR form, after which the graph of each time step only needs its ISL lengths as weights.
+    The GSLs change every time step, and form a separate graph.
+    """
+
+    def __init__(self, num_satellites, num_ground_stations, list_isls):
+        """
+        :param num_satellites:       Number of satellites
+        :param num_ground_stations:  Number of ground stations
+        :param list_isls:            List of ISLs (a, b)
+        """
+        self.num_satellites = num_satellites
+        self.num_ground_stations = num_ground_stations
+        self.list_isls = list_isls
+
+        # Interface mapping of ISLs (each satellite numbers its ISL interfaces in order of the ISLs)
+        self.num_isls_per_sat = [0] * num_satellites
+        self.sat_neighbor_to_if = {}
+        for (a, b) in list_isls:
+            self.sat_neighbor_to_if[(a, b)] = self.num_isls_per_sat[a]
+            self.sat_neighbor_to_if[(b, a)] = self.num_isls_per_sat[b]
+            self.num_isls_per_sat[a] += 1
+            self.num_isls_per_sat[b] += 1
+
+        # Fixed CSR index of the ISLs, with the interfaces at both sides
+        self.isl_offsets, self.isl_neighbors, self.isl_idx = edge_order(
+            num_satellites,
+            list(map(lambda isl: isl[0], list_isls)),
+            list(map(lambda isl: isl[1], list_isls))
+        )
+        sources = np.repeat(np.arange(num_satellites), np.diff(self.isl_offsets))
+        self.isl_interfaces = np.array(list(map(
+            lambda pair: self.sat_neighbor_to_if[pair], zip(sources.tolist(), self.isl_neighbors.tolist())
+        )), dtype=int)
+        self.isl_neighbor_interfaces = np.array(list(map(
+            lambda pair: self.sat_neighbor_to_if[pair], zip(self.isl_neighbors.tolist(), sources.tolist())
+        )), dtype=int)
+
+    def isl_graph(self, isl_lengths_m):
+        """
+        Graph of only the satellites with their ISLs.
+
+        :param isl_lengths_m:  Length of each ISL (in the order of list_isls)
+
+        :return: SatNetGraph
+        """
+        return SatNetGraph(
+            self.num_satellites,
+            self.isl_offsets,
+            self.isl_neighbors,
+            np.asarray(isl_lengths_m, dtype=float)[self.isl_idx],
+            self.isl_interfaces,
+            self.isl_neighbor_interfaces
+        )
+
+    def gsl_graph(self, ground_station_satellites_in_range):
+        """
+        Graph of the satellites and ground stations with only the GSLs.
+
+        :param ground_station_satellites_in_range:  For each ground station a list of (distance, sid) in range
+
+        :return: SatNetGraph
+        """
+        gsl_gids = []
+        gsl_sids = []
+        gsl_lengths_m = []
+        for gid, satellites_in_range in enumerate(ground_station_satellites_in_range):
+            gsl_gids.extend([gid] * len(satellites_in_range))
+            gsl_sids.extend(map(lambda b: b[1], satellites_in_range))
+            gsl_lengths_m.extend(map(lambda b: b[0], satellites_in_range))
+        graph = graph_from_edges(
+            self.num_satellites + self.num_ground_stations,
+            gsl_sids,
+            self.num_satellites + np.array(gsl_gids, dtype=int),
+            gsl_lengths_m
+        )
+
+        # None of the edges is an ISL
+        graph.interfaces = np.full(len(graph.neighbors_array), -1, dtype=int)
+        graph.neighbor_interfaces = graph.interfaces
+        return graph
@@ -0,0 +1,267 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os
+import sys
+import math
+import ephem
+import multiprocessing
+import numpy as np
+from multiprocessing import shared_memory, resource_tracker
+from satgen.tles import read_tles
+from satgen.isls import read_isls
+from satgen.ground_stations import read_ground_stations_extended
+from satgen.interfaces import read_gsl_interfaces_info
+
+# Orbital elements of an ephem satellite in the snapshot (angles are stored in degrees, as they are set,
+# and the last one is the integer orbit number)
+SATELLITE_ELEMENTS = ["_epoch", "_inc", "_raan", "_e", "_ap", "_M", "_n", "_decay", "_drag", "_orbit"]
+SATELLITE_ANGLE_ELEMENTS = ["_inc", "_raan", "_ap", "_M"]
+
+
+class ConstellationSnapshot:
+    """
+    Read-only snapshot of the inputs of a satellite network (satellite orbital elements, ground stations,
+    ISLs and GSL interfaces) as numeric arrays in a single block of shared memory. It is created once from
+    the files, after which workers (also in other processes) attach to it using its descriptor without parsing
+    or copying. Each worker only creates its own ephem satellites (which have mutable state) from the elements.
+    """
+
+    def __init__(self, shm, layout, metadata, owner):
+        """
+        Use create_constellation_snapshot() or attach_constellation_snapshot() instead.
+
+        :param shm:       SharedMemory block
+        :param layout:    List of (array name, dtype, shape, offset in the block)
+        :param metadata:  Dictionary of the scalar values (epoch, n_orbits, n_sats_per_orbit)
+        :param owner:     True iff this is the snapshot which created (and as such should unlink) the block
+        """
+        self.shm = shm
+        self.layout = layout
+        self.metadata = metadata
+        self.owner = owner
+        self.arrays = {}
+        for (key, dtype, shape, offset) in layout:
+            array = np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset)
+            array.flags.writeable = False
+            self.arrays[key] = array
+        self.epoch = metadata["epoch"]
+        self.n_orbits = metadata["n_orbits"]
+        self.n_sats_per_orbit = metadata["n_sats_per_orbit"]
+
+    def descriptor(self):
+        """
+        :return: Small descriptor with which another worker can attach (see attach_constellation_snapshot())
+        """
+        return self.shm.name, self.layout, self.metadata, os.getpid()
+
+    def num_satellites(self):
+        return self.arrays["satellite_elements"].shape[0]
+
+    def num_ground_stations(self):
+        return self.arrays["ground_station_values"].shape[0]
+
+    def satellites(self):
+        """
+        :return: List of new ephem satellites, the same as read_tles() reads
+        """
+        satellites = []
+        elements = self.arrays["satellite_elements"].tolist()
+        names = self.arrays["satellite_names"].tolist()
+        catalog_numbers = self.arrays["satellite_catalog_numbers"].tolist()
+        for sid in range(self.num_satellites()):
+            satellite = ephem.EarthSatellite()
+            satellite.name = names[sid].decode("utf-8")
+            satellite.catalog_number = catalog_numbers[sid]
+            satellite._epoch = ephem.Date(elements[sid][0])
+            for i in range(1, len(SATELLITE_ELEMENTS) - 1):
+                setattr(satellite, SATELLITE_ELEMENTS[i], elements[sid][i])
+            satellite._orbit = int(elements[sid][-1])
+            satellites.append(satellite)
+        return satellites
+
+    def ground_stations(self):
+        """
+        :return: List of ground stations, the same as read_ground_stations_extended() reads
+        """
+        ground_stations = []
+        names = self.arrays["ground_station_names"].tolist()
+        latitudes = self.arrays["ground_station_latitudes"].tolist()
+        longitudes = self.arrays["ground_station_longitudes"].tolist()
+        values = self.arrays["ground_station_values"].tolist()
+        for gid in range(self.num_ground_stations()):
+            ground_stations.append({
+                "gid": gid,
+                "name": names[gid].decode("utf-8"),
+                "latitude_degrees_str": latitudes[gid].decode("utf-8"),
+                "longitude_degrees_str": longitudes[gid].decode("utf-8"),
+                "elevation_m_float": values[gid][0],
+                "cartesian_x": values[gid][1],
+                "cartesian_y": values[gid][2],
+                "cartesian_z": values[gid][3],
+            })
+        return ground_stations
+
+    def list_isls(self):
+        """
+        :return: List of ISLs (a, b), the same as read_isls() reads
+        """
+        return list(map(tuple, self.arrays["isls"].tolist()))
+
+    def list_gsl_interfaces_info(self):
+        """
+        :return: GSL interface information of each node, the same as read_gsl_interfaces_info() reads
+        """
+        return list(map(
+            lambda info: {"number_of_interfaces": info[0], "aggregate_max_bandwidth": info[1]},
+            zip(
+                self.arrays["gsl_number_of_interfaces"].tolist(),
+                self.arrays["gsl_aggregate_max_bandwidth"].tolist()
+            )
+        ))
+
+    def close(self):
+        """
+        Detach from the shared memory (and if this is the snapshot which created it, also free it).
+        """
+        self.arrays = {}
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def encoded_strings(strings):
+    """
+    :param strings:  List of strings
+
+    :return: Numpy array of fixed-width UTF-8 encoded bytes
+    """
+    encoded = list(map(lambda s: s.encode("utf-8"), strings))
+    return np.array(encoded, dtype="S" + str(max([1] + list(map(len, encoded)))))
+
+
+def create_constellation_snapshot(satellite_network_dir):
+    """
+    Read the inputs of a satellite network once, and place them in shared memory.
+
+    :param satellite_network_dir:  Satellite network directory (with tles.txt, isls.txt, ground_stations.txt and
+                                   gsl_interfaces_info.txt)
+
+    :return: ConstellationSnapshot (which must be closed by the caller when all workers are done)
+    """
+    tles = read_tles(satellite_network_dir + "/tles.txt")
+    satellites = tles["satellites"]
+    ground_stations = read_ground_stations_extended(satellite_network_dir + "/ground_stations.txt")
+    list_isls = read_isls(satellite_network_dir + "/isls.txt", len(satellites))
+    list_gsl_interfaces_info = read_gsl_interfaces_info(
+        satellite_network_dir + "/gsl_interfaces_info.txt",
+        len(satellites),
+        len(ground_stations)
+    )
+
+    # All as numeric (or fixed-width bytes) arrays
+    arrays = {
+        "satellite_elements": np.array(list(map(
+            lambda satellite: list(map(
+                lambda element: math.degrees(float(getattr(satellite, element)))
+                if element in SATELLITE_ANGLE_ELEMENTS else float(getattr(satellite, element)),
+                SATELLITE_ELEMENTS
+            )),
+            satellites
+        )), dtype=float).reshape((len(satellites), len(SATELLITE_ELEMENTS))),
+        "satellite_names": encoded_strings(list(map(lambda satellite: satellite.name, satellites))),
+        "satellite_catalog_numbers": np.array(list(map(lambda s: s.catalog_number, satellites)), dtype=np.int64),
+        "ground_station_names": encoded_strings(list(map(lambda gs: gs["name"], ground_stations))),
+        "ground_station_latitudes": encoded_strings(list(map(
+            lambda gs: gs["latitude_degrees_str"], ground_stations
+        ))),
+        "ground_station_longitudes": encoded_strings(list(map(
+            lambda gs: gs["longitude_degrees_str"], ground_stations
+        ))),
+        "ground_station_values": np.array(list(map(
+            lambda gs: [gs["elevation_m_float"], gs["cartesian_x"], gs["cartesian_y"], gs["cartesian_z"]],
+            ground_stations
+        )), dtype=float).reshape((len(ground_stations), 4)),
+        "isls": np.array(list_isls, dtype=np.int64).reshape((len(list_isls), 2)),
+        "gsl_number_of_interfaces": np.array(list(map(
+            lambda info: info["number_of_interfaces"], list_gsl_interfaces_info
+        )), dtype=np.int64),
+        "gsl_aggregate_max_bandwidth": np.array(list(map(
+            lambda info: info["aggregate_max_bandwidth"], list_gsl_interfaces_info
+        )), dtype=float),
+    }
+
+    # Layout in a single block (each array aligned to 8 bytes)
+    layout = []
+    size = 0
+    for key, array in arrays.items():
+        layout.append((key, array.dtype.str, array.shape, size))
+        size += int(math.ceil(array.nbytes / 8.0)) * 8
+    shm = shared_memory.SharedMemory(create=True, size=max(1, size))
+    for (key, dtype, shape, offset) in layout:
+        np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset)[...] = arrays[key]
+
+    return ConstellationSnapshot(shm, layout, {
+        "epoch": tles["epoch"],
+        "n_orbits": tles["n_orbits"],
+        "n_sats_per_orbit": tles["n_sats_per_orbit"]
+    }, True)
+
+
+def attach_constellation_snapshot(descriptor):
+    """
+    Attach to a constellation snapshot created by another worker.
+
+    :param descriptor:  Descriptor of the snapshot (ConstellationSnapshot.descriptor())
+
+    :return: ConstellationSnapshot (which must be closed when done)
+    """
+    (name, layout, metadata, creator_pid) = descriptor
+    if os.getpid() == creator_pid:
+        shm = shared_memory.SharedMemory(name=name)
+    else:
+        shm = attach_untracked_shared_memory(name, creator_pid)
+    return ConstellationSnapshot(shm, layout, metadata, False)
+
+
+def attach_untracked_shared_memory(name, creator_pid):
+    """
+    Attach to shared memory created by another process, without it remaining registered by this process
+    with the resource tracker, which would otherwise free it when this process exits (if it has its own
+    resource tracker). From Python 3.13 on, it is attached untracked. Before, attaching always registers it,
+    after which the registration is removed again. A worker started by the creator (e.g., in a process pool)
+    shares the resource tracker of the creator though, which keeps one registration per name: registering
+    again has no effect, and removing it would remove the registration of the creator, so it is kept.
+    Nothing global is modified, such that it can be called concurrently by multiple threads.
+
+    :param name:         Name of the shared memory
+    :param creator_pid:  Process identifier of the creator
+
+    :return: SharedMemory
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    shm = shared_memory.SharedMemory(name=name)
+    parent = multiprocessing.parent_process()
+    if parent is None or parent.pid != creator_pid:
+        resource_tracker.unregister(shm._name, "shared_memory")
+    return shm
@@ -0,0 +1,135 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import numpy as np
+
+
+class ForwardingState:
+    """
+    Forwarding state of every node (satellites, then ground stations) towards every ground station.
+
+    It is stored as an int32 array of shape (number of nodes, number of ground stations, 3), holding for each
+    (current node, destination ground station) the (next-hop node id, own interface id, next-hop interface id),
+    or (-1, -1, -1) if it is dropped. It can be used as the dictionary (current node id, destination node id)
+    -> (next hop, own interface, next-hop interface) which was used before, which contains every pair except
+    a ground station to itself.
+    """
+
+    __slots__ = ("num_satellites", "num_ground_stations", "num_nodes", "next_hops")
+
+    def __init__(self, num_satellites, num_ground_stations, next_hops=None):
+        """
+        :param num_satellites:       Number of satellites
+        :param num_ground_stations:  Number of ground stations
+        :param next_hops:            Array of shape (number of nodes, number of ground stations, 3)
+                                     (if None, every entry is dropped)
+        """
+        self.num_satellites = num_satellites
+        self.num_ground_stations = num_ground_stations
+        self.num_nodes = num_satellites + num_ground_stations
+        if next_hops is None:
+            self.next_hops = np.full((self.num_nodes, num_ground_stations, 3), -1, dtype=np.int32)
+        else:
+            self.next_hops = np.asarray(next_hops, dtype=np.int32)
+            if self.next_hops.shape != (self.num_nodes, num_ground_stations, 3):
+                raise ValueError("Next hops array has shape " + str(self.next_hops.shape)
+                                 + " instead of " + str((self.num_nodes, num_ground_stations, 3)))
+
+    def _index(self, key):
+        curr, dst = key
+        dst_gid = dst - self.num_satellites
+        if not (0 <= curr < self.num_nodes and 0 <= dst_gid < self.num_ground_stations and curr != dst):
+            raise KeyError(key)
+        return curr, dst_gid
+
+    def __getitem__(self, key):
+        curr, dst_gid = self._index(key)
+        next_hop = self.next_hops[curr, dst_gid]
+        return int(next_hop[0]), int(next_hop[1]), int(next_hop[2])
+
+    def __setitem__(self, key, next_hop_decision):
+        curr, dst_gid = self._index(key)
+        self.next_hops[curr, dst_gid] = next_hop_decision
+
+    def __contains__(self, key):
+        try:
+            self._index(key)
+            return True
+        except (KeyError, TypeError, ValueError):
+            return False
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def __len__(self):
+        return self.num_nodes * self.num_ground_stations - self.num_ground_stations
+
+    def keys(self):
+        for curr in range(self.num_nodes):
+            for dst_gid in range(self.num_ground_stations):
+                if curr != self.num_satellites + dst_gid:
+                    yield curr, self.num_satellites + dst_gid
+
+    def __iter__(self):
+        return self.keys()
+
+    def values(self):
+        for key in self.keys():
+            yield self[key]
+
+    def items(self):
+        for key in self.keys():
+            yield key, self[key]
+
+    def next_hop(self, curr, dst):
+        """
+        :param curr:  Current node id
+        :param dst:   Destination ground station node id
+
+        :return: Next-hop node id (-1 if dropped)
+        """
+        return int(self.next_hops[self._index((curr, dst))][0])
+
+    def __eq__(self, other):
+        if isinstance(other, ForwardingState):
+            return (
+                self.num_satellites == other.num_satellites
+                and self.num_ground_stations == other.num_ground_stations
+                and np.array_equal(self._without_self_loops(), other._without_self_loops())
+            )
+        elif isinstance(other, dict):
+            return len(other) == len(self) and all(key in other and other[key] == value for key, value in self.items())
+        return NotImplemented
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    def _without_self_loops(self):
+        next_hops = self.next_hops.copy()
+        gids = np.arange(self.num_ground_stations)
+        next_hops[self.num_satellites + gids, gids] = -1
+        return next_hops
+
+    def __repr__(self):
+        return ("ForwardingState(num_satellites=" + str(self.num_satellites)
+                + ", num_ground_stations=" + str(self.num_ground_stations) + ")")
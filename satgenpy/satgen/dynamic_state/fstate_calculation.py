@@ -1,5 +1,21 @@
-import math
-import networkx as nx
+import numpy as np
+from .forwarding_state import ForwardingState
+from .shortest_paths import calculate_shortest_path_distances
+from .next_hop_selection import (
+    padded_neighbors,
+    padded_candidates,
+    padded_neighbor_interfaces,
+    select_via_candidates,
+    select_next_hops,
+    fill_fstate_without_gs_relaying,
+    fill_fstate_with_gs_relaying
+)
+from .state_writer import dynamic_state_filename, write_fstate_delta
+from .phase_timing import lap, count
+from .fstate_reverse_dijkstra import (
+    calculate_fstate_reverse_dijkstra_without_gs_relaying,
+    calculate_fstate_reverse_dijkstra_with_gs_relaying
+)
 
 
 def calculate_fstate_shortest_path_without_gs_relaying(
@@ -13,141 +29,83 @@ def calculate_fstate_shortest_path_without_gs_relaying(
         ground_station_satellites_in_range_candidates,
         sat_neighbor_to_if,
         prev_fstate,
-        enable_verbose_logs
+        enable_verbose_logs,
+        shortest_path_backend="floyd_warshall",  # Options: "floyd_warshall" (networkx), "dijkstra", "johnson",
+                                                 #          "restricted_dijkstra", "reverse_dijkstra"
+        phase_timer=None  # PhaseTimer, to record the time spent in each phase
 ):
 
+    # One reverse shortest path tree per destination ground station directly yields the next hops
+    if shortest_path_backend == "reverse_dijkstra":
+        return calculate_fstate_reverse_dijkstra_without_gs_relaying(
+            output_dynamic_state_dir,
+            time_since_epoch_ns,
+            num_satellites,
+            num_ground_stations,
+            sat_net_graph_only_satellites_with_isls,
+            num_isls_per_sat,
+            gid_to_sat_gsl_if_idx,
+            ground_station_satellites_in_range_candidates,
+            sat_neighbor_to_if,
+            prev_fstate,
+            enable_verbose_logs,
+            phase_timer
+        )
+
     # Calculate shortest path distances
     if enable_verbose_logs:
-        print("  > Calculating Floyd-Warshall for graph without ground-station relays")
-    # (Note: Numpy has a deprecation warning here because of how networkx uses matrices)
-    dist_sat_net_without_gs = nx.floyd_warshall_numpy(sat_net_graph_only_satellites_with_isls)
+        print("  > Calculating shortest paths (" + shortest_path_backend + ") for graph without ground-station relays")
+    # (only the distances to satellites in range of a ground station are ever used)
+    dist_sat_net_without_gs = calculate_shortest_path_distances(
+        sat_net_graph_only_satellites_with_isls,
+        shortest_path_backend,
+        destinations=list(set(
+            b[1] for candidates in ground_station_satellites_in_range_candidates for b in candidates
+        ))
+    )
+    lap(phase_timer, "shortest_paths")
+
+    # Satellites to ground stations
+    # From the satellites attached to the destination ground station,
+    # select the one which promises the shortest path to the destination ground station (getting there + last hop)
+    candidate_sids, candidate_distances = padded_candidates(ground_station_satellites_in_range_candidates)
+    dst_sat, dist_satellite_to_ground_station = select_via_candidates(
+        dist_sat_net_without_gs[:num_satellites], candidate_sids, candidate_distances
+    )
+
+    # If the current node is not that satellite, among its neighbors,
+    # find the one which promises the lowest distance to reach the destination satellite
+    neighbors, weights = padded_neighbors(sat_net_graph_only_satellites_with_isls, num_satellites)
+    next_hop_idx = select_next_hops(dist_sat_net_without_gs, neighbors, weights, dst_sat)
+
+    # Ground stations to ground stations
+    # Choose the source satellite which promises the shortest path
+    src_sat = select_via_candidates(dist_satellite_to_ground_station.T, candidate_sids, candidate_distances)[0].T
 
     # Forwarding state
-    fstate = {}
-
-    # Now write state to file for complete graph
-    output_filename = output_dynamic_state_dir + "/fstate_" + str(time_since_epoch_ns) + ".txt"
-    if enable_verbose_logs:
-        print("  > Writing forwarding state to: " + output_filename)
-    with open(output_filename, "w+") as f_out:
-
-        # Satellites to ground stations
-        # From the satellites attached to the destination ground station,
-        # select the one which promises the shortest path to the destination ground station (getting there + last hop)
-        dist_satellite_to_ground_station = {}
-        for curr in range(num_satellites):
-            for dst_gid in range(num_ground_stations):
-                dst_gs_node_id = num_satellites + dst_gid
-
-                # Among the satellites in range of the destination ground station,
-                # find the one which promises the shortest distance
-                possible_dst_sats = ground_station_satellites_in_range_candidates[dst_gid]
-                possibilities = []
-                for b in possible_dst_sats:
-                    if not math.isinf(dist_sat_net_without_gs[(curr, b[1])]):  # Must be reachable
-                        possibilities.append(
-                            (
-                                dist_sat_net_without_gs[(curr, b[1])] + b[0],
-                                b[1]
-                            )
-                        )
-                possibilities = list(sorted(possibilities))
-
-                # By default, if there is no satellite in range for the
-                # destination ground station, it will be dropped (indicated by -1)
-                next_hop_decision = (-1, -1, -1)
-                distance_to_ground_station_m = float("inf")
-                if len(possibilities) > 0:
-                    dst_sat = possibilities[0][1]
-                    distance_to_ground_station_m = possibilities[0][0]
-
-                    # If the current node is not that satellite, determine how to get to the satellite
-                    if curr != dst_sat:
-
-                        # Among its neighbors, find the one which promises the
-                        # lowest distance to reach the destination satellite
-                        best_distance_m = 1000000000000000
-                        for neighbor_id in sat_net_graph_only_satellites_with_isls.neighbors(curr):
-                            distance_m = (
-                                    sat_net_graph_only_satellites_with_isls.edges[(curr, neighbor_id)]["weight"]
-                                    +
-                                    dist_sat_net_without_gs[(neighbor_id, dst_sat)]
-                            )
-                            if distance_m < best_distance_m:
-                                next_hop_decision = (
-                                    neighbor_id,
-                                    sat_neighbor_to_if[(curr, neighbor_id)],
-                                    sat_neighbor_to_if[(neighbor_id, curr)]
-                                )
-                                best_distance_m = distance_m
-
-                    else:
-                        # This is the destination satellite, as such the next hop is the ground station itself
-                        next_hop_decision = (
-                            dst_gs_node_id,
-                            num_isls_per_sat[dst_sat] + gid_to_sat_gsl_if_idx[dst_gid],
-                            0
-                        )
-
-                # In any case, save the distance of the satellite to the ground station to re-use
-                # when we calculate ground station to ground station forwarding
-                dist_satellite_to_ground_station[(curr, dst_gs_node_id)] = distance_to_ground_station_m
-
-                # Write to forwarding state
-                if not prev_fstate or prev_fstate[(curr, dst_gs_node_id)] != next_hop_decision:
-                    f_out.write("%d,%d,%d,%d,%d\n" % (
-                        curr,
-                        dst_gs_node_id,
-                        next_hop_decision[0],
-                        next_hop_decision[1],
-                        next_hop_decision[2]
-                    ))
-                fstate[(curr, dst_gs_node_id)] = next_hop_decision
-
-        # Ground stations to ground stations
-        # Choose the source satellite which promises the shortest path
-        for src_gid in range(num_ground_stations):
-            for dst_gid in range(num_ground_stations):
-                if src_gid != dst_gid:
-                    src_gs_node_id = num_satellites + src_gid
-                    dst_gs_node_id = num_satellites + dst_gid
-
-                    # Among the satellites in range of the source ground station,
-                    # find the one which promises the shortest distance
-                    possible_src_sats = ground_station_satellites_in_range_candidates[src_gid]
-                    possibilities = []
-                    for a in possible_src_sats:
-                        best_distance_offered_m = dist_satellite_to_ground_station[(a[1], dst_gs_node_id)]
-                        if not math.isinf(best_distance_offered_m):
-                            possibilities.append(
-                                (
-                                    a[0] + best_distance_offered_m,
-                                    a[1]
-                                )
-                            )
-                    possibilities = sorted(possibilities)
-
-                    # By default, if there is no satellite in range for one of the
-                    # ground stations, it will be dropped (indicated by -1)
-                    next_hop_decision = (-1, -1, -1)
-                    if len(possibilities) > 0:
-                        src_sat_id = possibilities[0][1]
-                        next_hop_decision = (
-                            src_sat_id,
-                            0,
-                            num_isls_per_sat[src_sat_id] + gid_to_sat_gsl_if_idx[src_gid]
-                        )
+    fstate = ForwardingState(num_satellites, num_ground_stations)
+    own_ifs, neighbor_ifs = padded_neighbor_interfaces(
+        sat_net_graph_only_satellites_with_isls, neighbors, num_satellites, sat_neighbor_to_if
+    )
+    fill_fstate_without_gs_relaying(
+        fstate,
+        dst_sat,
+        next_hop_idx,
+        src_sat,
+        neighbors,
+        own_ifs,
+        neighbor_ifs,
+        num_isls_per_sat,
+        gid_to_sat_gsl_if_idx
+    )
 
-                    # Update forwarding state
-                    if not prev_fstate or prev_fstate[(src_gs_node_id, dst_gs_node_id)] != next_hop_decision:
-                        f_out.write("%d,%d,%d,%d,%d\n" % (
-                            src_gs_node_id,
-                            dst_gs_node_id,
-                            next_hop_decision[0],
-                            next_hop_decision[1],
-                            next_hop_decision[2]
-                        ))
-                    fstate[(src_gs_node_id, dst_gs_node_id)] = next_hop_decision
+    # Now write state (delta) to file for complete graph
+    output_filename = dynamic_state_filename(output_dynamic_state_dir, "fstate", time_since_epoch_ns)
+    if enable_verbose_logs and output_filename is not None:
+        print("  > Writing forwarding state to: " + str(output_filename))
+    lap(phase_timer, "next_hop_selection")
+    count(phase_timer, "fstate_delta_lines", write_fstate_delta(output_filename, fstate, prev_fstate))
+    lap(phase_timer, "file_writing")
 
     # Finally return result
     return fstate
@@ -163,99 +121,75 @@ def calculate_fstate_shortest_path_with_gs_relaying(
         gid_to_sat_gsl_if_idx,
         sat_neighbor_to_if,
         prev_fstate,
-        enable_verbose_logs
+        enable_verbose_logs,
+        shortest_path_backend="floyd_warshall",  # Options: "floyd_warshall" (networkx), "dijkstra", "johnson",
+                                                 #          "restricted_dijkstra", "reverse_dijkstra"
+        phase_timer=None  # PhaseTimer, to record the time spent in each phase
 ):
 
+    # One reverse shortest path tree per destination ground station directly yields the next hops
+    if shortest_path_backend == "reverse_dijkstra":
+        return calculate_fstate_reverse_dijkstra_with_gs_relaying(
+            output_dynamic_state_dir,
+            time_since_epoch_ns,
+            num_satellites,
+            num_ground_stations,
+            sat_net_graph,
+            num_isls_per_sat,
+            gid_to_sat_gsl_if_idx,
+            sat_neighbor_to_if,
+            prev_fstate,
+            enable_verbose_logs,
+            phase_timer
+        )
+
     # Calculate shortest paths
     if enable_verbose_logs:
-        print("  > Calculating Floyd-Warshall for graph including ground-station relays")
-    # (Note: Numpy has a deprecation warning here because of how networkx uses matrices)
-    dist_sat_net = nx.floyd_warshall_numpy(sat_net_graph)
+        print("  > Calculating shortest paths (" + shortest_path_backend + ") "
+              "for graph including ground-station relays")
+    # (only the distances to ground stations are used to decide, the restricted backend leaves the others NaN)
+    dist_sat_net = calculate_shortest_path_distances(
+        sat_net_graph,
+        shortest_path_backend,
+        destinations=list(range(num_satellites, num_satellites + num_ground_stations))
+    )
+    lap(phase_timer, "shortest_paths")
+
+    # Among its neighbors, find the one which promises the
+    # lowest distance to reach the destination ground station
+    num_nodes = num_satellites + num_ground_stations
+    neighbors, weights = padded_neighbors(sat_net_graph, num_nodes)
+    if np.any(np.isinf(dist_sat_net[np.arange(num_nodes)[:, np.newaxis], neighbors][neighbors >= 0])):
+        raise ValueError("Neighbor cannot be unreachable")
+    destinations = np.repeat(
+        np.arange(num_satellites, num_nodes)[np.newaxis, :],
+        num_nodes,
+        axis=0
+    )
+    next_hop_idx = select_next_hops(dist_sat_net, neighbors, weights, destinations)
 
     # Forwarding state
-    fstate = {}
-
-    # Now write state to file for complete graph
-    output_filename = output_dynamic_state_dir + "/fstate_" + str(time_since_epoch_ns) + ".txt"
-    if enable_verbose_logs:
-        print("  > Writing forwarding state to: " + output_filename)
-    with open(output_filename, "w+") as f_out:
-
-        # Satellites and ground stations to ground stations
-        for current_node_id in range(num_satellites + num_ground_stations):
-            for dst_gid in range(num_ground_stations):
-                dst_gs_node_id = num_satellites + dst_gid
-
-                # Cannot forward to itself
-                if current_node_id != dst_gs_node_id:
-
-                    # Among its neighbors, find the one which promises the
-                    # lowest distance to reach the destination satellite
-                    next_hop_decision = (-1, -1, -1)
-                    best_distance_m = 1000000000000000
-                    for neighbor_id in sat_net_graph.neighbors(current_node_id):
-
-                        # Any neighbor must be reachable
-                        if math.isinf(dist_sat_net[(current_node_id, neighbor_id)]):
-                            raise ValueError("Neighbor cannot be unreachable")
-
-                        # Calculate distance = next-hop + distance the next hop node promises
-                        distance_m = (
-                            sat_net_graph.edges[(current_node_id, neighbor_id)]["weight"]
-                            +
-                            dist_sat_net[(neighbor_id, dst_gs_node_id)]
-                        )
-                        if (
-                                not math.isinf(dist_sat_net[(neighbor_id, dst_gs_node_id)])
-                                and
-                                distance_m < best_distance_m
-                        ):
-
-                            # Check node identifiers to determine what are the
-                            # correct interface identifiers
-                            if current_node_id >= num_satellites and neighbor_id < num_satellites:  # GS to sat.
-                                my_if = 0
-                                next_hop_if = (
-                                    num_isls_per_sat[neighbor_id]
-                                    +
-                                    gid_to_sat_gsl_if_idx[current_node_id - num_satellites]
-                                )
-
-                            elif current_node_id < num_satellites and neighbor_id >= num_satellites:  # Sat. to GS
-                                my_if = (
-                                    num_isls_per_sat[current_node_id]
-                                    +
-                                    gid_to_sat_gsl_if_idx[neighbor_id - num_satellites]
-                                )
-                                next_hop_if = 0
-
-                            elif current_node_id < num_satellites and neighbor_id < num_satellites:  # Sat. to sat.
-                                my_if = sat_neighbor_to_if[(current_node_id, neighbor_id)]
-                                next_hop_if = sat_neighbor_to_if[(neighbor_id, current_node_id)]
-
-                            else:  # GS to GS
-                                raise ValueError("GS-to-GS link cannot exist")
-
-                            # Write the next-hop decision
-                            next_hop_decision = (
-                                neighbor_id,  # Next-hop node identifier
-                                my_if,        # My outgoing interface id
-                                next_hop_if   # Next-hop incoming interface id
-                            )
-
-                            # Update best distance found
-                            best_distance_m = distance_m
-
-                    # Write to forwarding state
-                    if not prev_fstate or prev_fstate[(current_node_id, dst_gs_node_id)] != next_hop_decision:
-                        f_out.write("%d,%d,%d,%d,%d\n" % (
-                            current_node_id,
-                            dst_gs_node_id,
-                            next_hop_decision[0],
-                            next_hop_decision[1],
-                            next_hop_decision[2]
-                        ))
-                    fstate[(current_node_id, dst_gs_node_id)] = next_hop_decision
+    fstate = ForwardingState(num_satellites, num_ground_stations)
+    own_ifs, neighbor_ifs = padded_neighbor_interfaces(
+        sat_net_graph, neighbors, num_satellites, sat_neighbor_to_if
+    )
+    fill_fstate_with_gs_relaying(
+        fstate,
+        next_hop_idx,
+        neighbors,
+        own_ifs,
+        neighbor_ifs,
+        num_isls_per_sat,
+        gid_to_sat_gsl_if_idx
+    )
+
+    # Now write state (delta) to file for complete graph
+    output_filename = dynamic_state_filename(output_dynamic_state_dir, "fstate", time_since_epoch_ns)
+    if enable_verbose_logs and output_filename is not None:
+        print("  > Writing forwarding state to: " + str(output_filename))
+    lap(phase_timer, "next_hop_selection")
+    count(phase_timer, "fstate_delta_lines", write_fstate_delta(output_filename, fstate, prev_fstate))
+    lap(phase_timer, "file_writing")
 
     # Finally return result
     return fstate
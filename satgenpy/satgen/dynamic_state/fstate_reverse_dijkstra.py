@@ -0,0 +1,209 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+from .forwarding_state import ForwardingState
+from .sat_net_graph import graph_to_csr
+from .next_hop_selection import (
+    padded_neighbors,
+    padded_candidates,
+    padded_neighbor_interfaces,
+    neighbor_index,
+    select_via_candidates,
+    fill_fstate_without_gs_relaying,
+    fill_fstate_with_gs_relaying
+)
+from .state_writer import dynamic_state_filename, write_fstate_delta
+from .phase_timing import lap, count
+
+
+def calculate_fstate_reverse_dijkstra_without_gs_relaying(
+        output_dynamic_state_dir,
+        time_since_epoch_ns,
+        num_satellites,
+        num_ground_stations,
+        sat_net_graph_only_satellites_with_isls,
+        num_isls_per_sat,
+        gid_to_sat_gsl_if_idx,
+        ground_station_satellites_in_range_candidates,
+        sat_neighbor_to_if,
+        prev_fstate,
+        enable_verbose_logs,
+        phase_timer=None  # PhaseTimer, to record the time spent in each phase
+):
+    """
+    Calculate (and write the delta of) the forwarding state of paths GS-(SAT)+-GS using one reverse
+    shortest path tree per destination ground station.
+
+    Each destination ground station is represented by a virtual sink node, which only has an (outgoing) edge
+    to every satellite in range of it with the GSL length as weight. A single Dijkstra run from all sinks in
+    the graph with reversed edges (the ISLs are undirected) then yields for every satellite the distance to
+    the ground station, and its predecessor in the tree is its next hop. The output is the same as that of
+    calculate_fstate_shortest_path_without_gs_relaying(), except that among equal-length paths another may
+    be chosen.
+
+    :return: Forwarding state (see ForwardingState)
+    """
+
+    if enable_verbose_logs:
+        print("  > Calculating reverse shortest path trees for graph without ground-station relays")
+
+    # ISLs and, for each destination ground station, its sink node (num_satellites + gid)
+    isls = graph_to_csr(sat_net_graph_only_satellites_with_isls).tocoo()
+    rows = [isls.row]
+    columns = [isls.col]
+    weights = [isls.data]
+    for dst_gid in range(num_ground_stations):
+        candidates = ground_station_satellites_in_range_candidates[dst_gid]
+        rows.append(np.full(len(candidates), num_satellites + dst_gid, dtype=int))
+        columns.append(np.array(list(map(lambda b: b[1], candidates)), dtype=int))
+        weights.append(np.array(list(map(lambda b: b[0], candidates)), dtype=float))
+    num_nodes = num_satellites + num_ground_stations
+    graph = csr_matrix(
+        (np.concatenate(weights), (np.concatenate(rows), np.concatenate(columns))),
+        shape=(num_nodes, num_nodes)
+    )
+
+    # Distance from every node to each ground station, and the next hop towards it
+    if num_ground_stations > 0:
+        dist_to_ground_station, next_hop = dijkstra(
+            graph,
+            directed=True,
+            indices=list(range(num_satellites, num_nodes)),
+            return_predecessors=True
+        )
+    else:
+        dist_to_ground_station = np.zeros((0, num_nodes))
+        next_hop = np.zeros((0, num_nodes), dtype=int)
+    lap(phase_timer, "shortest_paths")
+
+    # Satellites to ground stations
+    # A satellite with the sink as next hop is the destination satellite, the others go to a neighbor
+    next_hop = next_hop[:, :num_satellites].T
+    dst_gs_node_ids = num_satellites + np.arange(num_ground_stations)
+    dst_sat = np.where(next_hop == dst_gs_node_ids[np.newaxis, :], np.arange(num_satellites)[:, np.newaxis], -1)
+    neighbors, _ = padded_neighbors(sat_net_graph_only_satellites_with_isls, num_satellites)
+    next_hop_idx = neighbor_index(neighbors, np.where(next_hop < num_satellites, next_hop, -1))
+
+    # Ground stations to ground stations
+    # Choose the source satellite which promises the shortest path
+    candidate_sids, candidate_distances = padded_candidates(ground_station_satellites_in_range_candidates)
+    src_sat = select_via_candidates(dist_to_ground_station, candidate_sids, candidate_distances)[0].T
+
+    # Forwarding state
+    fstate = ForwardingState(num_satellites, num_ground_stations)
+    own_ifs, neighbor_ifs = padded_neighbor_interfaces(
+        sat_net_graph_only_satellites_with_isls, neighbors, num_satellites, sat_neighbor_to_if
+    )
+    fill_fstate_without_gs_relaying(
+        fstate,
+        dst_sat,
+        next_hop_idx,
+        src_sat,
+        neighbors,
+        own_ifs,
+        neighbor_ifs,
+        num_isls_per_sat,
+        gid_to_sat_gsl_if_idx
+    )
+
+    # Now write state (delta) to file for complete graph
+    output_filename = dynamic_state_filename(output_dynamic_state_dir, "fstate", time_since_epoch_ns)
+    if enable_verbose_logs and output_filename is not None:
+        print("  > Writing forwarding state to: " + str(output_filename))
+    lap(phase_timer, "next_hop_selection")
+    count(phase_timer, "fstate_delta_lines", write_fstate_delta(output_filename, fstate, prev_fstate))
+    lap(phase_timer, "file_writing")
+
+    # Finally return result
+    return fstate
+
+
+def calculate_fstate_reverse_dijkstra_with_gs_relaying(
+        output_dynamic_state_dir,
+        time_since_epoch_ns,
+        num_satellites,
+        num_ground_stations,
+        sat_net_graph,
+        num_isls_per_sat,
+        gid_to_sat_gsl_if_idx,
+        sat_neighbor_to_if,
+        prev_fstate,
+        enable_verbose_logs,
+        phase_timer=None  # PhaseTimer, to record the time spent in each phase
+):
+    """
+    Calculate (and write the delta of) the forwarding state of paths which can relay over ground stations
+    using one reverse shortest path tree per destination ground station.
+
+    The graph is undirected, so the shortest path tree from the destination ground station gives for every
+    node its next hop (its predecessor in the tree). The output is the same as that of
+    calculate_fstate_shortest_path_with_gs_relaying(), except that among equal-length paths another may
+    be chosen.
+
+    :return: Forwarding state (see ForwardingState)
+    """
+
+    if enable_verbose_logs:
+        print("  > Calculating reverse shortest path trees for graph including ground-station relays")
+
+    # Next hop of every node towards each ground station
+    num_nodes = num_satellites + num_ground_stations
+    if num_ground_stations > 0:
+        _, next_hop = dijkstra(
+            graph_to_csr(sat_net_graph),
+            directed=False,
+            indices=list(range(num_satellites, num_nodes)),
+            return_predecessors=True
+        )
+    else:
+        next_hop = np.zeros((0, num_nodes), dtype=int)
+    lap(phase_timer, "shortest_paths")
+
+    # Forwarding state
+    fstate = ForwardingState(num_satellites, num_ground_stations)
+    neighbors, _ = padded_neighbors(sat_net_graph, num_nodes)
+    own_ifs, neighbor_ifs = padded_neighbor_interfaces(
+        sat_net_graph, neighbors, num_satellites, sat_neighbor_to_if
+    )
+    fill_fstate_with_gs_relaying(
+        fstate,
+        neighbor_index(neighbors, next_hop.T),
+        neighbors,
+        own_ifs,
+        neighbor_ifs,
+        num_isls_per_sat,
+        gid_to_sat_gsl_if_idx
+    )
+
+    # Now write state (delta) to file for complete graph
+    output_filename = dynamic_state_filename(output_dynamic_state_dir, "fstate", time_since_epoch_ns)
+    if enable_verbose_logs and output_filename is not None:
+        print("  > Writing forwarding state to: " + str(output_filename))
+    lap(phase_timer, "next_hop_selection")
+    count(phase_timer, "fstate_delta_lines", write_fstate_delta(output_filename, fstate, prev_fstate))
+    lap(phase_timer, "file_writing")
+
+    # Finally return result
+    return fstate
@@ -21,10 +21,16 @@
 # SOFTWARE.
 
 from satgen.distance_tools import *
+from satgen.positions import *
 from astropy import units as u
 import math
-import networkx as nx
+import time
+import tempfile
 import numpy as np
+from .constellation_graph import ConstellationGraph
+from .adaptive_time_step import generate_adaptive
+from .phase_timing import PhaseTimer, lap, write_timings
+from .resume_dynamic_state import FSTATE_ONLY_ALGORITHMS, num_complete_time_steps, replay_fstate
 from .algorithm_free_one_only_gs_relays import algorithm_free_one_only_gs_relays
 from .algorithm_free_one_only_over_isls import algorithm_free_one_only_over_isls
 from .algorithm_paired_many_only_over_isls import algorithm_paired_many_only_over_isls
@@ -47,22 +53,266 @@ def generate_dynamic_state(
                                   # "algorithm_free_one_only_gs_relays"
                                   # "algorithm_free_one_only_over_isls"
                                   # "algorithm_paired_many_only_over_isls"
-        enable_verbose_logs
+        enable_verbose_logs,
+        *,  # The options below can only be given by keyword
+        position_engine="ephem",  # Options: "ephem" (reference), "sgp4" (vectorized), "kepler" (circular)
+        gsl_spatial_index=False,
+        ephemeris_cache=None,  # EphemerisCache (e.g., from load_or_create_ephemeris_cache())
+        interpolation_max_error_m=None,  # If set, positions are interpolated by a ChebyshevPositionEngine
+        shortest_path_backend="floyd_warshall",  # Options: "floyd_warshall" (networkx), "dijkstra", "johnson",
+                                                 #          "restricted_dijkstra", "reverse_dijkstra"
+        adaptive_coarse_step_ns=None,  # If set, only calculated on this coarse grid and where the state changes
+        gsl_event_sample_step_ns=None,  # If set, the GSL in-range changes are precomputed as events (sampled at this)
+        seed_prev_output=False,  # If True, the first time step is a delta against the time step before the offset
+        resume=False,  # If True, the time steps of which the files are already complete (from the start) are skipped
+        timings_filename=None,  # If set, the time spent in each phase of each time step is written to this CSV file
+        progress_rate=False,  # If True, the progress also shows the time steps per second and estimated time remaining
+        inline_analysis=None  # InlineAnalysis, to which the state of each time step is added (as it is calculated)
 ):
     if offset_ns % time_step_ns != 0:
         raise ValueError("Offset must be a multiple of time_step_ns")
+    if adaptive_coarse_step_ns is not None \
+            and (adaptive_coarse_step_ns <= 0 or adaptive_coarse_step_ns % time_step_ns != 0):
+        raise ValueError("Adaptive coarse step must be a positive multiple of time_step_ns")
+    if inline_analysis is not None and (adaptive_coarse_step_ns is not None or resume):
+        raise ValueError("Inline analysis needs every time step to be calculated (not adaptive or resumed)")
+
+    # Resume after the time steps which are already complete, with as previous output the state of the last of them
+    # (rebuilt from its files if possible, else calculated again)
     prev_output = None
-    i = 0
-    total_iterations = ((simulation_end_time_ns - offset_ns) / time_step_ns)
-    for time_since_epoch_ns in range(offset_ns, simulation_end_time_ns, time_step_ns):
-        if not enable_verbose_logs:
-            if i % int(math.floor(total_iterations) / 10.0) == 0:
-                print("Progress: calculating for T=%d (time step granularity is still %d ms)" % (
-                    time_since_epoch_ns, time_step_ns / 1000000
-                ))
-            i += 1
-        prev_output = generate_dynamic_state_at(
+    if resume:
+        times_ns = list(range(offset_ns, simulation_end_time_ns, time_step_ns))
+        num_complete = num_complete_time_steps(output_dynamic_state_dir, times_ns)
+        if num_complete == len(times_ns):
+            print("All %d time steps are already complete" % len(times_ns))
+            return
+        if num_complete > 0:
+            print("Resuming at T=%d (%d time steps are already complete)" % (times_ns[num_complete], num_complete))
+            if dynamic_state_algorithm in FSTATE_ONLY_ALGORITHMS:
+                fstate = replay_fstate(
+                    output_dynamic_state_dir,
+                    list(range(0 if seed_prev_output else offset_ns, times_ns[num_complete], time_step_ns)),
+                    len(satellites),
+                    len(ground_stations)
+                )
+                if fstate is not None:
+                    prev_output = {"fstate": fstate}
+            offset_ns = times_ns[num_complete]
+            seed_prev_output = True
+
+    # State at the time step before the offset (its files are discarded), such that the first delta is
+    # the same as when the generation would have started earlier (e.g., when split over multiple workers)
+    seed_at_ns = offset_ns - time_step_ns \
+        if seed_prev_output and prev_output is None and offset_ns >= time_step_ns else None
+
+    position_engine, constellation_graph, gsl_events = prepare_dynamic_state_generation(
+        epoch,
+        offset_ns if seed_at_ns is None else seed_at_ns,
+        offset_ns + ((simulation_end_time_ns - offset_ns - 1) // time_step_ns) * time_step_ns,
+        satellites,
+        ground_stations,
+        list_isls,
+        max_gsl_length_m,
+        position_engine=position_engine,
+        gsl_spatial_index=gsl_spatial_index,
+        ephemeris_cache=ephemeris_cache,
+        interpolation_max_error_m=interpolation_max_error_m,
+        gsl_event_sample_step_ns=gsl_event_sample_step_ns
+    )
+
+    # Time spent in each phase of each calculated time step
+    phase_timer = PhaseTimer() if timings_filename is not None else None
+
+    def time_steps(times_ns, prev, directory=output_dynamic_state_dir, timer=phase_timer, progress=None):
+        return calculate_dynamic_state_time_steps(
+            epoch,
+            times_ns,
+            satellites,
+            ground_stations,
+            list_isls,
+            list_gsl_interfaces_info,
+            max_gsl_length_m,
+            max_isl_length_m,
+            dynamic_state_algorithm,
+            position_engine,
+            constellation_graph,
+            output_dynamic_state_dir=directory,
+            prev_output=prev,
+            enable_verbose_logs=enable_verbose_logs,
+            gsl_spatial_index=gsl_spatial_index,
+            shortest_path_backend=shortest_path_backend,
+            gsl_events=gsl_events,
+            phase_timer=timer,
+            progress=progress
+        )
+
+    def calculate_at(time_since_epoch_ns, prev, directory=output_dynamic_state_dir, timer=phase_timer):
+        output = None
+        for _, _, output in time_steps([time_since_epoch_ns], prev, directory=directory, timer=timer):
+            pass
+        return output
+
+    if seed_at_ns is not None:
+        with tempfile.TemporaryDirectory() as seed_dynamic_state_dir:
+            prev_output = calculate_at(seed_at_ns, None, directory=seed_dynamic_state_dir, timer=None)
+
+    # Time steps per second and estimated time remaining (if enabled)
+    progress_start = time.time()
+
+    def progress_rate_info(num_done, num_total):
+        elapsed_s = time.time() - progress_start
+        if not progress_rate or num_done == 0 or elapsed_s <= 0:
+            return ""
+        rate = num_done / elapsed_s
+        return ", %.2f steps/s, ETA %ds" % (rate, int(math.ceil((num_total - num_done) / rate)))
+
+    times_ns = list(range(offset_ns, simulation_end_time_ns, time_step_ns))
+
+    # Adaptive: coarse grid, refined by bisection where the state changes
+    if adaptive_coarse_step_ns is not None:
+
+        # A change which reverts within one coarse step is not noticed, except for satellites coming into or
+        # going out of range if there are GSL events (as the intervals which contain them are refined as well)
+        changes_between = None
+        if gsl_events is not None:
+            def changes_between(a, b):
+                return np.searchsorted(gsl_events.times_ns, times_ns[a], side="right") \
+                    < np.searchsorted(gsl_events.times_ns, times_ns[b], side="left")
+            print("Warning: adaptive time steps do not notice a change of the routes which reverts within one "
+                  "coarse step (%d ms) without satellites coming into or going out of range"
+                  % (adaptive_coarse_step_ns / 1000000))
+        else:
+            print("Warning: adaptive time steps do not notice a change of the dynamic state which reverts within "
+                  "one coarse step (%d ms), set the GSL event sample step to at least refine where satellites "
+                  "come into or go out of range" % (adaptive_coarse_step_ns / 1000000))
+
+        num_calculated = generate_adaptive(
             output_dynamic_state_dir,
+            times_ns,
+            adaptive_coarse_step_ns // time_step_ns,
+            lambda idx, prev: calculate_at(times_ns[idx], prev),
+            progress=lambda idx: print("Progress: calculating for T=%d (adaptive, coarse step is %d ms%s)" % (
+                times_ns[idx], adaptive_coarse_step_ns / 1000000, progress_rate_info(idx, len(times_ns))
+            )) if not enable_verbose_logs else None,
+            prev_output=prev_output,
+            changes_between=changes_between
+        )
+        print("Calculated %d out of %d time steps" % (num_calculated, len(times_ns)))
+
+    else:
+        def progress(i):
+            if not enable_verbose_logs and i % max(1, int(math.floor(len(times_ns)) / 10.0)) == 0:  # (at least 1)
+                print("Progress: calculating for T=%d (time step granularity is still %d ms%s)" % (
+                    times_ns[i], time_step_ns / 1000000, progress_rate_info(i, len(times_ns))
+                ))
+
+        for time_since_epoch_ns, network_state, output in time_steps(times_ns, prev_output, progress=progress):
+            if inline_analysis is not None:
+                inline_analysis.add_time_step(
+                    time_since_epoch_ns,
+                    output["fstate"],
+                    prev_output["fstate"] if prev_output is not None else None,
+                    network_state["sat_net_graph_only_satellites_with_isls"],
+                    network_state["sat_net_graph_all_with_only_gsls"]
+                )
+            prev_output = output
+
+    if phase_timer is not None:
+        write_timings(timings_filename, phase_timer.records)
+
+
+def prepare_dynamic_state_generation(
+        epoch,
+        first_time_ns,
+        last_time_ns,
+        satellites,
+        ground_stations,
+        list_isls,
+        max_gsl_length_m,
+        position_engine="ephem",
+        gsl_spatial_index=False,
+        ephemeris_cache=None,
+        interpolation_max_error_m=None,
+        gsl_event_sample_step_ns=None
+):
+    """
+    Prepare what is shared by all time steps of a generation.
+
+    :param epoch:                      Epoch of the satellites
+    :param first_time_ns:              First time step (ns since epoch)
+    :param last_time_ns:               Last time step (ns since epoch), before the first if there are none
+    :param satellites:                 Satellites
+    :param ground_stations:            Ground stations
+    :param list_isls:                  List of ISLs
+    :param max_gsl_length_m:           Maximum GSL length (m)
+    :param position_engine:            Position engine (name or instance)
+    :param gsl_spatial_index:          Whether to use a spatial index to find satellites in range
+    :param ephemeris_cache:            EphemerisCache, or None
+    :param interpolation_max_error_m:  If set, positions are interpolated by a ChebyshevPositionEngine
+    :param gsl_event_sample_step_ns:   If set, the GSL in-range changes are precomputed as events (sampled at this)
+
+    :return: (position engine, constellation graph, GSL events or None)
+    """
+    position_engine = create_position_engine(position_engine, epoch, satellites)
+    if ephemeris_cache is not None:
+        position_engine = CachedPositionEngine(position_engine, ephemeris_cache)
+    if interpolation_max_error_m is not None:
+        position_engine = ChebyshevPositionEngine(position_engine, max_error_m=interpolation_max_error_m)
+    constellation_graph = ConstellationGraph(len(satellites), len(ground_stations), list_isls)
+
+    # Satellites coming into and going out of range of ground stations, found once for all time steps
+    gsl_events = None
+    if gsl_event_sample_step_ns is not None and last_time_ns >= first_time_ns:
+        gsl_events = calculate_gsl_events(
+            position_engine,
+            ground_stations,
+            len(satellites),
+            max_gsl_length_m,
+            first_time_ns,
+            last_time_ns,
+            gsl_event_sample_step_ns,
+            spatial_index=gsl_spatial_index
+        )
+        print("Found %d GSL events" % gsl_events.num_events())
+
+    return position_engine, constellation_graph, gsl_events
+
+
+def calculate_dynamic_state_time_steps(
+        epoch,
+        times_ns,
+        satellites,
+        ground_stations,
+        list_isls,
+        list_gsl_interfaces_info,
+        max_gsl_length_m,
+        max_isl_length_m,
+        dynamic_state_algorithm,
+        position_engine,
+        constellation_graph,
+        *,
+        output_dynamic_state_dir=None,  # If set, the files of each time step are written to it
+        prev_output=None,  # Output of the time step before the first one (None if there is none)
+        enable_verbose_logs=False,
+        gsl_spatial_index=False,
+        shortest_path_backend="floyd_warshall",
+        gsl_events=None,  # GslEvents, to only calculate the distances of satellites in range of ground stations
+        phase_timer=None,  # PhaseTimer, to record the time spent in each phase (including by the consumer)
+        progress=None  # Function (index of the time step) -> None called before each time step
+):
+    """
+    Calculate the dynamic state at each of the given time steps in order, each against the one before it.
+    This is the loop shared by generate_dynamic_state() and iterate_dynamic_state().
+
+    :return: Generator of (time since epoch (ns), network state (see calculate_network_state_at()),
+             output of the dynamic state algorithm) of each time step
+    """
+    for i, time_since_epoch_ns in enumerate(times_ns):
+        if progress is not None:
+            progress(i)
+        if phase_timer is not None:
+            phase_timer.start_time_step(time_since_epoch_ns)
+        network_state = calculate_network_state_at(
             epoch,
             time_since_epoch_ns,
             satellites,
@@ -71,10 +321,29 @@ def generate_dynamic_state(
             list_gsl_interfaces_info,
             max_gsl_length_m,
             max_isl_length_m,
+            enable_verbose_logs=enable_verbose_logs,
+            position_engine=position_engine,
+            gsl_spatial_index=gsl_spatial_index,
+            constellation_graph=constellation_graph,
+            gsl_events=gsl_events,
+            phase_timer=phase_timer
+        )
+        prev_output = calculate_dynamic_state_at(
+            output_dynamic_state_dir,
+            time_since_epoch_ns,
+            satellites,
+            ground_stations,
+            list_gsl_interfaces_info,
+            network_state,
             dynamic_state_algorithm,
             prev_output,
-            enable_verbose_logs
+            enable_verbose_logs=enable_verbose_logs,
+            shortest_path_backend=shortest_path_backend,
+            phase_timer=phase_timer
         )
+        yield time_since_epoch_ns, network_state, prev_output
+        if phase_timer is not None:
+            phase_timer.end_time_step()
 
 
 def generate_dynamic_state_at(
@@ -89,8 +358,69 @@ def generate_dynamic_state_at(
         max_isl_length_m,
         dynamic_state_algorithm,
         prev_output,
-        enable_verbose_logs
+        enable_verbose_logs,
+        position_engine=None,
+        gsl_spatial_index=False,
+        shortest_path_backend="floyd_warshall",
+        constellation_graph=None,  # ConstellationGraph, to not index the static topology again every time step
+        gsl_events=None,  # GslEvents, to only calculate the distances of satellites in range of ground stations
+        phase_timer=None  # PhaseTimer, to record the time spent in each phase
+):
+    network_state = calculate_network_state_at(
+        epoch,
+        time_since_epoch_ns,
+        satellites,
+        ground_stations,
+        list_isls,
+        list_gsl_interfaces_info,
+        max_gsl_length_m,
+        max_isl_length_m,
+        enable_verbose_logs,
+        position_engine,
+        gsl_spatial_index,
+        constellation_graph,
+        gsl_events,
+        phase_timer
+    )
+    return calculate_dynamic_state_at(
+        output_dynamic_state_dir,
+        time_since_epoch_ns,
+        satellites,
+        ground_stations,
+        list_gsl_interfaces_info,
+        network_state,
+        dynamic_state_algorithm,
+        prev_output,
+        enable_verbose_logs,
+        shortest_path_backend,
+        phase_timer
+    )
+
+
+def calculate_network_state_at(
+        epoch,
+        time_since_epoch_ns,
+        satellites,
+        ground_stations,
+        list_isls,
+        list_gsl_interfaces_info,
+        max_gsl_length_m,
+        max_isl_length_m,
+        enable_verbose_logs,
+        position_engine=None,
+        gsl_spatial_index=False,
+        constellation_graph=None,  # ConstellationGraph, to not index the static topology again every time step
+        gsl_events=None,  # GslEvents, to only calculate the distances of satellites in range of ground stations
+        phase_timer=None  # PhaseTimer, to record the time spent in each phase
 ):
+    """
+    Calculate the state of the network at a time step, on which the dynamic state algorithms decide.
+
+    :return: Dictionary with the satellite_positions_m, isl_lengths_m, the ISL graph
+             (sat_net_graph_only_satellites_with_isls) with its num_isls_per_sat and sat_neighbor_to_if,
+             the ground_station_satellites_in_range (list of (distance, satellite id) per ground station)
+             and the graph of only the GSLs (sat_net_graph_all_with_only_gsls)
+    """
     if enable_verbose_logs:
         print("FORWARDING STATE AT T = " + (str(time_since_epoch_ns))
               + "ns (= " + str(time_since_epoch_ns / 1e9) + " seconds)")
@@ -100,23 +430,17 @@ def generate_dynamic_state_at(
     if enable_verbose_logs:
         print("\nBASIC INFORMATION")
 
-    # Time
-    time = epoch + time_since_epoch_ns * u.ns
+    # Time (the absolute time is only formatted for the logs, the position engine uses its time grid)
     if enable_verbose_logs:
         print("  > Epoch.................. " + str(epoch))
         print("  > Time since epoch....... " + str(time_since_epoch_ns) + " ns")
-        print("  > Absolute time.......... " + str(time))
+        print("  > Absolute time.......... " + str(epoch + time_since_epoch_ns * u.ns))
 
-    # Graphs
-    sat_net_graph_only_satellites_with_isls = nx.Graph()
-    sat_net_graph_all_with_only_gsls = nx.Graph()
+    # Static topology (the ISLs and their interfaces), if not already indexed for the run
+    if constellation_graph is None:
+        constellation_graph = ConstellationGraph(len(satellites), len(ground_stations), list_isls)
 
     # Information
-    for i in range(len(satellites)):
-        sat_net_graph_only_satellites_with_isls.add_node(i)
-        sat_net_graph_all_with_only_gsls.add_node(i)
-    for i in range(len(satellites) + len(ground_stations)):
-        sat_net_graph_all_with_only_gsls.add_node(i)
     if enable_verbose_logs:
         print("  > Satellites............. " + str(len(satellites)))
         print("  > Ground stations........ " + str(len(ground_stations)))
@@ -125,38 +449,44 @@ def generate_dynamic_state_at(
 
     #################################
 
+    if enable_verbose_logs:
+        print("\nSATELLITE POSITIONS")
+
+    # Positions of all satellites at once
+    if position_engine is None:
+        position_engine = EphemPositionEngine(epoch, satellites)
+    lap(phase_timer, "other")
+    satellite_positions_m = position_engine.satellite_positions_m(time_since_epoch_ns)
+    lap(phase_timer, "propagation")
+    if enable_verbose_logs:
+        print("  > Position engine........ " + position_engine.name)
+
+    #################################
+
     if enable_verbose_logs:
         print("\nISL INFORMATION")
 
-    # ISL edges
-    total_num_isls = 0
-    num_isls_per_sat = [0] * len(satellites)
-    sat_neighbor_to_if = {}
-    for (a, b) in list_isls:
-
-        # ISLs are not permitted to exceed their maximum distance
-        # TODO: Technically, they can (could just be ignored by forwarding state calculation),
-        # TODO: but practically, defining a permanent ISL between two satellites which
-        # TODO: can go out of distance is generally unwanted
-        sat_distance_m = distance_m_between_satellites(satellites[a], satellites[b], str(epoch), str(time))
-        if sat_distance_m > max_isl_length_m:
-            raise ValueError(
-                "The distance between two satellites (%d and %d) "
-                "with an ISL exceeded the maximum ISL length (%.2fm > %.2fm at t=%dns)"
-                % (a, b, sat_distance_m, max_isl_length_m, time_since_epoch_ns)
-            )
-
-        # Add to networkx graph
-        sat_net_graph_only_satellites_with_isls.add_edge(
-            a, b, weight=sat_distance_m
+    # ISL lengths
+    isl_lengths_m = distance_m_isls(satellite_positions_m, list_isls)
+
+    # ISLs are not permitted to exceed their maximum distance
+    # TODO: Technically, they can (could just be ignored by forwarding state calculation),
+    # TODO: but practically, defining a permanent ISL between two satellites which
+    # TODO: can go out of distance is generally unwanted
+    exceeding_isl_idx = np.nonzero(isl_lengths_m > max_isl_length_m)[0]
+    if len(exceeding_isl_idx) > 0:
+        a, b = list_isls[exceeding_isl_idx[0]]
+        raise ValueError(
+            "The distance between two satellites (%d and %d) "
+            "with an ISL exceeded the maximum ISL length (%.2fm > %.2fm at t=%dns)"
+            % (a, b, float(isl_lengths_m[exceeding_isl_idx[0]]), max_isl_length_m, time_since_epoch_ns)
         )
 
-        # Interface mapping of ISLs
-        sat_neighbor_to_if[(a, b)] = num_isls_per_sat[a]
-        sat_neighbor_to_if[(b, a)] = num_isls_per_sat[b]
-        num_isls_per_sat[a] += 1
-        num_isls_per_sat[b] += 1
-        total_num_isls += 1
+    # Graph of the ISLs (the topology and interface mapping are fixed, only the lengths change)
+    sat_net_graph_only_satellites_with_isls = constellation_graph.isl_graph(isl_lengths_m)
+    num_isls_per_sat = constellation_graph.num_isls_per_sat
+    sat_neighbor_to_if = constellation_graph.sat_neighbor_to_if
+    lap(phase_timer, "isl_graph")
 
     if enable_verbose_logs:
         print("  > Total ISLs............. " + str(len(list_isls)))
@@ -187,25 +517,30 @@ def generate_dynamic_state_at(
     if enable_verbose_logs:
         print("\nGSL IN-RANGE INFORMATION")
 
-    # What satellites can a ground station see
-    ground_station_satellites_in_range = []
-    for ground_station in ground_stations:
-        # Find satellites in range
-        satellites_in_range = []
-        for sid in range(len(satellites)):
-            distance_m = distance_m_ground_station_to_satellite(
-                ground_station,
-                satellites[sid],
-                str(epoch),
-                str(time)
-            )
-            if distance_m <= max_gsl_length_m:
-                satellites_in_range.append((distance_m, sid))
-                sat_net_graph_all_with_only_gsls.add_edge(
-                    sid, len(satellites) + ground_station["gid"], weight=distance_m
-                )
-
-        ground_station_satellites_in_range.append(satellites_in_range)
+    lap(phase_timer, "other")
+    # What satellites can a ground station see (either all calculated, or only those which are in range
+    # according to the precomputed events)
+    if gsl_events is None:
+        ground_station_satellites_in_range = calculate_ground_station_satellites_in_range(
+            position_engine,
+            ground_stations,
+            time_since_epoch_ns,
+            max_gsl_length_m,
+            spatial_index=gsl_spatial_index
+        )
+    else:
+        ground_station_satellites_in_range = calculate_ground_station_satellites_in_range_from_events(
+            position_engine,
+            ground_stations,
+            time_since_epoch_ns,
+            max_gsl_length_m,
+            gsl_events
+        )
+    if enable_verbose_logs:
+        print("  > Spatial index.......... " + ("yes" if gsl_spatial_index else "no"))
+        print("  > GSL events............. " + ("yes" if gsl_events is not None else "no"))
+    sat_net_graph_all_with_only_gsls = constellation_graph.gsl_graph(ground_station_satellites_in_range)
+    lap(phase_timer, "gsl_in_range")
 
     # Print how many are in range
     ground_station_num_in_range = list(map(lambda x: len(x), ground_station_satellites_in_range))
@@ -215,6 +550,36 @@ def generate_dynamic_state_at(
 
     #################################
 
+    return {
+        "satellite_positions_m": satellite_positions_m,
+        "isl_lengths_m": isl_lengths_m,
+        "sat_net_graph_only_satellites_with_isls": sat_net_graph_only_satellites_with_isls,
+        "num_isls_per_sat": num_isls_per_sat,
+        "sat_neighbor_to_if": sat_neighbor_to_if,
+        "ground_station_satellites_in_range": ground_station_satellites_in_range,
+        "sat_net_graph_all_with_only_gsls": sat_net_graph_all_with_only_gsls,
+    }
+
+
+def calculate_dynamic_state_at(
+        output_dynamic_state_dir,  # (None to not write the files)
+        time_since_epoch_ns,
+        satellites,
+        ground_stations,
+        list_gsl_interfaces_info,
+        network_state,  # From calculate_network_state_at()
+        dynamic_state_algorithm,
+        prev_output,
+        enable_verbose_logs,
+        shortest_path_backend="floyd_warshall",
+        phase_timer=None  # PhaseTimer, to record the time spent in each phase
+):
+    sat_net_graph_only_satellites_with_isls = network_state["sat_net_graph_only_satellites_with_isls"]
+    num_isls_per_sat = network_state["num_isls_per_sat"]
+    sat_neighbor_to_if = network_state["sat_neighbor_to_if"]
+    ground_station_satellites_in_range = network_state["ground_station_satellites_in_range"]
+    sat_net_graph_all_with_only_gsls = network_state["sat_net_graph_all_with_only_gsls"]
+
     #
     # Call the dynamic state algorithm which:
     #
@@ -234,7 +599,9 @@ def generate_dynamic_state_at(
             sat_neighbor_to_if,
             list_gsl_interfaces_info,
             prev_output,
-            enable_verbose_logs
+            enable_verbose_logs,
+            shortest_path_backend,
+            phase_timer
         )
 
     elif dynamic_state_algorithm == "algorithm_free_gs_one_sat_many_only_over_isls":
@@ -250,7 +617,9 @@ def generate_dynamic_state_at(
             sat_neighbor_to_if,
             list_gsl_interfaces_info,
             prev_output,
-            enable_verbose_logs
+            enable_verbose_logs,
+            shortest_path_backend,
+            phase_timer
         )
 
     elif dynamic_state_algorithm == "algorithm_free_one_only_gs_relays":
@@ -264,7 +633,9 @@ def generate_dynamic_state_at(
             num_isls_per_sat,
             list_gsl_interfaces_info,
             prev_output,
-            enable_verbose_logs
+            enable_verbose_logs,
+            shortest_path_backend,
+            phase_timer
         )
 
     elif dynamic_state_algorithm == "algorithm_paired_many_only_over_isls":
@@ -280,7 +651,9 @@ def generate_dynamic_state_at(
             sat_neighbor_to_if,
             list_gsl_interfaces_info,
             prev_output,
-            enable_verbose_logs
+            enable_verbose_logs,
+            shortest_path_backend,
+            phase_timer
         )
 
     else:
@@ -24,121 +24,241 @@ from satgen.isls import *
 from satgen.ground_stations import *
 from satgen.tles import *
 from satgen.interfaces import *
+from satgen.positions import *
 from .generate_dynamic_state import generate_dynamic_state
+from .constellation_snapshot import create_constellation_snapshot, attach_constellation_snapshot
+from .phase_timing import read_timings, write_timings
+from satgen.post_analysis.inline_analysis import InlineAnalysis
 import os
 import math
+import shutil
+from multiprocessing import Pool as ProcessPool
 from multiprocessing.dummy import Pool as ThreadPool
 
 
 def worker(args):
+    """
+    Generate the dynamic state of one chunk of time steps.
 
-    # Extract arguments
-    (
-        output_dynamic_state_dir,
-        epoch,
-        simulation_end_time_ns,
-        time_step_ns,
-        offset_ns,
-        satellites,
-        ground_stations,
-        list_isls,
-        list_gsl_interfaces_info,
-        max_gsl_length_m,
-        max_isl_length_m,
-        dynamic_state_algorithm,
-        print_logs
-     ) = args
+    :param args:  Dictionary of the arguments of the chunk (as prepared by help_dynamic_state())
 
-    # Generate dynamic state
+    :return: InlineAnalysis of the time steps of the chunk (None if not analyzed inline)
+    """
+
+    # Variables (from the shared snapshot, with own satellite objects such that they don't interfere)
+    constellation_snapshot = attach_constellation_snapshot(args["constellation_snapshot_descriptor"])
+    ground_stations = constellation_snapshot.ground_stations()
+    satellites = constellation_snapshot.satellites()
+    list_isls = constellation_snapshot.list_isls()
+    list_gsl_interfaces_info = constellation_snapshot.list_gsl_interfaces_info()
+    epoch = constellation_snapshot.epoch
+    constellation_snapshot.close()
+
+    # RTT and path analysis of the time steps of this worker
+    inline_analysis = InlineAnalysis(len(satellites), len(ground_stations)) if args["analyze_inline"] else None
+
+    # Generate dynamic state. The first time step is a delta against the time step before it, which is
+    # the last one of the previous worker, such that the output is the same as if done by a single worker.
+    # This is required for both threads and processes: without it, the first time step of each chunk would be
+    # a full forwarding state, such that the output (and the number of forwarding state updates of the inline
+    # analysis) would depend on the number of workers and chunks. It is also safe for both, as the state before
+    # the offset is calculated by the worker itself (with its own satellite objects and position engine) into
+    # a temporary directory of its own, at the cost of one additional time step per chunk.
     generate_dynamic_state(
-        output_dynamic_state_dir,
+        args["output_dynamic_state_dir"],
         epoch,
-        simulation_end_time_ns,
-        time_step_ns,
-        offset_ns,
+        args["simulation_end_time_ns"],
+        args["time_step_ns"],
+        args["offset_ns"],
         satellites,
         ground_stations,
         list_isls,
         list_gsl_interfaces_info,
-        max_gsl_length_m,
-        max_isl_length_m,
-        dynamic_state_algorithm,  # Options:
-                                  # "algorithm_free_one_only_gs_relays"
-                                  # "algorithm_free_one_only_over_isls"
-                                  # "algorithm_free_gs_one_sat_many_only_over_isls"
-                                  # "algorithm_paired_many_only_over_isls"
-        print_logs
+        args["max_gsl_length_m"],
+        args["max_isl_length_m"],
+        args["dynamic_state_algorithm"],  # Options:
+                                          # "algorithm_free_one_only_gs_relays"
+                                          # "algorithm_free_one_only_over_isls"
+                                          # "algorithm_free_gs_one_sat_many_only_over_isls"
+                                          # "algorithm_paired_many_only_over_isls"
+        args["print_logs"],
+        position_engine=args["position_engine"],
+        gsl_spatial_index=args["gsl_spatial_index"],
+        ephemeris_cache=args["ephemeris_cache"],
+        interpolation_max_error_m=args["interpolation_max_error_m"],
+        shortest_path_backend=args["shortest_path_backend"],
+        adaptive_coarse_step_ns=args["adaptive_coarse_step_ns"],
+        gsl_event_sample_step_ns=args["gsl_event_sample_step_ns"],
+        seed_prev_output=True,
+        resume=args["resume"],
+        timings_filename=args["timings_filename"],
+        progress_rate=args["progress_rate"],
+        inline_analysis=inline_analysis
     )
+    return inline_analysis
 
 
 def help_dynamic_state(
         output_generated_data_dir, num_threads, name, time_step_ms, duration_s,
-        max_gsl_length_m, max_isl_length_m, dynamic_state_algorithm, print_logs
+        max_gsl_length_m, max_isl_length_m, dynamic_state_algorithm, print_logs,
+        *,  # The options below can only be given by keyword
+        position_engine="ephem", gsl_spatial_index=False, use_ephemeris_cache=False,
+        interpolation_max_error_m=None, shortest_path_backend="floyd_warshall", adaptive_coarse_step_ms=None,
+        gsl_event_sample_step_ms=None,
+        use_processes=False,  # Processes instead of threads, which run in parallel (threads share the GIL)
+        chunk_num_time_steps=None,  # Time steps per worker task (by default, evenly split over the workers)
+        resume=False,  # Skip the time steps which are already complete (e.g., after an interrupted generation)
+        extend_from_duration_s=None,  # Start from the time steps of the (shorter) dynamic state of this duration
+        record_timings=False,  # Write the time spent in each phase of each time step to <dynamic state dir>_timings.csv
+        progress_rate=False,  # Show the time steps per second and estimated time remaining of each worker
+        analysis_output_data_dir=None,  # If set, the RTT and path analysis is done while generating, and written here
+        analysis_satgenpy_dir_with_ending_slash=None  # If set, the analysis also prints the routes of the top pairs
 ):
 
+    # The inline analysis needs every time step to be calculated
+    if analysis_output_data_dir is not None \
+            and (resume or extend_from_duration_s is not None or adaptive_coarse_step_ms is not None):
+        raise ValueError("Inline analysis cannot be combined with resuming, extending or adaptive time steps")
+
     # Directory
-    output_dynamic_state_dir = output_generated_data_dir + "/" + name + "/dynamic_state_" + str(time_step_ms) \
+    satellite_network_dir = output_generated_data_dir + "/" + name
+    output_dynamic_state_dir = satellite_network_dir + "/dynamic_state_" + str(time_step_ms) \
                                + "ms_for_" + str(duration_s) + "s"
     if not os.path.isdir(output_dynamic_state_dir):
         os.makedirs(output_dynamic_state_dir)
 
+    # Extending a shorter dynamic state: its files are linked (they are never modified, only replaced), after which
+    # only the remaining time steps are generated
+    if extend_from_duration_s is not None:
+        shorter_dynamic_state_dir = satellite_network_dir + "/dynamic_state_" + str(time_step_ms) \
+                                    + "ms_for_" + str(extend_from_duration_s) + "s"
+        if extend_from_duration_s >= duration_s:
+            raise ValueError("Can only extend from a shorter duration")
+        if not os.path.isdir(shorter_dynamic_state_dir):
+            raise ValueError("Dynamic state to extend does not exist: " + shorter_dynamic_state_dir)
+        for filename in os.listdir(shorter_dynamic_state_dir):
+            source_filename = shorter_dynamic_state_dir + "/" + filename
+            target_filename = output_dynamic_state_dir + "/" + filename
+            if filename.endswith(".txt") and not os.path.exists(target_filename):
+                try:
+                    os.link(source_filename, target_filename)
+                except OSError:
+                    shutil.copyfile(source_filename, target_filename)
+        resume = True
+
     # In nanoseconds
     simulation_end_time_ns = duration_s * 1000 * 1000 * 1000
     time_step_ns = time_step_ms * 1000 * 1000
+    adaptive_coarse_step_ns = None
+    if adaptive_coarse_step_ms is not None:
+        adaptive_coarse_step_ns = adaptive_coarse_step_ms * 1000 * 1000
+    gsl_event_sample_step_ns = None
+    if gsl_event_sample_step_ms is not None:
+        gsl_event_sample_step_ns = gsl_event_sample_step_ms * 1000 * 1000
 
     num_calculations = math.floor(simulation_end_time_ns / time_step_ns)
-    calculations_per_thread = int(math.floor(float(num_calculations) / float(num_threads)))
-    num_threads_with_one_more = num_calculations % num_threads
+
+    # Satellite positions (and for ephem, the ground station distances) of all time steps are calculated once,
+    # and shared by the workers
+    ephemeris_cache = None
+    if use_ephemeris_cache:
+        ephemeris_cache = load_or_create_ephemeris_cache(
+            satellite_network_dir, time_step_ns, simulation_end_time_ns, position_engine,
+            ground_stations=read_ground_stations_extended(satellite_network_dir + "/ground_stations.txt"),
+            max_gsl_length_m=max_gsl_length_m
+        )
+
+    # Time steps of each chunk
+    if chunk_num_time_steps is None:
+        calculations_per_thread = int(math.floor(float(num_calculations) / float(num_threads)))
+        num_threads_with_one_more = num_calculations % num_threads
+        chunk_sizes = list(map(
+            lambda i: calculations_per_thread + (1 if i < num_threads_with_one_more else 0),
+            range(num_threads)
+        ))
+    else:
+        if chunk_num_time_steps < 1:
+            raise ValueError("Number of time steps per chunk must be at least 1")
+        chunk_sizes = [chunk_num_time_steps] * (num_calculations // chunk_num_time_steps)
+        if num_calculations % chunk_num_time_steps != 0:
+            chunk_sizes.append(num_calculations % chunk_num_time_steps)
+
+    # Inputs are read once, and shared with the workers
+    constellation_snapshot = create_constellation_snapshot(satellite_network_dir)
 
     # Prepare arguments
     current = 0
     list_args = []
-    for i in range(num_threads):
-
-        # How many time steps to calculate for
-        num_time_steps = calculations_per_thread
-        if i < num_threads_with_one_more:
-            num_time_steps += 1
-
-        # Variables (load in for each thread such that they don't interfere)
-        ground_stations = read_ground_stations_extended(output_generated_data_dir + "/" + name + "/ground_stations.txt")
-        tles = read_tles(output_generated_data_dir + "/" + name + "/tles.txt")
-        satellites = tles["satellites"]
-        list_isls = read_isls(output_generated_data_dir + "/" + name + "/isls.txt", len(satellites))
-        list_gsl_interfaces_info = read_gsl_interfaces_info(
-            output_generated_data_dir + "/" + name + "/gsl_interfaces_info.txt",
-            len(satellites),
-            len(ground_stations)
-        )
-        epoch = tles["epoch"]
+    for i, num_time_steps in enumerate(chunk_sizes):
+        if num_time_steps == 0:
+            continue
 
         # Print goal
-        print("Thread %d does interval [%.2f ms, %.2f ms]" % (
+        print("Chunk %d does interval [%.2f ms, %.2f ms]" % (
             i,
             (current * time_step_ns) / 1e6,
             ((current + num_time_steps) * time_step_ns) / 1e6
         ))
 
-        list_args.append((
-            output_dynamic_state_dir,
-            epoch,
-            (current + num_time_steps) * time_step_ns + (time_step_ns if (i + 1) != num_threads else 0),
-            time_step_ns,
-            current * time_step_ns,
-            satellites,
-            ground_stations,
-            list_isls,
-            list_gsl_interfaces_info,
-            max_gsl_length_m,
-            max_isl_length_m,
-            dynamic_state_algorithm,
-            print_logs
-        ))
+        list_args.append({
+            "constellation_snapshot_descriptor": constellation_snapshot.descriptor(),
+            "output_dynamic_state_dir": output_dynamic_state_dir,
+            "simulation_end_time_ns": (current + num_time_steps) * time_step_ns,
+            "time_step_ns": time_step_ns,
+            "offset_ns": current * time_step_ns,
+            "max_gsl_length_m": max_gsl_length_m,
+            "max_isl_length_m": max_isl_length_m,
+            "dynamic_state_algorithm": dynamic_state_algorithm,
+            "print_logs": print_logs,
+            "position_engine": position_engine,
+            "gsl_spatial_index": gsl_spatial_index,
+            "ephemeris_cache": ephemeris_cache,
+            "interpolation_max_error_m": interpolation_max_error_m,
+            "shortest_path_backend": shortest_path_backend,
+            "adaptive_coarse_step_ns": adaptive_coarse_step_ns,
+            "gsl_event_sample_step_ns": gsl_event_sample_step_ns,
+            "resume": resume,
+            "timings_filename": output_dynamic_state_dir + "_timings_chunk_" + str(current * time_step_ns) + ".csv"
+            if record_timings else None,
+            "progress_rate": progress_rate,
+            "analyze_inline": analysis_output_data_dir is not None
+        })
 
         current += num_time_steps
 
     # Run in parallel
-    pool = ThreadPool(num_threads)
-    pool.map(worker, list_args)
-    pool.close()
-    pool.join()
+    pool = ProcessPool(num_threads) if use_processes else ThreadPool(num_threads)
+    try:
+        inline_analyses = pool.map(worker, list_args, chunksize=1)
+    finally:
+        pool.close()
+        pool.join()
+        constellation_snapshot.close()
+
+    # Merge the timings of the chunks (of which all time steps were already complete, there are none)
+    if record_timings:
+        timings_filename = output_dynamic_state_dir + "_timings.csv"
+        records = []
+        for args in list_args:
+            chunk_timings_filename = args["timings_filename"]
+            if os.path.isfile(chunk_timings_filename):
+                records += read_timings(chunk_timings_filename)
+                os.remove(chunk_timings_filename)
+        write_timings(timings_filename, records)
+        print("Timings written to: " + timings_filename)
+
+    # Merge the analysis of the chunks (in order of time), and write it as analyze_rtt() and analyze_path() would
+    if analysis_output_data_dir is not None:
+        inline_analysis = inline_analyses[0]
+        for chunk_inline_analysis in inline_analyses[1:]:
+            inline_analysis.merge(chunk_inline_analysis)
+        inline_analysis.write(
+            analysis_output_data_dir,
+            satellite_network_dir,
+            time_step_ms,
+            duration_s,
+            analysis_satgenpy_dir_with_ending_slash,
+            use_ephemeris_cache=use_ephemeris_cache,
+            interpolation_max_error_m=interpolation_max_error_m
+        )
+        print("Analysis written to: " + analysis_output_data_dir)
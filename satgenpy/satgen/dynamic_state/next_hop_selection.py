@@ -0,0 +1,357 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import numpy as np
+from .sat_net_graph import SatNetGraph
+
+# Any path at least this long is never selected (the initial best distance of the neighbor scan)
+NEXT_HOP_MAX_DISTANCE_M = 1000000000000000
+
+# Maximum number of entries of the temporary arrays of a block of rows (as the per-row arrays with an entry per
+# destination and neighbor / candidate would otherwise not fit in memory for large constellations)
+MAX_BLOCK_ENTRIES = 4000000
+
+
+def row_blocks(num_rows, row_num_entries):
+    """
+    Split rows into consecutive blocks of which the temporary arrays have at most MAX_BLOCK_ENTRIES entries
+    (at least one row per block).
+
+    :param num_rows:         Number of rows
+    :param row_num_entries:  Number of entries of the temporary arrays per row
+
+    :return: List of slices, one per block
+    """
+    block_num_rows = max(1, MAX_BLOCK_ENTRIES // max(1, row_num_entries))
+    return [slice(start, min(start + block_num_rows, num_rows)) for start in range(0, num_rows, block_num_rows)]
+
+
+def padded_neighbors(graph, num_nodes):
+    """
+    Neighbors of each node as padded arrays, in the order of graph.neighbors().
+
+    :param graph:      SatNetGraph, or networkx graph with edge attribute "weight" and nodes 0, 1, ..., num_nodes - 1
+    :param num_nodes:  Number of nodes
+
+    :return: (neighbors, weights), both of shape (num_nodes, maximum degree (at least 1)),
+             padded with -1 and infinity
+    """
+    if isinstance(graph, SatNetGraph):
+        max_degree = max(1, int(np.max(np.diff(graph.offsets), initial=0)))
+        neighbors = np.full((num_nodes, max_degree), -1, dtype=int)
+        weights = np.full((num_nodes, max_degree), np.inf)
+        rows, positions = padded_positions(graph)
+        neighbors[rows, positions] = graph.neighbors_array
+        weights[rows, positions] = graph.weights
+        return neighbors, weights
+    max_degree = max([1] + list(map(lambda node_id: graph.degree(node_id), range(num_nodes))))
+    neighbors = np.full((num_nodes, max_degree), -1, dtype=int)
+    weights = np.full((num_nodes, max_degree), np.inf)
+    for node_id in range(num_nodes):
+        for i, (neighbor_id, attributes) in enumerate(graph.adj[node_id].items()):
+            neighbors[node_id][i] = neighbor_id
+            weights[node_id][i] = attributes["weight"]
+    return neighbors, weights
+
+
+def padded_candidates(ground_station_satellites_in_range_candidates):
+    """
+    Satellites in range of each ground station as padded arrays, in increasing order of satellite id.
+
+    :param ground_station_satellites_in_range_candidates:  For each ground station a list of (distance, sid)
+
+    :return: (sids, distances), both of shape (number of ground stations, maximum number of candidates),
+             padded with 0 and infinity
+    """
+    num_ground_stations = len(ground_station_satellites_in_range_candidates)
+    max_candidates = max([0] + list(map(len, ground_station_satellites_in_range_candidates)))
+    sids = np.zeros((num_ground_stations, max_candidates), dtype=int)
+    distances = np.full((num_ground_stations, max_candidates), np.inf)
+    for gid, candidates in enumerate(ground_station_satellites_in_range_candidates):
+        for i, b in enumerate(sorted(candidates, key=lambda c: c[1])):
+            sids[gid][i] = b[1]
+            distances[gid][i] = b[0]
+    return sids, distances
+
+
+def select_via_candidates(dist_to_sats, candidate_sids, candidate_distances):
+    """
+    For each source and ground station, select the candidate satellite which promises the shortest distance
+    (distance to the satellite + its distance to the ground station). Among equal distances, the lowest
+    satellite id is selected (as when sorting (distance, sid) tuples).
+
+    :param dist_to_sats:         Distances from each source to each satellite, shape (sources, satellites)
+                                 (only the columns of the candidates are read)
+    :param candidate_sids:       Padded candidate satellite ids (see padded_candidates())
+    :param candidate_distances:  Padded candidate distances (see padded_candidates())
+
+    :return: (selected sid, distance) each of shape (sources, ground stations), -1 / infinity if none
+
+    The sources are processed in blocks, such that the temporary arrays (with an entry per source, ground station
+    and candidate) have at most MAX_BLOCK_ENTRIES entries.
+    """
+    num_sources = dist_to_sats.shape[0]
+    num_ground_stations, max_candidates = candidate_sids.shape
+    selected_sids = np.full((num_sources, num_ground_stations), -1, dtype=int)
+    best_distances = np.full((num_sources, num_ground_stations), np.inf)
+    if max_candidates == 0:
+        return selected_sids, best_distances
+    flat_candidate_sids = candidate_sids.ravel()
+    for block in row_blocks(num_sources, num_ground_stations * max_candidates):
+        distances = (
+            dist_to_sats[block, flat_candidate_sids].reshape((-1, num_ground_stations, max_candidates))
+            +
+            candidate_distances[np.newaxis, :, :]
+        )
+        distances[:, np.isinf(candidate_distances)] = np.inf
+        best = np.argmin(distances, axis=2)
+        best_distances[block] = np.take_along_axis(distances, best[:, :, np.newaxis], axis=2)[:, :, 0]
+        selected_sids[block] = np.where(
+            np.isinf(best_distances[block]), -1, candidate_sids[np.arange(num_ground_stations), best]
+        )
+    return selected_sids, best_distances
+
+
+def select_next_hops(dist, neighbors, weights, destinations):
+    """
+    For each node and destination, select the neighbor which promises the shortest distance
+    (edge weight + its distance to the destination). Among equal distances, the first neighbor is selected.
+
+    :param dist:          Shortest path distance matrix (only the columns of the destinations are read)
+    :param neighbors:     Padded neighbors (see padded_neighbors())
+    :param weights:       Padded edge weights (see padded_neighbors())
+    :param destinations:  Destination node id for each node and destination, shape (nodes, destinations)
+                          (negative if there is none)
+
+    :return: Index of the selected neighbor in the padded neighbor arrays, shape (nodes, destinations)
+             (-1 if there is none)
+
+    The nodes are processed in blocks, such that the temporary arrays (with an entry per node, destination and
+    neighbor) have at most MAX_BLOCK_ENTRIES entries.
+    """
+    next_hop_idx = np.full(destinations.shape, -1, dtype=int)
+    for block in row_blocks(destinations.shape[0], destinations.shape[1] * neighbors.shape[1]):
+        block_neighbors = neighbors[block, np.newaxis, :]
+        block_destinations = destinations[block, :, np.newaxis]
+        distances = np.where(
+            (block_neighbors >= 0) & (block_destinations >= 0),
+            weights[block, np.newaxis, :] + dist[block_neighbors, block_destinations],
+            np.inf
+        )
+        distances[~(distances < NEXT_HOP_MAX_DISTANCE_M)] = np.inf
+        best = np.argmin(distances, axis=2)
+        best_distances = np.take_along_axis(distances, best[:, :, np.newaxis], axis=2)[:, :, 0]
+        next_hop_idx[block] = np.where(np.isinf(best_distances), -1, best)
+    return next_hop_idx
+
+
+def padded_positions(graph):
+    """
+    :param graph:  SatNetGraph
+
+    :return: (row, column) in the padded neighbor arrays of each entry of the CSR arrays of the graph
+    """
+    degrees = np.diff(graph.offsets)
+    rows = np.repeat(np.arange(graph.num_nodes), degrees)
+    return rows, np.arange(len(rows)) - np.repeat(graph.offsets[:-1], degrees)
+
+
+def padded_neighbor_interfaces(graph, neighbors, num_satellites, sat_neighbor_to_if):
+    """
+    Interfaces of the satellite-to-satellite links in the padded neighbor arrays.
+
+    :param graph:               SatNetGraph (if it has interfaces, these are used) or networkx graph
+    :param neighbors:           Padded neighbors (see padded_neighbors())
+    :param num_satellites:      Number of satellites
+    :param sat_neighbor_to_if:  Dictionary (sat, neighbor sat) -> interface of sat
+
+    :return: (own interface, neighbor interface), both of the shape of neighbors (-1 if not an ISL)
+    """
+    own_ifs = np.full(neighbors.shape, -1, dtype=int)
+    neighbor_ifs = np.full(neighbors.shape, -1, dtype=int)
+    if isinstance(graph, SatNetGraph) and graph.interfaces is not None:
+        rows, positions = padded_positions(graph)
+        own_ifs[rows, positions] = graph.interfaces
+        neighbor_ifs[rows, positions] = graph.neighbor_interfaces
+        return own_ifs, neighbor_ifs
+    for node_id in range(min(num_satellites, neighbors.shape[0])):
+        for i, neighbor_id in enumerate(neighbors[node_id].tolist()):
+            if 0 <= neighbor_id < num_satellites:
+                own_ifs[node_id][i] = sat_neighbor_to_if[(node_id, neighbor_id)]
+                neighbor_ifs[node_id][i] = sat_neighbor_to_if[(neighbor_id, node_id)]
+    return own_ifs, neighbor_ifs
+
+
+def neighbor_index(neighbors, next_hop_ids):
+    """
+    Position of each next hop in the padded neighbor arrays.
+
+    :param neighbors:     Padded neighbors (see padded_neighbors())
+    :param next_hop_ids:  Next-hop node id for each node and destination, shape (nodes, destinations)
+                          (negative if there is none)
+
+    :return: Index in the padded neighbor arrays, shape (nodes, destinations) (-1 if there is none)
+             (the nodes are processed in blocks, as in select_next_hops())
+    """
+    index = np.full(next_hop_ids.shape, -1, dtype=int)
+    for block in row_blocks(next_hop_ids.shape[0], next_hop_ids.shape[1] * neighbors.shape[1]):
+        block_next_hop_ids = next_hop_ids[block, :, np.newaxis]
+        matches = (neighbors[block, np.newaxis, :] == block_next_hop_ids) & (block_next_hop_ids >= 0)
+        index[block] = np.where(np.any(matches, axis=2), np.argmax(matches, axis=2), -1)
+    return index
+
+
+def fill_fstate_without_gs_relaying(
+        fstate,
+        dst_sat,
+        next_hop_idx,
+        src_sat,
+        neighbors,
+        own_ifs,
+        neighbor_ifs,
+        num_isls_per_sat,
+        gid_to_sat_gsl_if_idx
+):
+    """
+    Fill in the forwarding state of paths GS-(SAT)+-GS.
+
+    :param fstate:                 Forwarding state (ForwardingState) to fill in
+    :param dst_sat:                For each satellite and ground station, the satellite which is used to reach the
+                                   ground station, shape (satellites, ground stations) (-1 if none)
+    :param next_hop_idx:           For each satellite and ground station, the index of the next hop in the padded
+                                   neighbor arrays, shape (satellites, ground stations) (-1 if none)
+    :param src_sat:                For each source and destination ground station, the first satellite,
+                                   shape (ground stations, ground stations) (-1 if none)
+    :param neighbors:              Padded neighbors (see padded_neighbors())
+    :param own_ifs:                Padded own ISL interfaces (see padded_neighbor_interfaces())
+    :param neighbor_ifs:           Padded neighbor ISL interfaces (see padded_neighbor_interfaces())
+    :param num_isls_per_sat:       Number of ISLs of each satellite
+    :param gid_to_sat_gsl_if_idx:  Satellite GSL interface index for each ground station
+    """
+    num_satellites = fstate.num_satellites
+    num_ground_stations = fstate.num_ground_stations
+    num_isls_per_sat = np.array(num_isls_per_sat, dtype=int)
+    gid_to_sat_gsl_if_idx = np.array(gid_to_sat_gsl_if_idx, dtype=int)
+    dst_gs_node_ids = num_satellites + np.arange(num_ground_stations)
+
+    # Satellites to ground stations
+    # The destination satellite has the ground station itself as next hop, the others a neighbor
+    sat_ids = np.arange(num_satellites)[:, np.newaxis]
+    is_dst_sat = dst_sat == sat_ids
+    has_next_hop = next_hop_idx >= 0
+    next_hop_idx = np.maximum(next_hop_idx, 0)
+    sat_next_hops = fstate.next_hops[:num_satellites]
+    sat_next_hops[:, :, 0] = np.where(
+        is_dst_sat,
+        dst_gs_node_ids[np.newaxis, :],
+        np.where(has_next_hop, np.take_along_axis(neighbors[:num_satellites], next_hop_idx, axis=1), -1)
+    )
+    sat_next_hops[:, :, 1] = np.where(
+        is_dst_sat,
+        num_isls_per_sat[:, np.newaxis] + gid_to_sat_gsl_if_idx[np.newaxis, :],
+        np.where(has_next_hop, np.take_along_axis(own_ifs[:num_satellites], next_hop_idx, axis=1), -1)
+    )
+    sat_next_hops[:, :, 2] = np.where(
+        is_dst_sat,
+        0,
+        np.where(has_next_hop, np.take_along_axis(neighbor_ifs[:num_satellites], next_hop_idx, axis=1), -1)
+    )
+
+    # Ground stations to ground stations (never to itself)
+    has_src_sat = src_sat >= 0
+    np.fill_diagonal(has_src_sat, False)
+    gs_next_hops = fstate.next_hops[num_satellites:]
+    gs_next_hops[:, :, 0] = np.where(has_src_sat, src_sat, -1)
+    gs_next_hops[:, :, 1] = np.where(has_src_sat, 0, -1)
+    gs_next_hops[:, :, 2] = np.where(
+        has_src_sat,
+        num_isls_per_sat[np.maximum(src_sat, 0)] + gid_to_sat_gsl_if_idx[:, np.newaxis],
+        -1
+    )
+
+
+def fill_fstate_with_gs_relaying(
+        fstate,
+        next_hop_idx,
+        neighbors,
+        own_ifs,
+        neighbor_ifs,
+        num_isls_per_sat,
+        gid_to_sat_gsl_if_idx
+):
+    """
+    Fill in the forwarding state of paths which can relay over ground stations.
+
+    :param fstate:                 Forwarding state (ForwardingState) to fill in
+    :param next_hop_idx:           For each node and ground station, the index of the next hop in the padded
+                                   neighbor arrays, shape (nodes, ground stations) (-1 if none)
+    :param neighbors:              Padded neighbors (see padded_neighbors())
+    :param own_ifs:                Padded own ISL interfaces (see padded_neighbor_interfaces())
+    :param neighbor_ifs:           Padded neighbor ISL interfaces (see padded_neighbor_interfaces())
+    :param num_isls_per_sat:       Number of ISLs of each satellite
+    :param gid_to_sat_gsl_if_idx:  Satellite GSL interface index for each ground station
+    """
+    num_satellites = fstate.num_satellites
+    num_ground_stations = fstate.num_ground_stations
+    num_nodes = fstate.num_nodes
+    num_isls_per_sat = np.array(num_isls_per_sat, dtype=int)
+    gid_to_sat_gsl_if_idx = np.array(gid_to_sat_gsl_if_idx, dtype=int)
+
+    # Cannot forward to itself
+    has_next_hop = next_hop_idx >= 0
+    has_next_hop[num_satellites + np.arange(num_ground_stations), np.arange(num_ground_stations)] = False
+    next_hop_idx = np.maximum(next_hop_idx, 0)
+    next_hop_ids = np.take_along_axis(neighbors, next_hop_idx, axis=1)
+
+    # Check node identifiers to determine what are the correct interface identifiers
+    current_is_sat = (np.arange(num_nodes) < num_satellites)[:, np.newaxis]
+    next_hop_is_sat = next_hop_ids < num_satellites
+    if np.any(has_next_hop & ~current_is_sat & ~next_hop_is_sat):
+        raise ValueError("GS-to-GS link cannot exist")
+    current_gid_if = np.zeros(num_nodes, dtype=int)
+    current_gid_if[num_satellites:] = gid_to_sat_gsl_if_idx
+    current_num_isls = np.zeros(num_nodes, dtype=int)
+    current_num_isls[:num_satellites] = num_isls_per_sat
+    next_hop_sat = np.where(next_hop_is_sat, next_hop_ids, 0)
+    next_hop_gid = np.where(next_hop_is_sat, 0, next_hop_ids - num_satellites)
+    own_if = np.where(
+        current_is_sat,
+        np.where(
+            next_hop_is_sat,
+            np.take_along_axis(own_ifs, next_hop_idx, axis=1),  # Sat. to sat.
+            current_num_isls[:, np.newaxis] + gid_to_sat_gsl_if_idx[next_hop_gid]  # Sat. to GS
+        ),
+        0  # GS to sat.
+    )
+    next_hop_if = np.where(
+        current_is_sat,
+        np.where(
+            next_hop_is_sat,
+            np.take_along_axis(neighbor_ifs, next_hop_idx, axis=1),  # Sat. to sat.
+            0  # Sat. to GS
+        ),
+        num_isls_per_sat[next_hop_sat] + current_gid_if[:, np.newaxis]  # GS to sat.
+    )
+
+    fstate.next_hops[:, :, 0] = np.where(has_next_hop, next_hop_ids, -1)
+    fstate.next_hops[:, :, 1] = np.where(has_next_hop, own_if, -1)
+    fstate.next_hops[:, :, 2] = np.where(has_next_hop, next_hop_if, -1)
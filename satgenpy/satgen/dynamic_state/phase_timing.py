@@ -0,0 +1,155 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import time
+
+# Phases of the calculation of a time step (in order), "other" is the remainder
+PHASES = [
+    "propagation",
+    "isl_graph",
+    "gsl_in_range",
+    "shortest_paths",
+    "next_hop_selection",
+    "file_writing",
+    "other"
+]
+
+# Counts of a time step
+COUNTS = [
+    "fstate_delta_lines",
+    "gsl_if_bandwidth_delta_lines"
+]
+
+# Columns of a timings file
+TIMINGS_COLUMNS = ["time_since_epoch_ns", "total_s"] + list(map(lambda p: p + "_s", PHASES)) + COUNTS
+
+
+class PhaseTimer:
+    """
+    Records for each calculated time step the wall time spent in each phase, and the number of delta lines written.
+    The time since the previous lap is attributed to the phase of the current lap.
+    """
+
+    def __init__(self):
+        self.records = []
+        self._record = None
+        self._start = None
+        self._last_lap = None
+
+    def start_time_step(self, time_since_epoch_ns):
+        """
+        :param time_since_epoch_ns:  Time since epoch (ns) of the time step which is calculated next
+        """
+        self._record = {"time_since_epoch_ns": time_since_epoch_ns}
+        for phase in PHASES:
+            self._record[phase + "_s"] = 0.0
+        for name in COUNTS:
+            self._record[name] = 0
+        self._start = time.perf_counter()
+        self._last_lap = self._start
+
+    def lap(self, phase):
+        """
+        :param phase:  Phase (in PHASES) the time since the previous lap was spent on
+        """
+        if self._record is not None:
+            now = time.perf_counter()
+            self._record[phase + "_s"] += now - self._last_lap
+            self._last_lap = now
+
+    def count(self, name, num):
+        """
+        :param name:  Count (in COUNTS)
+        :param num:   Number to add
+        """
+        if self._record is not None:
+            self._record[name] += num
+
+    def end_time_step(self):
+        """
+        :return: Record of the time step (dictionary with the TIMINGS_COLUMNS)
+        """
+        self.lap("other")
+        self._record["total_s"] = self._last_lap - self._start
+        record = self._record
+        self.records.append(record)
+        self._record = None
+        return record
+
+
+def lap(phase_timer, phase):
+    """
+    Lap of the phase timer, if there is one.
+
+    :param phase_timer:  PhaseTimer, or None
+    :param phase:        Phase (in PHASES) the time since the previous lap was spent on
+    """
+    if phase_timer is not None:
+        phase_timer.lap(phase)
+
+
+def count(phase_timer, name, num):
+    """
+    Count of the phase timer, if there is one.
+
+    :param phase_timer:  PhaseTimer, or None
+    :param name:         Count (in COUNTS)
+    :param num:          Number to add
+    """
+    if phase_timer is not None:
+        phase_timer.count(name, num)
+
+
+def write_timings(output_filename, records):
+    """
+    Write timing records as CSV (with header), in increasing order of time.
+
+    :param output_filename:  Output filename
+    :param records:          List of records (dictionaries with the TIMINGS_COLUMNS)
+    """
+    with open(output_filename, "w+") as f_out:
+        f_out.write(",".join(TIMINGS_COLUMNS) + "\n")
+        for record in sorted(records, key=lambda r: r["time_since_epoch_ns"]):
+            f_out.write(",".join(map(
+                lambda c: ("%.6f" % record[c]) if c.endswith("_s") else str(record[c]), TIMINGS_COLUMNS
+            )) + "\n")
+
+
+def read_timings(filename):
+    """
+    Read timing records written by write_timings().
+
+    :param filename:  Timings filename
+
+    :return: List of records (dictionaries with the TIMINGS_COLUMNS)
+    """
+    records = []
+    with open(filename, "r") as f_in:
+        header = f_in.readline().strip().split(",")
+        if header != TIMINGS_COLUMNS:
+            raise ValueError("Unexpected timings header: " + ",".join(header))
+        for line in f_in:
+            values = line.strip().split(",")
+            records.append({
+                c: float(v) if c.endswith("_s") else int(v) for c, v in zip(TIMINGS_COLUMNS, values)
+            })
+    return records
@@ -0,0 +1,95 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os
+import numpy as np
+from .forwarding_state import ForwardingState
+
+# Algorithms of which the output (which the next time step needs) is only the forwarding state, such that it
+# can be rebuilt from the files (the paired algorithm also has its bandwidth state, of which the files only hold
+# the rounded values, so it is calculated again instead)
+FSTATE_ONLY_ALGORITHMS = [
+    "algorithm_free_one_only_gs_relays",
+    "algorithm_free_one_only_over_isls",
+    "algorithm_free_gs_one_sat_many_only_over_isls"
+]
+
+
+def is_time_step_complete(output_dynamic_state_dir, time_since_epoch_ns):
+    """
+    :param output_dynamic_state_dir:  Output directory of the dynamic state
+    :param time_since_epoch_ns:       Time since epoch (ns) of the time step
+
+    :return: True iff both files of the time step were written (as they are written atomically, they are complete)
+    """
+    return os.path.isfile(output_dynamic_state_dir + "/fstate_" + str(time_since_epoch_ns) + ".txt") \
+        and os.path.isfile(output_dynamic_state_dir + "/gsl_if_bandwidth_" + str(time_since_epoch_ns) + ".txt")
+
+
+def num_complete_time_steps(output_dynamic_state_dir, times_ns):
+    """
+    :param output_dynamic_state_dir:  Output directory of the dynamic state
+    :param times_ns:                  Time steps (ns since epoch), in increasing order
+
+    :return: Number of time steps from the start which are complete (i.e., the index of the first incomplete one)
+    """
+    for idx, time_since_epoch_ns in enumerate(times_ns):
+        if not is_time_step_complete(output_dynamic_state_dir, time_since_epoch_ns):
+            return idx
+    return len(times_ns)
+
+
+def apply_fstate_delta(fstate_filename, fstate):
+    """
+    Apply the entries of a forwarding state (delta) file to a forwarding state.
+
+    :param fstate_filename:  Forwarding state filename (fstate_<t>.txt)
+    :param fstate:           Forwarding state (ForwardingState), which is updated
+    """
+    with open(fstate_filename, "r") as f_in:
+        values = f_in.read().replace("\n", ",").split(",")[:-1]
+    if len(values) > 0:
+        entries = np.array(values, dtype=int).reshape((-1, 5))
+        fstate.next_hops[entries[:, 0], entries[:, 1] - fstate.num_satellites] = entries[:, 2:5]
+
+
+def replay_fstate(output_dynamic_state_dir, times_ns, num_satellites, num_ground_stations):
+    """
+    Rebuild the forwarding state at the last of the time steps by applying their files in order.
+    The file of the first time step must hold the full forwarding state (as it was written without previous one).
+
+    :param output_dynamic_state_dir:  Output directory of the dynamic state
+    :param times_ns:                  Time steps (ns since epoch), in increasing order
+    :param num_satellites:            Number of satellites
+    :param num_ground_stations:       Number of ground stations
+
+    :return: Forwarding state (ForwardingState), or None if not all files are there
+    """
+    if len(times_ns) == 0:
+        return None
+    fstate = ForwardingState(num_satellites, num_ground_stations)
+    for time_since_epoch_ns in times_ns:
+        fstate_filename = output_dynamic_state_dir + "/fstate_" + str(time_since_epoch_ns) + ".txt"
+        if not os.path.isfile(fstate_filename):
+            return None
+        apply_fstate_delta(fstate_filename, fstate)
+    return fstate
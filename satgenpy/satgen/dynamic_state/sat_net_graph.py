@@ -0,0 +1,201 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import networkx as nx
+import numpy as np
+from scipy.sparse import csr_matrix
+
+
+class SatNetGraph:
+    """
+    Undirected weighted graph of the satellite network at one moment in time, with as nodes the satellites
+    (0, 1, ...) followed by the ground stations. It is stored in compressed sparse row (CSR) form: the neighbors
+    of node i are neighbors_array[offsets[i]:offsets[i + 1]] with weights weights[offsets[i]:offsets[i + 1]],
+    in the order in which the edges were added (as in networkx), and every edge is stored in both directions.
+    Optionally, the interface of each node used for the edge and the interface of the neighbor on the other
+    side are stored alongside (-1 if the edge has none).
+
+    It offers the part of the networkx graph interface which satgen uses (number_of_nodes(), neighbors(),
+    degree(), has_edge(), get_edge_data() and edges), and can be converted from and to networkx.
+    """
+
+    __slots__ = ("num_nodes", "offsets", "neighbors_array", "weights", "interfaces", "neighbor_interfaces")
+
+    def __init__(self, num_nodes, offsets, neighbors, weights, interfaces=None, neighbor_interfaces=None):
+        """
+        :param num_nodes:            Number of nodes
+        :param offsets:              Offset of the neighbors of each node, of length num_nodes + 1
+        :param neighbors:            Neighbor node ids
+        :param weights:              Weight of the edge to each neighbor (in m)
+        :param interfaces:           Own interface id of the edge to each neighbor (optional)
+        :param neighbor_interfaces:  Interface id of the neighbor of the edge to each neighbor (optional)
+        """
+        self.num_nodes = num_nodes
+        self.offsets = offsets
+        self.neighbors_array = neighbors
+        self.weights = weights
+        self.interfaces = interfaces
+        self.neighbor_interfaces = neighbor_interfaces
+
+    def number_of_nodes(self):
+        return self.num_nodes
+
+    def neighbors(self, node_id):
+        return self.neighbors_array[self.offsets[node_id]:self.offsets[node_id + 1]].tolist()
+
+    def degree(self, node_id):
+        return int(self.offsets[node_id + 1] - self.offsets[node_id])
+
+    def edge_index(self, from_node_id, to_node_id):
+        """
+        :return: Index of the edge from the first to the second node in the CSR arrays (-1 if there is none)
+        """
+        if not (0 <= from_node_id < self.num_nodes):
+            return -1
+        start = self.offsets[from_node_id]
+        matches = np.nonzero(self.neighbors_array[start:self.offsets[from_node_id + 1]] == to_node_id)[0]
+        return int(start + matches[0]) if len(matches) > 0 else -1
+
+    def has_edge(self, from_node_id, to_node_id):
+        return self.edge_index(from_node_id, to_node_id) >= 0
+
+    def edge_weight(self, from_node_id, to_node_id):
+        """
+        :return: Weight of the edge between the two nodes
+
+        :raises: ValueError if there is no such edge
+        """
+        idx = self.edge_index(from_node_id, to_node_id)
+        if idx < 0:
+            raise ValueError("There is no edge between %d and %d" % (from_node_id, to_node_id))
+        return float(self.weights[idx])
+
+    def get_edge_data(self, from_node_id, to_node_id, default=None):
+        """
+        :return: Dictionary {"weight": weight} of the edge between the two nodes (as in networkx),
+                 or the default if there is no such edge
+        """
+        idx = self.edge_index(from_node_id, to_node_id)
+        if idx < 0:
+            return default
+        return {"weight": float(self.weights[idx])}
+
+    @property
+    def edges(self):
+        """
+        :return: List of every undirected edge (a, b) once, in the order networkx would iterate them
+                 if the nodes were added in order of their id
+        """
+        sources = np.repeat(np.arange(self.num_nodes), np.diff(self.offsets))
+        keep = self.neighbors_array >= sources
+        return list(zip(sources[keep].tolist(), self.neighbors_array[keep].tolist()))
+
+    def to_csr(self):
+        """
+        :return: Weighted adjacency matrix (scipy.sparse.csr_matrix), sharing the arrays of this graph
+        """
+        return csr_matrix((self.weights, self.neighbors_array, self.offsets), shape=(self.num_nodes, self.num_nodes))
+
+    def to_networkx(self):
+        """
+        :return: Networkx graph with the same nodes and edges (attribute "weight")
+        """
+        graph = nx.Graph()
+        for node_id in range(self.num_nodes):
+            graph.add_node(node_id)
+        neighbors = self.neighbors_array.tolist()
+        weights = self.weights.tolist()
+        for node_id in range(self.num_nodes):
+            for idx in range(self.offsets[node_id], self.offsets[node_id + 1]):
+                if not graph.has_edge(node_id, neighbors[idx]):
+                    graph.add_edge(node_id, neighbors[idx], weight=weights[idx])
+        return graph
+
+    @staticmethod
+    def from_networkx(graph, num_nodes=None):
+        """
+        :param graph:      Networkx graph with edge attribute "weight" and as nodes (a subset of) 0, 1, ..., n - 1
+        :param num_nodes:  Number of nodes n (by default the highest node id plus one)
+
+        :return: SatNetGraph with the same edges and order of neighbors
+        """
+        if num_nodes is None:
+            num_nodes = max(list(graph.nodes) + [-1]) + 1
+        offsets = np.zeros(num_nodes + 1, dtype=np.int32)
+        neighbors = []
+        weights = []
+        for node_id in range(num_nodes):
+            if node_id in graph:
+                for neighbor_id, attributes in graph.adj[node_id].items():
+                    neighbors.append(neighbor_id)
+                    weights.append(attributes["weight"])
+            offsets[node_id + 1] = len(neighbors)
+        return SatNetGraph(num_nodes, offsets, np.array(neighbors, dtype=np.int32), np.array(weights, dtype=float))
+
+
+def edge_order(num_nodes, edges_from, edges_to):
+    """
+    Order in which the directed copies of the undirected edges are stored, such that the neighbors
+    of every node are in order of the edges.
+
+    :param num_nodes:   Number of nodes
+    :param edges_from:  First node id of each edge
+    :param edges_to:    Second node id of each edge
+
+    :return: (offsets, neighbors, edge index of each neighbor)
+    """
+    edges_from = np.asarray(edges_from, dtype=int)
+    edges_to = np.asarray(edges_to, dtype=int)
+    sources = np.stack((edges_from, edges_to), axis=1).ravel()
+    targets = np.stack((edges_to, edges_from), axis=1).ravel()
+    order = np.argsort(sources, kind="stable")
+    offsets = np.zeros(num_nodes + 1, dtype=np.int32)
+    np.cumsum(np.bincount(sources, minlength=num_nodes), out=offsets[1:])
+    return offsets, targets[order].astype(np.int32), order // 2
+
+
+def graph_from_edges(num_nodes, edges_from, edges_to, edge_weights):
+    """
+    Create the graph with the given undirected edges, keeping the neighbors in order of the edges.
+
+    :param num_nodes:     Number of nodes
+    :param edges_from:    First node id of each edge
+    :param edges_to:      Second node id of each edge
+    :param edge_weights:  Weight of each edge
+
+    :return: SatNetGraph
+    """
+    offsets, neighbors, edge_idx = edge_order(num_nodes, edges_from, edges_to)
+    return SatNetGraph(num_nodes, offsets, neighbors, np.asarray(edge_weights, dtype=float)[edge_idx])
+
+
+def graph_to_csr(graph):
+    """
+    Weighted adjacency matrix of a graph.
+
+    :param graph:  SatNetGraph, or networkx graph with edge attribute "weight"
+
+    :return: Weighted adjacency matrix (scipy.sparse.csr_matrix), in the order of the nodes
+    """
+    if isinstance(graph, SatNetGraph):
+        return graph.to_csr()
+    return nx.to_scipy_sparse_array(graph, nodelist=list(graph.nodes), weight="weight", format="csr")
@@ -0,0 +1,144 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import networkx as nx
+import numpy as np
+from scipy.sparse.csgraph import dijkstra, johnson
+from .sat_net_graph import SatNetGraph, graph_to_csr
+
+
+def calculate_shortest_path_distances(graph, shortest_path_backend="floyd_warshall", destinations=None):
+    """
+    Calculate the shortest path distance between every pair of nodes.
+
+    The sparse backends find the shortest paths on the CSR adjacency of the graph, after which the distance
+    of each path is summed in the same order as Floyd-Warshall would. As such, the distance matrix is
+    bit-identical to the one of nx.floyd_warshall_numpy(), as long as the shortest paths are unique
+    (equal-length paths are not guaranteed to be resolved the same).
+
+    The "restricted_dijkstra" backend only calculates the distances towards the given destinations, by running
+    a single-source Dijkstra from each destination (the graph is undirected, so the reverse direction has the
+    same distance). Its distances are summed along the path instead of in Floyd-Warshall order, so they can
+    differ from the others in the last bits.
+
+    :param graph:                  SatNetGraph, or undirected networkx graph with edge attribute "weight"
+    :param shortest_path_backend:  "floyd_warshall" (networkx, reference), "dijkstra" or "johnson"
+                                   (scipy.sparse.csgraph), or "restricted_dijkstra" (scipy.sparse.csgraph,
+                                   only towards the destinations)
+    :param destinations:           Node identifiers (list of int) towards which the distances are needed
+                                   (required for "restricted_dijkstra", ignored otherwise)
+
+    :return: Numpy array of shape (number of nodes, number of nodes), in the order of graph.nodes
+             (for "restricted_dijkstra", only the columns of the destinations are calculated, the others are NaN)
+    """
+    if shortest_path_backend == "floyd_warshall":
+        if isinstance(graph, SatNetGraph):
+            return floyd_warshall_dense(graph.to_csr())
+        return nx.floyd_warshall_numpy(graph)
+    elif shortest_path_backend == "dijkstra" or shortest_path_backend == "johnson":
+        adjacency = graph_to_csr(graph)
+        if shortest_path_backend == "dijkstra":
+            _, predecessors = dijkstra(adjacency, directed=False, return_predecessors=True)
+        else:
+            _, predecessors = johnson(adjacency, directed=False, return_predecessors=True)
+        return floyd_warshall_order_distances(adjacency.toarray(), predecessors)
+    elif shortest_path_backend == "restricted_dijkstra":
+        if destinations is None:
+            raise ValueError("Destinations are required for the restricted_dijkstra shortest path backend")
+        num_nodes = graph.number_of_nodes()
+        distances = np.full((num_nodes, num_nodes), np.nan)
+        destinations = np.unique(np.array(destinations, dtype=int))
+        if len(destinations) > 0:
+            if not isinstance(graph, SatNetGraph) and list(graph.nodes) != list(range(num_nodes)):
+                raise ValueError("Restricted shortest paths require the nodes to be 0, 1, ..., n - 1 in order")
+            adjacency = graph_to_csr(graph)
+            distances[:, destinations] = dijkstra(adjacency, directed=False, indices=destinations).T
+        return distances
+    else:
+        raise ValueError("Unknown shortest path backend: " + str(shortest_path_backend))
+
+
+def floyd_warshall_dense(adjacency):
+    """
+    Floyd-Warshall on the dense distance matrix, exactly as nx.floyd_warshall_numpy() does it.
+
+    :param adjacency:  Weighted adjacency matrix (scipy.sparse)
+
+    :return: Distance matrix
+    """
+    distances = np.full(adjacency.shape, np.inf)
+    coo = adjacency.tocoo()
+    distances[coo.row, coo.col] = coo.data
+    np.fill_diagonal(distances, 0.0)
+    for i in range(distances.shape[0]):
+        distances = np.minimum(distances, distances[i, :][np.newaxis, :] + distances[:, i][:, np.newaxis])
+    return distances
+
+
+def floyd_warshall_order_distances(weights, predecessors):
+    """
+    Sum the shortest paths given by a predecessor matrix in the order of Floyd-Warshall.
+
+    Floyd-Warshall determines the distance of a path as the distance to its highest interior node (the pivot)
+    plus the distance from that node, both of which only have lower interior nodes. Hence, by processing
+    the pairs in increasing order of pivot, every distance is the sum of two already calculated ones.
+
+    :param weights:       Dense adjacency matrix of edge weights (zero if there is no edge)
+    :param predecessors:  Predecessor matrix (as returned by scipy.sparse.csgraph, negative if none)
+
+    :return: Distance matrix
+    """
+    num_nodes = weights.shape[0]
+    sources = np.repeat(np.arange(num_nodes)[:, np.newaxis], num_nodes, axis=1)
+    reachable = predecessors >= 0
+    direct = reachable & (predecessors == sources)
+
+    # Pivot (highest interior node) of each path, by pointer jumping along the predecessors:
+    # each round, every pair jumps twice as far towards its source, taking the maximum of the nodes it passes
+    row_offsets = (sources * num_nodes).ravel()
+    jumps = np.where(direct | ~reachable, sources, predecessors).ravel()
+    pivots = np.where(direct | ~reachable, -1, predecessors).ravel()
+    while np.any(jumps != sources.ravel()):
+        jump_idx = row_offsets + jumps
+        pivots = np.maximum(pivots, pivots[jump_idx])
+        jumps = jumps[jump_idx]
+    pivots = pivots.reshape((num_nodes, num_nodes))
+
+    # Paths without interior node have the edge weight as distance
+    distances = np.full((num_nodes, num_nodes), np.inf)
+    distances[direct] = weights[direct]
+    np.fill_diagonal(distances, 0.0)
+
+    # Others in increasing order of pivot
+    pair_rows, pair_columns = np.nonzero(pivots >= 0)
+    pair_pivots = pivots[pair_rows, pair_columns]
+    order = np.argsort(pair_pivots, kind="stable")
+    pair_rows = pair_rows[order]
+    pair_columns = pair_columns[order]
+    pair_pivots = pair_pivots[order]
+    boundaries = np.searchsorted(pair_pivots, np.arange(num_nodes + 1))
+    for k in range(num_nodes):
+        rows = pair_rows[boundaries[k]:boundaries[k + 1]]
+        columns = pair_columns[boundaries[k]:boundaries[k + 1]]
+        distances[rows, columns] = distances[rows, k] + distances[k, columns]
+
+    return distances
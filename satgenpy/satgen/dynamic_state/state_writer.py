@@ -0,0 +1,152 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os
+import numpy as np
+from contextlib import contextmanager
+from .forwarding_state import ForwardingState
+
+
+@contextmanager
+def atomic_output_file(output_filename):
+    """
+    Open an output file which only appears under its name once it is completely written (it is written to a
+    temporary file first), such that an interrupted generation never leaves a partially written file behind.
+
+    :param output_filename:  Output filename
+    """
+    temp_filename = output_filename + ".tmp"
+    with open(temp_filename, "w+") as f_out:
+        yield f_out
+    os.replace(temp_filename, output_filename)
+
+
+def dynamic_state_filename(output_dynamic_state_dir, prefix, time_since_epoch_ns):
+    """
+    :param output_dynamic_state_dir:  Output directory of the dynamic state, or None if it is not written
+    :param prefix:                    Prefix of the file ("fstate" or "gsl_if_bandwidth")
+    :param time_since_epoch_ns:       Time since epoch (ns) of the time step
+
+    :return: Filename of the time step (<prefix>_<t>.txt), or None if the dynamic state is not written
+    """
+    if output_dynamic_state_dir is None:
+        return None
+    return output_dynamic_state_dir + "/" + prefix + "_" + str(time_since_epoch_ns) + ".txt"
+
+
+def write_rows(f_out, row_format, columns):
+    """
+    Write rows in bulk, each formatted by the row format (e.g., "%d,%d,%f\\n").
+
+    :param f_out:       Output file
+    :param row_format:  Format of one row, with one conversion per column
+    :param columns:     List of equal-length columns (numpy arrays or lists)
+    """
+    columns = list(map(lambda c: np.asarray(c).tolist(), columns))
+    num_rows = len(columns[0]) if len(columns) > 0 else 0
+    if num_rows > 0:
+        f_out.write((row_format * num_rows) % tuple(value for row in zip(*columns) for value in row))
+
+
+def changed_fstate_entries(fstate, prev_fstate):
+    """
+    Which forwarding state entries changed compared to the previous forwarding state
+    (all if there is no previous one), which are the entries of its delta file.
+
+    :param fstate:       Forwarding state (ForwardingState)
+    :param prev_fstate:  Previous forwarding state (ForwardingState or dictionary), or None
+
+    :return: Boolean array of shape (number of nodes, number of ground stations), never set for
+             a ground station to itself
+    """
+    num_satellites = fstate.num_satellites
+    num_ground_stations = fstate.num_ground_stations
+
+    # Every pair except a ground station to itself
+    changed = np.ones((fstate.num_nodes, num_ground_stations), dtype=bool)
+    changed[num_satellites + np.arange(num_ground_stations), np.arange(num_ground_stations)] = False
+
+    # Only delta if there is a previous forwarding state
+    if prev_fstate:
+        if not isinstance(prev_fstate, ForwardingState):
+            prev_as_array = ForwardingState(num_satellites, num_ground_stations)
+            for key in fstate.keys():
+                prev_as_array[key] = prev_fstate[key]
+            prev_fstate = prev_as_array
+        changed &= np.any(fstate.next_hops != prev_fstate.next_hops, axis=2)
+
+    return changed
+
+
+def write_fstate_delta(output_filename, fstate, prev_fstate):
+    """
+    Write the forwarding state entries which changed compared to the previous forwarding state
+    (or all if there is no previous one), as lines "current,destination,next hop,own if,next-hop if"
+    in increasing order of current node and then destination.
+
+    :param output_filename:  Output filename (fstate_<t>.txt), or None to not write it
+    :param fstate:           Forwarding state (ForwardingState)
+    :param prev_fstate:      Previous forwarding state (ForwardingState or dictionary), or None
+
+    :return: Number of lines written
+    """
+    if output_filename is None:
+        return 0
+    curr, dst_gid = np.nonzero(changed_fstate_entries(fstate, prev_fstate))
+    next_hops = fstate.next_hops[curr, dst_gid]
+    with atomic_output_file(output_filename) as f_out:
+        write_rows(f_out, "%d,%d,%d,%d,%d\n", [
+            curr,
+            fstate.num_satellites + dst_gid,
+            next_hops[:, 0],
+            next_hops[:, 1],
+            next_hops[:, 2]
+        ])
+    return len(curr)
+
+
+def write_gsl_if_bandwidth_delta(output_filename, node_ids, if_ids, bandwidths, prev_bandwidths=None):
+    """
+    Write the GSL interface bandwidths which changed compared to the previous ones (or all if there are no
+    previous ones), as lines "node id,interface id,bandwidth".
+
+    :param output_filename:  Output filename (gsl_if_bandwidth_<t>.txt), or None to not write it
+    :param node_ids:         Node id of each interface
+    :param if_ids:           Interface id of each interface
+    :param bandwidths:       Bandwidth of each interface
+    :param prev_bandwidths:  Previous bandwidth of each interface (in the same order), or None
+
+    :return: Number of lines written
+    """
+    if output_filename is None:
+        return 0
+    node_ids = np.asarray(node_ids, dtype=int)
+    if_ids = np.asarray(if_ids, dtype=int)
+    bandwidths = np.asarray(bandwidths, dtype=float)
+    if prev_bandwidths is not None:
+        changed = bandwidths != np.asarray(prev_bandwidths, dtype=float)
+        node_ids = node_ids[changed]
+        if_ids = if_ids[changed]
+        bandwidths = bandwidths[changed]
+    with atomic_output_file(output_filename) as f_out:
+        write_rows(f_out, "%d,%d,%f\n", [node_ids, if_ids, bandwidths])
+    return len(node_ids)
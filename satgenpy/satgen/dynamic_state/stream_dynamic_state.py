@@ -0,0 +1,120 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from .generate_dynamic_state import prepare_dynamic_state_generation, calculate_dynamic_state_time_steps
+
+
+class DynamicStateAtTime:
+    """
+    Dynamic state of one time step, as yielded by iterate_dynamic_state().
+
+    time_since_epoch_ns:                 Time since epoch (ns) of the time step
+    fstate:                              Forwarding state (ForwardingState)
+    gsl_if_bandwidth_state:              Bandwidth of each GSL interface, of which gsl_if_node_ids and gsl_if_ids
+                                         are the node and interface id (None for the free algorithms, of which
+                                         the bandwidths are fixed: see gsl_if_bandwidth_0.txt)
+    satellite_positions_m:               Satellite positions (m), one row per satellite
+    isl_lengths_m:                       Length (m) of each ISL (in the order of the list of ISLs)
+    isl_graph:                           Graph of the satellites with the ISLs (SatNetGraph, weight is the length)
+    gsl_graph:                           Graph of all nodes with only the GSLs in range (SatNetGraph)
+    ground_station_satellites_in_range:  For each ground station the list of (distance, satellite id) in range
+    output:                              Output of the dynamic state algorithm
+    """
+
+    def __init__(self, time_since_epoch_ns, network_state, output):
+        self.time_since_epoch_ns = time_since_epoch_ns
+        self.fstate = output["fstate"]
+        self.gsl_if_bandwidth_state = output.get("gsl_if_bandwidth_state")
+        self.gsl_if_node_ids = output.get("gsl_if_node_ids")
+        self.gsl_if_ids = output.get("gsl_if_ids")
+        self.satellite_positions_m = network_state["satellite_positions_m"]
+        self.isl_lengths_m = network_state["isl_lengths_m"]
+        self.isl_graph = network_state["sat_net_graph_only_satellites_with_isls"]
+        self.gsl_graph = network_state["sat_net_graph_all_with_only_gsls"]
+        self.ground_station_satellites_in_range = network_state["ground_station_satellites_in_range"]
+        self.output = output
+
+
+def iterate_dynamic_state(
+        epoch,
+        simulation_end_time_ns,
+        time_step_ns,
+        offset_ns,
+        satellites,
+        ground_stations,
+        list_isls,
+        list_gsl_interfaces_info,
+        max_gsl_length_m,
+        max_isl_length_m,
+        dynamic_state_algorithm,
+        *,  # The options below can only be given by keyword
+        position_engine="ephem",
+        gsl_spatial_index=False,
+        ephemeris_cache=None,
+        interpolation_max_error_m=None,
+        shortest_path_backend="floyd_warshall",
+        gsl_event_sample_step_ns=None,
+        output_dynamic_state_dir=None  # If set, the files are also written (the same as generate_dynamic_state())
+):
+    """
+    Calculate the dynamic state time step by time step, without writing it to files (unless an output directory
+    is given), such that it can directly be used (e.g., analyzed) in the same process. The time steps are
+    calculated by the same loop as generate_dynamic_state() uses.
+
+    :return: Generator of the dynamic state of each time step (DynamicStateAtTime), in order
+    """
+    if offset_ns % time_step_ns != 0:
+        raise ValueError("Offset must be a multiple of time_step_ns")
+
+    position_engine, constellation_graph, gsl_events = prepare_dynamic_state_generation(
+        epoch,
+        offset_ns,
+        offset_ns + ((simulation_end_time_ns - offset_ns - 1) // time_step_ns) * time_step_ns,
+        satellites,
+        ground_stations,
+        list_isls,
+        max_gsl_length_m,
+        position_engine=position_engine,
+        gsl_spatial_index=gsl_spatial_index,
+        ephemeris_cache=ephemeris_cache,
+        interpolation_max_error_m=interpolation_max_error_m,
+        gsl_event_sample_step_ns=gsl_event_sample_step_ns
+    )
+
+    for time_since_epoch_ns, network_state, output in calculate_dynamic_state_time_steps(
+            epoch,
+            list(range(offset_ns, simulation_end_time_ns, time_step_ns)),
+            satellites,
+            ground_stations,
+            list_isls,
+            list_gsl_interfaces_info,
+            max_gsl_length_m,
+            max_isl_length_m,
+            dynamic_state_algorithm,
+            position_engine,
+            constellation_graph,
+            output_dynamic_state_dir=output_dynamic_state_dir,
+            gsl_spatial_index=gsl_spatial_index,
+            shortest_path_backend=shortest_path_backend,
+            gsl_events=gsl_events
+    ):
+        yield DynamicStateAtTime(time_since_epoch_ns, network_state, output)
@@ -0,0 +1,40 @@
+from .time_grid import (
+    TimeGrid
+)
+from .position_engine import (
+    EphemPositionEngine,
+    EarthFixedPositionEngine,
+    Sgp4PositionEngine,
+    KeplerPositionEngine,
+    create_position_engine,
+    satrec_from_ephem,
+    teme_to_ecef,
+    ground_station_positions_m,
+    distance_m_isls,
+    distance_m_ground_stations_to_satellites
+)
+from .spatial_index import (
+    SatelliteSpatialIndex,
+    calculate_ground_station_satellites_in_range
+)
+from .ephemeris_cache import (
+    EphemerisCache,
+    GroundStationDistanceCache,
+    CachedPositionEngine,
+    ephemeris_cache_key,
+    ground_stations_key,
+    ground_station_distance_cache_key,
+    load_or_create_ephemeris_cache
+)
+from .error_report import (
+    compare_position_engines,
+    print_position_engine_comparison
+)
+from .interpolation import (
+    ChebyshevPositionEngine
+)
+from .gsl_events import (
+    GslEvents,
+    calculate_gsl_events,
+    calculate_ground_station_satellites_in_range_from_events
+)
@@ -0,0 +1,346 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os
+import hashlib
+import tempfile
+import numpy as np
+from satgen.tles import read_tles
+from .position_engine import create_position_engine, distance_m_ground_stations_to_satellites, \
+    ground_station_positions_m
+from .spatial_index import SPATIAL_INDEX_MARGIN_M
+
+
+class EphemerisCache:
+    """
+    Memory-mapped satellite positions of a position engine for all time steps, with shape
+    (number of time steps, number of satellites, 3). Time step i is at i * time_step_ns since epoch.
+    For an engine which is not earth-fixed (ephem), it can also hold the ground station distances.
+    """
+
+    def __init__(self, filename, position_engine_name, time_step_ns, ground_station_distance_cache=None):
+        self.filename = filename
+        self.position_engine_name = position_engine_name
+        self.time_step_ns = time_step_ns
+        self.ground_station_distance_cache = ground_station_distance_cache
+        self.positions_m = np.load(filename, mmap_mode="r")
+
+    def __reduce__(self):
+        # Re-opened from the file when passed to another process, instead of copying all positions
+        return EphemerisCache, (
+            self.filename, self.position_engine_name, self.time_step_ns, self.ground_station_distance_cache
+        )
+
+    def num_time_steps(self):
+        return self.positions_m.shape[0]
+
+    def has(self, time_since_epoch_ns):
+        return time_since_epoch_ns % self.time_step_ns == 0 \
+            and 0 <= time_since_epoch_ns // self.time_step_ns < self.num_time_steps()
+
+    def satellite_positions_m(self, time_since_epoch_ns):
+        if not self.has(time_since_epoch_ns):
+            raise ValueError("Time %d ns is not in the ephemeris cache" % time_since_epoch_ns)
+        return np.array(self.positions_m[time_since_epoch_ns // self.time_step_ns])
+
+
+class GroundStationDistanceCache:
+    """
+    Memory-mapped distances of each ground station to the satellites within a radius (the maximum GSL length
+    plus the candidate margin) for all time steps. An engine which is not earth-fixed (ephem) calculates these
+    per ground station, such that they cannot be derived from the cached satellite positions.
+
+    The satellite identifiers (ascending) and distances of ground station gid at time step i are at
+    offsets[i * (number of ground stations) + gid] up to offsets[i * (number of ground stations) + gid + 1].
+    """
+
+    def __init__(self, filename_prefix, ground_stations_key, time_step_ns):
+        self.filename_prefix = filename_prefix
+        self.ground_stations_key = ground_stations_key
+        self.time_step_ns = time_step_ns
+        self.offsets = np.load(filename_prefix + "_offsets.npy", mmap_mode="r")
+        self.sids = np.load(filename_prefix + "_sids.npy", mmap_mode="r")
+        self.distances_m = np.load(filename_prefix + "_distances.npy", mmap_mode="r")
+        self.num_ground_stations = len(ground_stations_key)
+
+    def __reduce__(self):
+        # Re-opened from the files when passed to another process
+        return GroundStationDistanceCache, (self.filename_prefix, self.ground_stations_key, self.time_step_ns)
+
+    def num_time_steps(self):
+        return (len(self.offsets) - 1) // self.num_ground_stations
+
+    def has(self, ground_stations, time_since_epoch_ns):
+        return time_since_epoch_ns % self.time_step_ns == 0 \
+            and 0 <= time_since_epoch_ns // self.time_step_ns < self.num_time_steps() \
+            and ground_stations_key(ground_stations) == self.ground_stations_key
+
+    def satellite_distances_m(self, gid, time_since_epoch_ns):
+        """
+        Cached satellites of a ground station at a time step.
+
+        :param gid:                  Ground station identifier
+        :param time_since_epoch_ns:  Time since epoch (ns), which must be a cached time step
+
+        :return: (numpy array of satellite identifiers (ascending), numpy array of their distances (m))
+        """
+        k = (time_since_epoch_ns // self.time_step_ns) * self.num_ground_stations + gid
+        return self.sids[self.offsets[k]:self.offsets[k + 1]], self.distances_m[self.offsets[k]:self.offsets[k + 1]]
+
+
+class CachedPositionEngine:
+    """
+    Position engine which reads the satellite positions from an ephemeris cache, and falls back
+    to the underlying engine for times which are not in it.
+
+    For an earth-fixed engine, the ground station distances are derived from the cached positions.
+    Otherwise (ephem), they are calculated per observer: the distances to candidate satellites are then read
+    from the ground station distance cache (if the ephemeris cache has one for these ground stations),
+    and only those which are not in it are calculated by the underlying engine.
+    """
+
+    def __init__(self, position_engine, ephemeris_cache):
+        if position_engine.name != ephemeris_cache.position_engine_name:
+            raise ValueError("Ephemeris cache was created by position engine %s, not %s" % (
+                ephemeris_cache.position_engine_name, position_engine.name
+            ))
+        self.position_engine = position_engine
+        self.ephemeris_cache = ephemeris_cache
+        self.name = position_engine.name
+        self.earth_fixed = position_engine.earth_fixed
+
+    def satellite_positions_m(self, time_since_epoch_ns):
+        if self.ephemeris_cache.has(time_since_epoch_ns):
+            return self.ephemeris_cache.satellite_positions_m(time_since_epoch_ns)
+        return self.position_engine.satellite_positions_m(time_since_epoch_ns)
+
+    def ground_station_satellite_distances_m(self, ground_stations, time_since_epoch_ns):
+        if self.earth_fixed:
+            return distance_m_ground_stations_to_satellites(
+                ground_station_positions_m(ground_stations),
+                self.satellite_positions_m(time_since_epoch_ns)
+            )
+        return self.position_engine.ground_station_satellite_distances_m(ground_stations, time_since_epoch_ns)
+
+    def ground_station_satellite_candidate_distances_m(self, ground_stations, time_since_epoch_ns, candidate_sids):
+        if self.earth_fixed:
+            satellite_positions_m = self.satellite_positions_m(time_since_epoch_ns)
+            ground_station_positions = ground_station_positions_m(ground_stations)
+            return list(map(
+                lambda gid: distance_m_ground_stations_to_satellites(
+                    ground_station_positions[gid:(gid + 1)],
+                    satellite_positions_m[candidate_sids[gid]]
+                )[0],
+                range(len(ground_stations))
+            ))
+        distance_cache = self.ephemeris_cache.ground_station_distance_cache
+        if distance_cache is None or not distance_cache.has(ground_stations, time_since_epoch_ns):
+            return self.position_engine.ground_station_satellite_candidate_distances_m(
+                ground_stations, time_since_epoch_ns, candidate_sids
+            )
+        candidate_distances_m = []
+        for gid in range(len(ground_stations)):
+            cached_sids, cached_distances_m = distance_cache.satellite_distances_m(gid, time_since_epoch_ns)
+            sids = np.asarray(candidate_sids[gid], dtype=int)
+            indices = np.minimum(np.searchsorted(cached_sids, sids), max(len(cached_sids) - 1, 0))
+            if len(cached_sids) > 0:
+                in_cache = cached_sids[indices] == sids
+            else:
+                in_cache = np.zeros(len(sids), dtype=bool)
+            distances_m = np.empty(len(sids))
+            distances_m[in_cache] = cached_distances_m[indices[in_cache]]
+            if not np.all(in_cache):
+                distances_m[~in_cache] = self.position_engine.ground_station_satellite_candidate_distances_m(
+                    ground_stations[gid:(gid + 1)], time_since_epoch_ns, [sids[~in_cache]]
+                )[0]
+            candidate_distances_m.append(distances_m)
+        return candidate_distances_m
+
+    def earth_fixed_proxy(self):
+        if self.earth_fixed:
+            return self
+        return self.position_engine.earth_fixed_proxy()
+
+
+def ephemeris_cache_key(tles_filename, position_engine_name, time_step_ns, duration_ns):
+    """
+    Key of an ephemeris cache, which is a hash of the TLEs file content, position engine, time step and duration.
+
+    :param tles_filename:         TLEs filename
+    :param position_engine_name:  Position engine name (e.g., "ephem")
+    :param time_step_ns:          Time step (ns)
+    :param duration_ns:           Duration (ns)
+
+    :return: Hexadecimal key
+    """
+    h = hashlib.sha256()
+    with open(tles_filename, "rb") as f_in:
+        h.update(f_in.read())
+    h.update(("\n%s,%d,%d" % (position_engine_name, time_step_ns, duration_ns)).encode("utf-8"))
+    return h.hexdigest()[:32]
+
+
+def ground_stations_key(ground_stations):
+    """
+    Key which identifies the locations of a list of ground stations.
+
+    :param ground_stations:  List of ground stations
+
+    :return: Tuple of (latitude string, longitude string, elevation) per ground station
+    """
+    return tuple(map(
+        lambda g: (g["latitude_degrees_str"], g["longitude_degrees_str"], g["elevation_m_float"]),
+        ground_stations
+    ))
+
+
+def ground_station_distance_cache_key(tles_filename, position_engine_name, time_step_ns, duration_ns,
+                                      ground_stations, radius_m):
+    """
+    Key of a ground station distance cache, which is a hash of the ephemeris cache key, the ground station
+    locations and the radius.
+
+    :param tles_filename:         TLEs filename
+    :param position_engine_name:  Position engine name (e.g., "ephem")
+    :param time_step_ns:          Time step (ns)
+    :param duration_ns:           Duration (ns)
+    :param ground_stations:       List of ground stations
+    :param radius_m:              Radius (m) within which the satellites are cached
+
+    :return: Hexadecimal key
+    """
+    h = hashlib.sha256()
+    h.update(ephemeris_cache_key(tles_filename, position_engine_name, time_step_ns, duration_ns).encode("utf-8"))
+    h.update(("\n%r,%r" % (ground_stations_key(ground_stations), radius_m)).encode("utf-8"))
+    return h.hexdigest()[:32]
+
+
+def save_atomically(filename, array):
+    """
+    Save a numpy array to a temporary file first, such that a cache file is always complete.
+
+    :param filename:  Filename (.npy)
+    :param array:     Numpy array
+    """
+    fd, temp_filename = tempfile.mkstemp(suffix=".npy", dir=os.path.dirname(filename))
+    os.close(fd)
+    try:
+        np.save(temp_filename, array)
+        os.replace(temp_filename, filename)
+    finally:
+        if os.path.exists(temp_filename):
+            os.remove(temp_filename)
+
+
+def load_or_create_ephemeris_cache(satellite_network_dir, time_step_ns, duration_ns, position_engine="ephem",
+                                   ground_stations=None, max_gsl_length_m=None):
+    """
+    Load the ephemeris cache of a satellite network, or create it if it does not exist yet.
+
+    The cache is stored in <satellite_network_dir>/ephemeris_cache/positions_<engine>_<key>.npy,
+    such that any change to the TLEs, time step or duration results in a different cache.
+
+    If the ground stations and maximum GSL length are given and the engine is not earth-fixed (ephem),
+    the distances of each ground station to the satellites within the maximum GSL length (plus margin)
+    are cached as well, in <satellite_network_dir>/ephemeris_cache/gsl_distances_<engine>_<key>_*.npy.
+
+    :param satellite_network_dir:  Satellite network directory (containing tles.txt)
+    :param time_step_ns:           Time step (ns)
+    :param duration_ns:            Duration (ns)
+    :param position_engine:        Position engine name (e.g., "ephem")
+    :param ground_stations:        List of extended ground stations (or None to not cache their distances)
+    :param max_gsl_length_m:       Maximum GSL length (m) (or None to not cache the ground station distances)
+
+    :return: EphemerisCache
+    """
+    if time_step_ns <= 0:
+        raise ValueError("Time step must be positive")
+
+    # Filename
+    tles_filename = satellite_network_dir + "/tles.txt"
+    cache_dir = satellite_network_dir + "/ephemeris_cache"
+    filename = "%s/positions_%s_%s.npy" % (
+        cache_dir, position_engine, ephemeris_cache_key(tles_filename, position_engine, time_step_ns, duration_ns)
+    )
+
+    tles = read_tles(tles_filename)
+    engine = create_position_engine(position_engine, tles["epoch"], tles["satellites"])
+    num_time_steps = len(range(0, duration_ns, time_step_ns))
+
+    # Create it if it does not exist yet
+    if not os.path.isfile(filename):
+        os.makedirs(cache_dir, exist_ok=True)
+
+        # Written to a temporary file first, such that a cache file is always complete
+        fd, temp_filename = tempfile.mkstemp(suffix=".npy", dir=cache_dir)
+        os.close(fd)
+        try:
+            positions_m = np.lib.format.open_memmap(
+                temp_filename, mode="w+", dtype=np.float64, shape=(num_time_steps, len(tles["satellites"]), 3)
+            )
+            for i in range(num_time_steps):
+                positions_m[i] = engine.satellite_positions_m(i * time_step_ns)
+            positions_m.flush()
+            del positions_m
+            os.replace(temp_filename, filename)
+        finally:
+            if os.path.exists(temp_filename):
+                os.remove(temp_filename)
+
+    # Ground station distances, which only need caching if they are calculated per observer
+    ground_station_distance_cache = None
+    if ground_stations is not None and max_gsl_length_m is not None and not engine.earth_fixed:
+        radius_m = max_gsl_length_m + SPATIAL_INDEX_MARGIN_M
+        filename_prefix = "%s/gsl_distances_%s_%s" % (
+            cache_dir, position_engine, ground_station_distance_cache_key(
+                tles_filename, position_engine, time_step_ns, duration_ns, ground_stations, radius_m
+            )
+        )
+
+        # The offsets are written last, such that their file is only there if the cache is complete
+        if not os.path.isfile(filename_prefix + "_offsets.npy"):
+            index_engine = engine.earth_fixed_proxy()
+            offsets = [0]
+            sids = []
+            distances_m = []
+            for i in range(num_time_steps):
+                within_radius = distance_m_ground_stations_to_satellites(
+                    ground_station_positions_m(ground_stations),
+                    index_engine.satellite_positions_m(i * time_step_ns)
+                ) <= radius_m
+                candidate_sids = [np.nonzero(within_radius[gid])[0] for gid in range(len(ground_stations))]
+                candidate_distances_m = engine.ground_station_satellite_candidate_distances_m(
+                    ground_stations, i * time_step_ns, candidate_sids
+                )
+                for gid in range(len(ground_stations)):
+                    sids.append(candidate_sids[gid])
+                    distances_m.append(candidate_distances_m[gid])
+                    offsets.append(offsets[-1] + len(candidate_sids[gid]))
+            save_atomically(filename_prefix + "_sids.npy", np.concatenate([np.zeros(0, dtype=int)] + sids))
+            save_atomically(filename_prefix + "_distances.npy", np.concatenate([np.zeros(0)] + distances_m))
+            save_atomically(filename_prefix + "_offsets.npy", np.array(offsets, dtype=np.int64))
+
+        ground_station_distance_cache = GroundStationDistanceCache(
+            filename_prefix, ground_stations_key(ground_stations), time_step_ns
+        )
+
+    return EphemerisCache(filename, position_engine, time_step_ns, ground_station_distance_cache)
@@ -0,0 +1,110 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import numpy as np
+from .position_engine import distance_m_isls
+
+
+def compare_position_engines(
+        position_engine,
+        reference_position_engine,
+        times_since_epoch_ns,
+        list_isls,
+        ground_stations,
+        max_gsl_length_m
+):
+    """
+    Compare the distances of a position engine against a reference position engine (e.g., "kepler" or "sgp4"
+    against "ephem"), such that one can choose between speed and fidelity for an experiment.
+
+    :param position_engine:            Position engine to evaluate
+    :param reference_position_engine:  Reference position engine
+    :param times_since_epoch_ns:       Times since epoch (ns) to compare at
+    :param list_isls:                  List of ISLs
+    :param ground_stations:            List of extended ground stations
+    :param max_gsl_length_m:           Maximum GSL length (m)
+
+    :return: Dictionary with the maximum and mean absolute ISL and GSL length errors (m), the GSL errors only
+             over the ground station-satellite pairs which are in range according to the reference, the number
+             of such pairs which are in range according to only one of the two engines, and the maximum position
+             error (m) if both engines are earth-fixed (else None)
+    """
+    isl_errors_m = []
+    gsl_errors_m = []
+    num_gsl_in_range_mismatches = 0
+    max_position_error_m = 0.0 if position_engine.earth_fixed and reference_position_engine.earth_fixed else None
+    for time_since_epoch_ns in times_since_epoch_ns:
+        positions_m = position_engine.satellite_positions_m(time_since_epoch_ns)
+        reference_positions_m = reference_position_engine.satellite_positions_m(time_since_epoch_ns)
+
+        # Satellite positions and ISLs
+        if max_position_error_m is not None:
+            max_position_error_m = max(
+                max_position_error_m,
+                float(np.max(np.linalg.norm(positions_m - reference_positions_m, axis=1)))
+            )
+        if len(list_isls) > 0:
+            isl_errors_m.append(np.abs(
+                distance_m_isls(positions_m, list_isls) - distance_m_isls(reference_positions_m, list_isls)
+            ))
+
+        # GSLs
+        if len(ground_stations) > 0:
+            distances_m = position_engine.ground_station_satellite_distances_m(ground_stations, time_since_epoch_ns)
+            reference_distances_m = reference_position_engine.ground_station_satellite_distances_m(
+                ground_stations, time_since_epoch_ns
+            )
+            reference_in_range = reference_distances_m <= max_gsl_length_m
+            gsl_errors_m.append(np.abs(distances_m - reference_distances_m)[reference_in_range])
+            num_gsl_in_range_mismatches += int(np.sum((distances_m <= max_gsl_length_m) != reference_in_range))
+
+    isl_errors_m = np.concatenate(isl_errors_m) if len(isl_errors_m) > 0 else np.zeros(0)
+    gsl_errors_m = np.concatenate(gsl_errors_m) if len(gsl_errors_m) > 0 else np.zeros(0)
+    return {
+        "position_engine": position_engine.name,
+        "reference_position_engine": reference_position_engine.name,
+        "num_time_steps": len(times_since_epoch_ns),
+        "max_isl_length_error_m": float(np.max(isl_errors_m)) if len(isl_errors_m) > 0 else 0.0,
+        "mean_isl_length_error_m": float(np.mean(isl_errors_m)) if len(isl_errors_m) > 0 else 0.0,
+        "max_gsl_length_error_m": float(np.max(gsl_errors_m)) if len(gsl_errors_m) > 0 else 0.0,
+        "mean_gsl_length_error_m": float(np.mean(gsl_errors_m)) if len(gsl_errors_m) > 0 else 0.0,
+        "num_gsl_in_range_mismatches": num_gsl_in_range_mismatches,
+        "max_position_error_m": max_position_error_m,
+    }
+
+
+def print_position_engine_comparison(comparison):
+    """
+    Print the result of compare_position_engines().
+
+    :param comparison: Dictionary returned by compare_position_engines()
+    """
+    print("POSITION ENGINE " + comparison["position_engine"] + " VS. REFERENCE "
+          + comparison["reference_position_engine"])
+    print("  > Time steps............................ " + str(comparison["num_time_steps"]))
+    print("  > Max. ISL length error................. %.3f m" % comparison["max_isl_length_error_m"])
+    print("  > Mean ISL length error................. %.3f m" % comparison["mean_isl_length_error_m"])
+    print("  > Max. GSL length error................. %.3f m" % comparison["max_gsl_length_error_m"])
+    print("  > Mean GSL length error................. %.3f m" % comparison["mean_gsl_length_error_m"])
+    print("  > GSL in-range mismatches............... " + str(comparison["num_gsl_in_range_mismatches"]))
+    if comparison["max_position_error_m"] is not None:
+        print("  > Max. position error................... %.3f m" % comparison["max_position_error_m"])
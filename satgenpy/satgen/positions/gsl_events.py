@@ -0,0 +1,342 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import math
+import numpy as np
+from scipy.optimize import brentq
+from .spatial_index import calculate_ground_station_satellites_in_range
+
+# Upper bound of the rate (m/s) at which the distance between a ground station and a satellite changes:
+# the escape velocity at the surface (11186 m/s), which no satellite in orbit exceeds, plus the speed of
+# the rotation of the earth at the equator (465 m/s)
+GSL_MAX_RANGE_RATE_M_PER_S = 12000.0
+
+
+class GslEvents:
+    """
+    Enter and exit events of satellites into the range (maximum GSL length) of ground stations over a
+    time interval. Each event is at the first nanosecond at which the satellite is in range (enter) or out of
+    range (exit), such that the in-range satellites at any time in the interval follow from the ones at its
+    start by applying all events up to and including that time.
+    """
+
+    def __init__(self, start_ns, end_ns, initial_in_range, times_ns, gids, sids, entering):
+        """
+        :param start_ns:          Start of the interval (ns since epoch)
+        :param end_ns:            End of the interval (ns since epoch, inclusive)
+        :param initial_in_range:  Numpy array (ground stations, satellites) with True iff in range at the start
+        :param times_ns:          Time (ns since epoch) of each event, in increasing order
+        :param gids:              Ground station of each event
+        :param sids:              Satellite of each event
+        :param entering:          True iff the event is the satellite coming into range (else going out of range)
+        """
+        self.start_ns = start_ns
+        self.end_ns = end_ns
+        self.initial_in_range = initial_in_range
+        self.times_ns = times_ns
+        self.gids = gids
+        self.sids = sids
+        self.entering = entering
+
+        # State of the last query, as the in-range satellites are mostly requested in increasing time
+        self.query_time_ns = start_ns
+        self.query_num_events = 0
+        self.query_in_range = initial_in_range.copy()
+
+    def num_events(self):
+        return len(self.times_ns)
+
+    def in_range_at(self, time_since_epoch_ns):
+        """
+        :param time_since_epoch_ns:  Time since epoch (ns), within the interval
+
+        :return: Numpy array (ground stations, satellites) with True iff the satellite is in range (do not modify)
+        """
+        if not self.start_ns <= time_since_epoch_ns <= self.end_ns:
+            raise ValueError("Time %d ns is outside of the interval of the GSL events [%d ns, %d ns]" % (
+                time_since_epoch_ns, self.start_ns, self.end_ns
+            ))
+        if time_since_epoch_ns < self.query_time_ns:
+            self.query_num_events = 0
+            self.query_in_range = self.initial_in_range.copy()
+        num_events = int(np.searchsorted(self.times_ns, time_since_epoch_ns, side="right"))
+        np.logical_xor.at(
+            self.query_in_range,
+            (self.gids[self.query_num_events:num_events], self.sids[self.query_num_events:num_events]),
+            True
+        )
+        self.query_time_ns = time_since_epoch_ns
+        self.query_num_events = num_events
+        return self.query_in_range
+
+    def events_of_ground_station(self, gid):
+        """
+        :param gid:  Ground station identifier
+
+        :return: List of (time (ns since epoch), satellite id, True iff entering) of the ground station
+        """
+        return list(map(
+            lambda i: (int(self.times_ns[i]), int(self.sids[i]), bool(self.entering[i])),
+            np.nonzero(self.gids == gid)[0]
+        ))
+
+
+def in_range_matrix(ground_station_satellites_in_range, num_satellites):
+    """
+    :param ground_station_satellites_in_range:  For each ground station a list of (distance, sid) in range
+    :param num_satellites:                      Number of satellites
+
+    :return: Numpy array (ground stations, satellites) with True iff in range
+    """
+    in_range = np.zeros((len(ground_station_satellites_in_range), num_satellites), dtype=bool)
+    for gid, satellites_in_range in enumerate(ground_station_satellites_in_range):
+        in_range[gid, list(map(lambda b: b[1], satellites_in_range))] = True
+    return in_range
+
+
+def distance_matrix(ground_station_satellites_in_range, num_satellites):
+    """
+    :param ground_station_satellites_in_range:  For each ground station a list of (distance, sid) in range
+    :param num_satellites:                      Number of satellites
+
+    :return: Numpy array (ground stations, satellites) of the distance (m), infinite if not in range
+    """
+    distances_m = np.full((len(ground_station_satellites_in_range), num_satellites), np.inf)
+    for gid, satellites_in_range in enumerate(ground_station_satellites_in_range):
+        distances_m[gid, list(map(lambda b: b[1], satellites_in_range))] = list(map(
+            lambda b: b[0], satellites_in_range
+        ))
+    return distances_m
+
+
+def range_m(position_engine, ground_station, sid, max_gsl_length_m, time_ns):
+    """
+    :return: Distance (m) of the satellite to the ground station minus the maximum GSL length (m)
+    """
+    distance_m = position_engine.ground_station_satellite_candidate_distances_m(
+        [ground_station], int(time_ns), [np.array([sid])]
+    )[0][0]
+    return float(distance_m) - max_gsl_length_m
+
+
+def find_crossing_ns(position_engine, ground_station, sid, max_gsl_length_m, start_ns, end_ns):
+    """
+    Find the first nanosecond in (start, end] at which the satellite is on the other side of the maximum GSL
+    length than at the start, assuming it crosses only once in between.
+
+    :param position_engine:   Position engine
+    :param ground_station:    Ground station
+    :param sid:               Satellite identifier
+    :param max_gsl_length_m:  Maximum GSL length (m)
+    :param start_ns:          Start time (ns since epoch)
+    :param end_ns:            End time (ns since epoch), at which it is on the other side
+
+    :return: Time of the crossing (ns since epoch)
+    """
+
+    def range_function(time_ns):
+        return range_m(position_engine, ground_station, sid, max_gsl_length_m, time_ns)
+
+    def in_range(time_ns):
+        return range_function(time_ns) <= 0.0
+
+    # Root of the range function
+    was_in_range = in_range(start_ns)
+    lo = start_ns
+    hi = end_ns
+    if range_function(start_ns) != 0.0:
+        root_ns = brentq(range_function, start_ns, end_ns, xtol=1.0)
+        if in_range(max(lo, math.floor(root_ns) - 1)) == was_in_range:
+            lo = max(lo, math.floor(root_ns) - 1)
+        if in_range(min(hi, math.ceil(root_ns) + 1)) != was_in_range:
+            hi = min(hi, math.ceil(root_ns) + 1)
+
+    # Exact nanosecond (by bisection, which takes only a few steps around the root)
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if in_range(mid) == was_in_range:
+            lo = mid
+        else:
+            hi = mid
+    return hi
+
+
+def find_pass_ns(position_engine, ground_station, sid, max_gsl_length_m, start_ns, end_ns):
+    """
+    Find a pass of a satellite which is on the same side of the maximum GSL length at the start and end,
+    but crosses it in between and back again (coming into range and going out of range, or vice versa).
+
+    The interval is halved repeatedly, only searching further in the parts in which the range function can
+    reach the other side given that it changes at most GSL_MAX_RANGE_RATE_M_PER_S. As soon as a time on the
+    other side is found, the crossings towards it and back are located.
+
+    :param position_engine:   Position engine
+    :param ground_station:    Ground station
+    :param sid:               Satellite identifier
+    :param max_gsl_length_m:  Maximum GSL length (m)
+    :param start_ns:          Start time (ns since epoch)
+    :param end_ns:            End time (ns since epoch), at which it is on the same side as at the start
+
+    :return: List of the times (ns since epoch) of the two crossings, or empty if there is no pass
+    """
+
+    def range_function(time_ns):
+        return range_m(position_engine, ground_station, sid, max_gsl_length_m, time_ns)
+
+    start_range_m = range_function(start_ns)
+    was_in_range = start_range_m <= 0.0
+    parts = [(start_ns, start_range_m, end_ns, range_function(end_ns))]
+    while len(parts) > 0:
+        lo, lo_range_m, hi, hi_range_m = parts.pop()
+        if hi - lo <= 1 or abs(lo_range_m) + abs(hi_range_m) > GSL_MAX_RANGE_RATE_M_PER_S * (hi - lo) / 1000000000.0:
+            continue
+        mid = (lo + hi) // 2
+        mid_range_m = range_function(mid)
+        if (mid_range_m <= 0.0) != was_in_range:
+            return [
+                find_crossing_ns(position_engine, ground_station, sid, max_gsl_length_m, start_ns, mid),
+                find_crossing_ns(position_engine, ground_station, sid, max_gsl_length_m, mid, end_ns)
+            ]
+        parts.append((mid, mid_range_m, hi, hi_range_m))
+        parts.append((lo, lo_range_m, mid, mid_range_m))
+    return []
+
+
+def calculate_gsl_events(position_engine, ground_stations, num_satellites, max_gsl_length_m, start_ns, end_ns,
+                         sample_step_ns, spatial_index=False):
+    """
+    Find all events of satellites coming into and going out of range of ground stations in an interval.
+    The in-range satellites are sampled every sample step, and every change between two samples is located
+    by root-finding on the range function (the distance minus the maximum GSL length).
+
+    A satellite can also come into range and go out of range again (or vice versa) within one step, without
+    a change between the samples: a grazing pass can be arbitrarily short, whatever the sample step. As the
+    distance changes by at most GSL_MAX_RANGE_RATE_M_PER_S, this is only possible if the distances at both
+    samples together are within that rate times the step of the maximum GSL length. Therefore, the distances
+    up to that much beyond the maximum GSL length are sampled, and for those pairs such a pass is searched
+    for in between (see find_pass_ns()). The sample step should stay well below an orbital period (e.g., at
+    most a few minutes for low-earth orbit), such that a satellite passes a ground station at most once per step.
+
+    :param position_engine:   Position engine (e.g., from create_position_engine())
+    :param ground_stations:   List of extended ground stations
+    :param num_satellites:    Number of satellites
+    :param max_gsl_length_m:  Maximum GSL length (m)
+    :param start_ns:          Start time (ns since epoch)
+    :param end_ns:            End time (ns since epoch, inclusive)
+    :param sample_step_ns:    Sample step (ns)
+    :param spatial_index:     True iff the spatial index should be used to sample the in-range satellites
+
+    :return: GslEvents
+    """
+    if sample_step_ns <= 0:
+        raise ValueError("Sample step must be positive")
+    if end_ns < start_ns:
+        raise ValueError("End time cannot be before the start time")
+
+    # Sample times (always including the end)
+    sample_times_ns = list(range(start_ns, end_ns, sample_step_ns)) + [end_ns]
+
+    # The distances are sampled up to as far beyond the maximum GSL length as they can change within a step
+    sample_radius_m = max_gsl_length_m + GSL_MAX_RANGE_RATE_M_PER_S * sample_step_ns / 1000000000.0
+
+    # In-range satellites at the start
+    prev_distances_m = distance_matrix(calculate_ground_station_satellites_in_range(
+        position_engine, ground_stations, start_ns, sample_radius_m, spatial_index=spatial_index
+    ), num_satellites)
+    initial_in_range = prev_distances_m <= max_gsl_length_m
+
+    # Every change between two samples is an event
+    events = []
+    prev_in_range = initial_in_range
+    for i in range(1, len(sample_times_ns)):
+        distances_m = distance_matrix(calculate_ground_station_satellites_in_range(
+            position_engine, ground_stations, sample_times_ns[i], sample_radius_m, spatial_index=spatial_index
+        ), num_satellites)
+        in_range = distances_m <= max_gsl_length_m
+        for gid, sid in zip(*np.nonzero(in_range != prev_in_range)):
+            time_ns = find_crossing_ns(
+                position_engine, ground_stations[gid], sid, max_gsl_length_m, sample_times_ns[i - 1], sample_times_ns[i]
+            )
+            events.append((time_ns, int(gid), int(sid), bool(in_range[gid, sid])))
+
+        # Passes in between the samples are only possible if the distance can reach the maximum GSL length and back
+        max_change_m = GSL_MAX_RANGE_RATE_M_PER_S * (sample_times_ns[i] - sample_times_ns[i - 1]) / 1000000000.0
+        possible_pass = np.abs(prev_distances_m - max_gsl_length_m) + np.abs(distances_m - max_gsl_length_m) \
+            <= max_change_m
+        for gid, sid in zip(*np.nonzero((in_range == prev_in_range) & possible_pass)):
+            crossings_ns = find_pass_ns(
+                position_engine, ground_stations[gid], sid, max_gsl_length_m, sample_times_ns[i - 1], sample_times_ns[i]
+            )
+            if len(crossings_ns) > 0:
+                events.append((crossings_ns[0], int(gid), int(sid), not bool(in_range[gid, sid])))
+                events.append((crossings_ns[1], int(gid), int(sid), bool(in_range[gid, sid])))
+
+        prev_distances_m = distances_m
+        prev_in_range = in_range
+
+    # In order of time
+    events.sort()
+    return GslEvents(
+        start_ns,
+        end_ns,
+        initial_in_range,
+        np.array(list(map(lambda e: e[0], events)), dtype=np.int64),
+        np.array(list(map(lambda e: e[1], events)), dtype=int),
+        np.array(list(map(lambda e: e[2], events)), dtype=int),
+        np.array(list(map(lambda e: e[3], events)), dtype=bool)
+    )
+
+
+def calculate_ground_station_satellites_in_range_from_events(
+        position_engine,
+        ground_stations,
+        time_since_epoch_ns,
+        max_gsl_length_m,
+        gsl_events
+):
+    """
+    Determine for each ground station which satellites are within the maximum GSL length, only calculating
+    the distances to the satellites which are in range according to the GSL events.
+
+    :param position_engine:      Position engine
+    :param ground_stations:      List of extended ground stations
+    :param time_since_epoch_ns:  Time since epoch (ns)
+    :param max_gsl_length_m:     Maximum GSL length (m)
+    :param gsl_events:           GslEvents (e.g., from calculate_gsl_events()) of an interval including the time
+
+    :return: List (one per ground station) of lists of (distance (m), satellite id), in increasing satellite id
+    """
+    in_range = gsl_events.in_range_at(time_since_epoch_ns)
+    candidate_sids = list(map(lambda gid: np.nonzero(in_range[gid])[0], range(len(ground_stations))))
+    candidate_distances_m = position_engine.ground_station_satellite_candidate_distances_m(
+        ground_stations,
+        time_since_epoch_ns,
+        candidate_sids
+    )
+    ground_station_satellites_in_range = []
+    for gid in range(len(ground_stations)):
+        within_range = candidate_distances_m[gid] <= max_gsl_length_m
+        ground_station_satellites_in_range.append(list(map(
+            lambda i: (float(candidate_distances_m[gid][i]), int(candidate_sids[gid][i])),
+            np.nonzero(within_range)[0]
+        )))
+    return ground_station_satellites_in_range
@@ -0,0 +1,215 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import bisect
+import numpy as np
+from numpy.polynomial import chebyshev
+from .position_engine import distance_m_ground_stations_to_satellites, ground_station_positions_m
+
+# Defaults of the Chebyshev interpolation
+CHEBYSHEV_WINDOW_NS = 10 * 1000 * 1000 * 1000
+CHEBYSHEV_DEGREE = 10
+CHEBYSHEV_MAX_ERROR_M = 10.0
+CHEBYSHEV_MIN_WINDOW_NS = 1000 * 1000
+
+# Number of fitted windows which are kept (the oldest fitted is discarded first)
+CHEBYSHEV_MAX_WINDOWS_KEPT = 4
+
+
+class ChebyshevPositionEngine:
+    """
+    Position engine which interpolates another position engine with Chebyshev polynomials.
+
+    Time is divided into windows (by default of 10 seconds). For each window, the underlying engine is evaluated
+    at the Chebyshev nodes, and a polynomial is fitted per satellite and coordinate. The fit is validated
+    against the underlying engine halfway between the nodes: if the error exceeds max_error_m, the window
+    is split in two halves which are fitted separately (down to a minimum window). Afterwards, the positions at
+    any time within the window require only the evaluation of the polynomials, which makes granularities of
+    a millisecond (or finer) affordable.
+
+    For an earth-fixed engine, the ground station distances follow from the interpolated positions. Otherwise
+    (ephem), the distance of every ground station to every satellite is interpolated the same way, per set of
+    ground stations.
+
+    The default maximum error is 10 m, as the ephem positions themselves are only smooth up to a few meters
+    (ephem calculates internally with limited precision). The sgp4 engine is interpolated to well below a
+    millimeter with the default window and degree, such that a much smaller maximum error can be set for it.
+    """
+
+    def __init__(
+            self,
+            position_engine,
+            window_ns=CHEBYSHEV_WINDOW_NS,
+            degree=CHEBYSHEV_DEGREE,
+            max_error_m=CHEBYSHEV_MAX_ERROR_M,
+            min_window_ns=CHEBYSHEV_MIN_WINDOW_NS
+    ):
+        if window_ns <= 0 or min_window_ns <= 0:
+            raise ValueError("Chebyshev window must be positive")
+        if degree < 1:
+            raise ValueError("Chebyshev degree must be at least 1")
+        if max_error_m <= 0:
+            raise ValueError("Chebyshev maximum error must be positive")
+        self.position_engine = position_engine
+        self.name = position_engine.name
+        self.earth_fixed = position_engine.earth_fixed
+        self.window_ns = window_ns
+        self.degree = degree
+        self.max_error_m = max_error_m
+        self.min_window_ns = min_window_ns
+
+        # Largest error found during validation of the fits
+        self.max_validation_error_m = 0.0
+
+        # Fitted windows of the positions, and of the distances for each set of ground stations
+        self.position_windows = {}
+        self.distance_windows = {}
+
+    def satellite_positions_m(self, time_since_epoch_ns):
+        """
+        Calculate the (interpolated) position of all satellites.
+
+        :param time_since_epoch_ns: Time since epoch (ns)
+
+        :return: Numpy array of shape (number of satellites, 3) of positions (m)
+        """
+        return self.interpolate(
+            self.position_windows,
+            lambda t: self.position_engine.satellite_positions_m(t),
+            lambda values: np.max(np.linalg.norm(values, axis=-1)),
+            time_since_epoch_ns
+        )
+
+    def ground_station_satellite_distances_m(self, ground_stations, time_since_epoch_ns):
+        """
+        Calculate the (interpolated) distance of every ground station to every satellite.
+
+        :param ground_stations:      List of extended ground stations
+        :param time_since_epoch_ns:  Time since epoch (ns)
+
+        :return: Numpy array of shape (number of ground stations, number of satellites) of distances (m)
+        """
+        if self.earth_fixed:
+            return distance_m_ground_stations_to_satellites(
+                ground_station_positions_m(ground_stations),
+                self.satellite_positions_m(time_since_epoch_ns)
+            )
+
+        # The fitted distances are only valid for the same ground stations
+        key = tuple(map(
+            lambda g: (g["latitude_degrees_str"], g["longitude_degrees_str"], g["elevation_m_float"]),
+            ground_stations
+        ))
+        if key not in self.distance_windows:
+            self.distance_windows[key] = {}
+
+        return self.interpolate(
+            self.distance_windows[key],
+            lambda t: self.position_engine.ground_station_satellite_distances_m(ground_stations, t),
+            lambda values: np.max(np.abs(values)),
+            time_since_epoch_ns
+        )
+
+    def ground_station_satellite_candidate_distances_m(self, ground_stations, time_since_epoch_ns, candidate_sids):
+        """
+        Calculate the (interpolated) distance of every ground station to each of its candidate satellites.
+
+        :param ground_stations:      List of extended ground stations
+        :param time_since_epoch_ns:  Time since epoch (ns)
+        :param candidate_sids:       List (one per ground station) of numpy arrays of satellite identifiers
+
+        :return: List (one per ground station) of numpy arrays of distances (m), aligned with the candidates
+        """
+        distances_m = self.ground_station_satellite_distances_m(ground_stations, time_since_epoch_ns)
+        return list(map(lambda gid: distances_m[gid][candidate_sids[gid]], range(len(ground_stations))))
+
+    def earth_fixed_proxy(self):
+        if self.earth_fixed:
+            return self
+        return self.position_engine.earth_fixed_proxy()
+
+    def interpolate(self, windows, calculate, error_m, time_since_epoch_ns):
+        """
+        Evaluate the fitted polynomials at a time, fitting its window first if it was not yet.
+
+        :param windows:              Dictionary of window index to (sorted start times, list of fits)
+        :param calculate:            Function of time to the exact values (numpy array)
+        :param error_m:              Function of the difference in values to the error (m)
+        :param time_since_epoch_ns:  Time since epoch (ns)
+
+        :return: Interpolated values (numpy array of the same shape as calculate() returns)
+        """
+        window_idx = int(time_since_epoch_ns // self.window_ns)
+        if window_idx not in windows:
+            fits = self.fit(
+                calculate, error_m, window_idx * self.window_ns, (window_idx + 1) * self.window_ns
+            )
+            windows[window_idx] = (list(map(lambda f: f[0], fits)), fits)
+            if len(windows) > CHEBYSHEV_MAX_WINDOWS_KEPT:
+                del windows[next(iter(windows))]
+        starts, fits = windows[window_idx]
+        (start_ns, end_ns, coefficients, shape) = fits[bisect.bisect_right(starts, time_since_epoch_ns) - 1]
+        x = 2.0 * (time_since_epoch_ns - start_ns) / (end_ns - start_ns) - 1.0
+        return chebyshev.chebval(x, coefficients).reshape(shape)
+
+    def fit(self, calculate, error_m, start_ns, end_ns):
+        """
+        Fit Chebyshev polynomials over [start_ns, end_ns], split in halves until within the maximum error.
+
+        :param calculate:  Function of time to the exact values (numpy array)
+        :param error_m:    Function of the difference in values to the error (m)
+        :param start_ns:   Start of the window (ns)
+        :param end_ns:     End of the window (ns)
+
+        :return: List of (start (ns), end (ns), coefficients, shape of values), sorted by start
+        """
+
+        # Chebyshev nodes of the first kind, mapped onto the window
+        node_x = chebyshev.chebpts1(self.degree + 1)
+        values = np.array(list(map(lambda x: calculate(self.to_time_ns(x, start_ns, end_ns)), node_x)))
+        shape = values.shape[1:]
+        coefficients = chebyshev.chebfit(node_x, values.reshape((len(node_x), -1)), self.degree)
+
+        # Validate halfway between the nodes
+        validation_x = (node_x[1:] + node_x[:-1]) / 2.0
+        max_error_m = 0.0
+        for x in validation_x:
+            difference = chebyshev.chebval(x, coefficients).reshape(shape) \
+                         - calculate(self.to_time_ns(x, start_ns, end_ns))
+            max_error_m = max(max_error_m, float(error_m(difference)))
+
+        # Split if it is not within the error bound
+        if max_error_m > self.max_error_m:
+            if (end_ns - start_ns) / 2.0 < self.min_window_ns:
+                raise ValueError(
+                    "Chebyshev interpolation error %.6f m exceeds %.6f m with the minimum window of %d ns" % (
+                        max_error_m, self.max_error_m, self.min_window_ns
+                    )
+                )
+            middle_ns = (start_ns + end_ns) // 2
+            return self.fit(calculate, error_m, start_ns, middle_ns) + self.fit(calculate, error_m, middle_ns, end_ns)
+        self.max_validation_error_m = max(self.max_validation_error_m, max_error_m)
+        return [(start_ns, end_ns, coefficients, shape)]
+
+    @staticmethod
+    def to_time_ns(x, start_ns, end_ns):
+        return start_ns + (x + 1.0) / 2.0 * (end_ns - start_ns)
@@ -0,0 +1,57 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import sys
+import exputil
+from satgen.tles import read_tles
+from satgen.isls import read_isls
+from satgen.ground_stations import read_ground_stations_extended
+from satgen.positions.position_engine import create_position_engine
+from satgen.positions.error_report import compare_position_engines, print_position_engine_comparison
+
+
+def main():
+    args = sys.argv[1:]
+    if len(args) != 5:
+        print("Must supply exactly five arguments")
+        print("Usage: python -m satgen.positions.main_compare_position_engines [satellite_network_dir] "
+              "[position_engine] [reference_position_engine] [time_step_ms] [duration_s]")
+        exit(1)
+    else:
+        satellite_network_dir = args[0]
+        tles = read_tles(satellite_network_dir + "/tles.txt")
+        satellites = tles["satellites"]
+        description = exputil.PropertiesConfig(satellite_network_dir + "/description.txt")
+        time_step_ns = int(args[3]) * 1000 * 1000
+        duration_ns = int(args[4]) * 1000 * 1000 * 1000
+        print_position_engine_comparison(compare_position_engines(
+            create_position_engine(args[1], tles["epoch"], satellites),
+            create_position_engine(args[2], tles["epoch"], satellites),
+            list(range(0, duration_ns, time_step_ns)),
+            read_isls(satellite_network_dir + "/isls.txt", len(satellites)),
+            read_ground_stations_extended(satellite_network_dir + "/ground_stations.txt"),
+            exputil.parse_positive_float(description.get_property_or_fail("max_gsl_length_m"))
+        ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,431 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import math
+import ephem
+import numpy as np
+from sgp4.api import Satrec, SatrecArray, WGS72
+from .time_grid import TimeGrid, EPHEM_DATE_TO_JULIAN_DATE
+
+# Julian date of the sgp4 epoch origin (1949 December 31 00:00 UT)
+SGP4_EPOCH_JULIAN_DATE = 2433281.5
+
+# Maximum eccentricity of an orbit to be considered circular by the Kepler engine
+KEPLER_MAX_ECCENTRICITY = 0.0001
+
+
+class EphemPositionEngine:
+    """
+    Reference position engine which uses pyephem, the same as the pair-wise functions in distance_tools.
+
+    All satellites are computed once per time moment with respect to a single observer on the equator
+    at the prime meridian. Their positions are expressed as vectors relative to that observer, which
+    yields the same inter-satellite distances as distance_m_between_satellites() (up to floating point
+    rounding), at the cost of one computation per satellite instead of two per satellite pair.
+    As those vectors are not earth-fixed, ground station distances are computed with one observer
+    per ground station instead, the same as distance_m_ground_station_to_satellite().
+    """
+
+    name = "ephem"
+    earth_fixed = False
+
+    def __init__(self, epoch, satellites):
+        self.epoch = epoch
+        self.time_grid = TimeGrid(epoch)
+        self.satellites = satellites
+        self.sgp4_proxy = None
+
+    def satellite_positions_m(self, time_since_epoch_ns):
+        """
+        Calculate the position of all satellites.
+
+        :param time_since_epoch_ns: Time since epoch (ns)
+
+        :return: Numpy array of shape (number of satellites, 3) of positions (m) relative to the observer
+        """
+
+        # Create an observer somewhere on the planet
+        observer = ephem.Observer()
+        observer.epoch = self.time_grid.epoch_ephem_date
+        observer.date = self.time_grid.ephem_date(time_since_epoch_ns)
+        observer.lat = 0
+        observer.lon = 0
+        observer.elevation = 0
+
+        # The direction and range as seen from the observer gives the position relative to it
+        positions_m = np.empty((len(self.satellites), 3))
+        for sid in range(len(self.satellites)):
+            satellite = self.satellites[sid]
+            satellite.compute(observer)
+            ra = float(satellite.ra)
+            dec = float(satellite.dec)
+            positions_m[sid, 0] = satellite.range * math.cos(dec) * math.cos(ra)
+            positions_m[sid, 1] = satellite.range * math.cos(dec) * math.sin(ra)
+            positions_m[sid, 2] = satellite.range * math.sin(dec)
+        return positions_m
+
+    def ground_station_satellite_distances_m(self, ground_stations, time_since_epoch_ns):
+        """
+        Calculate the distance of every ground station to every satellite.
+
+        :param ground_stations:      List of ground stations
+        :param time_since_epoch_ns:  Time since epoch (ns)
+
+        :return: Numpy array of shape (number of ground stations, number of satellites) of distances (m)
+        """
+        all_sids = np.arange(len(self.satellites))
+        return np.array(self.ground_station_satellite_candidate_distances_m(
+            ground_stations,
+            time_since_epoch_ns,
+            [all_sids] * len(ground_stations)
+        )).reshape((len(ground_stations), len(self.satellites)))
+
+    def ground_station_satellite_candidate_distances_m(self, ground_stations, time_since_epoch_ns, candidate_sids):
+        """
+        Calculate the distance of every ground station to each of its candidate satellites.
+
+        :param ground_stations:      List of ground stations
+        :param time_since_epoch_ns:  Time since epoch (ns)
+        :param candidate_sids:       List (one per ground station) of numpy arrays of satellite identifiers
+
+        :return: List (one per ground station) of numpy arrays of distances (m), aligned with the candidates
+        """
+        epoch_date = self.time_grid.epoch_ephem_date
+        date = self.time_grid.ephem_date(time_since_epoch_ns)
+        candidate_distances_m = []
+        for gid in range(len(ground_stations)):
+
+            # Create an observer on the planet where the ground station is
+            observer = ephem.Observer()
+            observer.epoch = epoch_date
+            observer.date = date
+            observer.lat = str(ground_stations[gid]["latitude_degrees_str"])   # String argument is in degrees
+            observer.lon = str(ground_stations[gid]["longitude_degrees_str"])  # (a float would be radians)
+            observer.elevation = ground_stations[gid]["elevation_m_float"]
+
+            # Distance from each candidate satellite to the observer
+            distances_m = np.empty(len(candidate_sids[gid]))
+            for i in range(len(candidate_sids[gid])):
+                satellite = self.satellites[candidate_sids[gid][i]]
+                satellite.compute(observer)
+                distances_m[i] = satellite.range
+            candidate_distances_m.append(distances_m)
+
+        return candidate_distances_m
+
+    def earth_fixed_proxy(self):
+        """
+        Earth-fixed engine for the same satellites, which can be used to pre-select candidates.
+
+        :return: Sgp4PositionEngine
+        """
+        if self.sgp4_proxy is None:
+            self.sgp4_proxy = Sgp4PositionEngine(self.epoch, self.satellites)
+        return self.sgp4_proxy
+
+
+class EarthFixedPositionEngine:
+    """
+    Base of the position engines whose satellite positions are in an earth-centered, earth-fixed (ECEF) frame,
+    such that ground station distances follow directly from the ground station Cartesian coordinates.
+    Sub-classes implement satellite_positions_m().
+    """
+
+    earth_fixed = True
+
+    def ground_station_satellite_distances_m(self, ground_stations, time_since_epoch_ns):
+        """
+        Calculate the distance of every ground station to every satellite.
+
+        :param ground_stations:      List of extended ground stations (with Cartesian coordinates)
+        :param time_since_epoch_ns:  Time since epoch (ns)
+
+        :return: Numpy array of shape (number of ground stations, number of satellites) of distances (m)
+        """
+        return distance_m_ground_stations_to_satellites(
+            ground_station_positions_m(ground_stations),
+            self.satellite_positions_m(time_since_epoch_ns)
+        )
+
+    def ground_station_satellite_candidate_distances_m(self, ground_stations, time_since_epoch_ns, candidate_sids):
+        """
+        Calculate the distance of every ground station to each of its candidate satellites.
+
+        :param ground_stations:      List of extended ground stations (with Cartesian coordinates)
+        :param time_since_epoch_ns:  Time since epoch (ns)
+        :param candidate_sids:       List (one per ground station) of numpy arrays of satellite identifiers
+
+        :return: List (one per ground station) of numpy arrays of distances (m), aligned with the candidates
+        """
+        satellite_positions_m = self.satellite_positions_m(time_since_epoch_ns)
+        ground_station_positions = ground_station_positions_m(ground_stations)
+        candidate_distances_m = []
+        for gid in range(len(ground_stations)):
+            candidate_distances_m.append(distance_m_ground_stations_to_satellites(
+                ground_station_positions[gid:(gid + 1)],
+                satellite_positions_m[candidate_sids[gid]]
+            )[0])
+        return candidate_distances_m
+
+    def earth_fixed_proxy(self):
+        """
+        Earth-fixed engine for the same satellites, which is this engine itself.
+
+        :return: This position engine
+        """
+        return self
+
+
+class Sgp4PositionEngine(EarthFixedPositionEngine):
+    """
+    Vectorized position engine which uses the sgp4 library to propagate all satellites at once.
+
+    The positions are expressed in an earth-centered, earth-fixed (ECEF) frame, obtained by rotating
+    the TEME output of SGP-4 by the Greenwich mean sidereal time. Polar motion is neglected.
+    Its distances differ slightly from the pyephem reference: in the order of meters between satellites,
+    and in the order of tens of meters between ground stations and satellites (pyephem uses different
+    Earth constants than WGS72 for the observer location).
+    """
+
+    name = "sgp4"
+
+    def __init__(self, epoch, satellites):
+        self.epoch = epoch
+        self.time_grid = TimeGrid(epoch)
+        self.satellites = satellites
+        self.satrec_array = SatrecArray(list(map(satrec_from_ephem, satellites)))
+        self.last_time_since_epoch_ns = None
+        self.last_positions_m = None
+
+    def satellite_positions_m(self, time_since_epoch_ns):
+        """
+        Calculate the position of all satellites.
+
+        :param time_since_epoch_ns: Time since epoch (ns)
+
+        :return: Numpy array of shape (number of satellites, 3) of ECEF positions (m)
+        """
+        if time_since_epoch_ns == self.last_time_since_epoch_ns:
+            return self.last_positions_m
+        jd, jd_fraction = self.time_grid.julian_date_split(time_since_epoch_ns)
+        errors, positions_km, _ = self.satrec_array.sgp4(np.array([jd]), np.array([jd_fraction]))
+        if np.any(errors != 0):
+            raise ValueError("SGP-4 propagation failed for satellite(s): " + str(list(np.nonzero(errors)[0])))
+        self.last_time_since_epoch_ns = time_since_epoch_ns
+        self.last_positions_m = teme_to_ecef(positions_km[:, 0, :] * 1000.0, jd, jd_fraction)
+        return self.last_positions_m
+
+
+class KeplerPositionEngine(EarthFixedPositionEngine):
+    """
+    Analytic position engine for circular orbits, such as the constellations of
+    generate_tles_from_scratch_manual().
+
+    Each satellite moves with constant angular velocity over a circle with the SGP-4 mean semi-major axis,
+    with the secular drift of the ascending node, argument of perigee and mean anomaly due to J2
+    (as initialized by SGP-4 from the TLE). All satellites are evaluated at once with vectorized
+    trigonometry, after which they are rotated into the ECEF frame the same as the sgp4 engine.
+    The short-periodic perturbations of SGP-4 are neglected, which results in errors in the order of
+    kilometers compared to the sgp4 and ephem engines (see compare_position_engines()).
+    """
+
+    name = "kepler"
+
+    def __init__(self, epoch, satellites, max_eccentricity=KEPLER_MAX_ECCENTRICITY):
+        self.epoch = epoch
+        self.time_grid = TimeGrid(epoch)
+        self.satellites = satellites
+        satrecs = list(map(satrec_from_ephem, satellites))
+        for sid in range(len(satrecs)):
+            if satrecs[sid].ecco > max_eccentricity:
+                raise ValueError("Kepler position engine requires circular orbits, satellite %d has eccentricity %f" % (
+                    sid, satrecs[sid].ecco
+                ))
+
+        # Mean elements at the TLE epoch and their secular rates (rad/min)
+        self.semi_major_axis_m = np.array(list(map(lambda r: r.a * r.radiusearthkm * 1000.0, satrecs)))
+        self.inclination_rad = np.array(list(map(lambda r: r.inclo, satrecs)))
+        self.raan_rad = np.array(list(map(lambda r: r.nodeo, satrecs)))
+        self.argument_of_latitude_rad = np.array(list(map(lambda r: r.argpo + r.mo, satrecs)))
+        self.raan_rate_rad_per_min = np.array(list(map(lambda r: r.nodedot, satrecs)))
+        self.argument_of_latitude_rate_rad_per_min = np.array(list(map(lambda r: r.argpdot + r.mdot, satrecs)))
+
+        # Minutes between the TLE epoch of each satellite and the epoch
+        self.epoch_offset_min = np.array(list(map(
+            lambda r: (self.time_grid.julian_date(0) - (r.jdsatepoch + r.jdsatepochF)) * 1440.0,
+            satrecs
+        )))
+
+    def satellite_positions_m(self, time_since_epoch_ns):
+        """
+        Calculate the position of all satellites.
+
+        :param time_since_epoch_ns: Time since epoch (ns)
+
+        :return: Numpy array of shape (number of satellites, 3) of ECEF positions (m)
+        """
+        minutes = self.epoch_offset_min + time_since_epoch_ns / 60000000000.0
+        raan = self.raan_rad + self.raan_rate_rad_per_min * minutes
+        argument_of_latitude = self.argument_of_latitude_rad + self.argument_of_latitude_rate_rad_per_min * minutes
+        cos_raan = np.cos(raan)
+        sin_raan = np.sin(raan)
+        cos_u = np.cos(argument_of_latitude)
+        sin_u = np.sin(argument_of_latitude)
+        cos_i = np.cos(self.inclination_rad)
+        positions_teme = np.empty((len(self.satellites), 3))
+        positions_teme[:, 0] = self.semi_major_axis_m * (cos_raan * cos_u - sin_raan * sin_u * cos_i)
+        positions_teme[:, 1] = self.semi_major_axis_m * (sin_raan * cos_u + cos_raan * sin_u * cos_i)
+        positions_teme[:, 2] = self.semi_major_axis_m * (sin_u * np.sin(self.inclination_rad))
+        jd, jd_fraction = self.time_grid.julian_date_split(time_since_epoch_ns)
+        return teme_to_ecef(positions_teme, jd, jd_fraction)
+
+
+def create_position_engine(position_engine, epoch, satellites):
+    """
+    Create a satellite position engine.
+
+    :param position_engine:  Name of the engine ("ephem", "sgp4" or "kepler")
+    :param epoch:            Epoch of the TLEs (astropy Time)
+    :param satellites:       List of ephem satellites
+
+    :return: Position engine
+    """
+    if position_engine == "ephem":
+        return EphemPositionEngine(epoch, satellites)
+    elif position_engine == "sgp4":
+        return Sgp4PositionEngine(epoch, satellites)
+    elif position_engine == "kepler":
+        return KeplerPositionEngine(epoch, satellites)
+    else:
+        raise ValueError("Unknown position engine: " + str(position_engine))
+
+
+def satrec_from_ephem(satellite):
+    """
+    Create an sgp4 satellite record from the orbital elements of an ephem satellite.
+
+    :param satellite: Ephem satellite (e.g., from read_tles())
+
+    :return: sgp4 Satrec
+    """
+    minutes_per_day = 1440.0
+    rev_per_day_to_rad_per_min = 2.0 * math.pi / minutes_per_day
+    satrec = Satrec()
+    satrec.sgp4init(
+        WGS72,
+        'i',
+        satellite.catalog_number,
+        float(satellite._epoch) + EPHEM_DATE_TO_JULIAN_DATE - SGP4_EPOCH_JULIAN_DATE,
+        satellite._drag,
+        satellite._decay * rev_per_day_to_rad_per_min / minutes_per_day,
+        0.0,
+        satellite._e,
+        float(satellite._ap),
+        float(satellite._inc),
+        float(satellite._M),
+        satellite._n * rev_per_day_to_rad_per_min,
+        float(satellite._raan)
+    )
+    return satrec
+
+
+def greenwich_mean_sidereal_time_rad(jd, jd_fraction=0.0):
+    """
+    Greenwich mean sidereal time according to the IAU-82 model (as used by SGP-4).
+
+    :param jd:           Julian date (UT1)
+    :param jd_fraction:  Fraction to add to the Julian date (to retain precision)
+
+    :return: Angle in radians within [0, 2 pi)
+    """
+    t_ut1 = ((jd - 2451545.0) + jd_fraction) / 36525.0
+    gmst_s = (
+        -6.2e-6 * t_ut1 * t_ut1 * t_ut1
+        + 0.093104 * t_ut1 * t_ut1
+        + (876600.0 * 3600.0 + 8640184.812866) * t_ut1
+        + 67310.54841
+    )
+    return np.mod(np.radians(gmst_s / 240.0), 2.0 * math.pi)
+
+
+def teme_to_ecef(positions_teme, jd, jd_fraction=0.0):
+    """
+    Rotate positions from the TEME frame to the ECEF frame (neglecting polar motion).
+
+    :param positions_teme:  Numpy array of shape (n, 3)
+    :param jd:              Julian date (UT1)
+    :param jd_fraction:     Fraction to add to the Julian date (to retain precision)
+
+    :return: Numpy array of shape (n, 3)
+    """
+    gmst = greenwich_mean_sidereal_time_rad(jd, jd_fraction)
+    cos_gmst = np.cos(gmst)
+    sin_gmst = np.sin(gmst)
+    positions_ecef = np.empty(positions_teme.shape)
+    positions_ecef[..., 0] = cos_gmst * positions_teme[..., 0] + sin_gmst * positions_teme[..., 1]
+    positions_ecef[..., 1] = -sin_gmst * positions_teme[..., 0] + cos_gmst * positions_teme[..., 1]
+    positions_ecef[..., 2] = positions_teme[..., 2]
+    return positions_ecef
+
+
+def ground_station_positions_m(ground_stations):
+    """
+    Collect the Cartesian (ECEF) positions of the ground stations.
+
+    :param ground_stations: List of extended ground stations
+
+    :return: Numpy array of shape (number of ground stations, 3)
+    """
+    positions_m = np.empty((len(ground_stations), 3))
+    for gid in range(len(ground_stations)):
+        positions_m[gid, 0] = ground_stations[gid]["cartesian_x"]
+        positions_m[gid, 1] = ground_stations[gid]["cartesian_y"]
+        positions_m[gid, 2] = ground_stations[gid]["cartesian_z"]
+    return positions_m
+
+
+def distance_m_isls(satellite_positions_m, isls):
+    """
+    Calculate the length of all ISLs at once.
+
+    :param satellite_positions_m:  Numpy array of shape (number of satellites, 3)
+    :param isls:                   List of (a, b) satellite pairs or numpy array of shape (number of ISLs, 2)
+
+    :return: Numpy array of ISL lengths (m), in the same order as the ISLs
+    """
+    isls = np.array(isls, dtype=int).reshape(-1, 2)
+    return np.linalg.norm(satellite_positions_m[isls[:, 0]] - satellite_positions_m[isls[:, 1]], axis=1)
+
+
+def distance_m_ground_stations_to_satellites(ground_station_positions_m, satellite_positions_m):
+    """
+    Calculate the distance from every ground station to every satellite.
+
+    :param ground_station_positions_m:  Numpy array of shape (number of ground stations, 3)
+    :param satellite_positions_m:       Numpy array of shape (number of satellites, 3) in the same frame
+
+    :return: Numpy array of shape (number of ground stations, number of satellites) of distances (m)
+    """
+    return np.linalg.norm(
+        ground_station_positions_m[:, np.newaxis, :] - satellite_positions_m[np.newaxis, :, :],
+        axis=2
+    )
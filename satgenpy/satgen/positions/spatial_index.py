@@ -0,0 +1,119 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import numpy as np
+from scipy.spatial import cKDTree
+from .position_engine import ground_station_positions_m, distance_m_ground_stations_to_satellites
+
+# Additional search radius when pre-selecting candidate satellites (using the spatial index, or for an
+# engine which is not earth-fixed).
+# It must exceed the difference in distance between the engine used for the index (earth-fixed)
+# and the engine which calculates the final distances (in the order of tens of meters).
+SPATIAL_INDEX_MARGIN_M = 10000.0
+
+
+class SatelliteSpatialIndex:
+    """
+    KD-tree over the earth-fixed satellite positions of a single time moment (rebuilt every time step).
+    """
+
+    def __init__(self, satellite_positions_m):
+        self.kd_tree = cKDTree(satellite_positions_m)
+
+    def satellites_within(self, positions_m, radius_m):
+        """
+        Find the satellites within a radius of each of the positions.
+
+        :param positions_m:  Numpy array of shape (n, 3) in the same frame as the satellite positions
+        :param radius_m:     Search radius (m)
+
+        :return: List (one per position) of sorted numpy arrays of satellite identifiers
+        """
+        return list(map(
+            lambda sids: np.array(sids, dtype=int),
+            self.kd_tree.query_ball_point(positions_m, radius_m, return_sorted=True)
+        ))
+
+
+def calculate_ground_station_satellites_in_range(
+        position_engine,
+        ground_stations,
+        time_since_epoch_ns,
+        max_gsl_length_m,
+        spatial_index=False
+):
+    """
+    Determine for each ground station which satellites are within the maximum GSL length.
+
+    For an earth-fixed engine without spatial index, the distance of every ground station to every satellite
+    is calculated at once. Otherwise, first the candidates within a slightly larger radius are selected using
+    the earth-fixed satellite positions (with the spatial index by a KD-tree, else by calculating all distances
+    at once), after which only the distances to those candidates are calculated by the position engine.
+    This way an engine which calculates the distances per ground station (ephem) only does so for the
+    satellites which are (nearly) in range. All yield exactly the same in-range satellites and distances.
+
+    :param position_engine:      Position engine (e.g., from create_position_engine())
+    :param ground_stations:      List of extended ground stations
+    :param time_since_epoch_ns:  Time since epoch (ns)
+    :param max_gsl_length_m:     Maximum GSL length (m)
+    :param spatial_index:        True iff the spatial index should be used
+
+    :return: List (one per ground station) of lists of (distance (m), satellite id), in increasing satellite id
+    """
+    ground_station_satellites_in_range = []
+
+    if not spatial_index and position_engine.earth_fixed:
+        distances_m = position_engine.ground_station_satellite_distances_m(ground_stations, time_since_epoch_ns)
+        in_range = distances_m <= max_gsl_length_m
+        for gid in range(len(ground_stations)):
+            ground_station_satellites_in_range.append(list(map(
+                lambda sid: (float(distances_m[gid, sid]), int(sid)),
+                np.nonzero(in_range[gid])[0]
+            )))
+
+    else:
+        index_engine = position_engine.earth_fixed_proxy()
+        index_satellite_positions_m = index_engine.satellite_positions_m(time_since_epoch_ns)
+        if spatial_index:
+            candidate_sids = SatelliteSpatialIndex(index_satellite_positions_m).satellites_within(
+                ground_station_positions_m(ground_stations),
+                max_gsl_length_m + SPATIAL_INDEX_MARGIN_M
+            )
+        else:
+            within_margin = distance_m_ground_stations_to_satellites(
+                ground_station_positions_m(ground_stations),
+                index_satellite_positions_m
+            ) <= max_gsl_length_m + SPATIAL_INDEX_MARGIN_M
+            candidate_sids = [np.nonzero(within_margin[gid])[0] for gid in range(len(ground_stations))]
+        candidate_distances_m = position_engine.ground_station_satellite_candidate_distances_m(
+            ground_stations,
+            time_since_epoch_ns,
+            candidate_sids
+        )
+        for gid in range(len(ground_stations)):
+            in_range = candidate_distances_m[gid] <= max_gsl_length_m
+            ground_station_satellites_in_range.append(list(map(
+                lambda i: (float(candidate_distances_m[gid][i]), int(candidate_sids[gid][i])),
+                np.nonzero(in_range)[0]
+            )))
+
+    return ground_station_satellites_in_range
@@ -0,0 +1,86 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import math
+import ephem
+
+# Julian date of the ephem date origin (1899 December 31 12:00 UT)
+EPHEM_DATE_TO_JULIAN_DATE = 2415020.0
+
+# Nanoseconds in a day
+NS_PER_DAY = 86400.0 * 1000 * 1000 * 1000
+
+
+class TimeGrid:
+    """
+    Time axis of a simulation starting at the (astropy) epoch.
+
+    The epoch is converted only once to an ephem date (float days since 1899 December 31 12:00 UT),
+    after which the date of every time since epoch is calculated numerically instead of by formatting
+    an astropy Time as string and letting ephem parse it again. As the string of the epoch is used for
+    the conversion, it is the same epoch (with millisecond resolution) as str(epoch). For an epoch on a whole
+    millisecond, the dates are the same as ephem.Date(str(epoch + time_since_epoch_ns * u.ns)) up to
+    the floating point resolution of ephem dates (below a microsecond).
+    """
+
+    def __init__(self, epoch, time_step_ns=None, duration_ns=None):
+        self.epoch = epoch
+        self.epoch_ephem_date = float(ephem.Date(str(epoch)))
+        self.epoch_julian_date_whole = EPHEM_DATE_TO_JULIAN_DATE + math.floor(self.epoch_ephem_date)
+        self.epoch_julian_date_fraction = self.epoch_ephem_date - math.floor(self.epoch_ephem_date)
+        self.time_step_ns = time_step_ns
+        self.duration_ns = duration_ns
+
+    def ephem_date(self, time_since_epoch_ns):
+        """
+        :param time_since_epoch_ns: Time since epoch (ns)
+
+        :return: Ephem date (float, days)
+        """
+        return self.epoch_ephem_date + time_since_epoch_ns / NS_PER_DAY
+
+    def julian_date(self, time_since_epoch_ns):
+        """
+        :param time_since_epoch_ns: Time since epoch (ns)
+
+        :return: Julian date (float, days)
+        """
+        return self.ephem_date(time_since_epoch_ns) + EPHEM_DATE_TO_JULIAN_DATE
+
+    def julian_date_split(self, time_since_epoch_ns):
+        """
+        Julian date split in two parts, such that the fraction retains sub-microsecond precision
+        (as a single float, a Julian date has a resolution of tens of microseconds).
+
+        :param time_since_epoch_ns: Time since epoch (ns)
+
+        :return: Tuple of (whole, fraction) of which the sum is the Julian date (float, days)
+        """
+        return self.epoch_julian_date_whole, self.epoch_julian_date_fraction + time_since_epoch_ns / NS_PER_DAY
+
+    def times_since_epoch_ns(self):
+        """
+        :return: Range of the time since epoch (ns) of every time step
+        """
+        if self.time_step_ns is None or self.duration_ns is None:
+            raise ValueError("Time grid has no time step and duration")
+        return range(0, self.duration_ns, self.time_step_ns)
@@ -1,10 +1,13 @@
 from .print_routes_and_rtt import print_routes_and_rtt
-from .analyze_path import analyze_path
-from .analyze_rtt import analyze_rtt
+from .analyze_path import analyze_path, write_path_analysis
+from .analyze_rtt import analyze_rtt, write_rtt_analysis
+from .inline_analysis import InlineAnalysis
 from .analyze_time_step_path import analyze_time_step_path
 from .print_graphical_routes_and_rtt import print_graphical_routes_and_rtt
 from .graph_tools import (
+    analysis_position_engine,
     construct_graph_with_distances,
+    construct_sat_net_graph_with_distances,
     compute_path_length_with_graph,
     compute_path_length_without_graph,
     get_path,
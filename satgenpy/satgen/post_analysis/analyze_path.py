@@ -115,11 +115,44 @@ def analyze_path(
         it += 1
     print("")
 
+    # Write the analysis, with the routes and RTT over time of the top pairs
+    write_path_analysis(
+        data_dir,
+        len(satellites),
+        len(ground_stations),
+        path_list_per_pair,
+        time_step_num_path_changes,
+        time_step_num_fstate_updates,
+        lambda src_node_id, dst_node_id: print_routes_and_rtt(
+            base_output_dir, satellite_network_dir, dynamic_state_update_interval_ms, simulation_end_time_s,
+            src_node_id, dst_node_id, satgenpy_dir_with_ending_slash
+        )
+    )
+
+    print("Done")
+
+
+def write_path_analysis(data_dir, num_satellites, num_ground_stations, path_list_per_pair,
+                        time_step_num_path_changes, time_step_num_fstate_updates, print_routes=None):
+    """
+    Write the path analysis (ECDFs and top-10 lists) of the ground station pairs.
+
+    :param data_dir:                      Data output directory
+    :param num_satellites:                Number of satellites
+    :param num_ground_stations:           Number of ground stations
+    :param path_list_per_pair:            For each pair [src][dst] (src < dst) the list of its paths, each time it
+                                          changed (an empty path if it became unreachable)
+    :param time_step_num_path_changes:    Number of path changes of each time step (except the first)
+    :param time_step_num_fstate_updates:  Number of forwarding state updates of each time step (except the first)
+    :param print_routes:                  Function (src node id, dst node id) called for each pair in a top-10 list
+                                          (e.g., to print its routes and RTT over time), or None
+    """
+
     # Calculate hop count list
     hop_count_list_per_pair = []
-    for src in range(len(ground_stations)):
+    for src in range(num_ground_stations):
         temp_list = []
-        for dst in range(len(ground_stations)):  # The one until src are empty, but those are ignored later
+        for dst in range(num_ground_stations):  # The one until src are empty, but those are ignored later
             r = []
             for x in path_list_per_pair[src][dst]:
                 if len(x) != 0:
@@ -137,8 +170,8 @@ def analyze_path(
     list_max_minus_min_hop_count = []
     list_max_hop_count_to_min_hop_count = []
     list_num_path_changes = []
-    for src in range(len(ground_stations)):
-        for dst in range(src + 1, len(ground_stations)):
+    for src in range(num_ground_stations):
+        for dst in range(src + 1, num_ground_stations):
             min_hop_count = np.min(hop_count_list_per_pair[src][dst])
             max_hop_count = np.max(hop_count_list_per_pair[src][dst])
             list_max_hop_count_to_min_hop_count.append(float(max_hop_count) / float(min_hop_count))
@@ -164,8 +197,8 @@ def analyze_path(
     # Largest hop count delta
     with open(data_dir + "/top_10_largest_hop_count_delta.txt", "w+") as f_out:
         largest_hop_count_delta_list = []
-        for src in range(len(ground_stations)):
-            for dst in range(src + 1, len(ground_stations)):
+        for src in range(num_ground_stations):
+            for dst in range(src + 1, num_ground_stations):
                 min_hop_count = np.min(hop_count_list_per_pair[src][dst])
                 max_hop_count = np.max(hop_count_list_per_pair[src][dst])
                 largest_hop_count_delta_list.append((max_hop_count - min_hop_count, min_hop_count, max_hop_count,
@@ -181,16 +214,15 @@ def analyze_path(
                     and largest_hop_count_delta_list[i][4] not in already_plotted_nodes:
                 f_out.write("%-3d    %-4d -> %4d       %8d     %-8d          %-8d\n" % (
                     i + 1,
-                    len(satellites) + largest_hop_count_delta_list[i][3],
-                    len(satellites) + largest_hop_count_delta_list[i][4],
+                    num_satellites + largest_hop_count_delta_list[i][3],
+                    num_satellites + largest_hop_count_delta_list[i][4],
                     largest_hop_count_delta_list[i][0],
                     largest_hop_count_delta_list[i][1],
                     largest_hop_count_delta_list[i][2],
                 ))
-                print_routes_and_rtt(base_output_dir, satellite_network_dir, dynamic_state_update_interval_ms,
-                                     simulation_end_time_s, len(satellites) + largest_hop_count_delta_list[i][3],
-                                     len(satellites) + largest_hop_count_delta_list[i][4],
-                                     satgenpy_dir_with_ending_slash)
+                if print_routes is not None:
+                    print_routes(num_satellites + largest_hop_count_delta_list[i][3],
+                                 num_satellites + largest_hop_count_delta_list[i][4])
                 already_plotted_nodes.add(largest_hop_count_delta_list[i][3])
                 already_plotted_nodes.add(largest_hop_count_delta_list[i][4])
                 num_plotted += 1
@@ -202,8 +234,8 @@ def analyze_path(
     # Number of path changes
     with open(data_dir + "/top_10_most_path_changes.txt", "w+") as f_out:
         most_path_changes_list = []
-        for src in range(len(ground_stations)):
-            for dst in range(src + 1, len(ground_stations)):
+        for src in range(num_ground_stations):
+            for dst in range(src + 1, num_ground_stations):
                 most_path_changes_list.append((len(path_list_per_pair[src][dst]) - 1, src, dst))
         most_path_changes_list = sorted(most_path_changes_list, reverse=True)
         f_out.write("MOST PATH CHANGES TOP-10 WITHOUT DUPLICATE NODES\n")
@@ -216,15 +248,13 @@ def analyze_path(
                     and most_path_changes_list[i][2] not in already_plotted_nodes:
                 f_out.write("%-3d    %-4d -> %4d   %d\n" % (
                     i + 1,
-                    len(satellites) + most_path_changes_list[i][1],
-                    len(satellites) + most_path_changes_list[i][2],
+                    num_satellites + most_path_changes_list[i][1],
+                    num_satellites + most_path_changes_list[i][2],
                     most_path_changes_list[i][0]
                 ))
-                print_routes_and_rtt(base_output_dir, satellite_network_dir,
-                                     dynamic_state_update_interval_ms, simulation_end_time_s,
-                                     len(satellites) + most_path_changes_list[i][1],
-                                     len(satellites) + most_path_changes_list[i][2],
-                                     satgenpy_dir_with_ending_slash)
+                if print_routes is not None:
+                    print_routes(num_satellites + most_path_changes_list[i][1],
+                                 num_satellites + most_path_changes_list[i][2])
                 already_plotted_nodes.add(most_path_changes_list[i][1])
                 already_plotted_nodes.add(most_path_changes_list[i][2])
                 num_plotted += 1
@@ -232,5 +262,3 @@ def analyze_path(
                     break
         f_out.write("---------------------------------------\n")
         f_out.write("\n")
-
-    print("Done")
@@ -38,7 +38,8 @@ GEODESIC_ECDF_PLOT_CUTOFF_KM = 500
 
 def analyze_rtt(
         output_data_dir, satellite_network_dir, dynamic_state_update_interval_ms,
-        simulation_end_time_s, satgenpy_dir_with_ending_slash
+        simulation_end_time_s, satgenpy_dir_with_ending_slash, use_ephemeris_cache=False,
+        interpolation_max_error_m=None
 ):
 
     # Dynamic state directory
@@ -73,6 +74,15 @@ def analyze_rtt(
     max_gsl_length_m = exputil.parse_positive_float(description.get_property_or_fail("max_gsl_length_m"))
     max_isl_length_m = exputil.parse_positive_float(description.get_property_or_fail("max_isl_length_m"))
 
+    # Time steps
+    time_grid = TimeGrid(epoch, dynamic_state_update_interval_ns, simulation_end_time_ns)
+
+    # Satellite positions (None means they are calculated pair-wise)
+    position_engine = analysis_position_engine(
+        satellite_network_dir, epoch, satellites, dynamic_state_update_interval_ns, simulation_end_time_ns,
+        use_ephemeris_cache, interpolation_max_error_m, ground_stations, max_gsl_length_m
+    )
+
     # Analysis
     rtt_list_per_pair = []
     for i in range(len(ground_stations)):
@@ -86,7 +96,7 @@ def analyze_rtt(
     fstate = {}
     num_iterations = simulation_end_time_ns / dynamic_state_update_interval_ns
     it = 1
-    for t in range(0, simulation_end_time_ns, dynamic_state_update_interval_ns):
+    for t in time_grid.times_since_epoch_ns():
 
         # Read in forwarding state
         with open(satellite_network_dynamic_state_dir + "/fstate_" + str(t) + ".txt", "r") as f_in:
@@ -98,8 +108,10 @@ def analyze_rtt(
                 fstate[(current, destination)] = next_hop
 
             # Given we are going to graph often, we can pre-compute the edge lengths
-            graph_with_distance = construct_graph_with_distances(epoch, t, satellites, ground_stations,
-                                                                 list_isls, max_gsl_length_m, max_isl_length_m)
+            graph_with_distance = construct_sat_net_graph_with_distances(
+                epoch, t, satellites, ground_stations, list_isls, max_gsl_length_m, max_isl_length_m,
+                position_engine=position_engine, time_grid=time_grid
+            )
 
             # Go over each pair of ground stations and calculate the length
             for src in range(len(ground_stations)):
@@ -118,7 +130,36 @@ def analyze_rtt(
         it += 1
     print("")
 
-    #################################################
+    # Write the analysis, with the routes and RTT over time of the top pairs
+    write_rtt_analysis(
+        data_dir,
+        len(satellites),
+        ground_stations,
+        rtt_list_per_pair,
+        unreachable_per_pair,
+        lambda src_node_id, dst_node_id: print_routes_and_rtt(
+            base_output_dir, satellite_network_dir, dynamic_state_update_interval_ms, simulation_end_time_s,
+            src_node_id, dst_node_id, satgenpy_dir_with_ending_slash,
+            use_ephemeris_cache=use_ephemeris_cache, interpolation_max_error_m=interpolation_max_error_m
+        )
+    )
+
+    print("Done")
+
+
+def write_rtt_analysis(data_dir, num_satellites, ground_stations, rtt_list_per_pair, unreachable_per_pair,
+                       print_routes=None):
+    """
+    Write the RTT analysis (ECDFs and top-10 lists) of the ground station pairs.
+
+    :param data_dir:              Data output directory
+    :param num_satellites:        Number of satellites
+    :param ground_stations:       Ground stations (extended, as they are read by read_ground_stations_extended())
+    :param rtt_list_per_pair:     For each pair [src][dst] (src < dst) the list of RTTs (ns) when reachable
+    :param unreachable_per_pair:  Number of time steps each pair (src, dst) was unreachable
+    :param print_routes:          Function (src node id, dst node id) called for each pair in a top-10 list
+                                  (e.g., to print its routes and RTT over time), or None
+    """
 
     # ECDF stuff, which is quick, so we do that first
 
@@ -183,15 +224,15 @@ def analyze_rtt(
                     and largest_rtt_delta_list[i][4] not in already_plotted_nodes:
                 f_out.write("%-3d    %-4d -> %4d   %-8.2f     %-8.2f        %-8.2f\n" % (
                     i + 1,
-                    len(satellites) + largest_rtt_delta_list[i][3],
-                    len(satellites) + largest_rtt_delta_list[i][4],
+                    num_satellites + largest_rtt_delta_list[i][3],
+                    num_satellites + largest_rtt_delta_list[i][4],
                     largest_rtt_delta_list[i][0] / 1e6,
                     largest_rtt_delta_list[i][1] / 1e6,
                     largest_rtt_delta_list[i][2] / 1e6,
                 ))
-                print_routes_and_rtt(base_output_dir, satellite_network_dir, dynamic_state_update_interval_ms,
-                                     simulation_end_time_s, len(satellites) + largest_rtt_delta_list[i][3],
-                                     len(satellites) + largest_rtt_delta_list[i][4], satgenpy_dir_with_ending_slash)
+                if print_routes is not None:
+                    print_routes(num_satellites + largest_rtt_delta_list[i][3],
+                                 num_satellites + largest_rtt_delta_list[i][4])
                 already_plotted_nodes.add(largest_rtt_delta_list[i][3])
                 already_plotted_nodes.add(largest_rtt_delta_list[i][4])
                 num_plotted += 1
@@ -217,13 +258,13 @@ def analyze_rtt(
                     and most_unreachable_list[i][2] not in already_plotted_nodes:
                 f_out.write("%-3d    %-4d -> %4d   %d\n" % (
                     i + 1,
-                    len(satellites) + most_unreachable_list[i][1],
-                    len(satellites) + most_unreachable_list[i][2],
+                    num_satellites + most_unreachable_list[i][1],
+                    num_satellites + most_unreachable_list[i][2],
                     most_unreachable_list[i][0]
                 ))
-                print_routes_and_rtt(base_output_dir, satellite_network_dir, dynamic_state_update_interval_ms,
-                                     simulation_end_time_s, len(satellites) + most_unreachable_list[i][1],
-                                     len(satellites) + most_unreachable_list[i][2], satgenpy_dir_with_ending_slash)
+                if print_routes is not None:
+                    print_routes(num_satellites + most_unreachable_list[i][1],
+                                 num_satellites + most_unreachable_list[i][2])
                 already_plotted_nodes.add(most_unreachable_list[i][1])
                 already_plotted_nodes.add(most_unreachable_list[i][2])
                 num_plotted += 1
@@ -231,5 +272,3 @@ def analyze_rtt(
                     break
         f_out.write("---------------------------------------\n")
         f_out.write("\n")
-
-    print("Done")
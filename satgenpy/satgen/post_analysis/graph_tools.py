@@ -21,50 +21,140 @@
 # SOFTWARE.
 
 from satgen.distance_tools import *
+from satgen.positions import *
+from satgen.dynamic_state.forwarding_state import ForwardingState
+from satgen.dynamic_state.sat_net_graph import SatNetGraph, graph_from_edges
 import networkx as nx
-from astropy import units as u
+import numpy as np
+
+
+def analysis_position_engine(satellite_network_dir, epoch, satellites, time_step_ns, duration_ns,
+                             use_ephemeris_cache, interpolation_max_error_m=None, ground_stations=None,
+                             max_gsl_length_m=None):
+    """
+    Position engine for the post-analysis, which is None (pair-wise reference calculation) unless
+    the ephemeris cache of the satellite network is to be used and/or the positions are to be interpolated.
+    If the ground stations and maximum GSL length are given, the cache includes the ground station distances.
+    """
+    if not use_ephemeris_cache and interpolation_max_error_m is None:
+        return None
+    position_engine = EphemPositionEngine(epoch, satellites)
+    if use_ephemeris_cache:
+        position_engine = CachedPositionEngine(
+            position_engine,
+            load_or_create_ephemeris_cache(
+                satellite_network_dir, time_step_ns, duration_ns, "ephem",
+                ground_stations=ground_stations, max_gsl_length_m=max_gsl_length_m
+            )
+        )
+    if interpolation_max_error_m is not None:
+        position_engine = ChebyshevPositionEngine(position_engine, max_error_m=interpolation_max_error_m)
+    return position_engine
 
 
-def construct_graph_with_distances(epoch, time_since_epoch_ns, satellites, ground_stations, list_isls,
-                                   max_gsl_length_m, max_isl_length_m):
+def graph_edges_with_distances(epoch, time_since_epoch_ns, satellites, ground_stations, list_isls,
+                               max_gsl_length_m, max_isl_length_m, position_engine=None, gsl_spatial_index=False,
+                               time_grid=None):
+    """
+    Edges of the graph with distances: first the ISLs within the maximum ISL length (in order of the ISLs),
+    then for each ground station the GSLs within the maximum GSL length (in order of satellite id).
+
+    :return: (numpy array of from-node ids, numpy array of to-node ids, numpy array of distances (m))
+    """
 
     # Time
-    time = epoch + time_since_epoch_ns * u.ns
+    if time_grid is None:
+        time_grid = TimeGrid(epoch)
+    epoch_date = time_grid.epoch_ephem_date
+    date = time_grid.ephem_date(time_since_epoch_ns)
+
+    # ISLs (by default pair-wise, or from the satellite positions of a given position engine)
+    if position_engine is None:
+        isl_lengths_m = list(map(
+            lambda isl: distance_m_between_satellites(satellites[isl[0]], satellites[isl[1]], epoch_date, date),
+            list_isls
+        ))
+    else:
+        isl_lengths_m = distance_m_isls(position_engine.satellite_positions_m(time_since_epoch_ns), list_isls)
+
+    # Only ISLs which are close enough are considered
+    isl_lengths_m = np.array(isl_lengths_m, dtype=float).reshape(-1)
+    isls = np.array(list_isls, dtype=int).reshape(-1, 2)
+    within_range = isl_lengths_m <= max_isl_length_m
+    edges_from = [isls[within_range, 0]]
+    edges_to = [isls[within_range, 1]]
+    edge_weights = [isl_lengths_m[within_range]]
 
-    # Graph
-    sat_net_graph_with_gs = nx.Graph()
+    # GSLs
+    if position_engine is None:
+        position_engine = EphemPositionEngine(epoch, satellites)
+    ground_station_satellites_in_range = calculate_ground_station_satellites_in_range(
+        position_engine,
+        ground_stations,
+        time_since_epoch_ns,
+        max_gsl_length_m,
+        spatial_index=gsl_spatial_index
+    )
+    for ground_station in ground_stations:
 
-    # ISLs
-    for (a, b) in list_isls:
+        # Satellites in range
+        satellites_in_range = ground_station_satellites_in_range[ground_station["gid"]]
+        edges_from.append(np.full(len(satellites_in_range), len(satellites) + ground_station["gid"], dtype=int))
+        edges_to.append(np.array(list(map(lambda b: b[1], satellites_in_range)), dtype=int))
+        edge_weights.append(np.array(list(map(lambda b: b[0], satellites_in_range)), dtype=float))
 
-        # Only ISLs which are close enough are considered
-        sat_distance_m = distance_m_between_satellites(satellites[a], satellites[b], str(epoch), str(time))
-        if sat_distance_m <= max_isl_length_m:
-            sat_net_graph_with_gs.add_edge(
-                a, b, weight=sat_distance_m
-            )
+    return np.concatenate(edges_from), np.concatenate(edges_to), np.concatenate(edge_weights)
 
-    # GSLs
-    for ground_station in ground_stations:
 
-        # Find satellites in range
-        for sid in range(len(satellites)):
-            distance_m = distance_m_ground_station_to_satellite(ground_station, satellites[sid], str(epoch), str(time))
-            if distance_m <= max_gsl_length_m:
-                sat_net_graph_with_gs.add_edge(len(satellites) + ground_station["gid"], sid, weight=distance_m)
+def construct_graph_with_distances(epoch, time_since_epoch_ns, satellites, ground_stations, list_isls,
+                                   max_gsl_length_m, max_isl_length_m, position_engine=None, gsl_spatial_index=False,
+                                   time_grid=None):
+
+    # Graph
+    sat_net_graph_with_gs = nx.Graph()
+    edges_from, edges_to, edge_weights = graph_edges_with_distances(
+        epoch, time_since_epoch_ns, satellites, ground_stations, list_isls, max_gsl_length_m, max_isl_length_m,
+        position_engine=position_engine, gsl_spatial_index=gsl_spatial_index, time_grid=time_grid
+    )
+    for (a, b, weight) in zip(edges_from.tolist(), edges_to.tolist(), edge_weights.tolist()):
+        sat_net_graph_with_gs.add_edge(a, b, weight=weight)
 
     return sat_net_graph_with_gs
 
 
+def construct_sat_net_graph_with_distances(epoch, time_since_epoch_ns, satellites, ground_stations, list_isls,
+                                           max_gsl_length_m, max_isl_length_m, position_engine=None,
+                                           gsl_spatial_index=False, time_grid=None):
+    """
+    The same graph as construct_graph_with_distances(), as an array-based SatNetGraph (which is faster to
+    construct and to look up edge weights in) instead of a networkx graph.
+
+    :return: SatNetGraph
+    """
+    edges_from, edges_to, edge_weights = graph_edges_with_distances(
+        epoch, time_since_epoch_ns, satellites, ground_stations, list_isls, max_gsl_length_m, max_isl_length_m,
+        position_engine=position_engine, gsl_spatial_index=gsl_spatial_index, time_grid=time_grid
+    )
+    return graph_from_edges(len(satellites) + len(ground_stations), edges_from, edges_to, edge_weights)
+
+
 def compute_path_length_with_graph(path, graph):
     return sum_path_weights(augment_path_with_weights(path, graph))
 
 
 def compute_path_length_without_graph(path, epoch, time_since_epoch_ns, satellites, ground_stations, list_isls,
-                                      max_gsl_length_m, max_isl_length_m):
+                                      max_gsl_length_m, max_isl_length_m, position_engine=None, time_grid=None):
 
     # Time
-    time = epoch + time_since_epoch_ns * u.ns
+    if time_grid is None:
+        time_grid = TimeGrid(epoch)
+    epoch_date = time_grid.epoch_ephem_date
+    date = time_grid.ephem_date(time_since_epoch_ns)
+
+    # Satellite positions if a position engine is given
+    satellite_positions_m = None
+    if position_engine is not None:
+        satellite_positions_m = position_engine.satellite_positions_m(time_since_epoch_ns)
 
     # Go hop-by-hop and compute
     path_length_m = 0.0
@@ -75,12 +165,15 @@ def compute_path_length_without_graph(path, epoch, time_since_epoch_ns, satellit
         
         # Satellite to satellite
         if from_node_id < len(satellites) and to_node_id < len(satellites):
-            sat_distance_m = distance_m_between_satellites(
-                satellites[from_node_id],
-                satellites[to_node_id],
-                str(epoch),
-                str(time)
-            )
+            if position_engine is None:
+                sat_distance_m = distance_m_between_satellites(
+                    satellites[from_node_id],
+                    satellites[to_node_id],
+                    epoch_date,
+                    date
+                )
+            else:
+                sat_distance_m = float(distance_m_isls(satellite_positions_m, [(from_node_id, to_node_id)])[0])
             if sat_distance_m > max_isl_length_m \
                     or ((to_node_id, from_node_id) not in list_isls and (from_node_id, to_node_id) not in list_isls):
                 raise ValueError("Invalid ISL hop")
@@ -89,11 +182,8 @@ def compute_path_length_without_graph(path, epoch, time_since_epoch_ns, satellit
         # Ground station to satellite
         elif from_node_id >= len(satellites) and to_node_id < len(satellites):
             ground_station = ground_stations[from_node_id - len(satellites)]
-            distance_m = distance_m_ground_station_to_satellite(
-                ground_station,
-                satellites[to_node_id],
-                str(epoch),
-                str(time)
+            distance_m = compute_gsl_length(
+                ground_station, to_node_id, epoch_date, date, time_since_epoch_ns, satellites, position_engine
             )
             if distance_m > max_gsl_length_m:
                 raise ValueError("Invalid GSL hop from " + str(from_node_id) + " to " + str(to_node_id)
@@ -103,11 +193,8 @@ def compute_path_length_without_graph(path, epoch, time_since_epoch_ns, satellit
         # Satellite to ground station
         elif from_node_id < len(satellites) and to_node_id >= len(satellites):
             ground_station = ground_stations[to_node_id - len(satellites)]
-            distance_m = distance_m_ground_station_to_satellite(
-                ground_station,
-                satellites[from_node_id],
-                str(epoch),
-                str(time)
+            distance_m = compute_gsl_length(
+                ground_station, from_node_id, epoch_date, date, time_since_epoch_ns, satellites, position_engine
             )
             if distance_m > max_gsl_length_m:
                 raise ValueError("Invalid GSL hop from " + str(from_node_id) + " to " + str(to_node_id)
@@ -120,15 +207,40 @@ def compute_path_length_without_graph(path, epoch, time_since_epoch_ns, satellit
     return path_length_m
 
 
+def compute_gsl_length(ground_station, sid, epoch_date, date, time_since_epoch_ns, satellites, position_engine):
+    if position_engine is None:
+        return distance_m_ground_station_to_satellite(ground_station, satellites[sid], epoch_date, date)
+    else:
+        return float(position_engine.ground_station_satellite_candidate_distances_m(
+            [ground_station], time_since_epoch_ns, [np.array([sid])]
+        )[0][0])
+
+
+def next_hop_of(forward_state, curr, dst):
+    """
+    Next hop of the current node towards the destination.
+
+    :param forward_state:  Forwarding state, either a dictionary (curr, dst) -> next-hop node id
+                           (as read from the fstate files) or a ForwardingState
+    :param curr:           Current node id
+    :param dst:            Destination node id
+
+    :return: Next-hop node id (-1 if dropped)
+    """
+    if isinstance(forward_state, ForwardingState):
+        return forward_state.next_hop(curr, dst)
+    return forward_state[(curr, dst)]
+
+
 def get_path(src, dst, forward_state):
 
-    if forward_state[(src, dst)] == -1:  # No path exists
+    if next_hop_of(forward_state, src, dst) == -1:  # No path exists
         return None
 
     curr = src
     path = [src]
     while curr != dst:
-        next_hop = forward_state[(curr, dst)]
+        next_hop = next_hop_of(forward_state, curr, dst)
         path.append(next_hop)
         curr = next_hop
     return path
@@ -136,13 +248,13 @@ def get_path(src, dst, forward_state):
 
 def get_path_with_weights(src, dst, forward_state, sat_net_graph_with_gs):
 
-    if forward_state[(src, dst)] == -1:  # No path exists
+    if next_hop_of(forward_state, src, dst) == -1:  # No path exists
         return None
 
     curr = src
     path = []
     while curr != dst:
-        next_hop = forward_state[(curr, dst)]
+        next_hop = next_hop_of(forward_state, curr, dst)
         w = sat_net_graph_with_gs.get_edge_data(curr, next_hop)["weight"]
         path.append((curr, next_hop, w))
         curr = next_hop
@@ -152,7 +264,11 @@ def get_path_with_weights(src, dst, forward_state, sat_net_graph_with_gs):
 def augment_path_with_weights(path, sat_net_graph_with_gs):
     res = []
     for i in range(1, len(path)):
-        res.append((path[i - 1], path[i], sat_net_graph_with_gs.get_edge_data(path[i - 1], path[i])["weight"]))
+        if isinstance(sat_net_graph_with_gs, SatNetGraph):
+            weight = sat_net_graph_with_gs.edge_weight(path[i - 1], path[i])
+        else:
+            weight = sat_net_graph_with_gs.get_edge_data(path[i - 1], path[i])["weight"]
+        res.append((path[i - 1], path[i], weight))
     return res
 
 
@@ -0,0 +1,204 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from .graph_tools import *
+from .analyze_rtt import SPEED_OF_LIGHT_M_PER_S, write_rtt_analysis
+from .analyze_path import write_path_analysis
+from .print_routes_and_rtt import print_routes_and_rtt
+from satgen.ground_stations import *
+from satgen.dynamic_state.state_writer import changed_fstate_entries
+import exputil
+import numpy as np
+
+
+class InlineAnalysis:
+    """
+    RTT and path analysis of the ground station pairs (the same as analyze_rtt() and analyze_path()), which is
+    updated with the dynamic state of each time step while it is generated, instead of reading the forwarding
+    state files and calculating the satellite positions again afterwards.
+
+    The RTTs are calculated using the ISL and GSL lengths of the generation, which are the same as those of
+    analyze_rtt() if it uses the same satellite positions (e.g., the same ephemeris cache).
+    """
+
+    def __init__(self, num_satellites, num_ground_stations):
+        """
+        :param num_satellites:       Number of satellites
+        :param num_ground_stations:  Number of ground stations
+        """
+        self.num_satellites = num_satellites
+        self.num_ground_stations = num_ground_stations
+        self.times_since_epoch_ns = []
+
+        # Per pair [src][dst] (src < dst)
+        self.rtt_list_per_pair = []
+        self.path_list_per_pair = []
+        for i in range(num_ground_stations):
+            self.rtt_list_per_pair.append(list(map(lambda j: [], range(num_ground_stations))))
+            self.path_list_per_pair.append(list(map(lambda j: [], range(num_ground_stations))))
+        self.unreachable_per_pair = np.zeros((num_ground_stations, num_ground_stations))
+
+        # Per time step (including the first)
+        self.time_step_num_path_changes = []
+        self.time_step_num_fstate_updates = []
+
+    def add_time_step(self, time_since_epoch_ns, fstate, prev_fstate, isl_graph, gsl_graph):
+        """
+        Add the next time step.
+
+        :param time_since_epoch_ns:  Time since epoch (ns), after the time steps added so far
+        :param fstate:               Forwarding state (ForwardingState)
+        :param prev_fstate:          Forwarding state of the previous time step (the one its delta is against),
+                                     or None
+        :param isl_graph:            Graph of the satellites with the ISLs (SatNetGraph, weight is the length)
+        :param gsl_graph:            Graph of all nodes with only the GSLs in range (SatNetGraph)
+        """
+        if len(self.times_since_epoch_ns) > 0 and time_since_epoch_ns <= self.times_since_epoch_ns[-1]:
+            raise ValueError("Time steps must be added in increasing order of time")
+        self.times_since_epoch_ns.append(time_since_epoch_ns)
+
+        # Go over each pair of ground stations
+        num_path_changes = 0
+        for src in range(self.num_ground_stations):
+            for dst in range(src + 1, self.num_ground_stations):
+                path = get_path(self.num_satellites + src, self.num_satellites + dst, fstate)
+
+                # RTT
+                if path is None:
+                    self.unreachable_per_pair[(src, dst)] += 1
+                else:
+                    length_path_m = 0.0
+                    for i in range(1, len(path)):
+                        if path[i - 1] < self.num_satellites and path[i] < self.num_satellites:
+                            length_path_m += isl_graph.edge_weight(path[i - 1], path[i])
+                        else:
+                            length_path_m += gsl_graph.edge_weight(path[i - 1], path[i])
+                    self.rtt_list_per_pair[src][dst].append(
+                        (2 * length_path_m) * 1000000000.0 / SPEED_OF_LIGHT_M_PER_S
+                    )
+
+                # Path (only if it changed, unreachable being an empty path)
+                path = [] if path is None else path
+                if len(self.path_list_per_pair[src][dst]) == 0 or path != self.path_list_per_pair[src][dst][-1]:
+                    self.path_list_per_pair[src][dst].append(path)
+                    num_path_changes += 1
+
+        self.time_step_num_path_changes.append(num_path_changes)
+        self.time_step_num_fstate_updates.append(int(np.count_nonzero(changed_fstate_entries(fstate, prev_fstate))))
+
+    def merge(self, other):
+        """
+        Append the analysis of the time steps directly after these (e.g., of the next chunk of the generation).
+
+        :param other:  InlineAnalysis of the next time steps
+        """
+        if other.num_satellites != self.num_satellites or other.num_ground_stations != self.num_ground_stations:
+            raise ValueError("Can only merge the analysis of the same satellite network")
+        if len(other.times_since_epoch_ns) == 0:
+            return
+        if len(self.times_since_epoch_ns) > 0 and other.times_since_epoch_ns[0] <= self.times_since_epoch_ns[-1]:
+            raise ValueError("Can only merge the analysis of later time steps")
+
+        # The first path of each pair is only a change if it differs from the last one before it
+        num_path_changes = 0
+        for src in range(self.num_ground_stations):
+            for dst in range(src + 1, self.num_ground_stations):
+                path_list = self.path_list_per_pair[src][dst]
+                other_path_list = other.path_list_per_pair[src][dst]
+                if len(path_list) > 0 and path_list[-1] == other_path_list[0]:
+                    other_path_list = other_path_list[1:]
+                else:
+                    num_path_changes += 1
+                path_list.extend(other_path_list)
+                self.rtt_list_per_pair[src][dst].extend(other.rtt_list_per_pair[src][dst])
+        self.unreachable_per_pair += other.unreachable_per_pair
+
+        self.times_since_epoch_ns.extend(other.times_since_epoch_ns)
+        self.time_step_num_path_changes.append(num_path_changes)
+        self.time_step_num_path_changes.extend(other.time_step_num_path_changes[1:])
+        self.time_step_num_fstate_updates.extend(other.time_step_num_fstate_updates)
+
+    def write(self, output_data_dir, satellite_network_dir, dynamic_state_update_interval_ms, simulation_end_time_s,
+              satgenpy_dir_with_ending_slash=None, use_ephemeris_cache=False, interpolation_max_error_m=None):
+        """
+        Write the data of the RTT and path analysis, to the same directories as analyze_rtt() and analyze_path().
+
+        :param output_data_dir:                   Output data directory
+        :param satellite_network_dir:             Satellite network directory
+        :param dynamic_state_update_interval_ms:  Time step (ms) of the dynamic state
+        :param simulation_end_time_s:             Duration (s) of the dynamic state
+        :param satgenpy_dir_with_ending_slash:    If set, the routes and RTT over time of the pairs in the top-10
+                                                  lists are also printed and plotted (from the forwarding state
+                                                  files), else only the data of the analysis is written
+        :param use_ephemeris_cache:               Whether printing the routes uses the ephemeris cache
+        :param interpolation_max_error_m:         If set, printing the routes interpolates the positions
+        """
+        ground_stations = read_ground_stations_extended(satellite_network_dir + "/ground_stations.txt")
+        if len(ground_stations) != self.num_ground_stations:
+            raise ValueError("Number of ground stations does not match the analysis")
+
+        # Output directories
+        local_shell = exputil.LocalShell()
+        core_network_folder_name = satellite_network_dir.split("/")[-1]
+        base_output_dirs = {}
+        for analysis in ["rtt", "path"]:
+            base_output_dirs[analysis] = "%s/%s/%dms_for_%ds/%s" % (
+                output_data_dir, core_network_folder_name, dynamic_state_update_interval_ms, simulation_end_time_s,
+                analysis
+            )
+            local_shell.remove_force_recursive(base_output_dirs[analysis] + "/pdf")
+            local_shell.remove_force_recursive(base_output_dirs[analysis] + "/data")
+            local_shell.make_full_dir(base_output_dirs[analysis] + "/pdf")
+            local_shell.make_full_dir(base_output_dirs[analysis] + "/data")
+
+        # As analyze_rtt() and analyze_path(), of which only the RTT analysis prints the routes with the positions
+        # of the ephemeris cache and/or interpolated
+        def routes_printer(analysis):
+            if satgenpy_dir_with_ending_slash is None:
+                return None
+            return lambda src_node_id, dst_node_id: print_routes_and_rtt(
+                base_output_dirs[analysis], satellite_network_dir, dynamic_state_update_interval_ms,
+                simulation_end_time_s, src_node_id, dst_node_id, satgenpy_dir_with_ending_slash,
+                use_ephemeris_cache=use_ephemeris_cache if analysis == "rtt" else False,
+                interpolation_max_error_m=interpolation_max_error_m if analysis == "rtt" else None
+            )
+
+        # RTT
+        write_rtt_analysis(
+            base_output_dirs["rtt"] + "/data",
+            self.num_satellites,
+            ground_stations,
+            self.rtt_list_per_pair,
+            self.unreachable_per_pair,
+            routes_printer("rtt")
+        )
+
+        # Path (the first time step is not a change / update)
+        write_path_analysis(
+            base_output_dirs["path"] + "/data",
+            self.num_satellites,
+            self.num_ground_stations,
+            self.path_list_per_pair,
+            self.time_step_num_path_changes[1:],
+            self.time_step_num_fstate_updates[1:],
+            routes_printer("path")
+        )
@@ -41,7 +41,7 @@ ISL_COLOR = "#eb6b38"
 def print_graphical_routes_and_rtt(
         base_output_dir, satellite_network_dir,
         dynamic_state_update_interval_ms,
-        simulation_end_time_s, src, dst
+        simulation_end_time_s, src, dst, use_ephemeris_cache=False, interpolation_max_error_m=None
 ):
 
     # Local shell
@@ -72,11 +72,20 @@ def print_graphical_routes_and_rtt(
     max_gsl_length_m = exputil.parse_positive_float(description.get_property_or_fail("max_gsl_length_m"))
     max_isl_length_m = exputil.parse_positive_float(description.get_property_or_fail("max_isl_length_m"))
 
+    # Time steps
+    time_grid = TimeGrid(epoch, dynamic_state_update_interval_ns, simulation_end_time_ns)
+
+    # Satellite positions (None means they are calculated pair-wise)
+    position_engine = analysis_position_engine(
+        satellite_network_dir, epoch, satellites, dynamic_state_update_interval_ns, simulation_end_time_ns,
+        use_ephemeris_cache, interpolation_max_error_m, ground_stations, max_gsl_length_m
+    )
+
     # For each time moment
     fstate = {}
     current_path = []
     rtt_ns_list = []
-    for t in range(0, simulation_end_time_ns, dynamic_state_update_interval_ns):
+    for t in time_grid.times_since_epoch_ns():
         with open(satellite_network_dynamic_state_dir + "/fstate_" + str(t) + ".txt", "r") as f_in:
             for line in f_in:
                 spl = line.split(",")
@@ -91,10 +100,12 @@ def print_graphical_routes_and_rtt(
             if path_there is not None and path_back is not None:
                 length_src_to_dst_m = compute_path_length_without_graph(path_there, epoch, t, satellites,
                                                                         ground_stations, list_isls,
-                                                                        max_gsl_length_m, max_isl_length_m)
+                                                                        max_gsl_length_m, max_isl_length_m,
+                                                                        position_engine, time_grid=time_grid)
                 length_dst_to_src_m = compute_path_length_without_graph(path_back, epoch, t,
                                                                         satellites, ground_stations, list_isls,
-                                                                        max_gsl_length_m, max_isl_length_m)
+                                                                        max_gsl_length_m, max_isl_length_m,
+                                                                        position_engine, time_grid=time_grid)
                 rtt_ns = (length_src_to_dst_m + length_dst_to_src_m) * 1000000000.0 / 299792458.0
             else:
                 length_src_to_dst_m = 0.0
@@ -132,14 +143,15 @@ def print_graphical_routes_and_rtt(
                 ax.add_feature(cartopy.feature.BORDERS, edgecolor='gray', linewidth=0.2)
                 
                 # Time moment
-                time_moment_str = str(epoch + t * u.ns)
+                epoch_date = time_grid.epoch_ephem_date
+                date = time_grid.ephem_date(t)
 
                 # Other satellites
                 for node_id in range(len(satellites)):
                     shadow_ground_station = create_basic_ground_station_for_satellite_shadow(
                         satellites[node_id],
-                        str(epoch),
-                        time_moment_str
+                        epoch_date,
+                        date
                     )
                     latitude_deg = float(shadow_ground_station["latitude_degrees_str"])
                     longitude_deg = float(shadow_ground_station["longitude_degrees_str"])
@@ -165,12 +177,12 @@ def print_graphical_routes_and_rtt(
                 # # ISLs
                 # for isl in list_isls:
                 #     ephem_body = satellites[isl[0]]
-                #     ephem_body.compute(time_moment_str)
+                #     ephem_body.compute(date)
                 #     from_latitude_deg = math.degrees(ephem_body.sublat)
                 #     from_longitude_deg = math.degrees(ephem_body.sublong)
                 #
                 #     ephem_body = satellites[isl[1]]
-                #     ephem_body.compute(time_moment_str)
+                #     ephem_body.compute(date)
                 #     to_latitude_deg = math.degrees(ephem_body.sublat)
                 #     to_longitude_deg = math.degrees(ephem_body.sublong)
                 #
@@ -223,8 +235,8 @@ def print_graphical_routes_and_rtt(
                         if from_node_id < len(satellites):
                             shadow_ground_station = create_basic_ground_station_for_satellite_shadow(
                                 satellites[from_node_id],
-                                str(epoch),
-                                time_moment_str
+                                epoch_date,
+                                date
                             )
                             from_latitude_deg = float(shadow_ground_station["latitude_degrees_str"])
                             from_longitude_deg = float(shadow_ground_station["longitude_degrees_str"])
@@ -240,8 +252,8 @@ def print_graphical_routes_and_rtt(
                         if to_node_id < len(satellites):
                             shadow_ground_station = create_basic_ground_station_for_satellite_shadow(
                                 satellites[to_node_id],
-                                str(epoch),
-                                time_moment_str
+                                epoch_date,
+                                date
                             )
                             to_latitude_deg = float(shadow_ground_station["latitude_degrees_str"])
                             to_longitude_deg = float(shadow_ground_station["longitude_degrees_str"])
@@ -286,8 +298,8 @@ def print_graphical_routes_and_rtt(
                         if node_id < len(satellites):
                             shadow_ground_station = create_basic_ground_station_for_satellite_shadow(
                                 satellites[node_id],
-                                str(epoch),
-                                time_moment_str
+                                epoch_date,
+                                date
                             )
                             latitude_deg = float(shadow_ground_station["latitude_degrees_str"])
                             longitude_deg = float(shadow_ground_station["longitude_degrees_str"])
@@ -29,7 +29,8 @@ import tempfile
 
 
 def print_routes_and_rtt(base_output_dir, satellite_network_dir, dynamic_state_update_interval_ms,
-                         simulation_end_time_s, src, dst, satgenpy_dir_with_ending_slash):
+                         simulation_end_time_s, src, dst, satgenpy_dir_with_ending_slash,
+                         use_ephemeris_cache=False, interpolation_max_error_m=None):
 
     # Local shell
     local_shell = exputil.LocalShell()
@@ -59,6 +60,15 @@ def print_routes_and_rtt(base_output_dir, satellite_network_dir, dynamic_state_u
     max_gsl_length_m = exputil.parse_positive_float(description.get_property_or_fail("max_gsl_length_m"))
     max_isl_length_m = exputil.parse_positive_float(description.get_property_or_fail("max_isl_length_m"))
 
+    # Time steps
+    time_grid = TimeGrid(epoch, dynamic_state_update_interval_ns, simulation_end_time_ns)
+
+    # Satellite positions (None means they are calculated pair-wise)
+    position_engine = analysis_position_engine(
+        satellite_network_dir, epoch, satellites, dynamic_state_update_interval_ns, simulation_end_time_ns,
+        use_ephemeris_cache, interpolation_max_error_m, ground_stations, max_gsl_length_m
+    )
+
     # Write data file
 
     data_path_filename = data_dir + "/networkx_path_" + str(src) + "_to_" + str(dst) + ".txt"
@@ -68,7 +78,7 @@ def print_routes_and_rtt(base_output_dir, satellite_network_dir, dynamic_state_u
         fstate = {}
         current_path = []
         rtt_ns_list = []
-        for t in range(0, simulation_end_time_ns, dynamic_state_update_interval_ns):
+        for t in time_grid.times_since_epoch_ns():
 
             with open(satellite_network_dynamic_state_dir + "/fstate_" + str(t) + ".txt", "r") as f_in:
                 for line in f_in:
@@ -84,10 +94,12 @@ def print_routes_and_rtt(base_output_dir, satellite_network_dir, dynamic_state_u
                 if path_there is not None and path_back is not None:
                     length_src_to_dst_m = compute_path_length_without_graph(path_there, epoch, t, satellites,
                                                                             ground_stations, list_isls,
-                                                                            max_gsl_length_m, max_isl_length_m)
+                                                                            max_gsl_length_m, max_isl_length_m,
+                                                                            position_engine, time_grid=time_grid)
                     length_dst_to_src_m = compute_path_length_without_graph(path_back, epoch, t,
                                                                             satellites, ground_stations, list_isls,
-                                                                            max_gsl_length_m, max_isl_length_m)
+                                                                            max_gsl_length_m, max_isl_length_m,
+                                                                            position_engine, time_grid=time_grid)
                     rtt_ns = (length_src_to_dst_m + length_dst_to_src_m) * 1000000000.0 / 299792458.0
                 else:
                     length_src_to_dst_m = 0.0
@@ -0,0 +1,88 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from satgen import *
+
+# Kuiper-630 first shell (34 orbits of 34 satellites)
+KUIPER_630_NUM_ORBS = 34
+KUIPER_630_NUM_SATS_PER_ORB = 34
+KUIPER_630_NUM_SATELLITES = KUIPER_630_NUM_ORBS * KUIPER_630_NUM_SATS_PER_ORB
+
+# Maximum GSL length (at 30 degrees minimum elevation) and ISL length of Kuiper-630
+KUIPER_630_MAX_GSL_LENGTH_M = 1089686.4181956202
+KUIPER_630_MAX_ISL_LENGTH_M = 5016591.2330984278
+
+# Ground stations (basic format), which are in range of the first shell
+TEST_GROUND_STATIONS_BASIC = [
+    "0,Manila,14.6042,120.9822,0",
+    "1,Dalian,38.913811,121.602322,0",
+    "2,Amsterdam,52.379189,4.899431,10.5",
+]
+
+
+def write_kuiper_630_first_shell(
+        satellite_network_dir,
+        ground_stations_basic=None,
+        isl_shift=1,
+        gsl_interfaces_info=None,
+        description=False
+):
+    """
+    Write the Kuiper-630 first shell satellite network (tles.txt, isls.txt, ground_stations.basic.txt and
+    ground_stations.txt) used by the tests, into an existing directory.
+
+    :param satellite_network_dir:  Satellite network directory
+    :param ground_stations_basic:  List of ground station lines in basic format (default: TEST_GROUND_STATIONS_BASIC)
+    :param isl_shift:              ISL shift of the +Grid ISLs
+    :param gsl_interfaces_info:    If set, gsl_interfaces_info.txt is written with these (number of interfaces per
+                                   satellite, number of interfaces per ground station, aggregate max. bandwidth
+                                   per satellite, aggregate max. bandwidth per ground station)
+    :param description:            If True, description.txt is written with the maximum GSL and ISL lengths
+    """
+    if ground_stations_basic is None:
+        ground_stations_basic = TEST_GROUND_STATIONS_BASIC
+    generate_tles_from_scratch_manual(
+        satellite_network_dir + "/tles.txt", "Kuiper-630", KUIPER_630_NUM_ORBS, KUIPER_630_NUM_SATS_PER_ORB,
+        True, 51.9, 0.0000001, 0.0, 14.80
+    )
+    generate_plus_grid_isls(
+        satellite_network_dir + "/isls.txt", KUIPER_630_NUM_ORBS, KUIPER_630_NUM_SATS_PER_ORB,
+        isl_shift=isl_shift, idx_offset=0
+    )
+    with open(satellite_network_dir + "/ground_stations.basic.txt", "w+") as f_out:
+        for line in ground_stations_basic:
+            f_out.write(line + "\n")
+    extend_ground_stations(
+        satellite_network_dir + "/ground_stations.basic.txt",
+        satellite_network_dir + "/ground_stations.txt"
+    )
+    if gsl_interfaces_info is not None:
+        generate_simple_gsl_interfaces_info(
+            satellite_network_dir + "/gsl_interfaces_info.txt",
+            KUIPER_630_NUM_SATELLITES,
+            len(ground_stations_basic),
+            *gsl_interfaces_info
+        )
+    if description:
+        generate_description(
+            satellite_network_dir + "/description.txt", KUIPER_630_MAX_GSL_LENGTH_M, KUIPER_630_MAX_ISL_LENGTH_M
+        )
@@ -0,0 +1,151 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import exputil
+import unittest
+import numpy as np
+from satgen.dynamic_state.forwarding_state import ForwardingState
+from satgen.dynamic_state.adaptive_time_step import generate_adaptive
+from satgen.dynamic_state.state_writer import write_fstate_delta, write_gsl_if_bandwidth_delta
+
+
+class TestAdaptiveTimeStep(unittest.TestCase):
+
+    def synthetic_calculate_at(self, output_dir, times_ns, change_idx, calculated, reverting=False):
+        """
+        Calculation of a synthetic dynamic state (2 satellites, 2 ground stations), of which the next hop
+        of satellite 0 to ground station 2 (and the bandwidth of an interface) changes at the given time indices.
+        If reverting, every second change reverts the bandwidth as well (such that the whole state reverts).
+        """
+        def calculate_at(idx, prev_output):
+            calculated.append(idx)
+            num_changes = int(np.sum(np.array(change_idx) <= idx))
+            fstate = ForwardingState(2, 2)
+            fstate[(0, 2)] = (num_changes % 2, 0, 0)
+            output = {
+                "fstate": fstate,
+                "gsl_if_bandwidth_state": np.array([1.0, 1.0 / (1 + (num_changes % 2 if reverting else num_changes))]),
+                "gsl_if_node_ids": np.array([2, 3]),
+                "gsl_if_ids": np.array([0, 0])
+            }
+            write_fstate_delta(
+                output_dir + "/fstate_" + str(times_ns[idx]) + ".txt",
+                fstate,
+                None if prev_output is None else prev_output["fstate"]
+            )
+            write_gsl_if_bandwidth_delta(
+                output_dir + "/gsl_if_bandwidth_" + str(times_ns[idx]) + ".txt",
+                output["gsl_if_node_ids"],
+                output["gsl_if_ids"],
+                output["gsl_if_bandwidth_state"],
+                None if prev_output is None else prev_output["gsl_if_bandwidth_state"]
+            )
+            return output
+        return calculate_at
+
+    def test_same_as_fixed(self):
+        local_shell = exputil.LocalShell()
+        times_ns = list(range(100, 4100, 100))
+        for change_idx in [[], [1], [7, 8, 9], [5, 16, 31, 39], list(range(1, 40, 3))]:
+            for coarse_num_steps in [1, 2, 5, 8, 16, 64]:
+                local_shell.make_full_dir("temp_adaptive_test/fixed")
+                local_shell.make_full_dir("temp_adaptive_test/adaptive")
+
+                # Every time step
+                calculated = []
+                calculate_at = self.synthetic_calculate_at(
+                    "temp_adaptive_test/fixed", times_ns, change_idx, calculated
+                )
+                prev_output = None
+                for idx in range(len(times_ns)):
+                    prev_output = calculate_at(idx, prev_output)
+
+                # Adaptive
+                calculated = []
+                num_calculated = generate_adaptive(
+                    "temp_adaptive_test/adaptive",
+                    times_ns,
+                    coarse_num_steps,
+                    self.synthetic_calculate_at("temp_adaptive_test/adaptive", times_ns, change_idx, calculated)
+                )
+                self.assertEqual(num_calculated, len(calculated))
+                self.assertEqual(len(set(calculated)), len(calculated))
+                for idx in change_idx:
+                    self.assertTrue(idx in calculated)
+                if len(change_idx) == 0:
+                    self.assertEqual(num_calculated, 1 + int(np.ceil((len(times_ns) - 1) / coarse_num_steps)))
+
+                # Exactly the same files
+                for t in times_ns:
+                    for prefix in ["fstate_", "gsl_if_bandwidth_"]:
+                        with open("temp_adaptive_test/fixed/" + prefix + str(t) + ".txt", "r") as f_fixed:
+                            with open("temp_adaptive_test/adaptive/" + prefix + str(t) + ".txt", "r") as f_adaptive:
+                                self.assertEqual(f_fixed.read(), f_adaptive.read())
+
+                local_shell.remove_force_recursive("temp_adaptive_test")
+
+    def test_changes_between(self):
+        local_shell = exputil.LocalShell()
+        times_ns = list(range(100, 4100, 100))
+        change_idx = [5, 7]
+        for with_changes_between in [False, True]:
+            local_shell.make_full_dir("temp_adaptive_test/fixed")
+            local_shell.make_full_dir("temp_adaptive_test/adaptive")
+
+            # Every time step
+            calculate_at = self.synthetic_calculate_at(
+                "temp_adaptive_test/fixed", times_ns, change_idx, [], reverting=True
+            )
+            prev_output = None
+            for idx in range(len(times_ns)):
+                prev_output = calculate_at(idx, prev_output)
+
+            # Adaptive, of which the coarse step contains the change and its reversal
+            calculated = []
+            generate_adaptive(
+                "temp_adaptive_test/adaptive",
+                times_ns,
+                16,
+                self.synthetic_calculate_at(
+                    "temp_adaptive_test/adaptive", times_ns, change_idx, calculated, reverting=True
+                ),
+                changes_between=(lambda a, b: any(map(lambda c: a < c < b, change_idx)))
+                if with_changes_between else None
+            )
+            self.assertEqual(with_changes_between, 5 in calculated and 7 in calculated)
+
+            # The same files if the changes are known, else the change is not noticed
+            same_files = True
+            for t in times_ns:
+                with open("temp_adaptive_test/fixed/fstate_" + str(t) + ".txt", "r") as f_fixed:
+                    with open("temp_adaptive_test/adaptive/fstate_" + str(t) + ".txt", "r") as f_adaptive:
+                        same_files = same_files and f_fixed.read() == f_adaptive.read()
+            self.assertEqual(with_changes_between, same_files)
+
+            local_shell.remove_force_recursive("temp_adaptive_test")
+
+    def test_invalid_coarse_step(self):
+        try:
+            generate_adaptive("temp_adaptive_test", [0, 100], 0, lambda idx, prev_output: None)
+            self.fail()
+        except ValueError:
+            self.assertTrue(True)
@@ -0,0 +1,110 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import unittest
+import exputil
+from satgen import *
+from satgen.dynamic_state.phase_timing import PHASES
+
+
+class TestBenchmark(unittest.TestCase):
+
+    def test_benchmark_network(self):
+        local_shell = exputil.LocalShell()
+        temp_dir = "temp_benchmark_network"
+        for constellation, num_satellites in [("25x25", 625), ("kuiper_630", 1156), ("starlink_550", 1584),
+                                              ("telesat_1015", 351)]:
+            for algorithm in BENCHMARK_ALGORITHMS:
+                local_shell.make_full_dir(temp_dir)
+                params = generate_benchmark_network(temp_dir, constellation, 7, algorithm)
+                self.assertEqual(params, BENCHMARK_CONSTELLATIONS[constellation])
+                self.assertEqual(len(read_tles(temp_dir + "/tles.txt")["satellites"]), num_satellites)
+                ground_stations = read_ground_stations_extended(temp_dir + "/ground_stations.txt")
+                self.assertEqual(len(ground_stations), 7)
+                for ground_station in ground_stations:
+                    self.assertTrue(abs(float(ground_station["latitude_degrees_str"])) <= 50.0)
+                list_isls = read_isls(temp_dir + "/isls.txt", num_satellites)
+                if algorithm == "algorithm_free_one_only_gs_relays":
+                    self.assertEqual(len(list_isls), 0)
+                else:
+                    self.assertEqual(len(list_isls), 2 * num_satellites)
+                list_gsl_interfaces_info = read_gsl_interfaces_info(
+                    temp_dir + "/gsl_interfaces_info.txt", num_satellites, 7
+                )
+                self.assertEqual(
+                    list_gsl_interfaces_info[0]["number_of_interfaces"],
+                    1 if algorithm in ("algorithm_free_one_only_gs_relays", "algorithm_free_one_only_over_isls")
+                    else 7
+                )
+                local_shell.remove_force_recursive(temp_dir)
+
+        # Unknown constellation or algorithm
+        local_shell.make_full_dir(temp_dir)
+        for constellation, algorithm in [("iridium", "algorithm_free_one_only_over_isls"), ("25x25", "unknown")]:
+            try:
+                generate_benchmark_network(temp_dir, constellation, 7, algorithm)
+                self.fail()
+            except ValueError:
+                self.assertTrue(True)
+        local_shell.remove_force_recursive(temp_dir)
+
+    def test_run_benchmark(self):
+        benchmark = run_benchmark(
+            ["telesat_1015"],
+            [3, 6],
+            ["algorithm_free_one_only_over_isls"],
+            2,
+            1000,
+            num_repetitions=2,
+            progress=False
+        )
+        self.assertEqual(len(benchmark["results"]), 4)
+        for result in benchmark["results"]:
+            self.assertEqual(result["num_satellites"], 351)
+            self.assertEqual(result["num_time_steps"], 2)
+            self.assertTrue(result["time_steps_per_s"] > 0)
+            self.assertTrue(result["peak_rss_bytes"] > 0)
+            self.assertEqual(sorted(result["phases_s"].keys()), sorted(PHASES))
+            self.assertTrue(result["counts"]["fstate_delta_lines"] > 0)
+        self.assertEqual(
+            list(map(lambda r: (r["num_ground_stations"], r["repetition"]), benchmark["results"])),
+            [(3, 0), (3, 1), (6, 0), (6, 1)]
+        )
+
+        # Written and read back, and compared to itself
+        local_shell = exputil.LocalShell()
+        write_benchmark("temp_benchmark.json", benchmark)
+        self.assertEqual(read_benchmark("temp_benchmark.json"), benchmark)
+        print_benchmark_comparison(read_benchmark("temp_benchmark.json"), benchmark)
+        local_shell.remove("temp_benchmark.json")
+
+        # Invalid settings
+        for constellations, algorithms, duration_s, time_step_ms in [
+            (["iridium"], ["algorithm_free_one_only_over_isls"], 2, 1000),
+            (["25x25"], ["unknown"], 2, 1000),
+            (["25x25"], ["algorithm_free_one_only_over_isls"], 2, 300),
+        ]:
+            try:
+                run_benchmark(constellations, [3], algorithms, duration_s, time_step_ms, progress=False)
+                self.fail()
+            except ValueError:
+                self.assertTrue(True)
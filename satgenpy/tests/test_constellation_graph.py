@@ -0,0 +1,95 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import exputil
+import unittest
+import random
+import networkx as nx
+import numpy as np
+from satgen.isls import generate_plus_grid_isls
+from satgen.dynamic_state.constellation_graph import ConstellationGraph
+from satgen.dynamic_state.next_hop_selection import padded_neighbors
+from satgen.dynamic_state.shortest_paths import calculate_shortest_path_distances
+
+
+class TestConstellationGraph(unittest.TestCase):
+
+    def assert_same_graph(self, graph, nx_graph):
+        self.assertEqual(graph.number_of_nodes(), nx_graph.number_of_nodes())
+        for node_id in range(nx_graph.number_of_nodes()):
+            self.assertEqual(graph.neighbors(node_id), list(nx_graph.neighbors(node_id)))
+            self.assertEqual(graph.degree(node_id), nx_graph.degree(node_id))
+        for (a, b) in zip(padded_neighbors(graph, graph.number_of_nodes()),
+                          padded_neighbors(nx_graph, nx_graph.number_of_nodes())):
+            self.assertTrue(np.array_equal(a, b))
+        for shortest_path_backend in ["floyd_warshall", "dijkstra"]:
+            self.assertTrue(np.array_equal(
+                calculate_shortest_path_distances(graph, shortest_path_backend),
+                calculate_shortest_path_distances(nx_graph, shortest_path_backend)
+            ))
+
+    def test_isl_graph(self):
+        random.seed(123)
+        num_satellites = 8 * 6
+        list_isls = generate_plus_grid_isls("temp_isls.txt", 8, 6, isl_shift=1, idx_offset=0)
+        exputil.LocalShell().remove("temp_isls.txt")
+        constellation_graph = ConstellationGraph(num_satellites, 3, list_isls)
+
+        # Interfaces are numbered in order of the ISLs
+        num_isls_per_sat = [0] * num_satellites
+        for (a, b) in list_isls:
+            self.assertEqual(constellation_graph.sat_neighbor_to_if[(a, b)], num_isls_per_sat[a])
+            self.assertEqual(constellation_graph.sat_neighbor_to_if[(b, a)], num_isls_per_sat[b])
+            num_isls_per_sat[a] += 1
+            num_isls_per_sat[b] += 1
+        self.assertEqual(constellation_graph.num_isls_per_sat, num_isls_per_sat)
+
+        # Every time step only the lengths change
+        for _ in range(3):
+            isl_lengths_m = np.array(list(map(lambda isl: 1000000.0 + random.random() * 100000.0, list_isls)))
+            nx_graph = nx.Graph()
+            for i in range(num_satellites):
+                nx_graph.add_node(i)
+            for isl_idx, (a, b) in enumerate(list_isls):
+                nx_graph.add_edge(a, b, weight=float(isl_lengths_m[isl_idx]))
+            self.assert_same_graph(constellation_graph.isl_graph(isl_lengths_m), nx_graph)
+
+    def test_gsl_graph(self):
+        random.seed(456)
+        num_satellites = 20
+        num_ground_stations = 5
+        constellation_graph = ConstellationGraph(num_satellites, num_ground_stations, [])
+        self.assertEqual(constellation_graph.num_isls_per_sat, [0] * num_satellites)
+        for _ in range(3):
+            ground_station_satellites_in_range = []
+            for gid in range(num_ground_stations):
+                sids = random.sample(range(num_satellites), random.randint(0, 6))
+                ground_station_satellites_in_range.append(
+                    list(map(lambda sid: (500000.0 + random.random() * 500000.0, sid), sids))
+                )
+            nx_graph = nx.Graph()
+            for i in range(num_satellites + num_ground_stations):
+                nx_graph.add_node(i)
+            for gid in range(num_ground_stations):
+                for (distance_m, sid) in ground_station_satellites_in_range[gid]:
+                    nx_graph.add_edge(sid, num_satellites + gid, weight=distance_m)
+            self.assert_same_graph(constellation_graph.gsl_graph(ground_station_satellites_in_range), nx_graph)
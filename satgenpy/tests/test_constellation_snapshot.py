@@ -0,0 +1,161 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os
+import sys
+import pickle
+import unittest
+import subprocess
+import exputil
+import numpy as np
+from multiprocessing import Pool
+from multiprocessing.dummy import Pool as ThreadPool
+from satgen import *
+from satellite_network_fixtures import write_kuiper_630_first_shell
+from satgen.dynamic_state.constellation_snapshot import create_constellation_snapshot, \
+    attach_constellation_snapshot
+
+
+def read_in_worker(descriptor):
+    constellation_snapshot = attach_constellation_snapshot(descriptor)
+    satellites = constellation_snapshot.satellites()
+    positions_m = EphemPositionEngine(constellation_snapshot.epoch, satellites).satellite_positions_m(60000000000)
+    result = (
+        constellation_snapshot.ground_stations(),
+        constellation_snapshot.list_isls(),
+        constellation_snapshot.list_gsl_interfaces_info(),
+        str(constellation_snapshot.epoch),
+        positions_m
+    )
+    constellation_snapshot.close()
+    return result
+
+
+def attach_in_threads(descriptor):
+    pool = ThreadPool(8)
+    results = pool.map(lambda i: read_in_worker(descriptor)[0], range(8))
+    pool.close()
+    pool.join()
+    return results
+
+
+class TestConstellationSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.local_shell = exputil.LocalShell()
+        self.temp_dir = "temp_constellation_snapshot_test"
+        self.local_shell.make_full_dir(self.temp_dir)
+
+        # Kuiper-630 first shell
+        write_kuiper_630_first_shell(self.temp_dir, gsl_interfaces_info=(2, 1, 1.5, 1.0))
+
+        # Reference
+        self.tles = read_tles(self.temp_dir + "/tles.txt")
+        self.ground_stations = read_ground_stations_extended(self.temp_dir + "/ground_stations.txt")
+        self.list_isls = read_isls(self.temp_dir + "/isls.txt", 34 * 34)
+        self.list_gsl_interfaces_info = read_gsl_interfaces_info(
+            self.temp_dir + "/gsl_interfaces_info.txt", 34 * 34, 3
+        )
+
+    def tearDown(self):
+        self.local_shell.remove_force_recursive(self.temp_dir)
+
+    def test_same_as_read(self):
+        constellation_snapshot = create_constellation_snapshot(self.temp_dir)
+        self.assertEqual(constellation_snapshot.num_satellites(), 34 * 34)
+        self.assertEqual(constellation_snapshot.num_ground_stations(), 3)
+        self.assertEqual(constellation_snapshot.n_orbits, self.tles["n_orbits"])
+        self.assertEqual(constellation_snapshot.n_sats_per_orbit, self.tles["n_sats_per_orbit"])
+        self.assertEqual(str(constellation_snapshot.epoch), str(self.tles["epoch"]))
+        self.assertEqual(constellation_snapshot.ground_stations(), self.ground_stations)
+        self.assertEqual(constellation_snapshot.list_isls(), self.list_isls)
+        self.assertEqual(constellation_snapshot.list_gsl_interfaces_info(), self.list_gsl_interfaces_info)
+
+        # The satellites have the same orbital elements, and as such the same positions
+        satellites = constellation_snapshot.satellites()
+        for sid in range(len(satellites)):
+            self.assertEqual(satellites[sid].name, self.tles["satellites"][sid].name)
+            self.assertEqual(satellites[sid].catalog_number, self.tles["satellites"][sid].catalog_number)
+            for element in ["_epoch", "_inc", "_raan", "_e", "_ap", "_M", "_n", "_decay", "_drag", "_orbit"]:
+                self.assertEqual(
+                    float(getattr(satellites[sid], element)),
+                    float(getattr(self.tles["satellites"][sid], element))
+                )
+        for position_engine_name in ["ephem", "sgp4"]:
+            for time_since_epoch_ns in [0, 60000000000, 1000000000000]:
+                self.assertTrue(np.array_equal(
+                    create_position_engine(
+                        position_engine_name, constellation_snapshot.epoch, satellites
+                    ).satellite_positions_m(time_since_epoch_ns),
+                    create_position_engine(
+                        position_engine_name, self.tles["epoch"], self.tles["satellites"]
+                    ).satellite_positions_m(time_since_epoch_ns)
+                ))
+
+        # Read-only
+        try:
+            constellation_snapshot.arrays["isls"][0, 0] = 1
+            self.fail()
+        except ValueError:
+            self.assertTrue(True)
+
+        constellation_snapshot.close()
+
+    def test_attach_in_other_process(self):
+        constellation_snapshot = create_constellation_snapshot(self.temp_dir)
+        pool = Pool(2)
+        results = pool.map(read_in_worker, [constellation_snapshot.descriptor()] * 2)
+        pool.close()
+        pool.join()
+        constellation_snapshot.close()
+        reference_positions_m = EphemPositionEngine(
+            self.tles["epoch"], self.tles["satellites"]
+        ).satellite_positions_m(60000000000)
+        for result in results:
+            self.assertEqual(result[0], self.ground_stations)
+            self.assertEqual(result[1], self.list_isls)
+            self.assertEqual(result[2], self.list_gsl_interfaces_info)
+            self.assertEqual(result[3], str(self.tles["epoch"]))
+            self.assertTrue(np.array_equal(result[4], reference_positions_m))
+
+    def test_attach_in_threads_and_unrelated_process(self):
+        constellation_snapshot = create_constellation_snapshot(self.temp_dir)
+
+        # Threads of a worker process attach concurrently
+        pool = Pool(1)
+        results = pool.map(attach_in_threads, [constellation_snapshot.descriptor()])
+        pool.close()
+        pool.join()
+        self.assertEqual(results, [[self.ground_stations] * 8])
+
+        # A process which is not started by the creator (with its own resource tracker) does not free it on exit
+        subprocess.run(
+            [sys.executable, "-c", "import sys, pickle\n"
+                                   "from satgen.dynamic_state.constellation_snapshot import "
+                                   "attach_constellation_snapshot\n"
+                                   "attach_constellation_snapshot(pickle.load(sys.stdin.buffer)).close()\n"],
+            input=pickle.dumps(constellation_snapshot.descriptor()),
+            env=dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path)),
+            check=True
+        )
+        self.assertEqual(read_in_worker(constellation_snapshot.descriptor())[0], self.ground_stations)
+        constellation_snapshot.close()
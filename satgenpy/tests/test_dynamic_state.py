@@ -24,6 +24,7 @@
 import exputil
 import unittest
 from satgen import *
+from satellite_network_fixtures import write_kuiper_630_first_shell, TEST_GROUND_STATIONS_BASIC
 
 
 class TestDynamicState(unittest.TestCase):
@@ -196,3 +197,211 @@ class TestDynamicState(unittest.TestCase):
 
         # Clean up
         local_shell.remove_force_recursive(temp_gen_data)
+
+    def test_workers_same_output(self):
+        local_shell = exputil.LocalShell()
+        temp_gen_data = "temp_dynamic_state_workers_gen_data"
+        name = "kuiper_630_first_shell"
+        local_shell.make_full_dir(temp_gen_data + "/" + name)
+
+        # Kuiper-630 first shell with a few ground stations
+        write_kuiper_630_first_shell(temp_gen_data + "/" + name, gsl_interfaces_info=(1, 1, 1, 1))
+
+        # Single worker, multiple threads, and processes with small chunks
+        dynamic_state_dir = "/dynamic_state_1000ms_for_8s"
+        outputs = []
+        for (num_workers, use_processes, chunk_num_time_steps) in [(1, False, None), (3, False, None), (2, True, 3)]:
+            help_dynamic_state(
+                temp_gen_data,
+                num_workers,
+                name,
+                1000,
+                8,
+                1089686.4181956202,
+                5016591.2330984278,
+                "algorithm_free_one_only_over_isls",
+                False,
+                shortest_path_backend="dijkstra",
+                use_processes=use_processes,
+                chunk_num_time_steps=chunk_num_time_steps
+            )
+            output = {}
+            for t in range(0, 8000000000, 1000000000):
+                for prefix in ["/fstate_", "/gsl_if_bandwidth_"]:
+                    filename = temp_gen_data + "/" + name + dynamic_state_dir + prefix + str(t) + ".txt"
+                    output[prefix + str(t)] = local_shell.read_file(filename)
+            local_shell.remove_force_recursive(temp_gen_data + "/" + name + dynamic_state_dir)
+            outputs.append(output)
+
+        # Only the first time step has the full state, after that only deltas (the same for all)
+        self.assertTrue(len(outputs[0]["/fstate_0"]) > len(outputs[0]["/fstate_3000000000"]))
+        self.assertEqual(outputs[0], outputs[1])
+        self.assertEqual(outputs[0], outputs[2])
+
+        local_shell.remove_force_recursive(temp_gen_data)
+
+    def test_workers_same_output_with_gsl_events(self):
+        local_shell = exputil.LocalShell()
+        temp_gen_data = "temp_dynamic_state_workers_events_gen_data"
+        name = "kuiper_630_first_shell"
+        local_shell.make_full_dir(temp_gen_data + "/" + name)
+
+        # Kuiper-630 first shell with a few ground stations
+        write_kuiper_630_first_shell(temp_gen_data + "/" + name, gsl_interfaces_info=(1, 1, 1, 1))
+
+        # The workers after the first also calculate the time step before their first (to seed their deltas),
+        # which must be covered by their GSL events
+        dynamic_state_dir = "/dynamic_state_1000ms_for_4s"
+        outputs = []
+        for (num_workers, use_processes, chunk_num_time_steps) in [(1, False, None), (2, False, None), (2, True, 1)]:
+            help_dynamic_state(
+                temp_gen_data,
+                num_workers,
+                name,
+                1000,
+                4,
+                1089686.4181956202,
+                5016591.2330984278,
+                "algorithm_free_one_only_over_isls",
+                False,
+                shortest_path_backend="dijkstra",
+                gsl_event_sample_step_ms=1000,
+                use_processes=use_processes,
+                chunk_num_time_steps=chunk_num_time_steps
+            )
+            output = {}
+            for t in range(0, 4000000000, 1000000000):
+                for prefix in ["/fstate_", "/gsl_if_bandwidth_"]:
+                    filename = temp_gen_data + "/" + name + dynamic_state_dir + prefix + str(t) + ".txt"
+                    output[prefix + str(t)] = local_shell.read_file(filename)
+            local_shell.remove_force_recursive(temp_gen_data + "/" + name + dynamic_state_dir)
+            outputs.append(output)
+        self.assertEqual(outputs[0], outputs[1])
+        self.assertEqual(outputs[0], outputs[2])
+
+        local_shell.remove_force_recursive(temp_gen_data)
+
+    def test_resume_and_extend(self):
+        local_shell = exputil.LocalShell()
+        temp_gen_data = "temp_dynamic_state_resume_gen_data"
+        name = "kuiper_630_first_shell"
+        local_shell.make_full_dir(temp_gen_data + "/" + name)
+
+        # Kuiper-630 first shell with a few ground stations
+        write_kuiper_630_first_shell(temp_gen_data + "/" + name, gsl_interfaces_info=(1, 1, 1, 1))
+
+        def generate(duration_s, num_workers=1, use_processes=False, chunk_num_time_steps=None, resume=False,
+                     extend_from_duration_s=None):
+            help_dynamic_state(
+                temp_gen_data,
+                num_workers,
+                name,
+                1000,
+                duration_s,
+                1089686.4181956202,
+                5016591.2330984278,
+                "algorithm_free_one_only_over_isls",
+                False,
+                shortest_path_backend="dijkstra",
+                use_processes=use_processes,
+                chunk_num_time_steps=chunk_num_time_steps,
+                resume=resume,
+                extend_from_duration_s=extend_from_duration_s
+            )
+
+        def read_output(duration_s):
+            output = {}
+            for t in range(0, duration_s * 1000000000, 1000000000):
+                for prefix in ["/fstate_", "/gsl_if_bandwidth_"]:
+                    filename = temp_gen_data + "/" + name + "/dynamic_state_1000ms_for_" + str(duration_s) + "s" \
+                               + prefix + str(t) + ".txt"
+                    output[prefix + str(t)] = local_shell.read_file(filename)
+            return output
+
+        # Reference
+        generate(8)
+        reference = read_output(8)
+        dynamic_state_dir = temp_gen_data + "/" + name + "/dynamic_state_1000ms_for_8s"
+
+        # Interrupted after a few time steps (one with only its forwarding state written)
+        for t in range(5000000000, 8000000000, 1000000000):
+            local_shell.remove(dynamic_state_dir + "/fstate_" + str(t) + ".txt")
+            local_shell.remove(dynamic_state_dir + "/gsl_if_bandwidth_" + str(t) + ".txt")
+        local_shell.remove(dynamic_state_dir + "/gsl_if_bandwidth_4000000000.txt")
+        generate(8, resume=True)
+        self.assertEqual(reference, read_output(8))
+
+        # Interrupted chunks of processes (the earlier time steps are not all there)
+        for t in [2000000000, 6000000000, 7000000000]:
+            local_shell.remove(dynamic_state_dir + "/fstate_" + str(t) + ".txt")
+        generate(8, num_workers=2, use_processes=True, chunk_num_time_steps=3, resume=True)
+        self.assertEqual(reference, read_output(8))
+
+        # Nothing left to do
+        generate(8, resume=True)
+        self.assertEqual(reference, read_output(8))
+        local_shell.remove_force_recursive(dynamic_state_dir)
+
+        # Extending a shorter duration
+        generate(3)
+        generate(8, extend_from_duration_s=3)
+        self.assertEqual(reference, read_output(8))
+
+        # Can only extend from an existing shorter duration
+        for extend_from_duration_s in [8, 9, 5]:
+            try:
+                generate(8, extend_from_duration_s=extend_from_duration_s)
+                self.fail()
+            except ValueError:
+                self.assertTrue(True)
+
+        local_shell.remove_force_recursive(temp_gen_data)
+
+    def test_resume_with_gsl_events(self):
+        local_shell = exputil.LocalShell()
+        temp_gen_data = "temp_dynamic_state_resume_events_gen_data"
+        name = "kuiper_630_first_shell"
+        local_shell.make_full_dir(temp_gen_data + "/" + name)
+
+        # Kuiper-630 first shell with a few ground stations (paired: an interface per ground station)
+        write_kuiper_630_first_shell(
+            temp_gen_data + "/" + name, gsl_interfaces_info=(len(TEST_GROUND_STATIONS_BASIC), 1, 1, 1)
+        )
+
+        def generate(resume):
+            help_dynamic_state(
+                temp_gen_data,
+                1,
+                name,
+                1000,
+                4,
+                1089686.4181956202,
+                5016591.2330984278,
+                "algorithm_paired_many_only_over_isls",
+                False,
+                shortest_path_backend="dijkstra",
+                gsl_event_sample_step_ms=1000,
+                resume=resume
+            )
+
+        dynamic_state_dir = temp_gen_data + "/" + name + "/dynamic_state_1000ms_for_4s"
+
+        def read_output():
+            output = {}
+            for t in range(0, 4000000000, 1000000000):
+                for prefix in ["/fstate_", "/gsl_if_bandwidth_"]:
+                    output[prefix + str(t)] = local_shell.read_file(dynamic_state_dir + prefix + str(t) + ".txt")
+            return output
+
+        # Reference
+        generate(False)
+        reference = read_output()
+
+        # Interrupted after the first time step (the previous state is calculated again, within the GSL events)
+        for t in range(1000000000, 4000000000, 1000000000):
+            local_shell.remove(dynamic_state_dir + "/fstate_" + str(t) + ".txt")
+            local_shell.remove(dynamic_state_dir + "/gsl_if_bandwidth_" + str(t) + ".txt")
+        generate(True)
+        self.assertEqual(reference, read_output())
+
+        local_shell.remove_force_recursive(temp_gen_data)
@@ -0,0 +1,257 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import unittest
+import os
+import pickle
+import numpy as np
+import networkx as nx
+import exputil
+from satgen import *
+from satellite_network_fixtures import write_kuiper_630_first_shell
+
+
+class TestEphemerisCache(unittest.TestCase):
+
+    def setUp(self):
+        self.local_shell = exputil.LocalShell()
+        self.temp_dir = "temp_ephemeris_cache_test"
+        self.local_shell.make_full_dir(self.temp_dir)
+
+        # Kuiper-630 first shell with a few ground stations
+        write_kuiper_630_first_shell(self.temp_dir, isl_shift=0)
+        tles = read_tles(self.temp_dir + "/tles.txt")
+        self.epoch = tles["epoch"]
+        self.satellites = tles["satellites"]
+        self.list_isls = read_isls(self.temp_dir + "/isls.txt", len(self.satellites))
+        self.ground_stations = read_ground_stations_extended(self.temp_dir + "/ground_stations.txt")
+
+    def tearDown(self):
+        self.local_shell.remove_force_recursive(self.temp_dir)
+
+    def test_create_and_load(self):
+        time_step_ns = 10 * 1000 * 1000 * 1000
+        duration_ns = 95 * 1000 * 1000 * 1000
+        for engine_name in ["ephem", "sgp4"]:
+            cache = load_or_create_ephemeris_cache(self.temp_dir, time_step_ns, duration_ns, engine_name)
+            self.assertEqual(cache.positions_m.shape, (10, len(self.satellites), 3))
+            self.assertEqual(cache.num_time_steps(), 10)
+            self.assertTrue(cache.has(0))
+            self.assertTrue(cache.has(90 * 1000 * 1000 * 1000))
+            self.assertFalse(cache.has(100 * 1000 * 1000 * 1000))
+            self.assertFalse(cache.has(5 * 1000 * 1000 * 1000))
+            engine = create_position_engine(engine_name, self.epoch, self.satellites)
+            for t in [0, 30 * 1000 * 1000 * 1000, 90 * 1000 * 1000 * 1000]:
+                self.assertTrue(np.array_equal(cache.satellite_positions_m(t), engine.satellite_positions_m(t)))
+            try:
+                cache.satellite_positions_m(5 * 1000 * 1000 * 1000)
+                self.fail()
+            except ValueError:
+                self.assertTrue(True)
+
+            # Loading again re-uses the same file
+            modification_time = os.path.getmtime(cache.filename)
+            cache_again = load_or_create_ephemeris_cache(self.temp_dir, time_step_ns, duration_ns, engine_name)
+            self.assertEqual(cache.filename, cache_again.filename)
+            self.assertEqual(modification_time, os.path.getmtime(cache_again.filename))
+
+        # Different parameters result in a different cache
+        filenames = set()
+        for (time_step_ns, duration_ns, engine_name) in [
+            (10, 100, "ephem"),
+            (20, 100, "ephem"),
+            (10, 200, "ephem"),
+            (10, 100, "sgp4")
+        ]:
+            filenames.add(load_or_create_ephemeris_cache(
+                self.temp_dir, time_step_ns, duration_ns, engine_name
+            ).filename)
+        self.assertEqual(len(filenames), 4)
+        self.assertEqual(len(os.listdir(self.temp_dir + "/ephemeris_cache")), 6)
+
+    def test_cached_position_engine(self):
+        time_step_ns = 1000 * 1000 * 1000
+        duration_ns = 5 * 1000 * 1000 * 1000
+        for engine_name in ["ephem", "sgp4"]:
+            engine = create_position_engine(engine_name, self.epoch, self.satellites)
+            cached_engine = CachedPositionEngine(
+                create_position_engine(engine_name, self.epoch, self.satellites),
+                load_or_create_ephemeris_cache(self.temp_dir, time_step_ns, duration_ns, engine_name)
+            )
+            self.assertEqual(cached_engine.name, engine_name)
+            for t in [0, 3 * 1000 * 1000 * 1000, 7 * 1000 * 1000 * 1000, 123456789]:
+                self.assertTrue(np.array_equal(
+                    cached_engine.satellite_positions_m(t),
+                    engine.satellite_positions_m(t)
+                ))
+                self.assertTrue(np.allclose(
+                    cached_engine.ground_station_satellite_distances_m(self.ground_stations, t),
+                    engine.ground_station_satellite_distances_m(self.ground_stations, t),
+                    rtol=0, atol=1e-6
+                ))
+                self.assertEqual(
+                    calculate_ground_station_satellites_in_range(
+                        cached_engine, self.ground_stations, t, 1089686.4181956202, spatial_index=True
+                    ),
+                    calculate_ground_station_satellites_in_range(
+                        engine, self.ground_stations, t, 1089686.4181956202, spatial_index=True
+                    )
+                )
+
+        # Cache of another engine
+        try:
+            CachedPositionEngine(
+                create_position_engine("ephem", self.epoch, self.satellites),
+                load_or_create_ephemeris_cache(self.temp_dir, time_step_ns, duration_ns, "sgp4")
+            )
+            self.fail()
+        except ValueError:
+            self.assertTrue(True)
+
+    def test_ground_station_distance_cache(self):
+        time_step_ns = 1000 * 1000 * 1000
+        duration_ns = 4 * 1000 * 1000 * 1000
+        max_gsl_length_m = 1089686.4181956202
+        engine = create_position_engine("ephem", self.epoch, self.satellites)
+
+        # Only for an engine which is not earth-fixed, and only if the ground stations are given
+        self.assertIsNone(load_or_create_ephemeris_cache(
+            self.temp_dir, time_step_ns, duration_ns, "ephem"
+        ).ground_station_distance_cache)
+        self.assertIsNone(load_or_create_ephemeris_cache(
+            self.temp_dir, time_step_ns, duration_ns, "sgp4",
+            ground_stations=self.ground_stations, max_gsl_length_m=max_gsl_length_m
+        ).ground_station_distance_cache)
+        cache = load_or_create_ephemeris_cache(
+            self.temp_dir, time_step_ns, duration_ns, "ephem",
+            ground_stations=self.ground_stations, max_gsl_length_m=max_gsl_length_m
+        )
+        distance_cache = cache.ground_station_distance_cache
+        self.assertEqual(distance_cache.num_time_steps(), 4)
+        self.assertTrue(distance_cache.has(self.ground_stations, 3 * 1000 * 1000 * 1000))
+        self.assertFalse(distance_cache.has(self.ground_stations, 4 * 1000 * 1000 * 1000))
+        self.assertFalse(distance_cache.has(self.ground_stations[1:], 0))
+
+        # The cached distances are exactly those of the engine
+        for t in range(0, duration_ns, time_step_ns):
+            for gid in range(len(self.ground_stations)):
+                sids, distances_m = distance_cache.satellite_distances_m(gid, t)
+                self.assertTrue(np.all(np.diff(sids) > 0))
+                self.assertTrue(np.array_equal(
+                    distances_m,
+                    engine.ground_station_satellite_candidate_distances_m(
+                        self.ground_stations[gid:(gid + 1)], t, [sids]
+                    )[0]
+                ))
+
+        # The cached engine reads them, and calculates those which are not cached (or not at a cached time)
+        cached_engine = CachedPositionEngine(create_position_engine("ephem", self.epoch, self.satellites), cache)
+        all_sids = [np.arange(len(self.satellites))] * len(self.ground_stations)
+        for t in [0, 2 * 1000 * 1000 * 1000, 123456789]:
+            self.assertEqual(
+                calculate_ground_station_satellites_in_range(cached_engine, self.ground_stations, t, max_gsl_length_m),
+                calculate_ground_station_satellites_in_range(engine, self.ground_stations, t, max_gsl_length_m)
+            )
+            for (a, b) in zip(
+                cached_engine.ground_station_satellite_candidate_distances_m(self.ground_stations, t, all_sids),
+                engine.ground_station_satellite_candidate_distances_m(self.ground_stations, t, all_sids)
+            ):
+                self.assertTrue(np.array_equal(a, b))
+
+        # Re-opened from the files when passed to another process
+        reopened = pickle.loads(pickle.dumps(cache)).ground_station_distance_cache
+        self.assertEqual(reopened.filename_prefix, distance_cache.filename_prefix)
+        self.assertEqual(reopened.ground_stations_key, distance_cache.ground_stations_key)
+
+        # Loading again re-uses the same files, other ground stations result in a different cache
+        modification_time = os.path.getmtime(distance_cache.filename_prefix + "_distances.npy")
+        self.assertEqual(distance_cache.filename_prefix, load_or_create_ephemeris_cache(
+            self.temp_dir, time_step_ns, duration_ns, "ephem",
+            ground_stations=self.ground_stations, max_gsl_length_m=max_gsl_length_m
+        ).ground_station_distance_cache.filename_prefix)
+        self.assertEqual(modification_time, os.path.getmtime(distance_cache.filename_prefix + "_distances.npy"))
+        self.assertNotEqual(distance_cache.filename_prefix, load_or_create_ephemeris_cache(
+            self.temp_dir, time_step_ns, duration_ns, "ephem",
+            ground_stations=self.ground_stations[1:], max_gsl_length_m=max_gsl_length_m
+        ).ground_station_distance_cache.filename_prefix)
+
+    def test_post_analysis_with_cache(self):
+        time_step_ns = 1000 * 1000 * 1000
+        duration_ns = 3 * 1000 * 1000 * 1000
+        position_engine = analysis_position_engine(
+            self.temp_dir, self.epoch, self.satellites, time_step_ns, duration_ns, True,
+            ground_stations=self.ground_stations, max_gsl_length_m=1089686.4181956202
+        )
+        self.assertIsNone(analysis_position_engine(
+            self.temp_dir, self.epoch, self.satellites, time_step_ns, duration_ns, False
+        ))
+        for t in range(0, duration_ns, time_step_ns):
+            reference = construct_graph_with_distances(
+                self.epoch, t, self.satellites, self.ground_stations, self.list_isls, 1089686.4181956202, 5016591.2
+            )
+            cached = construct_graph_with_distances(
+                self.epoch, t, self.satellites, self.ground_stations, self.list_isls, 1089686.4181956202, 5016591.2,
+                position_engine=position_engine
+            )
+            self.assertEqual(list(reference.edges), list(cached.edges))
+
+            # Networkx graph, the array-based graph for the internal use has the same edges
+            self.assertIsInstance(reference, nx.Graph)
+            sat_net_graph = construct_sat_net_graph_with_distances(
+                self.epoch, t, self.satellites, self.ground_stations, self.list_isls, 1089686.4181956202, 5016591.2
+            )
+            self.assertEqual(sorted(reference.edges), sorted(sat_net_graph.edges))
+            for (a, b) in reference.edges:
+                self.assertEqual(reference.get_edge_data(a, b)["weight"], sat_net_graph.edge_weight(a, b))
+            for (a, b) in reference.edges:
+                self.assertAlmostEqual(
+                    reference.get_edge_data(a, b)["weight"], cached.get_edge_data(a, b)["weight"], delta=1e-5
+                )
+
+            # Path of a GS, over a few ISLs, to a GS
+            gs_node_id = len(self.satellites)
+            sid = list(reference.neighbors(gs_node_id))[0]
+            path = [gs_node_id, sid]
+            for (a, b) in self.list_isls:
+                if a == sid:
+                    path += [b, a]
+                    break
+            path.append(gs_node_id)
+            self.assertAlmostEqual(
+                compute_path_length_without_graph(
+                    path, self.epoch, t, self.satellites, self.ground_stations, self.list_isls,
+                    1089686.4181956202, 5016591.2
+                ),
+                compute_path_length_without_graph(
+                    path, self.epoch, t, self.satellites, self.ground_stations, self.list_isls,
+                    1089686.4181956202, 5016591.2, position_engine
+                ),
+                delta=1e-5
+            )
+            self.assertAlmostEqual(
+                compute_path_length_with_graph(path, reference),
+                compute_path_length_without_graph(
+                    path, self.epoch, t, self.satellites, self.ground_stations, self.list_isls,
+                    1089686.4181956202, 5016591.2, position_engine
+                ),
+                delta=1e-5
+            )
@@ -0,0 +1,105 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import unittest
+import numpy as np
+from satgen.dynamic_state.forwarding_state import ForwardingState
+from satgen.post_analysis.graph_tools import get_path
+
+
+class TestForwardingState(unittest.TestCase):
+
+    def test_dict_compatible(self):
+
+        # 3 satellites (0, 1, 2) and 2 ground stations (3, 4)
+        fstate = ForwardingState(3, 2)
+        self.assertEqual(fstate.next_hops.shape, (5, 2, 3))
+        self.assertEqual(fstate.next_hops.dtype, np.int32)
+        self.assertEqual(len(fstate), 5 * 2 - 2)
+        self.assertEqual(
+            list(fstate.keys()),
+            [(0, 3), (0, 4), (1, 3), (1, 4), (2, 3), (2, 4), (3, 4), (4, 3)]
+        )
+        for value in fstate.values():
+            self.assertEqual(value, (-1, -1, -1))
+
+        # Set and get
+        fstate[(0, 3)] = (1, 0, 1)
+        fstate[(1, 3)] = (3, 2, 0)
+        fstate[(4, 3)] = (0, 0, 3)
+        self.assertEqual(fstate[(0, 3)], (1, 0, 1))
+        self.assertEqual(fstate[(1, 3)], (3, 2, 0))
+        self.assertEqual(fstate[(4, 3)], (0, 0, 3))
+        self.assertEqual(fstate[(2, 4)], (-1, -1, -1))
+        self.assertEqual(fstate.next_hop(0, 3), 1)
+        self.assertEqual(fstate.get((0, 3)), (1, 0, 1))
+        self.assertEqual(fstate.get((3, 3), "none"), "none")
+        self.assertTrue((0, 3) in fstate)
+        self.assertFalse((3, 3) in fstate)
+        self.assertFalse((0, 1) in fstate)
+        self.assertFalse((5, 3) in fstate)
+        self.assertEqual(dict(fstate.items())[(1, 3)], (3, 2, 0))
+
+        # Only to ground stations, and not to itself
+        for key in [(0, 1), (3, 3), (5, 3), (-1, 3), (0, 5)]:
+            try:
+                fstate[key]
+                self.fail()
+            except KeyError:
+                self.assertTrue(True)
+
+        # Equal to itself, its copy and the same dictionary
+        other = ForwardingState(3, 2, fstate.next_hops.copy())
+        self.assertEqual(fstate, other)
+        self.assertEqual(fstate, dict(fstate.items()))
+        other[(2, 4)] = (1, 1, 1)
+        self.assertNotEqual(fstate, other)
+        self.assertNotEqual(fstate, dict(other.items()))
+
+    def test_invalid_shape(self):
+        try:
+            ForwardingState(3, 2, np.zeros((5, 3, 3)))
+            self.fail()
+        except ValueError:
+            self.assertTrue(True)
+
+    def test_get_path(self):
+
+        #  0 -- 1 -- 2
+        #  |         |
+        #  3         4
+        fstate = ForwardingState(3, 2)
+        fstate[(0, 4)] = (1, 0, 0)
+        fstate[(1, 4)] = (2, 1, 0)
+        fstate[(2, 4)] = (4, 1, 0)
+        fstate[(3, 4)] = (0, 0, 2)
+        fstate[(0, 3)] = (3, 1, 0)
+        fstate[(1, 3)] = (0, 0, 0)
+        fstate[(2, 3)] = (1, 0, 1)
+        self.assertEqual(get_path(3, 4, fstate), [3, 0, 1, 2, 4])
+        self.assertEqual(get_path(2, 3, fstate), [2, 1, 0, 3])
+        self.assertIsNone(get_path(4, 3, fstate))
+
+        # Same as the dictionary of next hops read from the fstate files
+        next_hops = dict(map(lambda item: (item[0], item[1][0]), fstate.items()))
+        self.assertEqual(get_path(3, 4, next_hops), [3, 0, 1, 2, 4])
+        self.assertIsNone(get_path(4, 3, next_hops))
@@ -22,7 +22,9 @@
 
 import exputil
 import unittest
+import networkx as nx
 from satgen.dynamic_state.fstate_calculation import *
+from satgen.dynamic_state import next_hop_selection
 
 
 def calculate_fstate_for(
@@ -30,6 +32,21 @@ def calculate_fstate_for(
         num_ground_stations,
         edges
 ):
+
+    # Every shortest path backend must yield exactly the same forwarding state
+    result = calculate_fstate_for_backend(num_satellites, num_ground_stations, edges, "floyd_warshall")
+    for shortest_path_backend in ["dijkstra", "johnson", "restricted_dijkstra", "reverse_dijkstra"]:
+        if calculate_fstate_for_backend(num_satellites, num_ground_stations, edges, shortest_path_backend) != result:
+            raise AssertionError("Shortest path backend " + shortest_path_backend + " has a different result")
+    return result
+
+
+def calculate_fstate_for_backend(
+        num_satellites,
+        num_ground_stations,
+        edges,
+        shortest_path_backend
+):
     local_shell = exputil.LocalShell()
 
     sat_net_graph_only_isls = nx.Graph()
@@ -102,7 +119,8 @@ def calculate_fstate_for(
             ground_station_satellites_in_range,
             sat_neighbor_to_if,
             prev_fstate,
-            enable_verbose_logs
+            enable_verbose_logs,
+            shortest_path_backend
         ),
         "only_gs_relays": calculate_fstate_shortest_path_with_gs_relaying(
             output_dynamic_state_dir,
@@ -114,7 +132,8 @@ def calculate_fstate_for(
             gid_to_sat_gsl_if_idx,
             sat_neighbor_to_if,
             prev_fstate,
-            enable_verbose_logs
+            enable_verbose_logs,
+            shortest_path_backend
         ),
         "combined": calculate_fstate_shortest_path_with_gs_relaying(
             output_dynamic_state_dir,
@@ -126,7 +145,8 @@ def calculate_fstate_for(
             gid_to_sat_gsl_if_idx,
             sat_neighbor_to_if,
             prev_fstate,
-            enable_verbose_logs
+            enable_verbose_logs,
+            shortest_path_backend
         )
     }
 
@@ -521,3 +541,32 @@ class TestFstateCalculation(unittest.TestCase):
         self.assertEqual(output["combined"][(3, 4)], (1, 0, 1))
         self.assertEqual(output["combined"][(4, 2)], (1, 0, 2))
         self.assertEqual(output["combined"][(4, 3)], (1, 0, 2))
+
+    def test_next_hop_selection_in_blocks(self):
+
+        #
+        #  3 -- 0 -- 1 -- 4
+        #       |  /
+        #       2 -- 5
+        #
+
+        num_satellites = 3
+        num_ground_stations = 3
+
+        edges = [
+            (0, 1, 100),
+            (1, 2, 100),
+            (0, 2, 150),
+            (0, 3, 100),
+            (1, 4, 100),
+            (2, 5, 100),
+        ]
+
+        # The same forwarding state if every block is only a single row
+        output = calculate_fstate_for(num_satellites, num_ground_stations, edges)
+        max_block_entries = next_hop_selection.MAX_BLOCK_ENTRIES
+        try:
+            next_hop_selection.MAX_BLOCK_ENTRIES = 1
+            self.assertEqual(calculate_fstate_for(num_satellites, num_ground_stations, edges), output)
+        finally:
+            next_hop_selection.MAX_BLOCK_ENTRIES = max_block_entries
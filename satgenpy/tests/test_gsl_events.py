@@ -0,0 +1,125 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import unittest
+import numpy as np
+import exputil
+from satgen import *
+from satellite_network_fixtures import write_kuiper_630_first_shell, KUIPER_630_MAX_GSL_LENGTH_M
+
+
+class TestGslEvents(unittest.TestCase):
+
+    def setUp(self):
+        self.local_shell = exputil.LocalShell()
+        self.temp_dir = "temp_gsl_events_test"
+        self.local_shell.make_full_dir(self.temp_dir)
+
+        # Kuiper-630 first shell with a few ground stations
+        write_kuiper_630_first_shell(self.temp_dir)
+        tles = read_tles(self.temp_dir + "/tles.txt")
+        self.epoch = tles["epoch"]
+        self.satellites = tles["satellites"]
+        self.ground_stations = read_ground_stations_extended(self.temp_dir + "/ground_stations.txt")
+        self.max_gsl_length_m = KUIPER_630_MAX_GSL_LENGTH_M
+
+    def tearDown(self):
+        self.local_shell.remove_force_recursive(self.temp_dir)
+
+    def test_events_match_sampling(self):
+        for position_engine_name in ["ephem", "sgp4"]:
+            position_engine = create_position_engine(position_engine_name, self.epoch, self.satellites)
+            gsl_events = calculate_gsl_events(
+                position_engine, self.ground_stations, len(self.satellites), self.max_gsl_length_m,
+                0, 60000000000, 10000000000
+            )
+            self.assertTrue(gsl_events.num_events() > 0)
+            self.assertTrue(np.all(np.diff(gsl_events.times_ns) >= 0))
+
+            # Each event is at exactly the first nanosecond at which the satellite is (not) in range
+            for i in range(gsl_events.num_events()):
+                gid = int(gsl_events.gids[i])
+                sid = int(gsl_events.sids[i])
+                distances_m = position_engine.ground_station_satellite_candidate_distances_m(
+                    [self.ground_stations[gid]],
+                    int(gsl_events.times_ns[i]) - 1,
+                    [np.array([sid])]
+                )[0][0], position_engine.ground_station_satellite_candidate_distances_m(
+                    [self.ground_stations[gid]],
+                    int(gsl_events.times_ns[i]),
+                    [np.array([sid])]
+                )[0][0]
+                self.assertEqual(distances_m[0] <= self.max_gsl_length_m, not gsl_events.entering[i])
+                self.assertEqual(distances_m[1] <= self.max_gsl_length_m, bool(gsl_events.entering[i]))
+                self.assertTrue((int(gsl_events.times_ns[i]), sid, bool(gsl_events.entering[i]))
+                                in gsl_events.events_of_ground_station(gid))
+
+            # Same in-range satellites as calculating all distances, also at arbitrary times (and going back)
+            for time_since_epoch_ns in [0, 100000000, 7300000000, 25000000000, 3000000000, 59999999999, 60000000000]:
+                self.assertEqual(
+                    calculate_ground_station_satellites_in_range_from_events(
+                        position_engine, self.ground_stations, time_since_epoch_ns, self.max_gsl_length_m, gsl_events
+                    ),
+                    calculate_ground_station_satellites_in_range(
+                        position_engine, self.ground_stations, time_since_epoch_ns, self.max_gsl_length_m
+                    )
+                )
+
+            # Only within the interval
+            try:
+                gsl_events.in_range_at(60000000001)
+                self.fail()
+            except ValueError:
+                self.assertTrue(True)
+
+    def test_passes_within_sample_step(self):
+        position_engine = create_position_engine("sgp4", self.epoch, self.satellites)
+        fine_gsl_events = calculate_gsl_events(
+            position_engine, self.ground_stations, len(self.satellites), self.max_gsl_length_m,
+            0, 600000000000, 10000000000
+        )
+
+        # With a sample step of 5 minutes, some satellites come into range and leave again within one step
+        coarse_gsl_events = calculate_gsl_events(
+            position_engine, self.ground_stations, len(self.satellites), self.max_gsl_length_m,
+            0, 600000000000, 300000000000
+        )
+        num_passes_within_step = 0
+        for gid in range(len(self.ground_stations)):
+            events = coarse_gsl_events.events_of_ground_station(gid)
+            self.assertEqual(events, fine_gsl_events.events_of_ground_station(gid))
+            for (time_ns, sid, entering) in events:
+                if entering and (time_ns // 300000000000, sid, False) in map(
+                    lambda e: (e[0] // 300000000000, e[1], e[2]), events
+                ):
+                    num_passes_within_step += 1
+        self.assertTrue(num_passes_within_step > 0)
+
+    def test_invalid_sample_step(self):
+        position_engine = create_position_engine("sgp4", self.epoch, self.satellites)
+        try:
+            calculate_gsl_events(
+                position_engine, self.ground_stations, len(self.satellites), self.max_gsl_length_m, 0, 1000, 0
+            )
+            self.fail()
+        except ValueError:
+            self.assertTrue(True)
@@ -0,0 +1,185 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import exputil
+import sys
+import unittest
+from unittest import mock
+from satgen import *
+from satellite_network_fixtures import write_kuiper_630_first_shell, TEST_GROUND_STATIONS_BASIC
+
+# Data files of the RTT and path analysis
+ANALYSIS_DATA_FILENAMES = {
+    "rtt": [
+        "ecdf_pairs_min_rtt_ns.txt",
+        "ecdf_pairs_max_rtt_ns.txt",
+        "ecdf_pairs_max_minus_min_rtt_ns.txt",
+        "ecdf_pairs_max_rtt_to_min_rtt_slowdown.txt",
+        "ecdf_pairs_max_rtt_to_geodesic_slowdown.txt",
+        "top_10_largest_rtt_delta.txt",
+        "top_10_most_unreachable.txt",
+    ],
+    "path": [
+        "ecdf_pairs_max_minus_min_hop_count.txt",
+        "ecdf_pairs_max_hop_count_to_min_hop_count.txt",
+        "ecdf_pairs_num_path_changes.txt",
+        "ecdf_time_step_num_path_changes.txt",
+        "ecdf_time_step_num_fstate_updates.txt",
+        "top_10_largest_hop_count_delta.txt",
+        "top_10_most_path_changes.txt",
+    ]
+}
+
+
+class TestInlineAnalysis(unittest.TestCase):
+
+    def test_same_as_analyze_rtt_and_path(self):
+        local_shell = exputil.LocalShell()
+        temp_gen_data = "temp_inline_analysis_gen_data"
+        temp_analysis_data = "temp_inline_analysis_data"
+        name = "kuiper_630_first_shell"
+        satellite_network_dir = temp_gen_data + "/" + name
+        local_shell.make_full_dir(satellite_network_dir)
+
+        # Kuiper-630 first shell with a few ground stations
+        write_kuiper_630_first_shell(
+            satellite_network_dir,
+            ground_stations_basic=TEST_GROUND_STATIONS_BASIC + ["3,Lima,-12.0464,-77.0428,0"],
+            gsl_interfaces_info=(1, 1, 1, 1),
+            description=True
+        )
+
+        def generate(analysis_output_data_dir, num_workers=1, use_processes=False, chunk_num_time_steps=None,
+                     resume=False, adaptive_coarse_step_ms=None):
+            help_dynamic_state(
+                temp_gen_data,
+                num_workers,
+                name,
+                1000,
+                20,
+                1089686.4181956202,
+                5016591.2330984278,
+                "algorithm_free_one_only_over_isls",
+                False,
+                use_ephemeris_cache=True,
+                shortest_path_backend="dijkstra",
+                adaptive_coarse_step_ms=adaptive_coarse_step_ms,
+                use_processes=use_processes,
+                chunk_num_time_steps=chunk_num_time_steps,
+                resume=resume,
+                analysis_output_data_dir=analysis_output_data_dir
+            )
+
+        def read_analysis(output_data_dir):
+            analysis = {}
+            for a in ANALYSIS_DATA_FILENAMES:
+                for filename in ANALYSIS_DATA_FILENAMES[a]:
+                    analysis[a + "/" + filename] = local_shell.read_file(
+                        output_data_dir + "/" + name + "/1000ms_for_20s/" + a + "/data/" + filename
+                    )
+            return analysis
+
+        # Inline, by a single worker
+        generate(temp_analysis_data + "/inline")
+        inline_analysis = read_analysis(temp_analysis_data + "/inline")
+
+        # Afterwards from the files, using the same satellite positions (the routes of the top pairs are not
+        # printed, as plotting them requires gnuplot and they are not part of the compared data)
+        with mock.patch.object(sys.modules["satgen.post_analysis.analyze_rtt"], "print_routes_and_rtt"), \
+                mock.patch.object(sys.modules["satgen.post_analysis.analyze_path"], "print_routes_and_rtt"):
+            analyze_rtt(
+                temp_analysis_data + "/files", satellite_network_dir, 1000, 20, "", use_ephemeris_cache=True
+            )
+            analyze_path(temp_analysis_data + "/files", satellite_network_dir, 1000, 20, "")
+        self.assertEqual(inline_analysis, read_analysis(temp_analysis_data + "/files"))
+
+        # Split over multiple workers (threads or processes), of which the analysis is merged
+        for num_workers, use_processes, chunk_num_time_steps in [(3, False, None), (2, True, 3)]:
+            generate(
+                temp_analysis_data + "/merged",
+                num_workers=num_workers,
+                use_processes=use_processes,
+                chunk_num_time_steps=chunk_num_time_steps
+            )
+            self.assertEqual(inline_analysis, read_analysis(temp_analysis_data + "/merged"))
+
+        # Every time step must be calculated
+        for kwargs in [{"resume": True}, {"adaptive_coarse_step_ms": 4000}]:
+            try:
+                generate(temp_analysis_data + "/invalid", **kwargs)
+                self.fail()
+            except ValueError:
+                self.assertTrue(True)
+
+        # Clean up
+        local_shell.remove_force_recursive(temp_gen_data)
+        local_shell.remove_force_recursive(temp_analysis_data)
+
+    def test_merge(self):
+        graph = ConstellationGraph(2, 2, [(0, 1)])
+        isl_graph = graph.isl_graph([1000.0])
+        gsl_graph = graph.gsl_graph([[(500.0, 0)], [(700.0, 1)]])
+
+        # Ground station 2 -> 0 -> 1 -> ground station 3 (and back), unreachable at the third time step
+        fstate = ForwardingState(2, 2)
+        fstate[(0, 3)] = (1, 0, 0)
+        fstate[(1, 3)] = (3, 1, 0)
+        fstate[(2, 3)] = (0, 0, 1)
+        fstate[(1, 2)] = (0, 0, 0)
+        fstate[(0, 2)] = (2, 1, 0)
+        fstate[(3, 2)] = (1, 0, 1)
+        unreachable = ForwardingState(2, 2)
+        fstates = [fstate, fstate, unreachable, fstate]
+
+        # All at once, or in two parts
+        whole = InlineAnalysis(2, 2)
+        for i in range(4):
+            whole.add_time_step(i * 1000, fstates[i], fstates[i - 1] if i > 0 else None, isl_graph, gsl_graph)
+        for split in range(0, 5):
+            first = InlineAnalysis(2, 2)
+            second = InlineAnalysis(2, 2)
+            for i in range(4):
+                (first if i < split else second).add_time_step(
+                    i * 1000, fstates[i], fstates[i - 1] if i > 0 else None, isl_graph, gsl_graph
+                )
+            first.merge(second)
+            self.assertEqual(first.times_since_epoch_ns, [0, 1000, 2000, 3000])
+            self.assertEqual(first.rtt_list_per_pair, whole.rtt_list_per_pair)
+            self.assertEqual(first.path_list_per_pair, whole.path_list_per_pair)
+            self.assertEqual(first.unreachable_per_pair.tolist(), whole.unreachable_per_pair.tolist())
+            self.assertEqual(first.time_step_num_path_changes, whole.time_step_num_path_changes)
+            self.assertEqual(first.time_step_num_fstate_updates, whole.time_step_num_fstate_updates)
+
+        # RTT is twice the path length (500 + 1000 + 700 m)
+        self.assertEqual(whole.rtt_list_per_pair[0][1], [2 * 2200 * 1000000000.0 / 299792458.0] * 3)
+        self.assertEqual(whole.unreachable_per_pair[(0, 1)], 1)
+        self.assertEqual(whole.path_list_per_pair[0][1], [[2, 0, 1, 3], [], [2, 0, 1, 3]])
+        self.assertEqual(whole.time_step_num_path_changes, [1, 0, 1, 1])
+        self.assertEqual(whole.time_step_num_fstate_updates, [6, 0, 6, 6])
+
+        # Only later time steps can be appended
+        try:
+            whole.merge(whole)
+            self.fail()
+        except ValueError:
+            self.assertTrue(True)
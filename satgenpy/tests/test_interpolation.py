@@ -0,0 +1,114 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import unittest
+import numpy as np
+import exputil
+from satgen import *
+from satellite_network_fixtures import write_kuiper_630_first_shell
+
+
+class TestInterpolation(unittest.TestCase):
+
+    def setUp(self):
+        self.local_shell = exputil.LocalShell()
+        self.temp_dir = "temp_interpolation_test"
+        self.local_shell.make_full_dir(self.temp_dir)
+        # Kuiper-630 first shell with a few ground stations
+        write_kuiper_630_first_shell(self.temp_dir, isl_shift=0)
+        tles = read_tles(self.temp_dir + "/tles.txt")
+        self.epoch = tles["epoch"]
+        self.satellites = tles["satellites"]
+        self.list_isls = read_isls(self.temp_dir + "/isls.txt", len(self.satellites))
+        self.ground_stations = read_ground_stations_extended(self.temp_dir + "/ground_stations.txt")
+        self.times_since_epoch_ns = [0, 1, 999999, 1234567891, 9999999999, 10000000000, 25000001000]
+
+    def tearDown(self):
+        self.local_shell.remove_force_recursive(self.temp_dir)
+
+    def test_sgp4(self):
+        engine = create_position_engine("sgp4", self.epoch, self.satellites)
+        interpolated = ChebyshevPositionEngine(
+            create_position_engine("sgp4", self.epoch, self.satellites), max_error_m=0.001
+        )
+        self.assertEqual(interpolated.name, "sgp4")
+        self.assertTrue(interpolated.earth_fixed)
+        comparison = compare_position_engines(
+            interpolated, engine, self.times_since_epoch_ns, self.list_isls, self.ground_stations, 1089686.4181956202
+        )
+        self.assertTrue(comparison["max_position_error_m"] < 0.001)
+        self.assertTrue(comparison["max_gsl_length_error_m"] < 0.001)
+        self.assertEqual(comparison["num_gsl_in_range_mismatches"], 0)
+        self.assertTrue(interpolated.max_validation_error_m < 0.001)
+
+    def test_ephem(self):
+        engine = create_position_engine("ephem", self.epoch, self.satellites)
+        interpolated = ChebyshevPositionEngine(create_position_engine("ephem", self.epoch, self.satellites))
+        self.assertFalse(interpolated.earth_fixed)
+        comparison = compare_position_engines(
+            interpolated, engine, self.times_since_epoch_ns, self.list_isls, self.ground_stations, 1089686.4181956202
+        )
+        self.assertTrue(comparison["max_isl_length_error_m"] < 20.0)
+        self.assertTrue(comparison["max_gsl_length_error_m"] < 10.0)
+        self.assertTrue(interpolated.max_validation_error_m < 10.0)
+
+        # Candidate distances are from the same interpolated distances
+        distances_m = interpolated.ground_station_satellite_distances_m(self.ground_stations, 1234567891)
+        candidate_distances_m = interpolated.ground_station_satellite_candidate_distances_m(
+            self.ground_stations, 1234567891, [np.array([0, 5]), np.array([], dtype=int), np.array([7])]
+        )
+        self.assertEqual(list(candidate_distances_m[0]), [distances_m[0][0], distances_m[0][5]])
+        self.assertEqual(len(candidate_distances_m[1]), 0)
+        self.assertEqual(list(candidate_distances_m[2]), [distances_m[2][7]])
+
+        # Below the smoothness of ephem, the maximum error cannot be reached
+        try:
+            ChebyshevPositionEngine(engine, max_error_m=0.001).satellite_positions_m(0)
+            self.fail()
+        except ValueError:
+            self.assertTrue(True)
+
+    def test_window_split(self):
+        engine = create_position_engine("sgp4", self.epoch, self.satellites)
+        interpolated = ChebyshevPositionEngine(
+            create_position_engine("sgp4", self.epoch, self.satellites),
+            window_ns=200000000000, degree=3, max_error_m=1.0
+        )
+        for t in [0, 3000000000, 150000000000, 199999999999]:
+            self.assertTrue(np.max(np.linalg.norm(
+                interpolated.satellite_positions_m(t) - engine.satellite_positions_m(t), axis=1
+            )) < 1.0)
+        starts, fits = interpolated.position_windows[0]
+        self.assertTrue(len(fits) > 1)
+        self.assertEqual(starts[0], 0)
+        self.assertEqual(fits[-1][1], 200000000000)
+        for i in range(1, len(fits)):
+            self.assertEqual(fits[i - 1][1], fits[i][0])
+
+    def test_invalid(self):
+        engine = create_position_engine("sgp4", self.epoch, self.satellites)
+        for kwargs in [{"window_ns": 0}, {"degree": 0}, {"max_error_m": 0.0}, {"min_window_ns": -1}]:
+            try:
+                ChebyshevPositionEngine(engine, **kwargs)
+                self.fail()
+            except ValueError:
+                self.assertTrue(True)
@@ -0,0 +1,129 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os
+import unittest
+import exputil
+from satgen import *
+from satellite_network_fixtures import write_kuiper_630_first_shell
+from satgen.dynamic_state.phase_timing import PHASES, COUNTS, TIMINGS_COLUMNS
+
+
+class TestPhaseTiming(unittest.TestCase):
+
+    def test_phase_timer(self):
+        phase_timer = PhaseTimer()
+
+        # Outside of a time step nothing is recorded
+        phase_timer.lap("propagation")
+        phase_timer.count("fstate_delta_lines", 3)
+        self.assertEqual(phase_timer.records, [])
+
+        for t in [2000, 1000]:
+            phase_timer.start_time_step(t)
+            phase_timer.lap("propagation")
+            phase_timer.count("fstate_delta_lines", 3)
+            phase_timer.count("fstate_delta_lines", 4)
+            phase_timer.lap("shortest_paths")
+            record = phase_timer.end_time_step()
+            self.assertEqual(record["time_since_epoch_ns"], t)
+            self.assertEqual(record["fstate_delta_lines"], 7)
+            self.assertEqual(record["gsl_if_bandwidth_delta_lines"], 0)
+            self.assertEqual(record["isl_graph_s"], 0.0)
+            self.assertAlmostEqual(record["total_s"], sum(record[p + "_s"] for p in PHASES))
+        self.assertEqual(len(phase_timer.records), 2)
+
+        # Written in order of time, and read back
+        local_shell = exputil.LocalShell()
+        write_timings("temp_timings.csv", phase_timer.records)
+        records = read_timings("temp_timings.csv")
+        self.assertEqual(list(map(lambda r: r["time_since_epoch_ns"], records)), [1000, 2000])
+        for record in records:
+            self.assertEqual(sorted(record.keys()), sorted(TIMINGS_COLUMNS))
+            self.assertEqual(record["fstate_delta_lines"], 7)
+
+        # Not a timings file
+        local_shell.write_file("temp_timings.csv", "a,b,c\n1,2,3\n")
+        try:
+            read_timings("temp_timings.csv")
+            self.fail()
+        except ValueError:
+            self.assertTrue(True)
+        local_shell.remove("temp_timings.csv")
+
+    def test_record_timings(self):
+        local_shell = exputil.LocalShell()
+        temp_gen_data = "temp_phase_timing_gen_data"
+        name = "kuiper_630_first_shell"
+        local_shell.make_full_dir(temp_gen_data + "/" + name)
+
+        # Kuiper-630 first shell with a few ground stations
+        write_kuiper_630_first_shell(temp_gen_data + "/" + name, gsl_interfaces_info=(1, 1, 1, 1))
+
+        # Both with the regular and the adaptive time steps (of which not all time steps are calculated)
+        dynamic_state_dir = temp_gen_data + "/" + name + "/dynamic_state_1000ms_for_6s"
+        for adaptive_coarse_step_ms in [None, 3000]:
+            help_dynamic_state(
+                temp_gen_data,
+                2,
+                name,
+                1000,
+                6,
+                1089686.4181956202,
+                5016591.2330984278,
+                "algorithm_free_one_only_over_isls",
+                False,
+                shortest_path_backend="dijkstra",
+                adaptive_coarse_step_ms=adaptive_coarse_step_ms,
+                use_processes=True,
+                record_timings=True,
+                progress_rate=True
+            )
+            records = read_timings(dynamic_state_dir + "_timings.csv")
+            times_ns = list(map(lambda r: r["time_since_epoch_ns"], records))
+            self.assertEqual(times_ns, sorted(set(times_ns)))
+            if adaptive_coarse_step_ms is None:
+                self.assertEqual(times_ns, list(range(0, 6000000000, 1000000000)))
+            for record in records:
+                self.assertTrue(record["total_s"] > 0)
+                self.assertTrue(record["propagation_s"] > 0)
+                self.assertTrue(record["shortest_paths_s"] > 0)
+
+                # (in adaptive mode, the delta is against the time step which was calculated before it)
+                if adaptive_coarse_step_ms is not None:
+                    continue
+                for count in COUNTS:
+                    filename_prefix = "/fstate_" if count == "fstate_delta_lines" else "/gsl_if_bandwidth_"
+                    lines = local_shell.read_file(
+                        dynamic_state_dir + filename_prefix + str(record["time_since_epoch_ns"]) + ".txt"
+                    ).splitlines()
+                    self.assertEqual(record[count], len(lines))
+            local_shell.remove_force_recursive(dynamic_state_dir)
+
+        # The chunk timings are merged
+        self.assertEqual(
+            sorted(os.listdir(temp_gen_data + "/" + name)),
+            sorted(["tles.txt", "isls.txt", "ground_stations.basic.txt", "ground_stations.txt",
+                    "gsl_interfaces_info.txt", "dynamic_state_1000ms_for_6s_timings.csv"])
+        )
+
+        local_shell.remove_force_recursive(temp_gen_data)
@@ -0,0 +1,254 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import unittest
+import math
+import numpy as np
+import exputil
+from astropy import units as u
+from satgen import *
+from satellite_network_fixtures import write_kuiper_630_first_shell, TEST_GROUND_STATIONS_BASIC
+
+
+class TestPositions(unittest.TestCase):
+
+    def setUp(self):
+        self.local_shell = exputil.LocalShell()
+        self.temp_dir = "temp_positions_test"
+        self.local_shell.make_full_dir(self.temp_dir)
+
+        # Kuiper-630 first shell with a few ground stations (including one far south)
+        write_kuiper_630_first_shell(
+            self.temp_dir,
+            ground_stations_basic=TEST_GROUND_STATIONS_BASIC + ["3,Punta-Arenas,-53.1638,-70.9171,0"],
+            isl_shift=0
+        )
+        tles = read_tles(self.temp_dir + "/tles.txt")
+        self.epoch = tles["epoch"]
+        self.satellites = tles["satellites"]
+        self.list_isls = read_isls(self.temp_dir + "/isls.txt", len(self.satellites))
+        self.ground_stations = read_ground_stations_extended(self.temp_dir + "/ground_stations.txt")
+
+    def tearDown(self):
+        self.local_shell.remove_force_recursive(self.temp_dir)
+
+    def reference_isl_lengths_m(self, time_since_epoch_ns):
+        return np.array(list(map(
+            lambda isl: distance_m_between_satellites(
+                self.satellites[isl[0]],
+                self.satellites[isl[1]],
+                str(self.epoch),
+                str(self.epoch + time_since_epoch_ns * u.ns)
+            ),
+            self.list_isls
+        )))
+
+    def test_ephem_engine_matches_reference(self):
+        engine = create_position_engine("ephem", self.epoch, self.satellites)
+        self.assertFalse(engine.earth_fixed)
+        for time_since_epoch_ns in [0, 1000000, 60000000000, 1000000000000]:
+            positions_m = engine.satellite_positions_m(time_since_epoch_ns)
+            self.assertEqual(positions_m.shape, (len(self.satellites), 3))
+            isl_lengths_m = distance_m_isls(positions_m, self.list_isls)
+            self.assertEqual(len(isl_lengths_m), len(self.list_isls))
+            reference_m = self.reference_isl_lengths_m(time_since_epoch_ns)
+            for i in range(len(self.list_isls)):
+                self.assertAlmostEqual(isl_lengths_m[i], reference_m[i], delta=0.00001)
+
+    def test_sgp4_engine_close_to_reference(self):
+        engine = create_position_engine("sgp4", self.epoch, self.satellites)
+        self.assertTrue(engine.earth_fixed)
+        for time_since_epoch_ns in [0, 1000000, 60000000000, 1000000000000]:
+            positions_m = engine.satellite_positions_m(time_since_epoch_ns)
+
+            # Altitude of ~630 km above the WGS72 equatorial radius (minus flattening)
+            radii_m = np.linalg.norm(positions_m, axis=1)
+            self.assertTrue(np.all(radii_m > 6378135.0 + 600000 - 25000))
+            self.assertTrue(np.all(radii_m < 6378135.0 + 660000))
+
+            # ISL lengths differ in the order of meters from the pyephem reference
+            isl_lengths_m = distance_m_isls(positions_m, self.list_isls)
+            reference_m = self.reference_isl_lengths_m(time_since_epoch_ns)
+            self.assertLess(np.max(np.abs(isl_lengths_m - reference_m)), 50.0)
+
+    def reference_ground_station_distances_m(self, time_since_epoch_ns):
+        distances_m = np.zeros((len(self.ground_stations), len(self.satellites)))
+        for gid in range(len(self.ground_stations)):
+            for sid in range(len(self.satellites)):
+                distances_m[gid, sid] = distance_m_ground_station_to_satellite(
+                    self.ground_stations[gid],
+                    self.satellites[sid],
+                    str(self.epoch),
+                    str(self.epoch + time_since_epoch_ns * u.ns)
+                )
+        return distances_m
+
+    def test_ground_station_distances(self):
+        ephem_engine = create_position_engine("ephem", self.epoch, self.satellites)
+        sgp4_engine = create_position_engine("sgp4", self.epoch, self.satellites)
+        for time_since_epoch_ns in [0, 60000000000, 1000000000000]:
+            reference_m = self.reference_ground_station_distances_m(time_since_epoch_ns)
+
+            # Reference engine yields exactly the pair-wise values
+            distances_m = ephem_engine.ground_station_satellite_distances_m(self.ground_stations, time_since_epoch_ns)
+            self.assertEqual(distances_m.shape, (len(self.ground_stations), len(self.satellites)))
+            self.assertTrue(np.array_equal(distances_m, reference_m))
+
+            # Vectorized engine is in the order of tens of meters off
+            distances_m = sgp4_engine.ground_station_satellite_distances_m(self.ground_stations, time_since_epoch_ns)
+            self.assertEqual(distances_m.shape, (len(self.ground_stations), len(self.satellites)))
+            self.assertLess(np.max(np.abs(distances_m - reference_m)), 100.0)
+
+    def test_distance_m_ground_stations_to_satellites(self):
+        distances_m = distance_m_ground_stations_to_satellites(
+            np.array([[0.0, 0.0, 0.0], [3.0, 0.0, 0.0]]),
+            np.array([[3.0, 4.0, 0.0], [0.0, 0.0, 1.0], [3.0, 0.0, 0.0]])
+        )
+        self.assertEqual(distances_m.shape, (2, 3))
+        self.assertEqual(list(distances_m[0]), [5.0, 1.0, 3.0])
+        self.assertEqual(list(distances_m[1]), [4.0, math.sqrt(10.0), 0.0])
+
+    def test_teme_to_ecef(self):
+        # At the J2000 epoch the GMST is ~280.46 degrees, rotation must preserve the norm and z
+        positions_teme = np.array([[7000000.0, 0.0, 10.0], [0.0, 7000000.0, -10.0]])
+        positions_ecef = teme_to_ecef(positions_teme, 2451545.0)
+        gmst = math.radians(280.46061837)
+        self.assertAlmostEqual(positions_ecef[0, 0], 7000000.0 * math.cos(gmst), delta=1.0)
+        self.assertAlmostEqual(positions_ecef[0, 1], -7000000.0 * math.sin(gmst), delta=1.0)
+        self.assertEqual(positions_ecef[0, 2], 10.0)
+        self.assertEqual(positions_ecef[1, 2], -10.0)
+        for i in range(2):
+            self.assertAlmostEqual(np.linalg.norm(positions_ecef[i]), np.linalg.norm(positions_teme[i]), delta=0.001)
+
+    def test_spatial_index(self):
+        engine = create_position_engine("sgp4", self.epoch, self.satellites)
+        positions_m = engine.satellite_positions_m(0)
+        index = SatelliteSpatialIndex(positions_m)
+        ground_station_positions = ground_station_positions_m(self.ground_stations)
+        candidates = index.satellites_within(ground_station_positions, 1500000.0)
+        distances_m = distance_m_ground_stations_to_satellites(ground_station_positions, positions_m)
+        self.assertEqual(len(candidates), len(self.ground_stations))
+        for gid in range(len(self.ground_stations)):
+            self.assertTrue(np.array_equal(candidates[gid], np.nonzero(distances_m[gid] <= 1500000.0)[0]))
+
+    def test_ground_station_satellites_in_range(self):
+        max_gsl_length_m = 1089686.4181956202
+        for engine_name in ["ephem", "sgp4"]:
+            engine = create_position_engine(engine_name, self.epoch, self.satellites)
+            for time_since_epoch_ns in [0, 1000000, 60000000000, 1000000000000]:
+                brute_force = calculate_ground_station_satellites_in_range(
+                    engine, self.ground_stations, time_since_epoch_ns, max_gsl_length_m, spatial_index=False
+                )
+                indexed = calculate_ground_station_satellites_in_range(
+                    engine, self.ground_stations, time_since_epoch_ns, max_gsl_length_m, spatial_index=True
+                )
+                self.assertEqual(len(brute_force), len(self.ground_stations))
+                self.assertEqual(brute_force, indexed)
+                for gid in range(len(self.ground_stations)):
+                    self.assertTrue(len(brute_force[gid]) > 0)
+                    for (distance_m, sid) in brute_force[gid]:
+                        self.assertTrue(distance_m <= max_gsl_length_m)
+
+        # Same as the per-pair reference calculation
+        engine = create_position_engine("ephem", self.epoch, self.satellites)
+        indexed = calculate_ground_station_satellites_in_range(
+            engine, self.ground_stations, 60000000000, max_gsl_length_m, spatial_index=True
+        )
+        for gid in range(len(self.ground_stations)):
+            reference = []
+            for sid in range(len(self.satellites)):
+                distance_m = distance_m_ground_station_to_satellite(
+                    self.ground_stations[gid],
+                    self.satellites[sid],
+                    str(self.epoch),
+                    str(self.epoch + 60000000000 * u.ns)
+                )
+                if distance_m <= max_gsl_length_m:
+                    reference.append((distance_m, sid))
+            self.assertEqual(reference, indexed[gid])
+
+    def test_kepler_engine(self):
+        engine = create_position_engine("kepler", self.epoch, self.satellites)
+        self.assertTrue(engine.earth_fixed)
+        times_since_epoch_ns = [0, 1000000, 60000000000, 1000000000000, 20000000000000]
+        for time_since_epoch_ns in times_since_epoch_ns:
+            positions_m = engine.satellite_positions_m(time_since_epoch_ns)
+            self.assertEqual(positions_m.shape, (len(self.satellites), 3))
+
+        # The errors are in the order of kilometers
+        comparison = compare_position_engines(
+            engine,
+            create_position_engine("sgp4", self.epoch, self.satellites),
+            times_since_epoch_ns,
+            self.list_isls,
+            self.ground_stations,
+            1089686.4181956202
+        )
+        self.assertEqual(comparison["num_time_steps"], 5)
+        self.assertTrue(comparison["max_position_error_m"] < 20000)
+        self.assertTrue(comparison["max_isl_length_error_m"] < 5000)
+        self.assertTrue(comparison["mean_isl_length_error_m"] < 1000)
+        self.assertTrue(comparison["max_gsl_length_error_m"] < 20000)
+        comparison = compare_position_engines(
+            engine,
+            create_position_engine("ephem", self.epoch, self.satellites),
+            times_since_epoch_ns,
+            self.list_isls,
+            self.ground_stations,
+            1089686.4181956202
+        )
+        self.assertIsNone(comparison["max_position_error_m"])
+        self.assertTrue(comparison["max_isl_length_error_m"] < 5000)
+
+        # Only circular orbits
+        generate_tles_from_scratch_manual(
+            self.temp_dir + "/tles_eccentric.txt", "Eccentric", 2, 2, True, 51.9, 0.01, 0.0, 14.80
+        )
+        tles = read_tles(self.temp_dir + "/tles_eccentric.txt")
+        try:
+            create_position_engine("kepler", tles["epoch"], tles["satellites"])
+            self.fail()
+        except ValueError:
+            self.assertTrue(True)
+
+    def test_compare_position_engines_identical(self):
+        comparison = compare_position_engines(
+            create_position_engine("sgp4", self.epoch, self.satellites),
+            create_position_engine("sgp4", self.epoch, self.satellites),
+            [0, 60000000000],
+            self.list_isls,
+            self.ground_stations,
+            1089686.4181956202
+        )
+        self.assertEqual(comparison["position_engine"], "sgp4")
+        self.assertEqual(comparison["max_isl_length_error_m"], 0.0)
+        self.assertEqual(comparison["mean_isl_length_error_m"], 0.0)
+        self.assertEqual(comparison["max_gsl_length_error_m"], 0.0)
+        self.assertEqual(comparison["num_gsl_in_range_mismatches"], 0)
+        self.assertEqual(comparison["max_position_error_m"], 0.0)
+
+    def test_unknown_engine(self):
+        try:
+            create_position_engine("does_not_exist", self.epoch, self.satellites)
+            self.fail()
+        except ValueError:
+            self.assertTrue(True)
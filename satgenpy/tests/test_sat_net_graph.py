@@ -0,0 +1,116 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import unittest
+import random
+import networkx as nx
+import numpy as np
+from satgen.dynamic_state.sat_net_graph import SatNetGraph, graph_from_edges, graph_to_csr
+from satgen.dynamic_state.constellation_graph import ConstellationGraph
+from satgen.dynamic_state.next_hop_selection import padded_neighbors, padded_neighbor_interfaces
+
+
+class TestSatNetGraph(unittest.TestCase):
+
+    def test_edges(self):
+        # 0 - 1 - 2, 0 - 2, node 3 without edges
+        graph = graph_from_edges(4, [0, 1, 2], [1, 2, 0], [10.0, 20.0, 30.0])
+        self.assertEqual(graph.number_of_nodes(), 4)
+        self.assertEqual(graph.neighbors(0), [1, 2])
+        self.assertEqual(graph.neighbors(2), [1, 0])
+        self.assertEqual(graph.neighbors(3), [])
+        self.assertEqual(graph.degree(1), 2)
+        self.assertEqual(graph.degree(3), 0)
+        self.assertEqual(list(graph.edges), [(0, 1), (0, 2), (1, 2)])
+
+        # Edges are undirected
+        self.assertTrue(graph.has_edge(0, 2))
+        self.assertTrue(graph.has_edge(2, 0))
+        self.assertFalse(graph.has_edge(0, 3))
+        self.assertFalse(graph.has_edge(1, 1))
+        self.assertEqual(graph.edge_weight(2, 1), 20.0)
+        self.assertEqual(graph.edge_weight(0, 2), 30.0)
+        self.assertEqual(graph.get_edge_data(1, 0), {"weight": 10.0})
+        self.assertIsNone(graph.get_edge_data(0, 3))
+        self.assertEqual(graph.get_edge_data(0, 3, default={}), {})
+        try:
+            graph.edge_weight(0, 3)
+            self.fail()
+        except ValueError:
+            self.assertTrue(True)
+
+    def test_networkx_round_trip(self):
+        random.seed(789)
+        for _ in range(10):
+            num_nodes = random.randint(2, 30)
+            nx_graph = nx.Graph()
+            for i in range(num_nodes):
+                nx_graph.add_node(i)
+            for a in range(num_nodes):
+                for b in range(a + 1, num_nodes):
+                    if random.random() < 0.3:
+                        nx_graph.add_edge(a, b, weight=random.random() * 1000.0)
+
+            # Same neighbors (in the same order), weights and edges as the networkx graph
+            graph = SatNetGraph.from_networkx(nx_graph)
+            self.assertEqual(graph.number_of_nodes(), nx_graph.number_of_nodes())
+            self.assertEqual(list(graph.edges), list(nx_graph.edges))
+            for node_id in range(num_nodes):
+                self.assertEqual(graph.neighbors(node_id), list(nx_graph.neighbors(node_id)))
+                for neighbor_id in graph.neighbors(node_id):
+                    self.assertEqual(graph.get_edge_data(node_id, neighbor_id),
+                                     nx_graph.get_edge_data(node_id, neighbor_id))
+            self.assertTrue(np.array_equal(graph_to_csr(graph).toarray(), graph_to_csr(nx_graph).toarray()))
+
+            # And back
+            round_trip = graph.to_networkx()
+            self.assertEqual(sorted(round_trip.nodes), sorted(nx_graph.nodes))
+            self.assertEqual(sorted(map(lambda e: tuple(sorted(e)), round_trip.edges)),
+                             sorted(map(lambda e: tuple(sorted(e)), nx_graph.edges)))
+            for (a, b) in nx_graph.edges:
+                self.assertEqual(round_trip.get_edge_data(a, b), nx_graph.get_edge_data(a, b))
+
+    def test_interfaces(self):
+        # Triangle of satellites 0, 1, 2 and a fourth satellite 3 connected to 0
+        list_isls = [(0, 1), (1, 2), (2, 0), (0, 3)]
+        constellation_graph = ConstellationGraph(4, 2, list_isls)
+        graph = constellation_graph.isl_graph([1.0, 2.0, 3.0, 4.0])
+        neighbors, _ = padded_neighbors(graph, 4)
+
+        # Interfaces from the graph are the same as the ones from the interface mapping
+        own_ifs, neighbor_ifs = padded_neighbor_interfaces(graph, neighbors, 4, constellation_graph.sat_neighbor_to_if)
+        own_ifs_ref, neighbor_ifs_ref = padded_neighbor_interfaces(
+            graph.to_networkx(), neighbors, 4, constellation_graph.sat_neighbor_to_if
+        )
+        self.assertTrue(np.array_equal(own_ifs, own_ifs_ref))
+        self.assertTrue(np.array_equal(neighbor_ifs, neighbor_ifs_ref))
+        self.assertEqual(own_ifs[0].tolist(), [0, 1, 2])
+        self.assertEqual(neighbor_ifs[0].tolist(), [0, 1, 0])
+
+        # GSLs have no ISL interfaces
+        gsl_graph = constellation_graph.gsl_graph([[(5.0, 0)], [(6.0, 0), (7.0, 3)]])
+        neighbors, _ = padded_neighbors(gsl_graph, 6)
+        own_ifs, neighbor_ifs = padded_neighbor_interfaces(
+            gsl_graph, neighbors, 4, constellation_graph.sat_neighbor_to_if
+        )
+        self.assertTrue(np.all(own_ifs == -1))
+        self.assertTrue(np.all(neighbor_ifs == -1))
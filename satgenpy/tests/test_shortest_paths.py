@@ -0,0 +1,127 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import unittest
+import random
+import math
+import networkx as nx
+import numpy as np
+from satgen.dynamic_state.shortest_paths import *
+
+
+class TestShortestPaths(unittest.TestCase):
+
+    def assert_same_as_floyd_warshall(self, graph):
+        reference = nx.floyd_warshall_numpy(graph)
+        for shortest_path_backend in ["floyd_warshall", "dijkstra", "johnson"]:
+            distances = calculate_shortest_path_distances(graph, shortest_path_backend)
+            self.assertEqual(distances.shape, reference.shape)
+            self.assertTrue(np.array_equal(distances, reference))  # Bit-identical (incl. infinity)
+
+    def test_plus_grid(self):
+        random.seed(123456789)
+        num_orbs = 20
+        num_sats_per_orb = 15
+        graph = nx.Graph()
+        for i in range(num_orbs * num_sats_per_orb):
+            graph.add_node(i)
+        for orb in range(num_orbs):
+            for n in range(num_sats_per_orb):
+                sat = orb * num_sats_per_orb + n
+                next_sat_same_orbit = orb * num_sats_per_orb + ((n + 1) % num_sats_per_orb)
+                next_sat_adjacent_orbit = ((orb + 1) % num_orbs) * num_sats_per_orb + n
+                graph.add_edge(sat, next_sat_same_orbit, weight=1000000.0 + random.random() * 10000.0)
+                graph.add_edge(sat, next_sat_adjacent_orbit, weight=1000000.0 + random.random() * 1000000.0)
+        self.assert_same_as_floyd_warshall(graph)
+
+    def test_random_geometric(self):
+        random.seed(987654321)
+        for num_nodes in [1, 2, 10, 100]:
+            positions = list(map(lambda i: (random.random(), random.random()), range(num_nodes)))
+            graph = nx.Graph()
+            for i in range(num_nodes):
+                graph.add_node(i)
+            for i in range(num_nodes):
+                for j in range(i + 1, num_nodes):
+                    distance = math.sqrt(
+                        (positions[i][0] - positions[j][0]) ** 2 + (positions[i][1] - positions[j][1]) ** 2
+                    )
+                    if distance < 0.25:
+                        graph.add_edge(i, j, weight=distance * 1000000.0)
+            self.assert_same_as_floyd_warshall(graph)
+
+    def test_disconnected(self):
+        graph = nx.Graph()
+        for i in range(6):
+            graph.add_node(i)
+        graph.add_edge(0, 1, weight=1.5)
+        graph.add_edge(1, 2, weight=2.25)
+        graph.add_edge(3, 4, weight=0.1)
+        self.assert_same_as_floyd_warshall(graph)
+        distances = calculate_shortest_path_distances(graph, "dijkstra")
+        self.assertEqual(distances[0][2], 3.75)
+        self.assertTrue(math.isinf(distances[0][3]))
+        self.assertTrue(math.isinf(distances[5][0]))
+        self.assertEqual(distances[5][5], 0.0)
+
+    def test_restricted_dijkstra(self):
+        random.seed(192837465)
+        graph = nx.Graph()
+        for i in range(50):
+            graph.add_node(i)
+        for i in range(50):
+            for j in range(i + 1, 50):
+                if random.random() < 0.1:
+                    graph.add_edge(i, j, weight=1000.0 + random.random() * 1000.0)
+        reference = nx.floyd_warshall_numpy(graph)
+        destinations = [3, 17, 17, 42]
+        distances = calculate_shortest_path_distances(graph, "restricted_dijkstra", destinations)
+        self.assertEqual(distances.shape, reference.shape)
+        for i in range(50):
+            for j in range(50):
+                if j in destinations:
+                    if math.isinf(reference[i][j]):
+                        self.assertTrue(math.isinf(distances[i][j]))
+                    else:
+                        self.assertAlmostEqual(distances[i][j], reference[i][j], places=6)
+                else:
+                    self.assertTrue(math.isnan(distances[i][j]))
+
+        # No destinations at all
+        distances = calculate_shortest_path_distances(graph, "restricted_dijkstra", [])
+        self.assertTrue(np.all(np.isnan(distances)))
+
+        # Destinations are required
+        try:
+            calculate_shortest_path_distances(graph, "restricted_dijkstra")
+            self.fail()
+        except ValueError:
+            self.assertTrue(True)
+
+    def test_unknown_backend(self):
+        graph = nx.Graph()
+        graph.add_edge(0, 1, weight=1.0)
+        try:
+            calculate_shortest_path_distances(graph, "bellman_ford")
+            self.fail()
+        except ValueError:
+            self.assertTrue(True)
@@ -0,0 +1,87 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import exputil
+import unittest
+from satgen.dynamic_state.forwarding_state import ForwardingState
+from satgen.dynamic_state.state_writer import write_fstate_delta, write_gsl_if_bandwidth_delta
+
+
+class TestStateWriter(unittest.TestCase):
+
+    def test_fstate_delta(self):
+        local_shell = exputil.LocalShell()
+        local_shell.make_full_dir("temp_state_writer_test")
+
+        # 2 satellites (0, 1) and 2 ground stations (2, 3)
+        fstate = ForwardingState(2, 2)
+        fstate[(0, 2)] = (2, 1, 0)
+        fstate[(1, 3)] = (3, 1, 0)
+        fstate[(2, 3)] = (0, 0, 1)
+
+        # Without previous state, everything except a ground station to itself
+        write_fstate_delta("temp_state_writer_test/fstate_0.txt", fstate, None)
+        with open("temp_state_writer_test/fstate_0.txt", "r") as f_in:
+            self.assertEqual(f_in.read(), (
+                "0,2,2,1,0\n"
+                "0,3,-1,-1,-1\n"
+                "1,2,-1,-1,-1\n"
+                "1,3,3,1,0\n"
+                "2,3,0,0,1\n"
+                "3,2,-1,-1,-1\n"
+            ))
+
+        # Only the changes, both with the previous state as forwarding state or as dictionary
+        next_fstate = ForwardingState(2, 2, fstate.next_hops.copy())
+        next_fstate[(0, 3)] = (1, 0, 0)
+        next_fstate[(2, 3)] = (1, 0, 1)
+        for prev_fstate in [fstate, dict(fstate.items())]:
+            write_fstate_delta("temp_state_writer_test/fstate_1.txt", next_fstate, prev_fstate)
+            with open("temp_state_writer_test/fstate_1.txt", "r") as f_in:
+                self.assertEqual(f_in.read(), "0,3,1,0,0\n2,3,1,0,1\n")
+
+        # Nothing changed
+        write_fstate_delta("temp_state_writer_test/fstate_2.txt", next_fstate, next_fstate)
+        with open("temp_state_writer_test/fstate_2.txt", "r") as f_in:
+            self.assertEqual(f_in.read(), "")
+
+        local_shell.remove_force_recursive("temp_state_writer_test")
+
+    def test_gsl_if_bandwidth_delta(self):
+        local_shell = exputil.LocalShell()
+        local_shell.make_full_dir("temp_state_writer_test")
+
+        write_gsl_if_bandwidth_delta("temp_state_writer_test/gsl_if_bandwidth_0.txt", [0, 0, 1], [2, 3, 0],
+                                     [1.0, 0.5, 0.25])
+        with open("temp_state_writer_test/gsl_if_bandwidth_0.txt", "r") as f_in:
+            self.assertEqual(f_in.read(), "0,2,1.000000\n0,3,0.500000\n1,0,0.250000\n")
+
+        write_gsl_if_bandwidth_delta("temp_state_writer_test/gsl_if_bandwidth_1.txt", [0, 0, 1], [2, 3, 0],
+                                     [1.0, 1.0, 0.25], [1.0, 0.5, 0.25])
+        with open("temp_state_writer_test/gsl_if_bandwidth_1.txt", "r") as f_in:
+            self.assertEqual(f_in.read(), "0,3,1.000000\n")
+
+        write_gsl_if_bandwidth_delta("temp_state_writer_test/gsl_if_bandwidth_2.txt", [], [], [])
+        with open("temp_state_writer_test/gsl_if_bandwidth_2.txt", "r") as f_in:
+            self.assertEqual(f_in.read(), "")
+
+        local_shell.remove_force_recursive("temp_state_writer_test")
@@ -0,0 +1,102 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os
+import unittest
+import exputil
+from satgen import *
+from satellite_network_fixtures import write_kuiper_630_first_shell
+
+
+class TestStreamDynamicState(unittest.TestCase):
+
+    def test_iterate_same_as_files(self):
+        local_shell = exputil.LocalShell()
+        temp_dir = "temp_stream_dynamic_state"
+        local_shell.make_full_dir(temp_dir)
+
+        # Kuiper-630 first shell with a few ground stations
+        write_kuiper_630_first_shell(temp_dir)
+        tles = read_tles(temp_dir + "/tles.txt")
+        satellites = tles["satellites"]
+        ground_stations = read_ground_stations_extended(temp_dir + "/ground_stations.txt")
+        list_isls = read_isls(temp_dir + "/isls.txt", len(satellites))
+
+        times_ns = list(range(0, 4000000000, 1000000000))
+        for dynamic_state_algorithm, num_gsl_interfaces_per_satellite in [
+            ("algorithm_free_one_only_over_isls", 1),
+            ("algorithm_paired_many_only_over_isls", 3)
+        ]:
+            generate_simple_gsl_interfaces_info(
+                temp_dir + "/gsl_interfaces_info.txt", len(satellites), 3, num_gsl_interfaces_per_satellite, 1, 1, 1
+            )
+            list_gsl_interfaces_info = read_gsl_interfaces_info(
+                temp_dir + "/gsl_interfaces_info.txt", len(satellites), len(ground_stations)
+            )
+            settings = [
+                tles["epoch"], 4000000000, 1000000000, 0, satellites, ground_stations, list_isls,
+                list_gsl_interfaces_info, 1089686.4181956202, 5016591.2330984278, dynamic_state_algorithm
+            ]
+
+            # Files
+            local_shell.make_full_dir(temp_dir + "/files")
+            generate_dynamic_state(temp_dir + "/files", *settings, False, shortest_path_backend="dijkstra")
+
+            # In memory (nothing is written)
+            files_before = sorted(os.listdir(temp_dir))
+            states = list(iterate_dynamic_state(*settings, shortest_path_backend="dijkstra"))
+            self.assertEqual(sorted(os.listdir(temp_dir)), files_before)
+            self.assertEqual(list(map(lambda x: x.time_since_epoch_ns, states)), times_ns)
+            for idx, state in enumerate(states):
+                self.assertEqual(
+                    state.fstate,
+                    replay_fstate(temp_dir + "/files", times_ns[:idx + 1], len(satellites), len(ground_stations))
+                )
+                self.assertEqual(len(state.ground_station_satellites_in_range), len(ground_stations))
+                self.assertEqual(state.satellite_positions_m.shape, (len(satellites), 3))
+                for isl_idx, (a, b) in enumerate(list_isls):
+                    self.assertEqual(state.isl_graph.edge_weight(a, b), state.isl_lengths_m[isl_idx])
+                for gid, in_range in enumerate(state.ground_station_satellites_in_range):
+                    for distance_m, sid in in_range:
+                        self.assertEqual(state.gsl_graph.edge_weight(sid, len(satellites) + gid), distance_m)
+                if dynamic_state_algorithm == "algorithm_paired_many_only_over_isls":
+                    self.assertEqual(len(state.gsl_if_bandwidth_state), len(state.gsl_if_ids))
+                    self.assertEqual(len(state.gsl_if_bandwidth_state), len(state.gsl_if_node_ids))
+                else:
+                    self.assertIsNone(state.gsl_if_bandwidth_state)
+
+            # Files as optional sink
+            local_shell.make_full_dir(temp_dir + "/stream_files")
+            for _ in iterate_dynamic_state(
+                    *settings, shortest_path_backend="dijkstra", output_dynamic_state_dir=temp_dir + "/stream_files"
+            ):
+                pass
+            self.assertEqual(sorted(os.listdir(temp_dir + "/files")), sorted(os.listdir(temp_dir + "/stream_files")))
+            for filename in os.listdir(temp_dir + "/files"):
+                self.assertEqual(
+                    local_shell.read_file(temp_dir + "/files/" + filename),
+                    local_shell.read_file(temp_dir + "/stream_files/" + filename)
+                )
+            local_shell.remove_force_recursive(temp_dir + "/files")
+            local_shell.remove_force_recursive(temp_dir + "/stream_files")
+
+        local_shell.remove_force_recursive(temp_dir)
@@ -0,0 +1,57 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import unittest
+import ephem
+from astropy import units as u
+from astropy.time import Time
+from satgen import *
+
+
+class TestTimeGrid(unittest.TestCase):
+
+    def test_same_as_string_conversion(self):
+        epoch = Time("2000-01-01 00:00:00", scale="tdb")
+        time_grid = TimeGrid(epoch)
+        self.assertEqual(time_grid.epoch_ephem_date, float(ephem.Date(str(epoch))))
+        for t in [0, 1000000, 50000000, 1000000000, 60000000000, 123456000000, 86400000000000, 200000000000000]:
+            self.assertEqual(time_grid.ephem_date(t), float(ephem.Date(str(epoch + t * u.ns))))
+            self.assertEqual(time_grid.julian_date(t), time_grid.ephem_date(t) + 2415020.0)
+
+        # Other epoch: equal up to the floating point resolution of ephem dates
+        epoch = Time("2020-05-07 12:34:56.789", scale="tdb")
+        time_grid = TimeGrid(epoch)
+        for t in [0, 1000000, 50000000, 1000000000, 60000000000, 123456000000, 86400000000000]:
+            difference_ns = (time_grid.ephem_date(t) - float(ephem.Date(str(epoch + t * u.ns)))) * 86400.0 * 1e9
+            self.assertTrue(abs(difference_ns) < 1000)
+
+    def test_time_steps(self):
+        epoch = Time("2000-01-01 00:00:00", scale="tdb")
+        time_grid = TimeGrid(epoch, 100 * 1000 * 1000, 1000 * 1000 * 1000)
+        self.assertEqual(list(time_grid.times_since_epoch_ns()), list(range(0, 1000000000, 100000000)))
+
+        # Without time step and duration there are no time steps
+        try:
+            TimeGrid(epoch).times_since_epoch_ns()
+            self.fail()
+        except ValueError:
+            self.assertTrue(True)